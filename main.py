@@ -7,9 +7,10 @@ import logging
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from scripts.create_tables import create_tables
+from src.db import DUCKDB_PROFILES, apply_profile, log_effective_settings, enable_sql_profiling, log_sql_profile_summary
 from src.ingest import run_ingestion
 from src.transform import main as run_transform
-from src.compare import run_comparison, compare_beneficiaries, compare_claims, calc_six_sigma, calc_financial_impact
+from src.compare import run_comparison, compare_beneficiaries, compare_claims, calc_six_sigma, calc_financial_impact, calc_data_quality_rules, calc_transformation_patterns
 from src.report import generate_report_md
 from scripts.validate_ingestion import validate as run_validation
 
@@ -25,6 +26,13 @@ def main():
     parser.add_argument("--compare", action="store_true", help="Run data comparison")
     parser.add_argument("--report", action="store_true", help="Generate report")
     parser.add_argument("--all", action="store_true", help="Run full pipeline (init, ingest, validate, transform, compare, report)")
+    parser.add_argument("--db-profile", choices=sorted(DUCKDB_PROFILES), help="DuckDB tuning profile (overrides DUCKDB_PROFILE in .env)")
+    parser.add_argument("--full-refresh", action="store_true", help="Rebuild every transform step, even those whose inputs are unchanged")
+    parser.add_argument("--from-phase", help="Rebuild this transform phase and every phase after it (e.g. 3, 3a, 5)")
+    parser.add_argument("--only-phase", help="Rebuild only this transform phase (e.g. 5)")
+    parser.add_argument("--resume", action="store_true", help="Skip transform phases that completed in an earlier run and whose outputs are unchanged")
+    parser.add_argument("--profile-sql", action="store_true", help="Save DuckDB's JSON query profile for each transform statement to data/sql_profiles")
+    parser.add_argument("--profile-top", type=int, default=10, help="Number of slowest statements/operators to list after the transform (default: 10)")
     
     args = parser.parse_args()
     
@@ -32,6 +40,15 @@ def main():
         parser.print_help()
         sys.exit(1)
 
+    if args.from_phase and args.only_phase:
+        parser.error("--from-phase and --only-phase cannot be combined")
+    if args.resume and args.full_refresh:
+        parser.error("--resume and --full-refresh cannot be combined")
+
+    if args.db_profile:
+        apply_profile(args.db_profile)
+    log_effective_settings()
+
     if args.all or args.init_db:
         logger.info("Initializing database...")
         create_tables()
@@ -49,7 +66,15 @@ def main():
     # Only run transformation if we've completed ingestion (and optionally validation)
     if args.all or args.ingest or args.validate or args.transform:
         logger.info("Running data transformation (creating views and audit tables)...")
-        run_transform()
+        if args.profile_sql:
+            enable_sql_profiling(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sql_profiles"))
+        run_transform(
+            full_refresh=args.full_refresh,
+            from_phase=args.from_phase,
+            only_phase=args.only_phase,
+            resume=args.resume,
+        )
+        log_sql_profile_summary(args.profile_top)
         logger.info("✅ Transformation complete")
 
     if args.all or args.ingest or args.validate or args.transform or args.compare:
@@ -70,6 +95,16 @@ def main():
         print(f"Financial Impact Beneficiary: {financial_impact_res['financial_impact_beneficiary']}")
         logger.info("✅ Financial Impact complete")
 
+        data_quality_res = calc_data_quality_rules()
+        print("\n--- Data Quality Rules ---")
+        print(f"Rule Violations: {data_quality_res['rule_violations']}")
+        logger.info("✅ Data Quality Rules complete")
+
+        transformation_res = calc_transformation_patterns()
+        print("\n--- Transformation Patterns ---")
+        print(f"Top Pattern per Field: {transformation_res['transformation_patterns']}")
+        logger.info("✅ Transformation Patterns complete")
+
         print("\n--- Beneficiary Comparison ---")
         bene_res = compare_beneficiaries()
         print(f"Records with Discrepancies: {bene_res['bene_records_with_discrepancies']}")
@@ -78,6 +113,7 @@ def main():
         print(f"Mismatched Beneficiary Attributes: {bene_res['mismatch_count']}")
         print(f"Beneficiary Date Differences: {bene_res['date_diff_count']}")
         print(f"Comprehensive Beneficiary Differences: {bene_res['comprehensive_beneficiary_count']}")
+        print(f"Cross-Year Inconsistencies: {bene_res['longitudinal_count']} ({bene_res['longitudinal_pattern_changes']} differ between systems)")
         print(f"Missing Beneficiary Sample: {bene_res['missing_sample']}")
         print(f"Beneficiary Date Changes: {bene_res['bene_date_changes']}")
         print(f"Mismatch Sample: {bene_res['mismatch_sample']}")
@@ -90,7 +126,12 @@ def main():
         print(f"Records with Discrepancies: {claims_res['claim_records_with_discrepancies']}")
         print(f"Missing Claims in New: {claims_res['missing_claims_count']}")
         print(f"Payment Mismatches: {claims_res['payment_mismatch_count']}")
+        print(f"Payment Mismatches (all lines): {claims_res['line_payment_mismatch_count']}")
         print(f"Compreh ensive Orphan Claims: {claims_res['comprehensive_orphan_claims_count']}")
+        print(f"Claims with Changed Death/Coverage Flags: {claims_res['claim_coverage_diff_count']}")
+        print(f"Claims with Diagnosis Codes Reordered Only: {claims_res['diagnosis_reordered_count']}")
+        print(f"Claims with Line Items Reordered Only: {claims_res['line_permuted_count']} ({claims_res['line_phantom_defects']} line field defects)")
+        print(f"Re-linked Orphan Claims: {claims_res['relinked_claims_count']} ({claims_res['unlinked_claims_count']} still unmatched)")
         print(f"Payment Mismatch Sample: {claims_res['payment_mismatch_sample']}")
         print(f"Comprehensive Orphan Claims Sample: {claims_res['comprehensive_orphan_claims_sample']}")
         print(f"Records with Discrepancies Sample: {claims_res['claim_records_with_discrepancies_sample']}")
@@ -98,7 +139,7 @@ def main():
         
         if args.all or args.ingest or args.validate or args.transform or args.compare or args.report:
             logger.info("Generating report...")
-            generate_report_md(bene_res, claims_res, six_sigma_res, financial_impact_res)
+            generate_report_md(bene_res, claims_res, six_sigma_res, financial_impact_res, data_quality_res, transformation_res)
             
             # Also generate HTML version
             logger.info("Generating HTML report...")
@@ -24,6 +24,11 @@ class LookupRace(Base):
     code = Column(String, primary_key=True)
     description = Column(String)
 
+class LookupProcessingIndicator(Base):
+    __tablename__ = 'lookup_processing_indicator'
+    code = Column(String, primary_key=True)
+    description = Column(String)
+
 def create_lookups():
     print("Creating lookup tables...")
     Base.metadata.create_all(bind=engine)
@@ -69,6 +74,29 @@ def create_lookups():
         {"code": "6", "description": "North American Native"}
     ]
     
+    # Line Processing Indicator Codes (CMS carrier claim LINE_PRCSG_IND_CD values)
+    processing_indicators = [
+        {"code": "A", "description": "Allowed"},
+        {"code": "B", "description": "Benefits exhausted"},
+        {"code": "C", "description": "Noncovered care"},
+        {"code": "D", "description": "Denied"},
+        {"code": "I", "description": "Invalid data"},
+        {"code": "L", "description": "CLIA"},
+        {"code": "M", "description": "Multiple submittal - duplicate line item"},
+        {"code": "N", "description": "Medically unnecessary"},
+        {"code": "O", "description": "Other"},
+        {"code": "P", "description": "Physician ownership denial"},
+        {"code": "Q", "description": "MSP cost avoided - voluntary agreement"},
+        {"code": "R", "description": "Reprocessed adjustments based on subsequent reprocessing of claim"},
+        {"code": "S", "description": "Secondary payer"},
+        {"code": "T", "description": "MSP cost avoided - IEQ contractor"},
+        {"code": "U", "description": "MSP cost avoided - HMO rate cell adjustment"},
+        {"code": "V", "description": "MSP cost avoided - litigation settlement"},
+        {"code": "X", "description": "MSP cost avoided - generic"},
+        {"code": "Y", "description": "MSP cost avoided - IRS/SSA/HCFA data match project"},
+        {"code": "Z", "description": "Bundled test, no payment"}
+    ]
+    
     try:
         # Upsert logic or simple insert (ignoring duplicates for now)
         for s in states:
@@ -77,6 +105,8 @@ def create_lookups():
              session.merge(LookupSex(**x))
         for r in races:
              session.merge(LookupRace(**r))
+        for p in processing_indicators:
+             session.merge(LookupProcessingIndicator(**p))
              
         session.commit()
         print("Lookup tables populated successfully.")
@@ -20,7 +20,7 @@ def run_comparison():
         
         # Source Sytem
         actual = conn.execute(text('SELECT SUM(MEDREIMB_CAR) FROM src_beneficiary_summary WHERE YEAR BETWEEN 2008 AND 2010')).scalar()
-        calc = conn.execute(text('SELECT SUM(CALC_MEDREIMB_CAR) FROM view_calc_src_payments')).scalar()
+        calc = conn.execute(text('SELECT SUM(SRC_CALC_MEDREIMB_CAR) FROM audit_payment_reconciliation')).scalar()
         
         print(f'Actual Annual Reimbursement: ${safe_fmt(actual)}')
         print(f'Calculated via Formula:    ${safe_fmt(calc)}')
@@ -32,7 +32,7 @@ def run_comparison():
         
         print('\n--- New System Comparison ---')
         actual_new = conn.execute(text('SELECT SUM(MEDREIMB_CAR) FROM new_beneficiary_summary WHERE YEAR BETWEEN 2008 AND 2010')).scalar()
-        calc_new = conn.execute(text('SELECT SUM(CALC_MEDREIMB_CAR) FROM view_calc_new_payments')).scalar()
+        calc_new = conn.execute(text('SELECT SUM(NEW_CALC_MEDREIMB_CAR) FROM audit_payment_reconciliation')).scalar()
         
         print(f'Actual Annual Reimbursement: ${safe_fmt(actual_new)}')
         print(f'Calculated via Formula:    ${safe_fmt(calc_new)}')
@@ -0,0 +1,357 @@
+"""
+Generates the repetitive per-column SQL of the audit tables from the column lists and
+types declared in src/models.py: defect flags, money deltas and their aggregates.
+
+How each column is compared is chosen by its semantics ('string', 'integer', 'money'
+or 'chronic_flag'). The SQL for each semantics lives in COMPARISON_SEMANTICS, so a
+different formulation can be tried across every column by editing one template.
+"""
+from sqlalchemy import Float, Integer, String
+
+from src.models import SrcBeneficiarySummary, SrcCarrierClaims
+from src.ingest import CHRONIC_CONDITION_FLAGS
+
+# SQL templates per comparison semantics. In 'flag', s and n are the src_ and new_ rows;
+# 'value' cleans a raw column before deltas or hashes are taken; 'delta' is the signed difference
+# between the cleaned new and src values; 'empty' is true when a value carries nothing
+# (unused claim lines hold 'nan' strings and 0 amounts).
+COMPARISON_SEMANTICS = {
+    'string': {
+        'flag': "CASE WHEN COALESCE(s.{col}, '') <> COALESCE(n.{col}, '') THEN 1 ELSE 0 END",
+        'value': "COALESCE({col}, '')",
+        'empty': "COALESCE({col}, '') IN ('', 'nan')",
+    },
+    'integer': {
+        'flag': "CASE WHEN COALESCE(s.{col}, 0) <> COALESCE(n.{col}, 0) THEN 1 ELSE 0 END",
+        'value': "COALESCE({col}, 0)",
+        'empty': "COALESCE({col}, 0) = 0",
+    },
+    'money': {
+        'flag': "CASE WHEN COALESCE(s.{col}, 0) <> COALESCE(n.{col}, 0) THEN 1 ELSE 0 END",
+        'value': "CASE WHEN isnan({col}) THEN 0 ELSE coalesce({col}, 0) END",
+        'delta': "{new} - {src}",
+        'empty': "(isnan({col}) OR COALESCE({col}, 0) = 0)",
+    },
+    # Diagnosis codes compared as the claim's set of codes (DGNS_SET of the src_ and new_
+    # rows): a position is defective only when its code was added or removed, not moved.
+    'diagnosis_set': {
+        'flag': (
+            "CASE WHEN COALESCE(s.{col}, '') <> COALESCE(n.{col}, '') "
+            "AND NOT ((COALESCE(s.{col}, '') IN ('', 'nan') OR COALESCE(list_contains(n.DGNS_SET, s.{col}), FALSE)) "
+            "AND (COALESCE(n.{col}, '') IN ('', 'nan') OR COALESCE(list_contains(s.DGNS_SET, n.{col}), FALSE))) "
+            "THEN 1 ELSE 0 END"
+        ),
+        'empty': "COALESCE({col}, '') IN ('', 'nan')",
+    },
+    # A flag is defective when its 2 bit lane of SP_CHRONIC_FLAGS differs between systems;
+    # lanes holding an unexpected value (3) fall back to comparing the original strings.
+    'chronic_flag': {
+        'flag': (
+            "CASE WHEN ((xor(COALESCE(s.SP_CHRONIC_FLAGS, 0), COALESCE(n.SP_CHRONIC_FLAGS, 0)) >> {shift}) & 3) <> 0 THEN 1 "
+            "WHEN ((COALESCE(s.SP_CHRONIC_FLAGS, 0) >> {shift}) & 3) = 3 AND s.{col} <> n.{col} THEN 1 "
+            "ELSE 0 END"
+        ),
+    },
+}
+
+# Column type in src/models.py -> comparison semantics
+SEMANTICS_BY_TYPE = {
+    String: 'string',
+    Integer: 'integer',
+    Float: 'money',
+}
+
+# Columns whose semantics differ from what their type implies
+COLUMN_SEMANTICS = {col: 'chronic_flag' for col in CHRONIC_CONDITION_FLAGS}
+
+# Key and surrogate columns are joined on, not audited
+CARRIER_IDENTITY_COLUMNS = ['DESYNPUF_ID', 'CLM_ID', 'CLM_FROM_DT', 'CLM_THRU_DT']
+CARRIER_KEY_COLUMNS = CARRIER_IDENTITY_COLUMNS + ['DESYNPUF_KEY', 'CLAIM_KEY']
+BENEFICIARY_KEY_COLUMNS = ['DESYNPUF_ID', 'YEAR', 'DESYNPUF_KEY', 'SP_CHRONIC_FLAGS']
+
+def audit_columns(model, key_columns):
+    """(column name, semantics) for every audited column of model, in declaration order."""
+    columns = []
+    for column in model.__table__.columns:
+        if column.name in key_columns:
+            continue
+        semantics = COLUMN_SEMANTICS.get(column.name) or SEMANTICS_BY_TYPE.get(type(column.type))
+        if semantics is None:
+            raise ValueError(
+                f"No comparison semantics for {model.__tablename__}.{column.name} "
+                f"({type(column.type).__name__}); add it to COLUMN_SEMANTICS"
+            )
+        columns.append((column.name, semantics))
+    return columns
+
+CARRIER_AUDIT_COLUMNS = audit_columns(SrcCarrierClaims, CARRIER_KEY_COLUMNS)
+BENEFICIARY_AUDIT_COLUMNS = audit_columns(SrcBeneficiarySummary, BENEFICIARY_KEY_COLUMNS)
+
+# Defect flags packed into the DEFECT_MASK_n words of the audit tables, in bit order.
+# Bit i lives in DEFECT_MASK_{i // 64} at position i % 64, so new model columns must be
+# appended after the existing ones to keep the stored masks readable.
+CARRIER_DEFECT_COLUMNS = [col for col, _ in CARRIER_AUDIT_COLUMNS]
+BENEFICIARY_DEFECT_COLUMNS = [col for col, _ in BENEFICIARY_AUDIT_COLUMNS]
+
+# Claim diagnosis codes; DIAGNOSIS_COMPARISON=set compares them as one unordered set
+CARRIER_DIAGNOSIS_COLUMNS = [col for col in CARRIER_DEFECT_COLUMNS if col.startswith('ICD9_DGNS_CD_')]
+DIAGNOSIS_COMPARISON_MODES = ('position', 'set')
+
+def carrier_flag_semantics(diagnosis_comparison='position'):
+    """CARRIER_AUDIT_COLUMNS, with the diagnosis codes given set semantics in 'set' mode."""
+    if diagnosis_comparison not in DIAGNOSIS_COMPARISON_MODES:
+        raise ValueError(
+            f"DIAGNOSIS_COMPARISON must be one of {', '.join(DIAGNOSIS_COMPARISON_MODES)}, "
+            f"got {diagnosis_comparison!r}"
+        )
+    if diagnosis_comparison == 'position':
+        return CARRIER_AUDIT_COLUMNS
+    return [
+        (col, 'diagnosis_set' if col in CARRIER_DIAGNOSIS_COLUMNS else semantics)
+        for col, semantics in CARRIER_AUDIT_COLUMNS
+    ]
+
+def diagnosis_set(columns=CARRIER_DIAGNOSIS_COLUMNS):
+    """Sorted, de-duplicated LIST of the non-empty codes of the columns: the claim's code set."""
+    empty = COMPARISON_SEMANTICS['string']['empty'].format(col='c')
+    return f"list_sort(list_distinct(list_filter([{', '.join(columns)}], c -> NOT ({empty}))))"
+
+def diagnosis_change(columns=CARRIER_DIAGNOSIS_COLUMNS):
+    """
+    Per-claim classification of the diagnosis codes between the s and n rows: UNCHANGED,
+    REORDERED_ONLY (same code set, different positions) or CODES_CHANGED; NULL when the
+    claim is on one side only.
+    """
+    positions = {
+        alias: "[" + ", ".join(f"COALESCE({alias}.{col}, '')" for col in columns) + "]"
+        for alias in ('s', 'n')
+    }
+    return (
+        f"CASE WHEN s.CLAIM_KEY IS NULL OR n.CLAIM_KEY IS NULL THEN NULL "
+        f"WHEN {positions['s']} = {positions['n']} THEN 'UNCHANGED' "
+        f"WHEN s.DGNS_SET = n.DGNS_SET THEN 'REORDERED_ONLY' "
+        f"ELSE 'CODES_CHANGED' END"
+    )
+
+# The beneficiary financial audit keys each row on the demographics as well as the bene-year
+BENEFICIARY_DEMOGRAPHIC_COLUMNS = ['BENE_BIRTH_DT', 'BENE_DEATH_DT', 'BENE_SEX_IDENT_CD', 'BENE_RACE_CD']
+
+# 0/1 claim date columns kept unpacked next to the masks; they are not counted in DEFECT_COUNT
+CARRIER_DATE_DIFF_COLUMNS = ['CLM_FROM_DT_DIFF', 'CLM_THRU_DT_DIFF']
+
+CARRIER_MONEY_COLUMNS = [col for col, semantics in CARRIER_AUDIT_COLUMNS if semantics == 'money']
+
+def line_families(columns, prefix=''):
+    """
+    Fields repeated on each claim line: family name -> line count (X_1..X_n). prefix
+    keeps only the columns that start with it, e.g. 'LINE_'.
+    """
+    families = {}
+    for col in columns:
+        family, _, line = col.rpartition('_')
+        if family and col.startswith(prefix) and line.isdigit():
+            families[family] = max(families.get(family, 0), int(line))
+    return families
+
+# e.g. LINE_NCH_PMT_AMT for LINE_NCH_PMT_AMT_1..LINE_NCH_PMT_AMT_13
+CARRIER_LINE_AMOUNT_FAMILIES = line_families(CARRIER_MONEY_COLUMNS, prefix='LINE_')
+CARRIER_LINE_COUNT = max(CARRIER_LINE_AMOUNT_FAMILIES.values())
+
+# The fields of one claim line item, repeated as <family>_1..<family>_13 on the claim row
+CARRIER_LINE_ITEM_FAMILIES = [
+    'HCPCS_CD', 'PRF_PHYSN_NPI', 'TAX_NUM', 'LINE_PRCSG_IND_CD', 'LINE_ICD9_DGNS_CD',
+] + list(CARRIER_LINE_AMOUNT_FAMILIES)
+CARRIER_LINE_ITEM_COLUMNS = [
+    f"{family}_{line}" for line in range(1, CARRIER_LINE_COUNT + 1) for family in CARRIER_LINE_ITEM_FAMILIES
+]
+BENEFICIARY_MONEY_COLUMNS = [col for col, semantics in BENEFICIARY_AUDIT_COLUMNS if semantics == 'money']
+
+def select_list(expressions, indent=16):
+    """Joins SELECT list items in the leading-comma style used throughout transform.py."""
+    return f"\n{' ' * indent}, ".join(expressions)
+
+def defect_flag_case_columns(columns, indent=16):
+    """One 0/1 defect flag per audited column, comparing the src_ (s) and new_ (n) rows."""
+    flags = []
+    for col, semantics in columns:
+        shift = 2 * CHRONIC_CONDITION_FLAGS.index(col) if semantics == 'chronic_flag' else None
+        flag = COMPARISON_SEMANTICS[semantics]['flag'].format(col=col, shift=shift)
+        flags.append(f"{flag} AS {col}")
+    return select_list(flags, indent)
+
+def money_value_columns(columns, alias='{col}', indent=16):
+    """Money columns with NaN and NULL read as 0, for the src_ and new_ CTEs."""
+    return select_list(
+        [f"{COMPARISON_SEMANTICS['money']['value'].format(col=col)} AS {alias.format(col=col)}" for col in columns],
+        indent,
+    )
+
+def money_delta_columns(columns, src='s.{col}', new='n.{col}', indent=16):
+    """src_, new_, signed delta_ and abs_delta_ columns for each money column."""
+    expressions = []
+    for col in columns:
+        src_value = src.format(col=col)
+        new_value = new.format(col=col)
+        delta = COMPARISON_SEMANTICS['money']['delta'].format(src=src_value, new=new_value)
+        expressions += [
+            f"{src_value} as src_{col}",
+            f"{new_value} as new_{col}",
+            f"{delta} as delta_{col}",
+            f"abs({delta}) as abs_delta_{col}",
+        ]
+    return select_list(expressions, indent)
+
+def money_delta_names(columns, prefixes=('src', 'new', 'delta', 'abs_delta')):
+    """Names of the columns money_delta_columns produces, in the same order."""
+    return [f"{prefix}_{col}" for col in columns for prefix in prefixes]
+
+def struct_columns(columns, alias):
+    """struct_pack of alias.col for each column, so a group of columns compares as one value."""
+    return "struct_pack(" + ", ".join(f"{col} := {alias}.{col}" for col in columns) + ")"
+
+def all_not_null(columns, alias):
+    """True when none of alias.col is NULL, i.e. an equality join on the columns could match."""
+    return "(" + " AND ".join(f"{alias}.{col} IS NOT NULL" for col in columns) + ")"
+
+def abs_delta_sum_columns(columns, indent=16):
+    return select_list([f"sum(abs_delta_{col}) as abs_delta_{col}" for col in columns], indent)
+
+def abs_delta_list(columns, indent=16):
+    """Comma separated abs_delta_ columns, for list_value(...)."""
+    return f",\n{' ' * indent}".join(f"abs_delta_{col}" for col in columns)
+
+def abs_delta_metrics(columns, indent=20):
+    """struct_pack(metric_name, metric_value) per abs_delta_ column, for a metrics list."""
+    return f",\n{' ' * indent}".join(
+        f"struct_pack(metric_name := 'abs_delta_{col}', metric_value := abs_delta_{col})"
+        for col in columns
+    )
+
+def defect_mask_columns(flag_columns):
+    """
+    Builds the SELECT list that packs 0/1 flag columns into UBIGINT DEFECT_MASK_n words
+    followed by DEFECT_COUNT, the number of bits set across all words.
+    """
+    words = []
+    for word, start in enumerate(range(0, len(flag_columns), 64)):
+        bits = "\n                | ".join(
+            f"(COALESCE({col}, 0)::UBIGINT << {bit})"
+            for bit, col in enumerate(flag_columns[start:start + 64])
+        )
+        words.append(f"({bits}) AS DEFECT_MASK_{word}")
+    count = " + ".join(f"bit_count(DEFECT_MASK_{word})::INTEGER" for word in range(len(words)))
+    return "\n            , ".join(words + [f"({count}) AS DEFECT_COUNT"])
+
+def defect_flag_columns(flag_columns, aggregate=None):
+    """
+    Builds the SELECT list that unpacks DEFECT_MASK_n back into one 0/1 INTEGER column
+    per flag, optionally wrapped in an aggregate such as SUM.
+    """
+    columns = []
+    for position, col in enumerate(flag_columns):
+        flag = f"((DEFECT_MASK_{position // 64} >> {position % 64}) & 1)::INTEGER"
+        if aggregate:
+            flag = f"{aggregate}({flag})"
+        columns.append(f"{flag} AS {col}")
+    return "\n            , ".join(columns)
+
+def chronic_flag_decode_columns():
+    """
+    Builds the SELECT list that decodes SP_CHRONIC_FLAGS back into one column per flag.
+    """
+    return "\n            , ".join(
+        f"CASE (SP_CHRONIC_FLAGS >> {2 * lane}) & 3 WHEN 1 THEN '1' WHEN 2 THEN '2' WHEN 3 THEN 'OTHER' END AS {col}"
+        for lane, col in enumerate(CHRONIC_CONDITION_FLAGS)
+    )
+
+# Per-column defect totals of both audit tables, one row per (SOURCE, COLUMN_NAME), so the
+# Six Sigma views read a few hundred rows instead of unpacking every audit row
+COLUMN_DEFECT_COUNTS_TABLE = 'audit_column_defect_counts'
+
+def column_defect_counts_script(source, table, flag_columns, diff_columns=()):
+    """
+    Replaces the source's rows of audit_column_defect_counts with the totals of table:
+    defects per packed flag and per 0/1 diff_column, and the row count as opportunities.
+    """
+    diff_sums = "".join(f"\n                , SUM({col}) AS {col}" for col in diff_columns)
+    return f"""
+        CREATE TABLE IF NOT EXISTS {COLUMN_DEFECT_COUNTS_TABLE} (
+            SOURCE VARCHAR,
+            COLUMN_NAME VARCHAR,
+            TOTAL_DEFECTS BIGINT,
+            TOTAL_OPPORTUNITIES BIGINT
+        );
+        DELETE FROM {COLUMN_DEFECT_COUNTS_TABLE} WHERE SOURCE = '{source}';
+        INSERT INTO {COLUMN_DEFECT_COUNTS_TABLE}
+        WITH totals AS (
+            SELECT
+                COUNT(*) AS TOTAL_OPPORTUNITIES{diff_sums}
+                , {defect_flag_columns(flag_columns, aggregate='SUM')}
+            FROM {table}
+        ),
+        unpivoted AS (
+            UNPIVOT totals ON COLUMNS(* EXCLUDE (TOTAL_OPPORTUNITIES)) INTO NAME COLUMN_NAME VALUE TOTAL_DEFECTS
+        )
+        SELECT
+            '{source}' AS SOURCE
+            , COLUMN_NAME
+            , COALESCE(TOTAL_DEFECTS, 0)::BIGINT AS TOTAL_DEFECTS
+            , TOTAL_OPPORTUNITIES
+        FROM unpivoted;"""
+
+# Columns the orphan re-linker compares between an unmatched source and new claim: the
+# claim identity, whose drift left them unmatched, and every audited column
+CARRIER_RELINK_COLUMNS = [(col, 'string') for col in CARRIER_IDENTITY_COLUMNS] + CARRIER_AUDIT_COLUMNS
+
+def field_difference_list(columns):
+    """Names of the columns whose defect flag is set between the s and n rows, as a LIST."""
+    names = ",\n                    ".join(
+        f"CASE WHEN {COMPARISON_SEMANTICS[semantics]['flag'].format(col=col)} = 1 THEN '{col}' END"
+        for col, semantics in columns
+    )
+    return f"""list_filter([
+                    {names}
+                ], f -> f IS NOT NULL)"""
+
+def compared_field_count(columns, indent=20):
+    """Number of columns holding a value on the s or the n row; empty on both is no evidence."""
+    counts = f"\n{' ' * indent}+ ".join(
+        f"CASE WHEN {COMPARISON_SEMANTICS[semantics]['empty'].format(col=f's.{col}')} "
+        f"AND {COMPARISON_SEMANTICS[semantics]['empty'].format(col=f'n.{col}')} THEN 0 ELSE 1 END"
+        for col, semantics in columns
+    )
+    return f"({counts})"
+
+def line_item_hashes(alias):
+    """
+    LIST of one hash per claim line of the alias row, line 1 first, over the line's cleaned
+    fields. Lines with every field empty hash to 0, so they can be filtered out.
+    """
+    semantics = dict(CARRIER_AUDIT_COLUMNS)
+    hashes = []
+    for line in range(1, CARRIER_LINE_COUNT + 1):
+        columns = [(family, f"{family}_{line}") for family in CARRIER_LINE_ITEM_FAMILIES]
+        empty = " AND ".join(
+            COMPARISON_SEMANTICS[semantics[col]]['empty'].format(col=f"{alias}.{col}") for _, col in columns
+        )
+        fields = ", ".join(
+            f"{family} := {COMPARISON_SEMANTICS[semantics[col]]['value'].format(col=f'{alias}.{col}')}"
+            for family, col in columns
+        )
+        hashes.append(f"CASE WHEN {empty} THEN 0 ELSE hash(struct_pack({fields})) END")
+    return "[\n                    " + ",\n                    ".join(hashes) + "\n                ]"
+
+def defect_subset_count(flag_columns, subset):
+    """DEFECT_COUNT over the subset's flags only: each mask word ANDed with the subset's bits."""
+    words = {}
+    for position, col in enumerate(flag_columns):
+        if col in subset:
+            words[position // 64] = words.get(position // 64, 0) | (1 << (position % 64))
+    return "(" + " + ".join(
+        f"bit_count(DEFECT_MASK_{word} & {bits}::UBIGINT)::INTEGER" for word, bits in sorted(words.items())
+    ) + ")"
+
+def money_fingerprint(columns, alias):
+    """Hash of a row's cleaned money columns, equal for claims billing the same amounts."""
+    values = ", ".join(COMPARISON_SEMANTICS['money']['value'].format(col=f"{alias}.{col}") for col in columns)
+    return f"hash(list_value({values}))"
@@ -1,6 +1,4 @@
 import pandas as pd
-import numpy as np
-from scipy import stats
 from sqlalchemy import text
 from src.db import engine
 from src.db import execute_sql_script
@@ -10,35 +8,6 @@ import os
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 data_dir = os.path.join(project_root, "data")
 
-def accurate_sigma_level(yield_value):
-    """
-    Calculate accurate Six Sigma level using scipy's inverse normal distribution.
-    
-    Args:
-        yield_value: Proportion of defect-free items (0 to 1)
-    
-    Returns:
-        float: Six Sigma level (typically 0 to 6+)
-    
-    Note:
-        This replaces the SQL approximation with the precise inverse normal CDF.
-        The 1.5 sigma shift is a standard industry adjustment for long-term drift.
-    """
-    if pd.isna(yield_value) or yield_value <= 0 or yield_value >= 1:
-        return np.nan
-    
-    try:
-        # Calculate Z-score from yield using inverse normal CDF
-        # stats.norm.ppf gives us the inverse of the normal cumulative distribution
-        z_score = stats.norm.ppf(yield_value)
-        
-        # Apply 1.5 sigma shift (standard Six Sigma methodology)
-        sigma_level = z_score + 1.5
-        
-        return sigma_level
-    except (ValueError, FloatingPointError):
-        return np.nan
-
 def get_row_counts():
     """Returns row counts for all tables."""
     with engine.connect() as conn:
@@ -55,7 +24,7 @@ def get_row_counts():
 def calc_six_sigma():
     """
     Calculate Six Sigma to score Data Migration Quality.
-    Recalculates sigma values using accurate scipy inverse normal distribution.
+    SIGMA_LEVEL is computed in SQL with the exact inverse normal (sigma_level_exact).
     """
     with engine.connect() as conn:
 
@@ -70,11 +39,6 @@ def calc_six_sigma():
             select * from vw_sigma_analysis
         """)
         six_sigma_df = pd.read_sql(six_sigma_query, conn)
-        
-        # Recalculate SIX_SIGMA using accurate Python function
-        if 'YIELD' in six_sigma_df.columns:
-            six_sigma_df['SIX_SIGMA'] = six_sigma_df['YIELD'].apply(accurate_sigma_level)
-        
         six_sigma_df.to_csv(os.path.join(data_dir, "six_sigma.csv"), index=False)
         
         # 2. Six Sigma Analysis for Carrier Claim Fields
@@ -82,11 +46,6 @@ def calc_six_sigma():
             select * from vw_sigma_analysis_carrier_columns;
         """)
         six_sigma_carrier_df = pd.read_sql(six_sigma_carrier_query, conn)
-        
-        # Recalculate SIX_SIGMA using accurate Python function
-        if 'YIELD' in six_sigma_carrier_df.columns:
-            six_sigma_carrier_df['SIX_SIGMA'] = six_sigma_carrier_df['YIELD'].apply(accurate_sigma_level)
-        
         six_sigma_carrier_df.to_csv(os.path.join(data_dir, "six_sigma_carrier.csv"), index=False)
 
         # 3. Six Sigma Analysis for Beneficiary Fields
@@ -94,11 +53,6 @@ def calc_six_sigma():
             select * from vw_sigma_analysis_beneficiary_columns
         """)
         six_sigma_beneficiary_df = pd.read_sql(six_sigma_beneficiary_query, conn)
-        
-        # Recalculate SIX_SIGMA using accurate Python function
-        if 'YIELD' in six_sigma_beneficiary_df.columns:
-            six_sigma_beneficiary_df['SIX_SIGMA'] = six_sigma_beneficiary_df['YIELD'].apply(accurate_sigma_level)
-        
         six_sigma_beneficiary_df.to_csv(os.path.join(data_dir, "six_sigma_beneficiary.csv"), index=False)
         
         # 4. Six Sigma Analysis for All Fields (not grouped)
@@ -106,11 +60,6 @@ def calc_six_sigma():
             select * from vw_sigma_analysis_columns
         """)
         six_sigma_columns_df = pd.read_sql(six_sigma_columns_query, conn)
-        
-        # Recalculate SIX_SIGMA using accurate Python function
-        if 'YIELD' in six_sigma_columns_df.columns:
-            six_sigma_columns_df['SIX_SIGMA'] = six_sigma_columns_df['YIELD'].apply(accurate_sigma_level)
-        
         six_sigma_columns_df.to_csv(os.path.join(data_dir, "six_sigma_columns.csv"), index=False)
         
     return {
@@ -137,10 +86,65 @@ def calc_financial_impact():
         """)
         financial_impact_beneficiary_df = pd.read_sql(financial_impact_beneficiary_query, conn)
         financial_impact_beneficiary_df.to_csv(os.path.join(data_dir, "financial_impact_beneficiary.csv"), index=False)
+
+        # 3. Beneficiary annual amounts reconciled to the claims behind them, by year
+        payment_reconciliation_query = text("""
+            select * from vw_payment_reconciliation_by_year
+        """)
+        payment_reconciliation_df = pd.read_sql(payment_reconciliation_query, conn)
+        payment_reconciliation_df.to_csv(os.path.join(data_dir, "payment_reconciliation_by_year.csv"), index=False)
+
+        # 4. Line amounts moved to another amount field of the same line, as a field by field matrix
+        transposition_query = text("""
+            select * from vw_financial_transposition_matrix
+        """)
+        transposition_df = pd.read_sql(transposition_query, conn)
+        transposition_df.to_csv(os.path.join(data_dir, "financial_transposition_matrix.csv"), index=False)
         
     return {
         "financial_impact_claim": financial_impact_claim_df,
-        "financial_impact_beneficiary": financial_impact_beneficiary_df
+        "financial_impact_beneficiary": financial_impact_beneficiary_df,
+        "payment_reconciliation_by_year": payment_reconciliation_df,
+        "transposition_matrix": transposition_df
+    }
+
+def calc_data_quality_rules():
+    """
+    Violations of the data-quality rules in data/data_quality_rules.json, per rule and table.
+    """
+    with engine.connect() as conn:
+        rule_violations_query = text("""
+            select
+                c.TABLE_NAME
+                , c.RULE_ID
+                , r.DESCRIPTION
+                , c.VIOLATIONS
+                , c.ROWS_CHECKED
+                , round(100.0 * c.VIOLATIONS / nullif(c.ROWS_CHECKED, 0), 2) as VIOLATION_PCT
+            from dq_rule_violation_counts c
+            join dq_rules r on r.RULE_ID = c.RULE_ID
+            order by r.TARGET, r.MASK_WORD, r.MASK_BIT, c.TABLE_NAME desc
+        """)
+        rule_violations_df = pd.read_sql(rule_violations_query, conn)
+        rule_violations_df.to_csv(os.path.join(data_dir, "data_quality_rule_violations.csv"), index=False)
+
+    return {
+        "rule_violations": rule_violations_df
+    }
+
+def calc_transformation_patterns():
+    """
+    The transformation pattern and recurring value mapping most likely behind each field's defects.
+    """
+    with engine.connect() as conn:
+        transformation_patterns_query = text("""
+            select * from vw_transformation_patterns_top order by SOURCE, MISMATCHES desc
+        """)
+        transformation_patterns_df = pd.read_sql(transformation_patterns_query, conn)
+        transformation_patterns_df.to_csv(os.path.join(data_dir, "transformation_patterns.csv"), index=False)
+
+    return {
+        "transformation_patterns": transformation_patterns_df
     }
 
 def compare_beneficiaries():
@@ -186,42 +190,20 @@ def compare_beneficiaries():
 
         # 6. Audit Beneficiary Summary
         audit_beneficiary_query = text("""
-            select * from audit_beneficiary_summary 
-            where 
-                BENE_BIRTH_DT = 1 or
-                BENE_DEATH_DT = 1 or
-                BENE_SEX_IDENT_CD = 1 or
-                BENE_RACE_CD = 1 or
-                BENE_ESRD_IND = 1 or
-                SP_STATE_CODE = 1 or
-                BENE_COUNTY_CD = 1 or
-                BENE_HI_CVRAGE_TOT_MONS = 1 or
-                BENE_SMI_CVRAGE_TOT_MONS = 1 or
-                BENE_HMO_CVRAGE_TOT_MONS = 1 or
-                PLAN_CVRG_MOS_NUM = 1 or
-                SP_ALZHDMTA = 1 or
-                SP_CHF = 1 or
-                SP_CHRNKIDN = 1 or
-                SP_CNCR = 1 or
-                SP_COPD = 1 or
-                SP_DEPRESSN = 1 or
-                SP_DIABETES = 1 or
-                SP_ISCHMCHT = 1 or
-                SP_OSTEOPRS = 1 or
-                SP_RA_OA = 1 or
-                SP_STRKETIA = 1 or
-                MEDREIMB_IP = 1 or
-                BENRES_IP = 1 or
-                PPPYMT_IP = 1 or
-                MEDREIMB_OP = 1 or
-                BENRES_OP = 1 or
-                PPPYMT_OP = 1 or
-                MEDREIMB_CAR = 1 or
-                BENRES_CAR = 1 or
-                PPPYMT_CAR = 1
+            select * exclude (DEFECT_COUNT) from vw_audit_beneficiary_summary_flags 
+            where DEFECT_COUNT > 0
         """)
         audit_beneficiary_df = pd.read_sql(audit_beneficiary_query, conn)
         audit_beneficiary_df.to_csv(os.path.join(data_dir, "audit_beneficiary_summary.csv"), index=False)
+
+        # 7. Cross-year inconsistencies within each system, compared between systems
+        longitudinal_query = text("""
+            select * from vw_beneficiary_longitudinal_errors
+            order by FINDING, DESYNPUF_ID
+        """)
+        longitudinal_df = pd.read_sql(longitudinal_query, conn)
+        longitudinal_df.to_csv(os.path.join(data_dir, "beneficiary_longitudinal_inconsistencies.csv"), index=False)
+        longitudinal_summary_df = pd.read_sql(text("select * from vw_beneficiary_longitudinal_summary"), conn)
     
     return {
         "bene_records_with_discrepancies": len(audit_beneficiary_df),
@@ -229,6 +211,10 @@ def compare_beneficiaries():
         "mismatch_count": len(mismatch_df),
         "date_diff_count": len(date_diff_df),
         "comprehensive_beneficiary_count": len(comprehensive_df),
+        "longitudinal_count": len(longitudinal_df),
+        # Beneficiaries whose cross-year pattern differs between the systems
+        "longitudinal_pattern_changes": int((~longitudinal_df['FINDING'].isin(['Inconsistent in Both Systems'])).sum()),
+        "longitudinal_summary": longitudinal_summary_df,
         "missing_sample": missing_df_1.head(),
         "extra_sample": missing_df_2.head(),
         "bene_date_changes": date_diff_df.head(),
@@ -266,158 +252,84 @@ def compare_claims():
 
         # 4. Audit Claim Summary
         audit_claim_query = text("""
-            SELECT * 
-            FROM audit_carrier_claims
-            WHERE 
-                ICD9_DGNS_CD_1 = 1 OR
-                ICD9_DGNS_CD_2 = 1 OR
-                ICD9_DGNS_CD_3 = 1 OR
-                ICD9_DGNS_CD_4 = 1 OR
-                ICD9_DGNS_CD_5 = 1 OR
-                ICD9_DGNS_CD_6 = 1 OR
-                ICD9_DGNS_CD_7 = 1 OR
-                ICD9_DGNS_CD_8 = 1 OR
-                PRF_PHYSN_NPI_1 = 1 OR
-                PRF_PHYSN_NPI_2 = 1 OR
-                PRF_PHYSN_NPI_3 = 1 OR
-                PRF_PHYSN_NPI_4 = 1 OR
-                PRF_PHYSN_NPI_5 = 1 OR
-                PRF_PHYSN_NPI_6 = 1 OR
-                PRF_PHYSN_NPI_7 = 1 OR
-                PRF_PHYSN_NPI_8 = 1 OR
-                PRF_PHYSN_NPI_9 = 1 OR
-                PRF_PHYSN_NPI_10 = 1 OR
-                PRF_PHYSN_NPI_11 = 1 OR
-                PRF_PHYSN_NPI_12 = 1 OR
-                PRF_PHYSN_NPI_13 = 1 OR
-                TAX_NUM_1 = 1 OR
-                TAX_NUM_2 = 1 OR
-                TAX_NUM_3 = 1 OR
-                TAX_NUM_4 = 1 OR
-                TAX_NUM_5 = 1 OR
-                TAX_NUM_6 = 1 OR
-                TAX_NUM_7 = 1 OR
-                TAX_NUM_8 = 1 OR
-                TAX_NUM_9 = 1 OR
-                TAX_NUM_10 = 1 OR
-                TAX_NUM_11 = 1 OR
-                TAX_NUM_12 = 1 OR
-                TAX_NUM_13 = 1 OR
-                HCPCS_CD_1 = 1 OR
-                HCPCS_CD_2 = 1 OR
-                HCPCS_CD_3 = 1 OR
-                HCPCS_CD_4 = 1 OR
-                HCPCS_CD_5 = 1 OR
-                HCPCS_CD_6 = 1 OR
-                HCPCS_CD_7 = 1 OR
-                HCPCS_CD_8 = 1 OR
-                HCPCS_CD_9 = 1 OR
-                HCPCS_CD_10 = 1 OR
-                HCPCS_CD_11 = 1 OR
-                HCPCS_CD_12 = 1 OR
-                HCPCS_CD_13 = 1 OR
-                LINE_NCH_PMT_AMT_1 = 1 OR
-                LINE_NCH_PMT_AMT_2 = 1 OR
-                LINE_NCH_PMT_AMT_3 = 1 OR
-                LINE_NCH_PMT_AMT_4 = 1 OR
-                LINE_NCH_PMT_AMT_5 = 1 OR
-                LINE_NCH_PMT_AMT_6 = 1 OR
-                LINE_NCH_PMT_AMT_7 = 1 OR
-                LINE_NCH_PMT_AMT_8 = 1 OR
-                LINE_NCH_PMT_AMT_9 = 1 OR
-                LINE_NCH_PMT_AMT_10 = 1 OR
-                LINE_NCH_PMT_AMT_11 = 1 OR
-                LINE_NCH_PMT_AMT_12 = 1 OR
-                LINE_NCH_PMT_AMT_13 = 1 OR
-                LINE_BENE_PTB_DDCTBL_AMT_1 = 1 OR
-                LINE_BENE_PTB_DDCTBL_AMT_2 = 1 OR
-                LINE_BENE_PTB_DDCTBL_AMT_3 = 1 OR
-                LINE_BENE_PTB_DDCTBL_AMT_4 = 1 OR
-                LINE_BENE_PTB_DDCTBL_AMT_5 = 1 OR
-                LINE_BENE_PTB_DDCTBL_AMT_6 = 1 OR
-                LINE_BENE_PTB_DDCTBL_AMT_7 = 1 OR
-                LINE_BENE_PTB_DDCTBL_AMT_8 = 1 OR
-                LINE_BENE_PTB_DDCTBL_AMT_9 = 1 OR
-                LINE_BENE_PTB_DDCTBL_AMT_10 = 1 OR
-                LINE_BENE_PTB_DDCTBL_AMT_11 = 1 OR
-                LINE_BENE_PTB_DDCTBL_AMT_12 = 1 OR
-                LINE_BENE_PTB_DDCTBL_AMT_13 = 1 OR
-                LINE_BENE_PRMRY_PYR_PD_AMT_1 = 1 OR
-                LINE_BENE_PRMRY_PYR_PD_AMT_2 = 1 OR
-                LINE_BENE_PRMRY_PYR_PD_AMT_3 = 1 OR
-                LINE_BENE_PRMRY_PYR_PD_AMT_4 = 1 OR
-                LINE_BENE_PRMRY_PYR_PD_AMT_5 = 1 OR
-                LINE_BENE_PRMRY_PYR_PD_AMT_6 = 1 OR
-                LINE_BENE_PRMRY_PYR_PD_AMT_7 = 1 OR
-                LINE_BENE_PRMRY_PYR_PD_AMT_8 = 1 OR
-                LINE_BENE_PRMRY_PYR_PD_AMT_9 = 1 OR
-                LINE_BENE_PRMRY_PYR_PD_AMT_10 = 1 OR
-                LINE_BENE_PRMRY_PYR_PD_AMT_11 = 1 OR
-                LINE_BENE_PRMRY_PYR_PD_AMT_12 = 1 OR
-                LINE_BENE_PRMRY_PYR_PD_AMT_13 = 1 OR
-                LINE_COINSRNC_AMT_1 = 1 OR
-                LINE_COINSRNC_AMT_2 = 1 OR
-                LINE_COINSRNC_AMT_3 = 1 OR
-                LINE_COINSRNC_AMT_4 = 1 OR
-                LINE_COINSRNC_AMT_5 = 1 OR
-                LINE_COINSRNC_AMT_6 = 1 OR
-                LINE_COINSRNC_AMT_7 = 1 OR
-                LINE_COINSRNC_AMT_8 = 1 OR
-                LINE_COINSRNC_AMT_9 = 1 OR
-                LINE_COINSRNC_AMT_10 = 1 OR
-                LINE_COINSRNC_AMT_11 = 1 OR
-                LINE_COINSRNC_AMT_12 = 1 OR
-                LINE_COINSRNC_AMT_13 = 1 OR
-                LINE_ALOWD_CHRG_AMT_1 = 1 OR
-                LINE_ALOWD_CHRG_AMT_2 = 1 OR
-                LINE_ALOWD_CHRG_AMT_3 = 1 OR
-                LINE_ALOWD_CHRG_AMT_4 = 1 OR
-                LINE_ALOWD_CHRG_AMT_5 = 1 OR
-                LINE_ALOWD_CHRG_AMT_6 = 1 OR
-                LINE_ALOWD_CHRG_AMT_7 = 1 OR
-                LINE_ALOWD_CHRG_AMT_8 = 1 OR
-                LINE_ALOWD_CHRG_AMT_9 = 1 OR
-                LINE_ALOWD_CHRG_AMT_10 = 1 OR
-                LINE_ALOWD_CHRG_AMT_11 = 1 OR
-                LINE_ALOWD_CHRG_AMT_12 = 1 OR
-                LINE_ALOWD_CHRG_AMT_13 = 1 OR
-                LINE_PRCSG_IND_CD_1 = 1 OR
-                LINE_PRCSG_IND_CD_2 = 1 OR
-                LINE_PRCSG_IND_CD_3 = 1 OR
-                LINE_PRCSG_IND_CD_4 = 1 OR
-                LINE_PRCSG_IND_CD_5 = 1 OR
-                LINE_PRCSG_IND_CD_6 = 1 OR
-                LINE_PRCSG_IND_CD_7 = 1 OR
-                LINE_PRCSG_IND_CD_8 = 1 OR
-                LINE_PRCSG_IND_CD_9 = 1 OR
-                LINE_PRCSG_IND_CD_10 = 1 OR
-                LINE_PRCSG_IND_CD_11 = 1 OR
-                LINE_PRCSG_IND_CD_12 = 1 OR
-                LINE_PRCSG_IND_CD_13 = 1 OR
-                LINE_ICD9_DGNS_CD_1 = 1 OR
-                LINE_ICD9_DGNS_CD_2 = 1 OR
-                LINE_ICD9_DGNS_CD_3 = 1 OR
-                LINE_ICD9_DGNS_CD_4 = 1 OR
-                LINE_ICD9_DGNS_CD_5 = 1 OR
-                LINE_ICD9_DGNS_CD_6 = 1 OR
-                LINE_ICD9_DGNS_CD_7 = 1 OR
-                LINE_ICD9_DGNS_CD_8 = 1 OR
-                LINE_ICD9_DGNS_CD_9 = 1 OR
-                LINE_ICD9_DGNS_CD_10 = 1 OR
-                LINE_ICD9_DGNS_CD_11 = 1 OR
-                LINE_ICD9_DGNS_CD_12 = 1 OR
-                LINE_ICD9_DGNS_CD_13 = 1
+            SELECT * EXCLUDE (DEFECT_COUNT)
+            FROM vw_audit_carrier_claims_flags
+            WHERE DEFECT_COUNT > 0
         """)
         audit_claim_df = pd.read_sql(audit_claim_query, conn)
         audit_claim_df.to_csv(os.path.join(data_dir, "audit_claim_summary.csv"), index=False)
 
+        # 5. Payment Amount Discrepancies on every line and every line amount
+        line_payment_diff_query = text("""
+            select * from vw_claim_line_payment_differences
+            order by CLM_ID, LINE_NUM
+        """)
+        line_payment_diff_df = pd.read_sql(line_payment_diff_query, conn)
+        line_payment_diff_df.to_csv(os.path.join(data_dir, "claim_line_payment_discrepancies.csv"), index=False)
+
+        # 6. Orphan claims re-linked to their counterpart despite a drifted claim identity
+        relinked_query = text("""
+            select * replace (
+                array_to_string(BLOCKING_KEYS, '; ') as BLOCKING_KEYS,
+                array_to_string(DRIFTED_KEY_FIELDS, '; ') as DRIFTED_KEY_FIELDS,
+                array_to_string(DIFFERING_FIELDS, '; ') as DIFFERING_FIELDS
+            )
+            from carrier_claims_relinked
+            order by SRC_CLM_ID
+        """)
+        relinked_df = pd.read_sql(relinked_query, conn)
+        relinked_df.to_csv(os.path.join(data_dir, "relinked_orphan_claims.csv"), index=False)
+        unlinked_claims_count = conn.execute(text("select count(*) from vw_carrier_claims_unlinked")).scalar()
+
+        # 7. Claims dated after death or in a year without Part B coverage, source vs new
+        claim_coverage_query = text("""
+            select * from vw_claim_coverage_summary
+        """)
+        claim_coverage_df = pd.read_sql(claim_coverage_query, conn)
+        claim_coverage_df.to_csv(os.path.join(data_dir, "claim_coverage_summary.csv"), index=False)
+        claim_coverage_diff_query = text("""
+            select * from vw_claim_coverage_differences
+            order by DESYNPUF_ID, CLM_ID
+        """)
+        claim_coverage_diff_df = pd.read_sql(claim_coverage_diff_query, conn)
+        claim_coverage_diff_df.to_csv(os.path.join(data_dir, "claim_coverage_differences.csv"), index=False)
+
+        # 8. Claims whose diagnosis codes were only reordered, not added or removed
+        diagnosis_changes_query = text("""
+            select * from vw_claim_diagnosis_changes
+        """)
+        diagnosis_changes_df = pd.read_sql(diagnosis_changes_query, conn)
+        reordered = diagnosis_changes_df.loc[diagnosis_changes_df['DGNS_CHANGE'] == 'REORDERED_ONLY', 'CLAIMS']
+
+        # 9. Claims with line defects: line items reordered only, or the minimum line edit
+        line_permutations_query = text("""
+            select * from audit_claim_line_permutations
+            order by LINE_CHANGE desc, CLM_ID
+        """)
+        line_permutations_df = pd.read_sql(line_permutations_query, conn)
+        line_permutations_df.to_csv(os.path.join(data_dir, "claim_line_permutations.csv"), index=False)
+        line_permutation_summary_df = pd.read_sql(text("select * from vw_claim_line_permutation_summary"), conn)
+        permuted = line_permutations_df[line_permutations_df['LINE_CHANGE'] == 'PERMUTED_ONLY']
+
     return {
         "claim_records_with_discrepancies": len(audit_claim_df),
         "missing_claims_count": len(missing_df),
         "payment_mismatch_count": len(payment_diff_df_sample),
+        "line_payment_mismatch_count": len(line_payment_diff_df),
         "comprehensive_orphan_claims_count": len(comprehensive_orphan_claims_df),
+        "relinked_claims_count": len(relinked_df),
+        "unlinked_claims_count": unlinked_claims_count,
+        "claim_coverage_summary": claim_coverage_df,
+        "claim_coverage_diff_count": len(claim_coverage_diff_df),
+        "diagnosis_reordered_count": int(reordered.sum()),
+        "diagnosis_changes": diagnosis_changes_df,
+        "line_defect_claims_count": len(line_permutations_df),
+        "line_permuted_count": len(permuted),
+        "line_phantom_defects": int(permuted['LINE_FIELD_DEFECTS'].sum()),
+        "line_permutation_summary": line_permutation_summary_df,
         "payment_mismatch_sample": payment_diff_df_sample.head(),
         "comprehensive_orphan_claims_sample": comprehensive_orphan_claims_df.head(),
+        "relinked_claims_sample": relinked_df.head(),
         "claim_records_with_discrepancies_sample": audit_claim_df.head()
     }
 
@@ -1,6 +1,15 @@
 import os
+import re
+import atexit
+import json
+import time
+import logging
+import threading
+import numpy as np
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
+from duckdb import sqltypes
+from scipy.special import ndtri
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 
 load_dotenv()
@@ -18,9 +27,183 @@ if not DUCKDB_PATH:
 
 DATABASE_URL = f"duckdb:///{DUCKDB_PATH}"
 
+logger = logging.getLogger(__name__)
+
+# Named DuckDB runtime tuning profiles. Select one with DUCKDB_PROFILE in .env or
+# --db-profile on the command line. Individual settings can be overridden with
+# DUCKDB_THREADS, DUCKDB_MEMORY_LIMIT and DUCKDB_TEMP_DIRECTORY (the spill location).
+DUCKDB_PROFILES = {
+    # Personal computer: leave headroom for the OS and other applications
+    'laptop': {
+        'threads': 4,
+        'memory_limit': '8GB',
+        'preserve_insertion_order': False,
+    },
+    # Large dedicated machine: use the cores and checkpoint less often during bulk loads
+    'ingest-server': {
+        'threads': 16,
+        'memory_limit': '64GB',
+        'preserve_insertion_order': False,
+        'checkpoint_threshold': '1GB',
+    },
+    # Tight memory budget: few threads (each holds its own buffers) and spill to disk early
+    'bounded-memory': {
+        'threads': 2,
+        'memory_limit': '2GB',
+        'preserve_insertion_order': False,
+        'max_temp_directory_size': '500GB',
+    },
+}
+
+# Settings reported at startup regardless of the active profile
+REPORTED_SETTINGS = [
+    'threads', 'memory_limit', 'temp_directory', 'max_temp_directory_size',
+    'preserve_insertion_order', 'checkpoint_threshold',
+]
+
+ENV_SETTING_OVERRIDES = {
+    'DUCKDB_THREADS': 'threads',
+    'DUCKDB_MEMORY_LIMIT': 'memory_limit',
+    'DUCKDB_TEMP_DIRECTORY': 'temp_directory',
+}
+
+def resolve_profile(profile_name=None):
+    """
+    Returns the DuckDB settings for the named profile (or DUCKDB_PROFILE from .env)
+    with any DUCKDB_* environment overrides applied. No profile means DuckDB defaults.
+    """
+    profile_name = profile_name or os.getenv('DUCKDB_PROFILE')
+    settings = {}
+    if profile_name:
+        if profile_name not in DUCKDB_PROFILES:
+            raise ValueError(
+                f"Unknown DuckDB profile: {profile_name}. "
+                f"Available profiles: {', '.join(DUCKDB_PROFILES)}"
+            )
+        settings.update(DUCKDB_PROFILES[profile_name])
+
+    for env_var, setting in ENV_SETTING_OVERRIDES.items():
+        value = os.getenv(env_var)
+        if value:
+            settings[setting] = value
+    return profile_name, settings
+
+# Size units DuckDB reports settings such as memory_limit in (e.g. '7.7 GiB')
+SIZE_UNITS = {
+    'B': 1, 'BYTES': 1,
+    'KB': 1000, 'MB': 1000 ** 2, 'GB': 1000 ** 3, 'TB': 1000 ** 4,
+    'KIB': 1024, 'MIB': 1024 ** 2, 'GIB': 1024 ** 3, 'TIB': 1024 ** 4,
+}
+
+def parse_size(value):
+    """Bytes in a DuckDB size string such as '2GB' or '7.7 GiB'."""
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([A-Za-z]*)\s*", str(value))
+    unit = match.group(2).upper() if match else None
+    if unit not in SIZE_UNITS and unit != '':
+        raise ValueError(f"Cannot parse size: {value!r}")
+    return int(float(match.group(1)) * SIZE_UNITS.get(unit, 1))
+
+def memory_limit_bytes(conn):
+    """The memory_limit in effect on the connection, in bytes."""
+    return parse_size(conn.execute(text("SELECT current_setting('memory_limit')")).scalar())
+
+def format_setting_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+# Long-term drift allowance added to the Z-score of the yield (the 1.5 sigma shift)
+SIGMA_SHIFT = 1.5
+
+def sigma_levels(yields):
+    """
+    Exact Six Sigma levels, Φ⁻¹(yield) + 1.5, for an array of yields. Yields outside
+    (0, 1), where the inverse normal is infinite or undefined, give NaN.
+    """
+    yields = np.asarray(yields, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        levels = ndtri(yields) + SIGMA_SHIFT
+    return np.where((yields > 0) & (yields < 1), levels, np.nan)
+
+def sigma_level_batch(yields):
+    """Arrow UDF: one vector of yields in, one vector of sigma levels (NULL for NaN) out."""
+    import pyarrow
+    return pyarrow.array(sigma_levels(yields.to_pandas()), from_pandas=True)
+
+def sigma_level_value(yield_value):
+    """Row-at-a-time UDF used when pyarrow is not installed; NULL yields give NULL."""
+    level = float(sigma_levels([yield_value])[0])
+    return None if np.isnan(level) else level
+
+def register_functions(dbapi_connection):
+    """
+    Registers sigma_level_exact(yield) on the connection, vectorized over Arrow batches.
+    pyarrow is in requirements.txt; without it a much slower scalar function is used.
+    Connections to the same database share their functions, so it is registered once.
+    """
+    registered = dbapi_connection.execute(
+        "SELECT count(*) FROM duckdb_functions() WHERE function_name = 'sigma_level_exact'"
+    ).fetchone()[0]
+    if registered:
+        return
+    try:
+        import pyarrow  # noqa: F401
+        function, udf_type = sigma_level_batch, 'arrow'
+    except ImportError:
+        logger.warning("pyarrow is not installed; sigma_level_exact runs row at a time. Run pip install -r requirements.txt")
+        function, udf_type = sigma_level_value, 'native'
+    dbapi_connection.create_function(
+        'sigma_level_exact', function, [sqltypes.DOUBLE], sqltypes.DOUBLE,
+        type=udf_type, null_handling='special',
+    )
+
+ACTIVE_PROFILE, ACTIVE_SETTINGS = resolve_profile()
+
 engine = create_engine(DATABASE_URL)
+# The Python functions registered on each connection keep DuckDB from closing (and
+# checkpointing the WAL) on its own at interpreter exit, so close the pool explicitly
+atexit.register(engine.dispose)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+@event.listens_for(engine, "connect")
+def apply_settings_on_connect(dbapi_connection, connection_record):
+    """Applies the active tuning profile and registers the Python SQL functions on every new DuckDB connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for setting, value in ACTIVE_SETTINGS.items():
+            cursor.execute(f"SET {setting} = {format_setting_value(value)}")
+        if PROFILE_DIR:
+            # DuckDB only accepts a .json profiling_output once the output format is JSON;
+            # pick the format here with profiling left off (see run_statement)
+            cursor.execute("SET enable_profiling = 'json'")
+            cursor.execute("PRAGMA disable_profiling")
+    finally:
+        cursor.close()
+    register_functions(dbapi_connection)
+
+def apply_profile(profile_name):
+    """
+    Switches the active tuning profile (e.g. from the --db-profile CLI option).
+    Pooled connections are discarded so every later connection uses the new settings.
+    """
+    global ACTIVE_PROFILE, ACTIVE_SETTINGS
+    ACTIVE_PROFILE, ACTIVE_SETTINGS = resolve_profile(profile_name)
+    engine.dispose()
+
+def log_effective_settings():
+    """Logs the DuckDB settings actually in effect on a fresh connection."""
+    names = list(dict.fromkeys(REPORTED_SETTINGS + list(ACTIVE_SETTINGS)))
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT name, value FROM duckdb_settings() WHERE list_contains(:names, name) ORDER BY name"),
+            {"names": names},
+        ).fetchall()
+    logger.info(f"DuckDB profile: {ACTIVE_PROFILE or 'default'}")
+    for name, value in rows:
+        logger.info(f"  {name} = {value}")
+
 def get_db():
     db = SessionLocal()
     try:
@@ -28,13 +211,258 @@ def get_db():
     finally:
         db.close()
 
-def execute_sql_script(sql_script: str) -> None:
+# Per-statement statistics recorded by execute_sql_script, in execution order
+STATEMENT_LOG = []
+
+# Directory DuckDB JSON query profiles are written to (None disables profiling)
+PROFILE_DIR = None
+
+# Statements slower than this are logged at INFO, everything else at DEBUG
+SLOW_STATEMENT_SECONDS = 5.0
+
+# How often the temp directory and memory use are sampled while a statement runs
+RESOURCE_POLL_SECONDS = 0.5
+
+# duckdb_memory() tags of caches DuckDB evicts on demand; they fill up to memory_limit
+# during any large scan, so they are left out of the memory a statement is using
+CACHE_MEMORY_TAGS = ['BASE_TABLE', 'EXTERNAL_FILE_CACHE', 'OBJECT_CACHE']
+
+class MemoryGovernorAbort(RuntimeError):
+    """A statement was cancelled because its memory use passed the limit it was run with."""
+
+def split_sql_statements(sql_script: str) -> list:
+    """
+    Split a SQL script into statements on semicolons, ignoring semicolons inside
+    single-quoted strings, double-quoted identifiers, -- line comments and /* */
+    block comments. Statements consisting only of comments are dropped.
+    """
+    statements = []
+    current = []
+    has_code = False
+    i = 0
+    length = len(sql_script)
+    while i < length:
+        char = sql_script[i]
+        pair = sql_script[i:i + 2]
+        if pair == '--':
+            end = sql_script.find('\n', i)
+            end = length if end == -1 else end
+            current.append(sql_script[i:end])
+            i = end
+            continue
+        if pair == '/*':
+            end = sql_script.find('*/', i + 2)
+            end = length if end == -1 else end + 2
+            current.append(sql_script[i:end])
+            i = end
+            continue
+        if char in ("'", '"'):
+            # Quotes are escaped by doubling them, which this loop handles naturally
+            end = sql_script.find(char, i + 1)
+            end = length if end == -1 else end + 1
+            current.append(sql_script[i:end])
+            has_code = True
+            i = end
+            continue
+        if char == ';':
+            if has_code:
+                statements.append(''.join(current).strip())
+            current = []
+            has_code = False
+            i += 1
+            continue
+        if not char.isspace():
+            has_code = True
+        current.append(char)
+        i += 1
+    if has_code:
+        statements.append(''.join(current).strip())
+    return statements
+
+def enable_sql_profiling(output_dir: str) -> None:
+    """
+    Save DuckDB's JSON query profile for every statement run by execute_sql_script.
+    Pooled connections are discarded so every later connection is set up for profiling.
+    """
+    global PROFILE_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    PROFILE_DIR = output_dir
+    engine.dispose()
+
+def process_rss_bytes():
+    """Resident set size of this process, or None where /proc is not available."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def physical_memory_bytes():
+    """Physical memory of the machine, or None where the OS does not report it."""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def watch_resources(stop_event, sample, memory_limits, dbapi_connection):
+    """
+    Samples DuckDB's temp files and memory use and the process RSS until stop_event is
+    set, keeping the peaks. When a sample passes memory_limits ('duckdb_bytes' and/or
+    'rss_bytes'), the running statement is interrupted and the reason kept in sample.
+    """
+    with engine.connect() as conn:
+        while True:
+            spill, memory = conn.execute(text(
+                "SELECT (SELECT coalesce(sum(size), 0) FROM duckdb_temporary_files()), "
+                "(SELECT coalesce(sum(memory_usage_bytes), 0) FROM duckdb_memory() "
+                " WHERE NOT list_contains(:cache_tags, tag))"
+            ), {'cache_tags': CACHE_MEMORY_TAGS}).one()
+            rss = process_rss_bytes() or 0
+            sample['spill_bytes'] = max(sample['spill_bytes'], int(spill))
+            sample['memory_bytes'] = max(sample['memory_bytes'], int(memory))
+            sample['rss_bytes'] = max(sample['rss_bytes'], rss)
+
+            if memory_limits and not sample['cancelled']:
+                if memory_limits.get('duckdb_bytes') and memory > memory_limits['duckdb_bytes']:
+                    sample['cancelled'] = (
+                        f"DuckDB memory {memory / 1024 ** 2:,.0f} MiB passed "
+                        f"{memory_limits['duckdb_bytes'] / 1024 ** 2:,.0f} MiB"
+                    )
+                elif memory_limits.get('rss_bytes') and rss > memory_limits['rss_bytes']:
+                    sample['cancelled'] = (
+                        f"process RSS {rss / 1024 ** 2:,.0f} MiB passed "
+                        f"{memory_limits['rss_bytes'] / 1024 ** 2:,.0f} MiB"
+                    )
+                if sample['cancelled']:
+                    dbapi_connection.interrupt()
+            if stop_event.wait(RESOURCE_POLL_SECONDS):
+                break
+
+def run_statement(conn, statement: str, label: str, index: int, memory_limits: dict = None) -> dict:
+    """
+    Run one statement on conn and return its statistics: wall time, rows produced
+    (the count DuckDB reports for CREATE TABLE AS / INSERT / UPDATE / DELETE), the
+    peak size of the temp files written while it ran and the peak DuckDB memory and
+    process RSS. With memory_limits the statement is cancelled once either peak passes
+    its limit, raising MemoryGovernorAbort. The peaks are sampled by a watcher thread on
+    a second connection, which is only started for governed statements or when the stats
+    are collected (--profile-sql or DEBUG logging); otherwise they are None.
+    """
+    profile_path = None
+    if PROFILE_DIR:
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_').lower()
+        profile_path = os.path.join(PROFILE_DIR, f"{slug}_{index:03d}.json")
+        # Profiling is switched on last: with coverage ALL every statement run while it is
+        # on is profiled, and one with no output file is printed to the terminal
+        conn.execute(text("SET profiling_coverage = 'ALL'"))
+        conn.execute(text(f"SET profiling_output = '{profile_path}'"))
+        conn.execute(text("SET enable_profiling = 'json'"))
+
+    sample = {'spill_bytes': None, 'memory_bytes': None, 'rss_bytes': None, 'cancelled': None}
+    stop_event = threading.Event()
+    watcher = None
+    if memory_limits or PROFILE_DIR or logger.isEnabledFor(logging.DEBUG):
+        sample.update(spill_bytes=0, memory_bytes=0, rss_bytes=0)
+        watcher = threading.Thread(
+            target=watch_resources,
+            args=(stop_event, sample, memory_limits, conn.connection.dbapi_connection),
+            daemon=True,
+        )
+        watcher.start()
+    started = time.perf_counter()
+    try:
+        result = conn.execute(text(statement))
+        rows = None
+        if result.returns_rows and list(result.keys()) == ['Count']:
+            rows = result.scalar()
+    except Exception as e:
+        # The watcher records why it interrupted the statement before interrupting it
+        if sample['cancelled']:
+            raise MemoryGovernorAbort(f"[{label} #{index}] cancelled: {sample['cancelled']}") from e
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        if watcher:
+            stop_event.set()
+            watcher.join()
+        if PROFILE_DIR:
+            # Switched off before the output file is forgotten, so the RESET is not profiled
+            conn.execute(text("PRAGMA disable_profiling"))
+            conn.execute(text("RESET profiling_output"))
+
+    stats = {
+        'label': label,
+        'index': index,
+        'statement': ' '.join(statement.split())[:120],
+        'seconds': elapsed,
+        'rows': rows,
+        'spill_bytes': sample['spill_bytes'],
+        'memory_bytes': sample['memory_bytes'],
+        'rss_bytes': sample['rss_bytes'],
+        'profile_path': profile_path,
+    }
+    STATEMENT_LOG.append(stats)
+    level = logging.INFO if elapsed >= SLOW_STATEMENT_SECONDS else logging.DEBUG
+    logger.log(level, format_statement_stats(stats))
+    return stats
+
+def format_statement_stats(stats: dict) -> str:
+    rows = 'n/a' if stats['rows'] is None else f"{stats['rows']:,}"
+    def mib(key):
+        return 'n/a' if stats[key] is None else f"{stats[key] / 1024 ** 2:,.1f} MiB"
+    return (
+        f"[{stats['label']} #{stats['index']}] {stats['seconds']:.2f}s, rows {rows}, "
+        f"spill {mib('spill_bytes')}, mem {mib('memory_bytes')}, rss {mib('rss_bytes')}: {stats['statement']}"
+    )
+
+def profile_operators(profile_path: str) -> list:
+    """Flatten a DuckDB JSON query profile into (operator_name, operator_timing) pairs."""
+    with open(profile_path) as f:
+        profile = json.load(f)
+    operators = []
+    pending = list(profile.get('children', []))
+    while pending:
+        node = pending.pop()
+        operators.append((node.get('operator_name', node.get('operator_type')), node.get('operator_timing', 0.0)))
+        pending.extend(node.get('children', []))
+    return operators
+
+def log_sql_profile_summary(top_n: int = 10) -> None:
+    """Log the top_n slowest statements and, when profiling was enabled, the top_n slowest operators."""
+    if not STATEMENT_LOG:
+        return
+    total = sum(stats['seconds'] for stats in STATEMENT_LOG)
+    logger.info(f"SQL statements: {len(STATEMENT_LOG)}, total {total:.2f}s. Top {top_n} slowest:")
+    for stats in sorted(STATEMENT_LOG, key=lambda s: s['seconds'], reverse=True)[:top_n]:
+        logger.info(f"  {format_statement_stats(stats)}")
+
+    operators = []
+    for stats in STATEMENT_LOG:
+        if stats['profile_path'] and os.path.exists(stats['profile_path']):
+            for name, timing in profile_operators(stats['profile_path']):
+                operators.append((timing, name, f"{stats['label']} #{stats['index']}"))
+    if operators:
+        logger.info(f"Top {top_n} slowest operators:")
+        for timing, name, statement in sorted(operators, reverse=True)[:top_n]:
+            logger.info(f"  {timing:.2f}s {name} in [{statement}]")
+
+def execute_sql_script(sql_script: str, label: str = "SQL script", memory_limits: dict = None) -> list:
     """
     Execute a SQL script containing one or more SQL statements.
     
     Args:
         sql_script: String containing one or more SQL statements separated by semicolons.
                    Can include CREATE TABLE, DROP, SELECT, and other SQL commands.
+        label: Name used for this script in the statement statistics and profile files.
+        memory_limits: Optional {'duckdb_bytes': ..., 'rss_bytes': ...}; a statement whose
+                   memory use passes either is cancelled and MemoryGovernorAbort raised,
+                   with the script's changes rolled back.
+
+    Returns:
+        The statistics recorded for each statement (see run_statement).
     
     Example:
         >>> sql = '''
@@ -43,14 +471,12 @@ def execute_sql_script(sql_script: str) -> None:
         ... '''
         >>> execute_sql_script(sql)
     """
+    statements = split_sql_statements(sql_script)
+    results = []
     with engine.connect() as conn:
-        # Split the script into individual statements
-        # Remove empty statements and strip whitespace
-        statements = [stmt.strip() for stmt in sql_script.split(';') if stmt.strip()]
-        
-        for statement in statements:
-            # Execute each statement
-            conn.execute(text(statement))
+        for index, statement in enumerate(statements, start=1):
+            results.append(run_statement(conn, statement, label, index, memory_limits))
         
         # Commit all changes
         conn.commit()
+    return results
@@ -10,6 +10,7 @@ load_dotenv()
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import logging
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from src.db import engine, SessionLocal
 from src.models import (
@@ -22,6 +23,31 @@ logger = logging.getLogger(__name__)
 
 BATCH_SIZE = 10000
 
+BENEFICIARY_TABLES = ['src_beneficiary_summary', 'new_beneficiary_summary']
+CLAIM_TABLES = ['src_carrier_claims', 'new_carrier_claims']
+
+# DESYNPUF_ID is a 16 character identifier. Its 16 bytes are packed losslessly
+# into a UHUGEINT as two UBIGINT halves so joins compare one fixed-width integer
+# instead of a string. IDs that are not ASCII of at most 16 characters are rejected
+# by encode_surrogate_keys.
+ENCODE_DESYNPUF_ID_MACRO = """
+CREATE OR REPLACE MACRO encode_desynpuf_id(id) AS
+    CASE WHEN id IS NULL THEN NULL
+    ELSE (('0x' || hex(left(rpad(id, 16, ' '), 8)))::UBIGINT::UHUGEINT << 64)
+        | ('0x' || hex(right(rpad(id, 16, ' '), 8)))::UBIGINT::UHUGEINT
+    END
+"""
+
+# The claim identity (DESYNPUF_ID, CLM_ID, CLM_FROM_DT, CLM_THRU_DT) is hashed into
+# a single UBIGINT. A NULL component yields a NULL key so that, as with the
+# original composite equality joins, such rows never match.
+ENCODE_CLAIM_KEY_MACRO = """
+CREATE OR REPLACE MACRO encode_claim_key(bene_id, clm_id, from_dt, thru_dt) AS
+    CASE WHEN bene_id IS NULL OR clm_id IS NULL OR from_dt IS NULL OR thru_dt IS NULL THEN NULL
+    ELSE hash(bene_id, clm_id, from_dt, thru_dt)
+    END
+"""
+
 def ingest_csv(file_path, model_class, year=None, extra_cols=None):
     """
     Ingests a CSV file into the database using chunked processing.
@@ -75,6 +101,102 @@ def ingest_csv(file_path, model_class, year=None, extra_cols=None):
     except Exception as e:
         logger.error(f"Failed to ingest {file_path}: {e}")
 
+# The 11 SP_* chronic condition flags, in lane order of SP_CHRONIC_FLAGS. Each flag
+# takes a 2 bit lane: 0 = blank/NULL, 1 = '1', 2 = '2', 3 = any other value. Two bits
+# are used rather than one so blank and unexpected values stay distinguishable.
+CHRONIC_CONDITION_FLAGS = [
+    'SP_ALZHDMTA', 'SP_CHF', 'SP_CHRNKIDN', 'SP_CNCR', 'SP_COPD', 'SP_DEPRESSN',
+    'SP_DIABETES', 'SP_ISCHMCHT', 'SP_OSTEOPRS', 'SP_RA_OA', 'SP_STRKETIA',
+]
+
+ENCODE_CHRONIC_FLAG_MACRO = """
+CREATE OR REPLACE MACRO encode_chronic_flag(flag) AS
+    CASE
+        WHEN flag IS NULL OR flag = '' THEN 0
+        WHEN flag = '1' THEN 1
+        WHEN flag = '2' THEN 2
+        ELSE 3
+    END
+"""
+
+def encode_surrogate_keys():
+    """
+    Populates the DESYNPUF_KEY and CLAIM_KEY surrogate columns on the ingested tables.
+
+    Only rows with a NULL key are encoded, so the step is cheap to re-run against an
+    already encoded database. Raises ValueError if an ID cannot be encoded losslessly
+    or if two distinct claim identities hash to the same CLAIM_KEY.
+    """
+    logger.info("Encoding surrogate keys...")
+    with engine.begin() as conn:
+        for table in BENEFICIARY_TABLES + CLAIM_TABLES:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS DESYNPUF_KEY UHUGEINT"))
+        for table in CLAIM_TABLES:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS CLAIM_KEY UBIGINT"))
+
+        conn.execute(text(ENCODE_DESYNPUF_ID_MACRO))
+        conn.execute(text(ENCODE_CLAIM_KEY_MACRO))
+
+        for table in BENEFICIARY_TABLES + CLAIM_TABLES:
+            too_long = conn.execute(text(
+                f"SELECT DESYNPUF_ID FROM {table} WHERE strlen(DESYNPUF_ID) > 16 OR strlen(DESYNPUF_ID) <> length(DESYNPUF_ID) LIMIT 5"
+            )).fetchall()
+            if too_long:
+                raise ValueError(
+                    f"Cannot encode DESYNPUF_ID values that are not ASCII of at most 16 characters in {table}: "
+                    f"{[row[0] for row in too_long]}"
+                )
+            conn.execute(text(
+                f"UPDATE {table} SET DESYNPUF_KEY = encode_desynpuf_id(DESYNPUF_ID) "
+                f"WHERE DESYNPUF_KEY IS NULL AND DESYNPUF_ID IS NOT NULL"
+            ))
+
+        for table in CLAIM_TABLES:
+            conn.execute(text(
+                f"UPDATE {table} SET CLAIM_KEY = encode_claim_key(DESYNPUF_ID, CLM_ID, CLM_FROM_DT, CLM_THRU_DT) "
+                f"WHERE CLAIM_KEY IS NULL"
+            ))
+
+        # Collision detection: every CLAIM_KEY must map back to exactly one claim identity
+        # across both systems.
+        union_sql = " UNION ".join(
+            f"SELECT CLAIM_KEY, DESYNPUF_ID, CLM_ID, CLM_FROM_DT, CLM_THRU_DT FROM {table} WHERE CLAIM_KEY IS NOT NULL"
+            for table in CLAIM_TABLES
+        )
+        collisions = conn.execute(text(
+            f"SELECT CLAIM_KEY, count(*) AS identities FROM ({union_sql}) "
+            f"GROUP BY CLAIM_KEY HAVING count(*) > 1 LIMIT 5"
+        )).fetchall()
+        if collisions:
+            raise ValueError(
+                f"CLAIM_KEY collision detected for keys {[row[0] for row in collisions]}. "
+                "The claim identity hash is not unique for this dataset."
+            )
+
+    logger.info("✅ Surrogate keys encoded successfully")
+
+def encode_chronic_flags():
+    """
+    Packs the SP_* chronic condition flags of each bene-year into the UINTEGER
+    SP_CHRONIC_FLAGS word (2 bits per flag, see CHRONIC_CONDITION_FLAGS).
+
+    Only rows with a NULL word are encoded, so the step is cheap to re-run.
+    """
+    logger.info("Encoding chronic condition flags...")
+    word = " | ".join(
+        f"(encode_chronic_flag({flag})::UINTEGER << {2 * lane})"
+        for lane, flag in enumerate(CHRONIC_CONDITION_FLAGS)
+    )
+    with engine.begin() as conn:
+        conn.execute(text(ENCODE_CHRONIC_FLAG_MACRO))
+        for table in BENEFICIARY_TABLES:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS SP_CHRONIC_FLAGS UINTEGER"))
+            conn.execute(text(
+                f"UPDATE {table} SET SP_CHRONIC_FLAGS = {word} WHERE SP_CHRONIC_FLAGS IS NULL"
+            ))
+
+    logger.info("✅ Chronic condition flags encoded successfully")
+
 def run_ingestion():
     # Load data directories from environment variables
     source_data_dir = os.getenv('SOURCE_DATA_DIR')
@@ -143,5 +265,8 @@ def run_ingestion():
     ingest_csv(new_claims_a, NewCarrierClaims)
     ingest_csv(new_claims_b, NewCarrierClaims)
 
+    encode_surrogate_keys()
+    encode_chronic_flags()
+
 if __name__ == "__main__":
     run_ingestion()
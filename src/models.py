@@ -1,5 +1,6 @@
 from sqlalchemy import Column, Integer, String, Float, Date, MetaData
 from sqlalchemy.orm import declarative_base
+from duckdb_engine.datatypes import UBigInteger, UHugeInteger, UInteger
 
 # DuckDB doesn't strictly require schemas, usually defaults to 'main'. 
 # Removing the explicit schema="data" to avoid issues with DuckDB/SQLAlchemy
@@ -41,6 +42,13 @@ class BeneficiarySummaryMixin:
     BENRES_CAR = Column(Float)
     PPPYMT_CAR = Column(Float)
 
+    # Surrogate key (populated after ingestion, see src/ingest.py encode_surrogate_keys)
+    DESYNPUF_KEY = Column(UHugeInteger)
+
+    # SP_* chronic condition flags packed 2 bits per flag (populated after ingestion,
+    # see src/ingest.py encode_chronic_flags)
+    SP_CHRONIC_FLAGS = Column(UInteger)
+
 class SrcBeneficiarySummary(Base, BeneficiarySummaryMixin):
     __tablename__ = 'src_beneficiary_summary'
 
@@ -213,6 +221,10 @@ class CarrierClaimsMixin:
     LINE_ICD9_DGNS_CD_12 = Column(String)
     LINE_ICD9_DGNS_CD_13 = Column(String)
 
+    # Surrogate keys (populated after ingestion, see src/ingest.py encode_surrogate_keys)
+    DESYNPUF_KEY = Column(UHugeInteger)
+    CLAIM_KEY = Column(UBigInteger)
+
 
 class SrcCarrierClaims(Base, CarrierClaimsMixin):
     __tablename__ = 'src_carrier_claims'
@@ -0,0 +1,331 @@
+"""
+Compiles the payment formulas of data/lookup_payment_formulas.json into SQL.
+
+Each "Sum of" expression is parsed into an AST and then emitted as one SELECT list
+item per formula, evaluated against the columns of a target claims table. Fields that
+the claims files repeat per line (LINE_NCH_PMT_AMT_1..13 and so on) are referenced by
+their family name in the formulas; the compiled SQL evaluates the formula once per line
+and adds up the lines, so every formula of a table is computed in a single scan.
+
+    LINE_NCH_PMT_AMT IF LINE_PRCSG_IND_CD = 'A' OR (LINE_PRCSG_IND_CD IN ('R','S') & LINE_ALOWD_CHRG_AMT > 0)
+
+AST nodes are tuples: ('column', name), ('number', text), ('string', value),
+('negate', operand), ('not', operand), ('binary', op, left, right),
+('in', operand, [items]) and ('if', value, condition).
+"""
+import os
+import re
+import json
+import hashlib
+
+from src.models import SrcCarrierClaims, NewCarrierClaims
+from src.audit_sql import line_families
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAYMENT_FORMULAS_PATH = os.path.join(project_root, "data", "lookup_payment_formulas.json")
+
+# Claim type suffix of the formula variable name -> models of the tables it applies to.
+# Inpatient and outpatient claims are not ingested, so their formulas are parsed and
+# validated but have no target table yet.
+FORMULA_TARGETS = {
+    'CAR': [SrcCarrierClaims, NewCarrierClaims],
+    'IP': [],
+    'OP': [],
+}
+
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<number>\d+(?:\.\d+)?)
+      | (?P<string>'(?:[^']|'')*')
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<op><>|!=|<=|>=|[-+*/=<>&(),])
+    )""", re.VERBOSE)
+
+KEYWORDS = {'IF', 'OR', 'AND', 'NOT', 'IN'}
+COMPARISON_OPERATORS = {'=', '<>', '!=', '<', '>', '<=', '>='}
+
+def tokenize(logic):
+    """(kind, value) tokens of a formula; keywords are upper-cased, & reads as AND."""
+    tokens = []
+    position = 0
+    logic = logic.rstrip()
+    while position < len(logic):
+        match = TOKEN_PATTERN.match(logic, position)
+        if not match:
+            raise ValueError(f"Unexpected character {logic[position:].strip()[:1]!r} in payment formula: {logic}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'name' and value.upper() in KEYWORDS:
+            kind, value = 'keyword', value.upper()
+        elif kind == 'op' and value == '&':
+            kind, value = 'keyword', 'AND'
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+class FormulaParser:
+    """
+    Recursive descent parser, lowest precedence first:
+    formula := expression [IF expression]; OR; AND / &; NOT; comparison and IN;
+    + and -; * and /; unary minus; literals, columns and parentheses.
+    """
+
+    def __init__(self, logic):
+        self.logic = logic
+        self.tokens = tokenize(logic)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def accept(self, *values):
+        kind, value = self.peek()
+        if kind in ('keyword', 'op') and value in values:
+            self.position += 1
+            return value
+        return None
+
+    def expect(self, value):
+        if not self.accept(value):
+            found = self.peek()[1]
+            raise ValueError(
+                f"Expected {value!r} but found {found if found is not None else 'end of formula'!r} "
+                f"in payment formula: {self.logic}"
+            )
+
+    def parse(self):
+        node = self.expression()
+        if self.accept('IF'):
+            node = ('if', node, self.expression())
+        if self.position < len(self.tokens):
+            raise ValueError(f"Unexpected {self.peek()[1]!r} in payment formula: {self.logic}")
+        return node
+
+    def expression(self):
+        node = self.conjunction()
+        while self.accept('OR'):
+            node = ('binary', 'OR', node, self.conjunction())
+        return node
+
+    def conjunction(self):
+        node = self.negation()
+        while self.accept('AND'):
+            node = ('binary', 'AND', node, self.negation())
+        return node
+
+    def negation(self):
+        if self.accept('NOT'):
+            return ('not', self.negation())
+        return self.comparison()
+
+    def comparison(self):
+        node = self.additive()
+        operator = self.accept(*COMPARISON_OPERATORS)
+        if operator:
+            return ('binary', '<>' if operator == '!=' else operator, node, self.additive())
+        if self.accept('IN'):
+            self.expect('(')
+            items = [self.additive()]
+            while self.accept(','):
+                items.append(self.additive())
+            self.expect(')')
+            return ('in', node, items)
+        return node
+
+    def additive(self):
+        node = self.multiplicative()
+        while True:
+            operator = self.accept('+', '-')
+            if not operator:
+                return node
+            node = ('binary', operator, node, self.multiplicative())
+
+    def multiplicative(self):
+        node = self.unary()
+        while True:
+            operator = self.accept('*', '/')
+            if not operator:
+                return node
+            node = ('binary', operator, node, self.unary())
+
+    def unary(self):
+        if self.accept('-'):
+            return ('negate', self.unary())
+        return self.primary()
+
+    def primary(self):
+        if self.accept('('):
+            node = self.expression()
+            self.expect(')')
+            return node
+        kind, value = self.peek()
+        if kind == 'number':
+            self.position += 1
+            return ('number', value)
+        if kind == 'string':
+            self.position += 1
+            return ('string', value[1:-1].replace("''", "'"))
+        if kind == 'name':
+            self.position += 1
+            return ('column', value.upper())
+        raise ValueError(
+            f"Expected a column, number or string but found "
+            f"{value if value is not None else 'end of formula'!r} in payment formula: {self.logic}"
+        )
+
+def formula_hash(logic):
+    return hashlib.sha256(logic.encode()).hexdigest()
+
+# Parsed formulas and compiled projections, keyed by the hash of what they were built from
+COMPILED_FORMULAS = {}
+COMPILED_PROJECTIONS = {}
+
+def parse_formula(logic):
+    """AST of a "Sum of" expression, parsed once per distinct formula text."""
+    key = formula_hash(logic)
+    if key not in COMPILED_FORMULAS:
+        COMPILED_FORMULAS[key] = FormulaParser(logic).parse()
+    return COMPILED_FORMULAS[key]
+
+def formula_columns(node):
+    """Column names referenced anywhere in the AST."""
+    if node[0] == 'column':
+        return {node[1]}
+    children = []
+    for part in node[1:]:
+        if isinstance(part, tuple):
+            children.append(part)
+        elif isinstance(part, list):
+            children.extend(part)
+    return set().union(*(formula_columns(child) for child in children)) if children else set()
+
+def resolve_columns(node, column_names):
+    """
+    How the formula's columns bind to a table: (line count, unresolved columns). The
+    line count is None when the formula uses no line families; the families it uses
+    must all have the same number of lines.
+    """
+    families = line_families(column_names)
+    line_counts = set()
+    unresolved = []
+    for name in sorted(formula_columns(node)):
+        if name in column_names:
+            continue
+        if name in families:
+            line_counts.add(families[name])
+        else:
+            unresolved.append(name)
+    if len(line_counts) > 1:
+        raise ValueError(f"Payment formula mixes line families of different lengths: {sorted(line_counts)}")
+    return (line_counts.pop() if line_counts else None), unresolved
+
+def emit_sql(node, column_names, line=None, numeric=True):
+    """
+    SQL for an AST node. Amounts (columns used in arithmetic or as the summed value)
+    read NULL as 0; columns compared in a condition are left as they are.
+    """
+    kind = node[0]
+    if kind == 'column':
+        name = node[1] if node[1] in column_names else f"{node[1]}_{line}"
+        return f"COALESCE({name}, 0)" if numeric else name
+    if kind == 'number':
+        return node[1]
+    if kind == 'string':
+        return "'" + node[1].replace("'", "''") + "'"
+    if kind == 'negate':
+        return f"-({emit_sql(node[1], column_names, line)})"
+    if kind == 'not':
+        return f"NOT ({emit_sql(node[1], column_names, line, numeric=False)})"
+    if kind == 'in':
+        items = ", ".join(emit_sql(item, column_names, line, numeric=False) for item in node[2])
+        return f"{emit_sql(node[1], column_names, line, numeric=False)} IN ({items})"
+    if kind == 'binary':
+        operator = node[1]
+        arithmetic = operator in ('+', '-', '*', '/')
+        left = emit_sql(node[2], column_names, line, numeric=arithmetic)
+        right = emit_sql(node[3], column_names, line, numeric=arithmetic)
+        return f"({left} {operator} {right})"
+    if kind == 'if':
+        condition = emit_sql(node[2], column_names, line, numeric=False)
+        return f"CASE WHEN {condition} THEN {emit_sql(node[1], column_names, line)} ELSE 0 END"
+    raise ValueError(f"Unknown payment formula node: {kind}")
+
+def compile_formula(logic, column_names):
+    """
+    SQL expression of one formula over a table with the given columns, summed over the
+    lines when the formula uses line families. None when the table lacks its columns.
+    """
+    node = parse_formula(logic)
+    lines, unresolved = resolve_columns(node, column_names)
+    if unresolved:
+        return None
+    if lines is None:
+        return emit_sql(node, column_names)
+    return "\n                + ".join(
+        f"({emit_sql(node, column_names, line)})" for line in range(1, lines + 1)
+    )
+
+def load_payment_formulas(path=PAYMENT_FORMULAS_PATH):
+    """The formula records of the JSON lookup, in file order."""
+    with open(path, encoding='utf-8-sig') as f:
+        return [
+            {
+                'variable_name': item.get("Variable names"),
+                'label': item.get("Labels"),
+                'calculation_logic': item.get("Sum of"),
+                'variable_type': item.get("Type"),
+            }
+            for item in json.load(f)
+        ]
+
+def formula_targets(variable_name):
+    """Table names a formula applies to, from the claim type suffix of its variable name."""
+    claim_type = variable_name.rsplit('_', 1)[-1]
+    if claim_type not in FORMULA_TARGETS:
+        raise ValueError(
+            f"Payment formula {variable_name} has no known claim type; "
+            f"expected a suffix of {', '.join(FORMULA_TARGETS)}"
+        )
+    return [model.__tablename__ for model in FORMULA_TARGETS[claim_type]]
+
+def table_columns(table_name):
+    """Column names of an ingested claims table, from src/models.py."""
+    for models in FORMULA_TARGETS.values():
+        for model in models:
+            if model.__tablename__ == table_name:
+                return [column.name for column in model.__table__.columns]
+    raise ValueError(f"No payment formula target table named {table_name}")
+
+def payment_columns(table_name, formulas=None):
+    """Names of the CALC_<variable> columns payment_projection produces, in the same order."""
+    formulas = load_payment_formulas() if formulas is None else formulas
+    return [f"CALC_{formula['variable_name']}" for formula in formulas if table_name in formula_targets(formula['variable_name'])]
+
+def payment_projection(table_name, formulas=None, indent=16):
+    """
+    SELECT list with one CALC_<variable> column per formula that targets table_name.
+    Every formula is parsed and checked; compiled projections are cached by the hash
+    of the formulas and the table's columns.
+    """
+    formulas = load_payment_formulas() if formulas is None else formulas
+    for formula in formulas:
+        parse_formula(formula['calculation_logic'])
+    columns = table_columns(table_name)
+    key = formula_hash(json.dumps([table_name, columns, formulas, indent], sort_keys=True))
+    if key not in COMPILED_PROJECTIONS:
+        expressions = []
+        for formula in formulas:
+            if table_name not in formula_targets(formula['variable_name']):
+                continue
+            sql = compile_formula(formula['calculation_logic'], columns)
+            if sql is None:
+                _, unresolved = resolve_columns(parse_formula(formula['calculation_logic']), columns)
+                raise ValueError(
+                    f"Payment formula {formula['variable_name']} uses columns {table_name} "
+                    f"does not have: {', '.join(unresolved)}"
+                )
+            expressions.append(f"{sql} AS CALC_{formula['variable_name']}")
+        if not expressions:
+            raise ValueError(f"No payment formulas target {table_name}")
+        COMPILED_PROJECTIONS[key] = f"\n{' ' * indent}, ".join(expressions)
+    return COMPILED_PROJECTIONS[key]
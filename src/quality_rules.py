@@ -0,0 +1,241 @@
+"""
+Compiles the declarative data-quality rules of data/data_quality_rules.json into SQL.
+
+Each rule states what a valid row of a target (beneficiary_summary or carrier_claims)
+looks like, either per column or across columns:
+
+    not_empty   the columns are filled in (not NULL, '' or 'nan')
+    date        the columns are real YYYYMMDD dates; "required": true also rejects empties
+    range       the columns are within "min" and/or "max"
+    in_set      the columns hold one of "values"
+    in_lookup   the columns hold a code of the "lookup" table ("lookup_column", default code)
+    expression  a SQL predicate over the row must hold; NULL counts as holding
+
+Per-column checks pass empty values, so missing data is only reported by not_empty and
+required rules. "columns" accepts fnmatch patterns such as LINE_PRCSG_IND_CD_*; a rule
+over several columns is violated when any of them fails.
+
+All rules of a target are compiled into one SELECT per table: every rule becomes a 0/1
+flag packed into DEFECT_MASK_n words, so adding a rule adds a bit, not a table scan.
+"""
+import os
+import re
+import json
+import fnmatch
+
+from sqlalchemy import Float, Integer, String, text
+
+from src.db import engine
+from src.models import SrcBeneficiarySummary, SrcCarrierClaims
+from src.ingest import BENEFICIARY_TABLES, CLAIM_TABLES
+from src.audit_sql import defect_mask_columns, defect_flag_columns
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUALITY_RULES_PATH = os.path.join(project_root, "data", "data_quality_rules.json")
+
+# Rule target -> the source and new tables it is checked on, their model and the row keys
+# kept in the violations table
+RULE_TARGETS = {
+    'beneficiary_summary': {
+        'tables': BENEFICIARY_TABLES,
+        'model': SrcBeneficiarySummary,
+        'keys': ['DESYNPUF_ID', 'YEAR'],
+    },
+    'carrier_claims': {
+        'tables': CLAIM_TABLES,
+        'model': SrcCarrierClaims,
+        'keys': ['DESYNPUF_ID', 'CLM_ID', 'CLM_FROM_DT', 'CLM_THRU_DT'],
+    },
+}
+
+QUALITY_RULES_TABLE = 'dq_rules'
+RULE_VIOLATION_COUNTS_TABLE = 'dq_rule_violation_counts'
+
+# SQL true when a column holds no value, by column type
+EMPTY_BY_TYPE = {
+    String: "COALESCE({col}, '') IN ('', 'nan')",
+    Integer: "{col} IS NULL",
+    Float: "({col} IS NULL OR isnan({col}))",
+}
+
+# SQL true when a non-empty column passes the check
+CHECK_TEMPLATES = {
+    'date': "try_strptime({col}, '%Y%m%d') IS NOT NULL",
+    'range': "({lower} AND {upper})",
+    'in_set': "{col} IN ({values})",
+}
+
+def violations_table(target):
+    return f"dq_{target}_violations"
+
+def load_quality_rules(path=QUALITY_RULES_PATH):
+    """The rules of the JSON file, in file order, with their ids checked."""
+    with open(path, encoding='utf-8-sig') as f:
+        rules = json.load(f)
+    seen = set()
+    for rule in rules:
+        rule_id = rule.get('id', '')
+        if not re.fullmatch(r"[A-Z][A-Z0-9_]*", rule_id):
+            raise ValueError(f"Data quality rule id {rule_id!r} must be an upper case SQL identifier")
+        if rule_id in seen:
+            raise ValueError(f"Data quality rule {rule_id} is defined more than once")
+        if rule.get('target') not in RULE_TARGETS:
+            raise ValueError(
+                f"Data quality rule {rule_id} has target {rule.get('target')!r}; "
+                f"expected one of {', '.join(RULE_TARGETS)}"
+            )
+        seen.add(rule_id)
+    return rules
+
+def rule_columns(rule, column_types):
+    """Columns of the target matching the rule's column patterns, in table order."""
+    columns = []
+    for pattern in rule.get('columns', []):
+        matches = [col for col in column_types if fnmatch.fnmatchcase(col, pattern)]
+        if not matches:
+            raise ValueError(f"Data quality rule {rule['id']}: no column matches {pattern!r}")
+        columns += [col for col in matches if col not in columns]
+    if not columns:
+        raise ValueError(f"Data quality rule {rule['id']} ({rule['check']}) needs columns")
+    return columns
+
+def sql_literal(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+def lookup_values(rule):
+    """Codes of the rule's lookup table, read once when the rules are compiled."""
+    column = rule.get('lookup_column', 'code')
+    with engine.connect() as conn:
+        values = [row[0] for row in conn.execute(text(
+            f"SELECT DISTINCT {column} FROM {rule['lookup']} WHERE {column} IS NOT NULL ORDER BY 1"
+        ))]
+    if not values:
+        raise ValueError(f"Data quality rule {rule['id']}: lookup table {rule['lookup']} is empty")
+    return values
+
+def column_check(rule, col, column_type):
+    """SQL true when one column passes the rule."""
+    check = rule['check']
+    empty = EMPTY_BY_TYPE[column_type].format(col=col)
+    if check == 'not_empty':
+        return f"NOT {empty}"
+    if check == 'range':
+        if 'min' not in rule and 'max' not in rule:
+            raise ValueError(f"Data quality rule {rule['id']} needs a min or a max")
+        valid = CHECK_TEMPLATES['range'].format(
+            lower=f"{col} >= {sql_literal(rule['min'])}" if 'min' in rule else "TRUE",
+            upper=f"{col} <= {sql_literal(rule['max'])}" if 'max' in rule else "TRUE",
+        )
+    elif check in ('in_set', 'in_lookup'):
+        values = rule['values'] if check == 'in_set' else lookup_values(rule)
+        valid = CHECK_TEMPLATES['in_set'].format(col=col, values=", ".join(sql_literal(v) for v in values))
+    elif check == 'date':
+        valid = CHECK_TEMPLATES['date'].format(col=col)
+    else:
+        raise ValueError(f"Data quality rule {rule['id']} has unknown check {check!r}")
+    if rule.get('required'):
+        return f"(NOT {empty} AND {valid})"
+    return f"({empty} OR {valid})"
+
+def rule_predicate(rule, column_types):
+    """SQL true when a row satisfies the rule."""
+    if rule['check'] == 'expression':
+        if not rule.get('expression'):
+            raise ValueError(f"Data quality rule {rule['id']} needs an expression")
+        return f"COALESCE(({rule['expression']}), TRUE)"
+    return " AND ".join(
+        column_check(rule, col, column_types[col]) for col in rule_columns(rule, column_types)
+    )
+
+def compile_target(target, rules):
+    """(rule ids, predicates) of the target's rules, in bit order."""
+    column_types = {column.name: type(column.type) for column in RULE_TARGETS[target]['model'].__table__.columns}
+    target_rules = [rule for rule in rules if rule['target'] == target]
+    for rule in target_rules:
+        if rule['id'] in column_types:
+            raise ValueError(f"Data quality rule id {rule['id']} clashes with a {target} column")
+    return [rule['id'] for rule in target_rules], [rule_predicate(rule, column_types) for rule in target_rules]
+
+def quality_rules_script(rules=None):
+    """
+    SQL building dq_rules (the rule catalog with each rule's mask bit), one violations
+    table per target holding the rows that break any rule, and per-table violation counts.
+    """
+    rules = load_quality_rules() if rules is None else rules
+    if not rules:
+        raise ValueError("No data quality rules to compile")
+    catalog = []
+    statements = [f"""
+        CREATE OR REPLACE TABLE {RULE_VIOLATION_COUNTS_TABLE} (
+            TABLE_NAME VARCHAR,
+            RULE_ID VARCHAR,
+            VIOLATIONS BIGINT,
+            ROWS_CHECKED BIGINT
+        );"""]
+    for target, config in RULE_TARGETS.items():
+        rule_ids, predicates = compile_target(target, rules)
+        if not rule_ids:
+            continue
+        for position, (rule_id, predicate) in enumerate(zip(rule_ids, predicates)):
+            rule = next(rule for rule in rules if rule['id'] == rule_id)
+            catalog.append(
+                f"({sql_literal(rule_id)}, {sql_literal(target)}, {sql_literal(rule.get('description', ''))}, "
+                f"{position // 64}, {position % 64}, {sql_literal(predicate)})"
+            )
+        keys = ", ".join(config['keys'])
+        flags = "\n                    , ".join(
+            f"CASE WHEN {predicate} THEN 0 ELSE 1 END AS {rule_id}"
+            for rule_id, predicate in zip(rule_ids, predicates)
+        )
+        scans = "\n                UNION ALL".join(f"""
+                SELECT
+                    '{table}' AS TABLE_NAME
+                    , {keys}
+                    , {flags}
+                FROM {table}""" for table in config['tables'])
+        table = violations_table(target)
+        statements.append(f"""
+        -- Every {target} rule in one pass over each table; only the masks are kept
+        CREATE OR REPLACE TEMP TABLE dq_scan AS
+        SELECT
+            TABLE_NAME
+            , {keys}
+            , {defect_mask_columns(rule_ids)}
+        FROM ({scans}
+        );
+        INSERT INTO {RULE_VIOLATION_COUNTS_TABLE}
+        WITH totals AS (
+            SELECT
+                TABLE_NAME
+                , COUNT(*) AS ROWS_CHECKED
+                , {defect_flag_columns(rule_ids, aggregate='SUM')}
+            FROM dq_scan
+            GROUP BY TABLE_NAME
+        ),
+        unpivoted AS (
+            UNPIVOT totals ON COLUMNS(* EXCLUDE (TABLE_NAME, ROWS_CHECKED)) INTO NAME RULE_ID VALUE VIOLATIONS
+        )
+        SELECT TABLE_NAME, RULE_ID, COALESCE(VIOLATIONS, 0)::BIGINT, ROWS_CHECKED
+        FROM unpivoted;
+        CREATE OR REPLACE TABLE {table} AS
+        SELECT * FROM dq_scan WHERE DEFECT_COUNT > 0;
+        DROP TABLE dq_scan;
+        ANALYZE {table};
+
+        -- The violations with one 0/1 column per rule
+        CREATE OR REPLACE VIEW vw_{table} AS
+        SELECT
+            TABLE_NAME
+            , {keys}
+            , DEFECT_COUNT
+            , {defect_flag_columns(rule_ids)}
+        FROM {table};""")
+    rows = ",\n            ".join(catalog)
+    statements.insert(0, f"""
+        CREATE OR REPLACE TABLE {QUALITY_RULES_TABLE} AS
+        SELECT * FROM (VALUES
+            {rows}
+        ) AS rules(RULE_ID, TARGET, DESCRIPTION, MASK_WORD, MASK_BIT, VALID_WHEN);""")
+    return "".join(statements)
@@ -49,7 +49,7 @@ def html_table_footer():
     """Close HTML table"""
     return '  </tbody>\n</table>\n\n'
 
-def generate_report_md(bene_res, claims_res, six_sigma_res, financial_impact_res, output_path="report.md"):
+def generate_report_md(bene_res, claims_res, six_sigma_res, financial_impact_res, data_quality_res=None, transformation_res=None, output_path="report.md"):
     """
     Generates a comprehensive Markdown report from the comparison results.
     
@@ -58,6 +58,8 @@ def generate_report_md(bene_res, claims_res, six_sigma_res, financial_impact_res
         claims_res: Claims comparison results dictionary
         six_sigma_res: Six Sigma analysis results dictionary
         financial_impact_res: Financial impact analysis results dictionary
+        data_quality_res: Data quality rule results dictionary (section omitted when None)
+        transformation_res: Transformation pattern results dictionary (subsection omitted when None)
         output_path: Path to output markdown file
     """
     # Get project root for relative CSV paths
@@ -101,9 +103,15 @@ def generate_report_md(bene_res, claims_res, six_sigma_res, financial_impact_res
         
         f.write(f"| Missing Beneficiaries | {bene_res['missing_count']:,} | {'❌ Critical' if bene_res['missing_count'] > 100 else '⚠️ Review'} |\n")
         f.write(f"| Beneficiary Records with Defects | {bene_res['bene_records_with_discrepancies']:,} | {'❌ Critical' if bene_res['bene_records_with_discrepancies'] > 1000 else '⚠️ Review'} |\n")
+        f.write(f"| Cross-Year Patterns Changed by Migration | {bene_res['longitudinal_pattern_changes']:,} | {'❌ Critical' if bene_res['longitudinal_pattern_changes'] > 100 else '⚠️ Review'} |\n")
         f.write(f"| Missing Claims | {claims_res['missing_claims_count']:,} | {'❌ Critical' if claims_res['missing_claims_count'] > 1000 else '⚠️ Review'} |\n")
         f.write(f"| Claim Records with Defects | {claims_res['claim_records_with_discrepancies']:,} | {'❌ Critical' if claims_res['claim_records_with_discrepancies'] > 1000 else '⚠️ Review'} |\n")
         f.write(f"| Payment Discrepancies | {claims_res['payment_mismatch_count']:,} | {'❌ Critical' if claims_res['payment_mismatch_count'] > 10000 else '⚠️ Review'} |\n")
+        f.write(f"| Payment Discrepancies (all lines) | {claims_res['line_payment_mismatch_count']:,} | {'❌ Critical' if claims_res['line_payment_mismatch_count'] > 10000 else '⚠️ Review'} |\n")
+        f.write(f"| Claims with Changed Death/Coverage Flags | {claims_res['claim_coverage_diff_count']:,} | {'❌ Critical' if claims_res['claim_coverage_diff_count'] > 1000 else '⚠️ Review'} |\n")
+        f.write(f"| Claims with Diagnosis Codes Reordered Only | {claims_res['diagnosis_reordered_count']:,} | {'✅ Pass' if claims_res['diagnosis_reordered_count'] == 0 else '⚠️ Review'} |\n")
+        f.write(f"| Claims with Line Items Reordered Only | {claims_res['line_permuted_count']:,} ({claims_res['line_phantom_defects']:,} phantom line defects) | {'✅ Pass' if claims_res['line_permuted_count'] == 0 else '⚠️ Review'} |\n")
+        f.write(f"| Orphan Claims Re-linked (identity drift) | {claims_res['relinked_claims_count']:,} | {'✅ Resolved' if claims_res['unlinked_claims_count'] == 0 else '⚠️ Review'} |\n")
         f.write("\n")
         
         # Six Sigma Quality Analysis Section
@@ -173,6 +181,23 @@ def generate_report_md(bene_res, claims_res, six_sigma_res, financial_impact_res
         for _, row in bene_sigma.iterrows():
             f.write(f"| {row['FIELD_FAMILY']} | {int(row['TOTAL_DEFECTS']):,} | {int(row['DPMO']):,} | {row['SIGMA_LEVEL']:.2f}σ |\n")
         f.write("\n")
+
+        # Transformation patterns behind the defects
+        if transformation_res is not None:
+            patterns = transformation_res['transformation_patterns'].nlargest(10, 'MISMATCHES')
+            f.write("### Likely Transformations Behind the Defects\n\n")
+            f.write("Each mismatched value pair is tested against known transformation patterns (date shifted a day, leading zeros lost, ")
+            f.write("truncated, sign flipped, rounded, ...); a single character edit only counts the pairs none of these explain. ")
+            f.write("The pattern explaining the most pairs of a field and its most frequent recurring src -> new mapping point at ")
+            f.write("the likely root cause; a high unexplained share means no known pattern fits.\n\n")
+            f.write("**[transformation_patterns.csv](data/transformation_patterns.csv)** - The top pattern and top mapping of every field with defects\n\n")
+            f.write("| Source | Field | Mismatches | Top Pattern | % Explained | Top Mapping | % of Mismatches | % Unexplained |\n")
+            f.write("|--------|-------|------------|-------------|-------------|-------------|-----------------|---------------|\n")
+            for _, row in patterns.iterrows():
+                top_pattern = row['TOP_PATTERN'] if pd.notna(row['TOP_PATTERN']) else "-"
+                top_mapping = f"`{row['TOP_MAPPING']}`" if pd.notna(row['TOP_MAPPING']) else "-"
+                f.write(f"| {row['SOURCE']} | {row['COLUMN_NAME']} | {int(row['MISMATCHES']):,} | {top_pattern} | {row['TOP_PATTERN_PCT']:.1f}% | {top_mapping} | {row['TOP_MAPPING_PCT']:.1f}% | {row['UNEXPLAINED_PCT']:.1f}% |\n")
+            f.write("\n")
         
         # Financial Impact Section
         f.write("---\n\n")
@@ -202,6 +227,18 @@ def generate_report_md(bene_res, claims_res, six_sigma_res, financial_impact_res
         f.write("- Focus remediation on field families with RUNNING_PCT_OF_TOTAL < 0.8 (first ~80% of errors)\n")
         f.write("- Use this to justify resource allocation for data quality improvement efforts\n")
         f.write("- Cross-reference with six_sigma_carrier.csv to find fields that are both high-defect AND high-cost\n\n")
+
+        # Line amounts that moved between fields rather than changed value
+        transpositions = financial_impact_res['transposition_matrix']
+        f.write("### Transposed Line Amounts\n\n")
+        f.write("Line amounts whose source value turns up in another amount field of the same line in the new system, with both fields changed. ")
+        f.write("Rows are the source field and columns the field the amount moved to; SWAPPED_VALUES counts pairs whose values changed places.\n\n")
+        if len(transpositions) > 0:
+            f.write(transpositions.to_markdown(index=False))
+            f.write("\n\n")
+        else:
+            f.write("✅ No line amounts moved between fields.\n\n")
+        f.write("📊 **Detailed Data**: **[financial_transposition_matrix.csv](data/financial_transposition_matrix.csv)** (each moved amount is in the `audit_financial_transpositions` table)\n\n")
         
         # Beneficiary Financial Impact
         bene_financial = financial_impact_res['financial_impact_beneficiary']
@@ -238,6 +275,7 @@ def generate_report_md(bene_res, claims_res, six_sigma_res, financial_impact_res
         f.write(f"| Date Differences (DOB/DOD) | {bene_res['date_diff_count']:,} | [beneficiary_date_differences.csv](data/beneficiary_date_differences.csv) |\n")
         f.write(f"| Comprehensive Line Differences | {bene_res['comprehensive_beneficiary_count']:,} | [comprehensive_beneficiary_differences.csv](data/comprehensive_beneficiary_differences.csv) |\n")
         f.write(f"| Beneficiary Audit Sample | {bene_res['bene_records_with_discrepancies']:,} | [audit_beneficiary_summary.csv](data/audit_beneficiary_summary.csv) |\n")
+        f.write(f"| Cross-Year Inconsistencies | {bene_res['longitudinal_count']:,} | [beneficiary_longitudinal_inconsistencies.csv](data/beneficiary_longitudinal_inconsistencies.csv) |\n")
         f.write("\n")
         
         if bene_res['mismatch_count'] > 0:
@@ -303,6 +341,15 @@ def generate_report_md(bene_res, claims_res, six_sigma_res, financial_impact_res
         f.write("  - Compare financial fields (MEDREIMB_*, BENRES_*, PPPYMT_*) to quantify volume of defects for each field\n")
         f.write("  - Cross-reference DESYNPUF_IDs with the other CSVs to understand root causes\n")
         f.write("  - Use for detailed reconciliation, auditing, and six sigma calculations\n\n")
+
+        f.write("**7. [beneficiary_longitudinal_inconsistencies.csv](data/beneficiary_longitudinal_inconsistencies.csv)** ({:,} records)\n\n".format(bene_res['longitudinal_count']))
+        f.write("- **Columns**: DESYNPUF_ID, SRC_/NEW_YEARS, SRC_/NEW_INCONSISTENT, FINDING, and per attribute the years it changed (SRC_/NEW_*_CHANGE_YEARS) and its value history (SRC_/NEW_*_HISTORY)\n")
+        f.write("- **What it shows**: Birth date, sex and race that change between a beneficiary's year files, and death dates that change once set, within each system; the source and new patterns are then compared\n")
+        f.write("- **FINDING values**: 'Inconsistent in Both Systems' (carried over from the source), 'Inconsistency Introduced by Migration', 'Inconsistency Removed by Migration', 'Inconsistency Pattern Changed', 'Year Files Differ' (the beneficiary is in different years in each system)\n")
+        f.write("- **Why this matters**: The per-year comparisons only match source and new rows of the same YEAR, so migration bugs that only show across year files are missed there\n\n")
+        summary_df = bene_res['longitudinal_summary'][['FINDING', 'BENEFICIARIES']]
+        f.write(summary_df.to_markdown(index=False))
+        f.write("\n\n")
         
         # Claims Analysis Section
         f.write("---\n\n")
@@ -313,7 +360,11 @@ def generate_report_md(bene_res, claims_res, six_sigma_res, financial_impact_res
         f.write("|------------------|-------|------------|\n")
         f.write(f"| Missing Claims | {claims_res['missing_claims_count']:,} | [missing_claims.csv](data/missing_claims.csv) |\n")
         f.write(f"| Payment Amount Discrepancies | {claims_res['payment_mismatch_count']:,} | [claim_payment_amount_discrepancies.csv](data/claim_payment_amount_discrepancies.csv) |\n")
+        f.write(f"| Payment Amount Discrepancies (all lines and amounts) | {claims_res['line_payment_mismatch_count']:,} | [claim_line_payment_discrepancies.csv](data/claim_line_payment_discrepancies.csv) |\n")
         f.write(f"| Orphan Claims (4-way match) | {claims_res['comprehensive_orphan_claims_count']:,} | [comprehensive_orphan_claims.csv](data/comprehensive_orphan_claims.csv) |\n")
+        f.write(f"| Orphan Claims Re-linked | {claims_res['relinked_claims_count']:,} | [relinked_orphan_claims.csv](data/relinked_orphan_claims.csv) |\n")
+        f.write(f"| Line Items Reordered Only | {claims_res['line_permuted_count']:,} | [claim_line_permutations.csv](data/claim_line_permutations.csv) |\n")
+        f.write(f"| Death/Coverage Flags Differing | {claims_res['claim_coverage_diff_count']:,} | [claim_coverage_differences.csv](data/claim_coverage_differences.csv) |\n")
         f.write(f"| Claim Audit Sample | {claims_res['claim_records_with_discrepancies']:,} | [claim_records_with_discrepancies_sample.csv](data/audit_claim_summary.csv) |\n")
         f.write("\n")
         
@@ -368,15 +419,51 @@ def generate_report_md(bene_res, claims_res, six_sigma_res, financial_impact_res
         f.write("- **Columns**: All 142 carrier claim fields (DESYNPUF_ID, CLM_ID, CLM_FROM_DT, CLM_THRU_DT, diagnosis codes, procedures, NPIs, financials, etc.)\n")
         f.write("- **What it shows**: ANY row where ANY field differs between source and new (SQL EXCEPT operation)\n")
         f.write("- **Size**: Largest claim CSV - this is your master list of all claim-level differences (0 equals match, 1 equals no match)\n")
+        f.write("- **DGNS_CHANGE**: UNCHANGED, REORDERED_ONLY (the same diagnosis codes in different ICD9_DGNS_CD positions) or CODES_CHANGED. ")
+        f.write("With DIAGNOSIS_COMPARISON=set in .env only added or removed codes count as ICD9_DGNS_CD defects, so reordered-only claims are left out; their count is in the executive summary\n")
         f.write("- **How to use**:\n")
         f.write("  - Import into Excel/SQL and pivot by specific columns to find patterns\n")
         f.write("  - Compare financial fields (MEDREIMB_*, BENRES_*, PPPYMT_*) to quantify volume of defects for each field\n")
         f.write("  - Cross-reference DESYNPUF_IDs with the other CSVs to understand root causes\n")
         f.write("  - Use for detailed reconciliation, auditing, and six sigma calculations\n\n")
-        
+
+        f.write("**5. [relinked_orphan_claims.csv](data/relinked_orphan_claims.csv)** ({:,} records)\n\n".format(claims_res['relinked_claims_count']))
+        f.write("- **Columns**: SRC_CLM_ID, NEW_CLM_ID, SRC_/NEW_ DESYNPUF_ID, CLM_FROM_DT and CLM_THRU_DT, BLOCKING_KEYS, MATCH_SCORE, DRIFTED_KEY_FIELDS, DIFFERING_FIELDS, DIFFERING_FIELD_COUNT, COMPARED_FIELDS\n")
+        f.write("- **What it shows**: Source claims missing on the 4-way key paired with the new claim they became, so each drifted claim is one row instead of a missing claim plus an orphan\n")
+        f.write("- **How pairs are found**: Only claims sharing a blocking key (CLM_ID, DESYNPUF_ID with the claim amounts, or DESYNPUF_ID with either claim date) are compared; a pair is kept when each claim is the other's best candidate and MATCH_SCORE, the share of compared fields that agree, is at least 0.7\n")
+        f.write(f"- **Still unmatched**: {claims_res['unlinked_claims_count']:,} claims have no counterpart after re-linking (vw_carrier_claims_unlinked)\n")
+        f.write("- **How to use**: Group by DRIFTED_KEY_FIELDS to see which identity field the migration corrupts; correct the new claim's key fields from the SRC_ columns\n\n")
+
+        f.write("**6. [claim_coverage_differences.csv](data/claim_coverage_differences.csv)** ({:,} records)\n\n".format(claims_res['claim_coverage_diff_count']))
+        f.write("- **What it shows**: Each claim is matched to the beneficiary's year file in effect on CLM_FROM_DT, in each system. Claims are flagged when they start after BENE_DEATH_DT, fall in a year with zero BENE_SMI_CVRAGE_TOT_MONS (Part B) or have no beneficiary file for the claim year; the file lists claims whose flags differ between source and new\n")
+        f.write("- **Flagged claims per system** ([claim_coverage_summary.csv](data/claim_coverage_summary.csv)):\n\n")
+        f.write(claims_res['claim_coverage_summary'][['CHECK_NAME', 'DESCRIPTION', 'SRC_CLAIMS', 'NEW_CLAIMS', 'DIFFERENCE']].to_markdown(index=False))
+        f.write("\n\n")
+
+        f.write("**7. [claim_line_permutations.csv](data/claim_line_permutations.csv)** ({:,} records)\n\n".format(claims_res['line_defect_claims_count']))
+        f.write("- **What it shows**: Every matched claim with a line field defect. Each line item (HCPCS, NPI, tax number, processing indicator, line diagnosis and amounts) is hashed, and the claim's lines are compared as a multiset of hashes\n")
+        f.write("- **LINE_CHANGE**: PERMUTED_ONLY claims hold the same lines in a different order, so their LINE_FIELD_DEFECTS are phantoms of the line order; CHANGED claims have lines added, removed or edited\n")
+        f.write("- **MIN_LINE_EDITS**: The fewest lines to add, remove or substitute to turn the source lines into the new ones (LINE_SLOTS_DIFFERING counts the line positions the audit flags)\n\n")
+        f.write(claims_res['line_permutation_summary'].to_markdown(index=False))
+        f.write("\n\n")
+        
+        # Data Quality Rules Section
+        if data_quality_res is not None:
+            f.write("---\n\n")
+            f.write("## 5. Data Quality Rules\n\n")
+            f.write("Validity rules from `data/data_quality_rules.json`, checked on both the source and the new tables. ")
+            f.write("Rows breaking any rule are in `dq_beneficiary_summary_violations` and `dq_carrier_claims_violations` ")
+            f.write("(one bit per rule; `vw_dq_*_violations` expands them).\n\n")
+            f.write("| Rule | Description | Table | Violations | Rows Checked | % |\n")
+            f.write("|------|-------------|-------|------------|--------------|---|\n")
+            for _, row in data_quality_res['rule_violations'].iterrows():
+                f.write(f"| {row['RULE_ID']} | {row['DESCRIPTION']} | {row['TABLE_NAME']} | {int(row['VIOLATIONS']):,} | {int(row['ROWS_CHECKED']):,} | {row['VIOLATION_PCT']:.2f}% |\n")
+            f.write("\n")
+            f.write("_See [data_quality_rule_violations.csv](data/data_quality_rule_violations.csv)._\n\n")
+
         # Recommendations Section
         f.write("---\n\n")
-        f.write("## 5. Recommendations\n\n")
+        f.write("## 6. Recommendations\n\n")
         
         # Generate data-driven recommendations based on findings
         recommendations = []
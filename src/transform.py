@@ -1,6 +1,36 @@
-from src.db import execute_sql_script
+from src.db import (
+    engine, execute_sql_script, memory_limit_bytes, physical_memory_bytes, MemoryGovernorAbort,
+)
+from src.ingest import encode_surrogate_keys, encode_chronic_flags, CHRONIC_CONDITION_FLAGS, BENEFICIARY_TABLES, CLAIM_TABLES
+from src.audit_sql import (
+    BENEFICIARY_AUDIT_COLUMNS, BENEFICIARY_DEFECT_COLUMNS, BENEFICIARY_MONEY_COLUMNS,
+    CARRIER_DEFECT_COLUMNS, CARRIER_MONEY_COLUMNS,
+    BENEFICIARY_DEMOGRAPHIC_COLUMNS, CARRIER_DATE_DIFF_COLUMNS, CARRIER_LINE_AMOUNT_FAMILIES,
+    CARRIER_IDENTITY_COLUMNS, CARRIER_RELINK_COLUMNS, CARRIER_DIAGNOSIS_COLUMNS,
+    select_list, defect_flag_case_columns, money_value_columns, money_delta_columns, money_delta_names,
+    struct_columns, all_not_null,
+    abs_delta_sum_columns, abs_delta_list, abs_delta_metrics,
+    defect_mask_columns, defect_flag_columns, chronic_flag_decode_columns,
+    COLUMN_DEFECT_COUNTS_TABLE, column_defect_counts_script,
+    field_difference_list, compared_field_count, money_fingerprint,
+    carrier_flag_semantics, diagnosis_set, diagnosis_change,
+    CARRIER_LINE_COUNT, CARRIER_LINE_ITEM_COLUMNS, line_item_hashes, defect_subset_count,
+)
+from src.models import SrcBeneficiarySummary
+from src.payment_formulas import payment_columns, payment_projection
+from src.transformation_patterns import transformation_patterns_script
+from src.quality_rules import (
+    QUALITY_RULES_PATH, QUALITY_RULES_TABLE, RULE_VIOLATION_COUNTS_TABLE, RULE_TARGETS,
+    quality_rules_script, violations_table,
+)
+from src import audit_sql, models, payment_formulas, quality_rules, transformation_patterns
 import os
+import json
+import math
+import hashlib
+import inspect
 import logging
+from sqlalchemy import text
 
 # Import lookup table functions
 import sys
@@ -15,38 +45,122 @@ logger = logging.getLogger(__name__)
 # Get the project root directory (parent of src/)
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-def main():
-    
-    logger.info("Loading lookup tables...")
-    
-    # Load lookup tables BEFORE running SQL transformations
-    try:
-        create_lookups()
-        logger.info("✅ Lookup tables created successfully")
-    except Exception as e:
-        logger.error(f"Error creating lookup tables: {e}")
-        raise
-    
-    try:
-        ingest_formulas()
-        logger.info("✅ Payment formulas ingested successfully")
-    except Exception as e:
-        logger.error(f"Error ingesting formulas: {e}")
-        raise
-    
-    try:
-        ingest_labels()
-        logger.info("✅ Variable labels ingested successfully")
-    except Exception as e:
-        logger.error(f"Error ingesting labels: {e}")
-        raise
-    
+# Memory governor for the heavy carrier audit statements. Before they run, the working
+# set of the claim join is estimated from the claim tables' cardinalities and column
+# widths, and an execution strategy is chosen:
+#   single-pass  the join fits in GOVERNOR_MEMORY_FRACTION of DuckDB's memory_limit
+#   partitioned  the claims are processed in K hash partitions of DESYNPUF_KEY, each
+#                appended to the result, so each join holds about 1/K of the claims
+#   spilling     even GOVERNOR_MAX_PARTITIONS partitions do not fit; run that many and
+#                let DuckDB spill to its temp_directory
+# While the statements run, DuckDB's memory use and the process RSS are watched; passing
+# the cancel limits interrupts the script, which is re-planned with twice the partitions
+# instead of running out of memory. TRANSFORM_PARTITIONS in .env forces the starting count.
+GOVERNOR_MEMORY_FRACTION = 0.5
+GOVERNOR_DUCKDB_CANCEL_FRACTION = 0.95
+GOVERNOR_RSS_CANCEL_FRACTION = 0.9
+GOVERNOR_MAX_PARTITIONS = 64
+
+# Bytes a value of each DuckDB type takes in a join hash table; strings are counted as
+# their 16 byte header
+TYPE_WIDTHS = {
+    'BOOLEAN': 1, 'TINYINT': 1, 'UTINYINT': 1, 'SMALLINT': 2, 'USMALLINT': 2,
+    'INTEGER': 4, 'UINTEGER': 4, 'FLOAT': 4, 'DATE': 4,
+    'BIGINT': 8, 'UBIGINT': 8, 'DOUBLE': 8, 'TIMESTAMP': 8,
+    'HUGEINT': 16, 'UHUGEINT': 16, 'VARCHAR': 16,
+}
+DEFAULT_TYPE_WIDTH = 16
+# Hash and row pointer kept per row of a join hash table
+HASH_ENTRY_BYTES = 16
+
+def estimate_claim_join_bytes(conn):
+    """Working set of the carrier join: the rows of both claim tables plus their CLAIM_KEYs."""
+    rows = dict(conn.execute(text(
+        "SELECT table_name, estimated_size FROM duckdb_tables() WHERE list_contains(:tables, table_name)"
+    ), {'tables': CLAIM_TABLES}).all())
+    widths = {}
+    for table_name, data_type in conn.execute(text(
+        "SELECT table_name, data_type FROM duckdb_columns() WHERE list_contains(:tables, table_name)"
+    ), {'tables': CLAIM_TABLES}):
+        widths[table_name] = widths.get(table_name, 0) + TYPE_WIDTHS.get(data_type, DEFAULT_TYPE_WIDTH)
+    row_bytes = sum(count * (widths.get(table_name, 0) + HASH_ENTRY_BYTES) for table_name, count in rows.items())
+    key_bytes = sum(rows.values()) * (TYPE_WIDTHS['UBIGINT'] + HASH_ENTRY_BYTES)
+    return row_bytes + key_bytes
+
+def make_plan(partitions, memory_limit, estimate):
+    """Strategy, partition count and cancel limits for running in the given partitions."""
+    if partitions == 1:
+        strategy = 'single-pass'
+    elif partitions <= GOVERNOR_MAX_PARTITIONS:
+        strategy = 'partitioned'
+    else:
+        strategy = 'spilling'
+    physical_memory = physical_memory_bytes()
+    memory_limits = {'rss_bytes': physical_memory * GOVERNOR_RSS_CANCEL_FRACTION if physical_memory else None}
+    # Spilling runs are expected to fill DuckDB's memory; only the process RSS is guarded
+    if strategy != 'spilling':
+        memory_limits['duckdb_bytes'] = memory_limit * GOVERNOR_DUCKDB_CANCEL_FRACTION
+    return {
+        'strategy': strategy,
+        'partitions': min(partitions, GOVERNOR_MAX_PARTITIONS),
+        'memory_limit': memory_limit,
+        'estimate_bytes': estimate,
+        'memory_limits': memory_limits,
+    }
+
+def plan_carrier_audit():
+    """Chooses how the carrier audits run from the estimated working set of the claim join."""
+    override = os.getenv('TRANSFORM_PARTITIONS')
+    if override and (not override.isdigit() or int(override) < 1):
+        raise ValueError(f"TRANSFORM_PARTITIONS must be a positive integer, got {override!r}")
+
+    with engine.connect() as conn:
+        memory_limit = memory_limit_bytes(conn)
+        estimate = estimate_claim_join_bytes(conn)
+    partitions = int(override) if override else max(1, math.ceil(estimate / (memory_limit * GOVERNOR_MEMORY_FRACTION)))
+    plan = make_plan(partitions, memory_limit, estimate)
+    logger.info(
+        f"Carrier audit plan: {plan['strategy']} in {plan['partitions']} partition(s), estimated "
+        f"working set {estimate / 1024 ** 3:,.2f} GiB against a {memory_limit / 1024 ** 3:,.2f} GiB memory limit"
+    )
+    return plan
+
+def diagnosis_comparison():
+    """
+    How the carrier audit flags the claim diagnosis codes: 'position' (default) compares
+    ICD9_DGNS_CD_n slot by slot; 'set' only flags codes added or removed, not reordered.
+    """
+    return os.getenv('DIAGNOSIS_COMPARISON', 'position').strip().lower() or 'position'
+
+def run_governed(build_script, label):
+    """
+    Runs the script build_script(partitions) returns under the memory governor. A run the
+    governor cancels is rolled back and re-planned with twice the partitions; a cancelled
+    spilling run is raised.
+    """
+    plan = plan_carrier_audit()
+    while True:
+        try:
+            return execute_sql_script(
+                build_script(plan['partitions']), label=label, memory_limits=plan['memory_limits'],
+            )
+        except MemoryGovernorAbort as e:
+            if plan['strategy'] == 'spilling':
+                raise
+            plan = make_plan(plan['partitions'] * 2, plan['memory_limit'], plan['estimate_bytes'])
+            logger.warning(f"{e}; re-planning {label} as {plan['strategy']} in {plan['partitions']} partitions")
+
+def partition_filter(partitions, bucket):
+    """Predicate selecting one hash partition of the claims; TRUE when unpartitioned."""
+    if partitions == 1:
+        return "TRUE"
+    return f"hash(DESYNPUF_KEY) % {partitions} = {bucket}"
+
+def run_phase_1():
+    """Schema and source row-count views."""
     logger.info("Starting Phase 1 SQL transformations.")
-    sql_script = """CREATE OR REPLACE FUNCTION sigma_level(p_yield) AS (
-            -- This is a standard approximation for the Inverse Normal Distribution
-            -- combined with your 1.5 Sigma Shift
-            (5.5556 * (1 - POWER(1 - p_yield, 0.1186))) + 1.5
-        );
+    sql_script = """-- Superseded by the exact sigma_level_exact function registered on each connection (src/db.py)
+        DROP MACRO IF EXISTS sigma_level;
 
         DROP VIEW IF EXISTS vw_db_schema;
         CREATE VIEW vw_db_schema as 
@@ -76,14 +190,28 @@ def main():
             (SELECT COUNT(*) FROM new_carrier_claims),
             (SELECT COUNT(*) FROM new_carrier_claims) - (SELECT COUNT(*) FROM src_carrier_claims) AS diff;"""
     try:
-        execute_sql_script(sql_script)
+        execute_sql_script(sql_script, label="Phase 1")
         logger.info("✅ Phase 1 SQL transformations completed successfully")
     except Exception as e:
         logger.error(f"Error running Phase 1 SQL transformations: {e}")
         raise
 
+def run_phase_1a():
+    """Data-quality rules of data/data_quality_rules.json over the source and new tables."""
+    logger.info("Starting Phase 1a data quality rules.")
+    sql_script = quality_rules_script()
+
+    try:
+        execute_sql_script(sql_script, label="Phase 1a")
+        logger.info("✅ Phase 1a data quality rules completed successfully")
+    except Exception as e:
+        logger.error(f"Error running Phase 1a data quality rules: {e}")
+        raise
+
+def run_phase_2():
+    """Beneficiary difference views and audit tables."""
     logger.info("Starting Phase 2 SQL transformations.")
-    sql_script = """/*BENEFICIARY DIFFERENCES*/
+    sql_script = f"""/*BENEFICIARY DIFFERENCES*/
 
         CREATE OR REPLACE VIEW vw_beneficiary_errors AS
         SELECT
@@ -95,7 +223,7 @@ def main():
             src_beneficiary_summary s
         LEFT JOIN new_beneficiary_summary n 
         ON
-            s.desynpuf_id = n.desynpuf_id
+            s.desynpuf_key = n.desynpuf_key
             AND s.year = n.year
         WHERE
             (n.desynpuf_id IS NULL and s.bene_death_dt= 'nan') 
@@ -110,7 +238,7 @@ def main():
             new_beneficiary_summary n
         LEFT JOIN src_beneficiary_summary s 
         ON
-            n.desynpuf_id = s.desynpuf_id
+            n.desynpuf_key = s.desynpuf_key
             AND n.year = s.year
         WHERE
             (s.desynpuf_id IS NULL and n.bene_death_dt= 'nan') 
@@ -133,7 +261,7 @@ def main():
             src_beneficiary_summary s
         JOIN new_beneficiary_summary n 
         ON
-            s.desynpuf_id = n.desynpuf_id
+            s.desynpuf_key = n.desynpuf_key
             AND s.year = n.year
         WHERE 
             s.bene_birth_dt IS DISTINCT FROM n.bene_birth_dt
@@ -148,28 +276,30 @@ def main():
                 s.BENE_DEATH_DT as src_dod,
                 n.BENE_DEATH_DT as new_dod       
             FROM src_beneficiary_summary s
-            JOIN new_beneficiary_summary n ON s.DESYNPUF_ID = n.DESYNPUF_ID AND s."YEAR" = n."YEAR"
+            JOIN new_beneficiary_summary n ON s.DESYNPUF_KEY = n.DESYNPUF_KEY AND s."YEAR" = n."YEAR"
             WHERE s.BENE_BIRTH_DT <> n.BENE_BIRTH_DT
                 OR s.BENE_DEATH_DT <> n.BENE_DEATH_DT;
 
         DROP VIEW IF EXISTS vw_beneficiary_lines_not_identical;
         CREATE VIEW vw_beneficiary_lines_not_identical as
         -- This returns all rows that are NOT identical across all columns
-        (SELECT * FROM src_beneficiary_summary EXCEPT SELECT * FROM new_beneficiary_summary)
+        (SELECT * EXCLUDE (DESYNPUF_KEY, SP_CHRONIC_FLAGS) FROM src_beneficiary_summary EXCEPT SELECT * EXCLUDE (DESYNPUF_KEY, SP_CHRONIC_FLAGS) FROM new_beneficiary_summary)
         UNION ALL
-        (SELECT * FROM new_beneficiary_summary EXCEPT SELECT * FROM src_beneficiary_summary);
+        (SELECT * EXCLUDE (DESYNPUF_KEY, SP_CHRONIC_FLAGS) FROM new_beneficiary_summary EXCEPT SELECT * EXCLUDE (DESYNPUF_KEY, SP_CHRONIC_FLAGS) FROM src_beneficiary_summary);
 
-        DROP TABLE IF EXISTS audit_beneficiary_summary;
-        CREATE TABLE audit_beneficiary_summary AS
+        -- One scan and join of the src/new bene-years feeds both the defect mask and the
+        -- money values; the staged comparison is split into the two audit tables below.
+        DROP TABLE IF EXISTS audit_beneficiary_compare;
+        CREATE TABLE audit_beneficiary_compare AS
         WITH KEYS AS (
             SELECT DISTINCT
-                DESYNPUF_ID
+                DESYNPUF_KEY
                 , "YEAR"
             FROM
                 data_eng.main.src_beneficiary_summary
             UNION 
             SELECT DISTINCT
-                DESYNPUF_ID
+                DESYNPUF_KEY
                 , "YEAR"
             FROM 
                 data_eng.main.new_beneficiary_summary        
@@ -177,296 +307,216 @@ def main():
         src_ as (
             SELECT
                 DESYNPUF_ID
+                , DESYNPUF_KEY
                 , "YEAR"
-                , BENE_BIRTH_DT
-                , BENE_DEATH_DT
-                , BENE_SEX_IDENT_CD
-                , BENE_RACE_CD
-                , BENE_ESRD_IND
-                , SP_STATE_CODE
-                , BENE_COUNTY_CD
-                , BENE_HI_CVRAGE_TOT_MONS
-                , BENE_SMI_CVRAGE_TOT_MONS
-                , BENE_HMO_CVRAGE_TOT_MONS
-                , PLAN_CVRG_MOS_NUM
-                , SP_ALZHDMTA
-                , SP_CHF
-                , SP_CHRNKIDN
-                , SP_CNCR
-                , SP_COPD
-                , SP_DEPRESSN
-                , SP_DIABETES
-                , SP_ISCHMCHT
-                , SP_OSTEOPRS
-                , SP_RA_OA
-                , SP_STRKETIA
-                , MEDREIMB_IP
-                , BENRES_IP
-                , PPPYMT_IP
-                , MEDREIMB_OP
-                , BENRES_OP
-                , PPPYMT_OP
-                , MEDREIMB_CAR
-                , BENRES_CAR
-                , PPPYMT_CAR
+                , SP_CHRONIC_FLAGS
+                , {select_list(BENEFICIARY_DEFECT_COLUMNS)}
+                , {money_value_columns(BENEFICIARY_MONEY_COLUMNS, alias='VALUE_{col}')}
             FROM
                 data_eng.main.src_beneficiary_summary
         ),
         new_ as (
             SELECT
                 DESYNPUF_ID
+                , DESYNPUF_KEY
                 , "YEAR"
-                , BENE_BIRTH_DT
-                , BENE_DEATH_DT
-                , BENE_SEX_IDENT_CD
-                , BENE_RACE_CD
-                , BENE_ESRD_IND
-                , SP_STATE_CODE
-                , BENE_COUNTY_CD
-                , BENE_HI_CVRAGE_TOT_MONS
-                , BENE_SMI_CVRAGE_TOT_MONS
-                , BENE_HMO_CVRAGE_TOT_MONS
-                , PLAN_CVRG_MOS_NUM
-                , SP_ALZHDMTA
-                , SP_CHF
-                , SP_CHRNKIDN
-                , SP_CNCR
-                , SP_COPD
-                , SP_DEPRESSN
-                , SP_DIABETES
-                , SP_ISCHMCHT
-                , SP_OSTEOPRS
-                , SP_RA_OA
-                , SP_STRKETIA
-                , MEDREIMB_IP
-                , BENRES_IP
-                , PPPYMT_IP
-                , MEDREIMB_OP
-                , BENRES_OP
-                , PPPYMT_OP
-                , MEDREIMB_CAR
-                , BENRES_CAR
-                , PPPYMT_CAR
+                , SP_CHRONIC_FLAGS
+                , {select_list(BENEFICIARY_DEFECT_COLUMNS)}
+                , {money_value_columns(BENEFICIARY_MONEY_COLUMNS, alias='VALUE_{col}')}
             FROM
                 data_eng.main.new_beneficiary_summary
-        )
-        SELECT
-                k.DESYNPUF_ID
+        ),
+        -- Per-column comparisons are generated from src/models.py (see src/audit_sql.py)
+        flags AS (
+            SELECT
+                COALESCE(s.DESYNPUF_ID, n.DESYNPUF_ID) AS DESYNPUF_ID
+                , k.DESYNPUF_KEY
                 , k."YEAR"
-                -- Demographics & Geography (VARCHAR)
-                , CASE WHEN COALESCE(s.BENE_BIRTH_DT, '') <> COALESCE(n.BENE_BIRTH_DT, '') THEN 1 ELSE 0 END AS BENE_BIRTH_DT
-                , CASE WHEN COALESCE(s.BENE_DEATH_DT, '') <> COALESCE(n.BENE_DEATH_DT, '') THEN 1 ELSE 0 END AS BENE_DEATH_DT
-                , CASE WHEN COALESCE(s.BENE_SEX_IDENT_CD, '') <> COALESCE(n.BENE_SEX_IDENT_CD, '') THEN 1 ELSE 0 END AS BENE_SEX_IDENT_CD
-                , CASE WHEN COALESCE(s.BENE_RACE_CD, '') <> COALESCE(n.BENE_RACE_CD, '') THEN 1 ELSE 0 END AS BENE_RACE_CD
-                , CASE WHEN COALESCE(s.BENE_ESRD_IND, '') <> COALESCE(n.BENE_ESRD_IND, '') THEN 1 ELSE 0 END AS BENE_ESRD_IND
-                , CASE WHEN COALESCE(s.SP_STATE_CODE, '') <> COALESCE(n.SP_STATE_CODE, '') THEN 1 ELSE 0 END AS SP_STATE_CODE
-                , CASE WHEN COALESCE(s.BENE_COUNTY_CD, '') <> COALESCE(n.BENE_COUNTY_CD, '') THEN 1 ELSE 0 END AS BENE_COUNTY_CD
-                
-                -- Coverage Months (INTEGER)
-                , CASE WHEN COALESCE(s.BENE_HI_CVRAGE_TOT_MONS, 0) <> COALESCE(n.BENE_HI_CVRAGE_TOT_MONS, 0) THEN 1 ELSE 0 END AS BENE_HI_CVRAGE_TOT_MONS
-                , CASE WHEN COALESCE(s.BENE_SMI_CVRAGE_TOT_MONS, 0) <> COALESCE(n.BENE_SMI_CVRAGE_TOT_MONS, 0) THEN 1 ELSE 0 END AS BENE_SMI_CVRAGE_TOT_MONS
-                , CASE WHEN COALESCE(s.BENE_HMO_CVRAGE_TOT_MONS, 0) <> COALESCE(n.BENE_HMO_CVRAGE_TOT_MONS, 0) THEN 1 ELSE 0 END AS BENE_HMO_CVRAGE_TOT_MONS
-                , CASE WHEN COALESCE(s.PLAN_CVRG_MOS_NUM, 0) <> COALESCE(n.PLAN_CVRG_MOS_NUM, 0) THEN 1 ELSE 0 END AS PLAN_CVRG_MOS_NUM
-                
-                -- Chronic Conditions (VARCHAR Flags)
-                , CASE WHEN COALESCE(s.SP_ALZHDMTA, '') <> COALESCE(n.SP_ALZHDMTA, '') THEN 1 ELSE 0 END AS SP_ALZHDMTA
-                , CASE WHEN COALESCE(s.SP_CHF, '') <> COALESCE(n.SP_CHF, '') THEN 1 ELSE 0 END AS SP_CHF
-                , CASE WHEN COALESCE(s.SP_CHRNKIDN, '') <> COALESCE(n.SP_CHRNKIDN, '') THEN 1 ELSE 0 END AS SP_CHRNKIDN
-                , CASE WHEN COALESCE(s.SP_CNCR, '') <> COALESCE(n.SP_CNCR, '') THEN 1 ELSE 0 END AS SP_CNCR
-                , CASE WHEN COALESCE(s.SP_COPD, '') <> COALESCE(n.SP_COPD, '') THEN 1 ELSE 0 END AS SP_COPD
-                , CASE WHEN COALESCE(s.SP_DEPRESSN, '') <> COALESCE(n.SP_DEPRESSN, '') THEN 1 ELSE 0 END AS SP_DEPRESSN
-                , CASE WHEN COALESCE(s.SP_DIABETES, '') <> COALESCE(n.SP_DIABETES, '') THEN 1 ELSE 0 END AS SP_DIABETES
-                , CASE WHEN COALESCE(s.SP_ISCHMCHT, '') <> COALESCE(n.SP_ISCHMCHT, '') THEN 1 ELSE 0 END AS SP_ISCHMCHT
-                , CASE WHEN COALESCE(s.SP_OSTEOPRS, '') <> COALESCE(n.SP_OSTEOPRS, '') THEN 1 ELSE 0 END AS SP_OSTEOPRS
-                , CASE WHEN COALESCE(s.SP_RA_OA, '') <> COALESCE(n.SP_RA_OA, '') THEN 1 ELSE 0 END AS SP_RA_OA
-                , CASE WHEN COALESCE(s.SP_STRKETIA, '') <> COALESCE(n.SP_STRKETIA, '') THEN 1 ELSE 0 END AS SP_STRKETIA
-                
-                -- Financials (FLOAT/DOUBLE)
-                , CASE WHEN COALESCE(s.MEDREIMB_IP, 0) <> COALESCE(n.MEDREIMB_IP, 0) THEN 1 ELSE 0 END AS MEDREIMB_IP
-                , CASE WHEN COALESCE(s.BENRES_IP, 0) <> COALESCE(n.BENRES_IP, 0) THEN 1 ELSE 0 END AS BENRES_IP
-                , CASE WHEN COALESCE(s.PPPYMT_IP, 0) <> COALESCE(n.PPPYMT_IP, 0) THEN 1 ELSE 0 END AS PPPYMT_IP
-                , CASE WHEN COALESCE(s.MEDREIMB_OP, 0) <> COALESCE(n.MEDREIMB_OP, 0) THEN 1 ELSE 0 END AS MEDREIMB_OP
-                , CASE WHEN COALESCE(s.BENRES_OP, 0) <> COALESCE(n.BENRES_OP, 0) THEN 1 ELSE 0 END AS BENRES_OP
-                , CASE WHEN COALESCE(s.PPPYMT_OP, 0) <> COALESCE(n.PPPYMT_OP, 0) THEN 1 ELSE 0 END AS PPPYMT_OP
-                , CASE WHEN COALESCE(s.MEDREIMB_CAR, 0) <> COALESCE(n.MEDREIMB_CAR, 0) THEN 1 ELSE 0 END AS MEDREIMB_CAR
-                , CASE WHEN COALESCE(s.BENRES_CAR, 0) <> COALESCE(n.BENRES_CAR, 0) THEN 1 ELSE 0 END AS BENRES_CAR
-                , CASE WHEN COALESCE(s.PPPYMT_CAR, 0) <> COALESCE(n.PPPYMT_CAR, 0) THEN 1 ELSE 0 END AS PPPYMT_CAR
+                , s.DESYNPUF_ID AS SRC_DESYNPUF_ID
+                , n.DESYNPUF_ID AS NEW_DESYNPUF_ID
+                , {struct_columns(BENEFICIARY_DEMOGRAPHIC_COLUMNS, 's')} AS SRC_DEMOGRAPHICS
+                , {struct_columns(BENEFICIARY_DEMOGRAPHIC_COLUMNS, 'n')} AS NEW_DEMOGRAPHICS
+                , {all_not_null(BENEFICIARY_DEMOGRAPHIC_COLUMNS, 's')} AS SRC_DEMOGRAPHICS_COMPLETE
+                , {all_not_null(BENEFICIARY_DEMOGRAPHIC_COLUMNS, 'n')} AS NEW_DEMOGRAPHICS_COMPLETE
+                , {select_list([f"{side}.VALUE_{col} AS {prefix}_{col}" for col in BENEFICIARY_MONEY_COLUMNS for side, prefix in (('s', 'src'), ('n', 'new'))])}
+                , {defect_flag_case_columns(BENEFICIARY_AUDIT_COLUMNS)}
             FROM
                 keys k 
-        LEFT JOIN src_ s ON k.DESYNPUF_ID = s.DESYNPUF_ID AND k."YEAR" = s."YEAR"
-        LEFT JOIN new_ n ON k.DESYNPUF_ID = n.DESYNPUF_ID AND k."YEAR" = n."YEAR";
+        LEFT JOIN src_ s ON k.DESYNPUF_KEY = s.DESYNPUF_KEY AND k."YEAR" = s."YEAR"
+        LEFT JOIN new_ n ON k.DESYNPUF_KEY = n.DESYNPUF_KEY AND k."YEAR" = n."YEAR"
+        )
+        -- The 31 defect flags are stored as one packed bitmask per row (see BENEFICIARY_DEFECT_COLUMNS)
+        SELECT
+            DESYNPUF_ID
+            , DESYNPUF_KEY
+            , "YEAR"
+            , {defect_mask_columns(BENEFICIARY_DEFECT_COLUMNS)}
+            , SRC_DESYNPUF_ID
+            , NEW_DESYNPUF_ID
+            , SRC_DEMOGRAPHICS
+            , NEW_DEMOGRAPHICS
+            , SRC_DEMOGRAPHICS_COMPLETE
+            , NEW_DEMOGRAPHICS_COMPLETE
+            , {select_list(money_delta_names(BENEFICIARY_MONEY_COLUMNS, ('src', 'new')), indent=12)}
+        FROM flags;
+
+        DROP TABLE IF EXISTS audit_beneficiary_summary;
+        CREATE TABLE audit_beneficiary_summary AS
+        SELECT
+            DESYNPUF_ID
+            , DESYNPUF_KEY
+            , "YEAR"
+            , COLUMNS('^DEFECT_MASK_')
+            , DEFECT_COUNT
+        FROM audit_beneficiary_compare;
         -- CREATE INDEX for performance
-        CREATE INDEX idx_audit_beneficiary_desynpuf_year ON audit_beneficiary_summary(DESYNPUF_ID, "YEAR");
+        CREATE INDEX idx_audit_beneficiary_desynpuf_year ON audit_beneficiary_summary(DESYNPUF_KEY, "YEAR");
         ANALYZE audit_beneficiary_summary;
+        {column_defect_counts_script('Beneficiary Summary', 'audit_beneficiary_summary', BENEFICIARY_DEFECT_COLUMNS)}
 
+        -- Readable one-column-per-flag view of the packed chronic condition words
+        CREATE OR REPLACE VIEW vw_beneficiary_chronic_flags AS
+        SELECT
+            'Source' AS SYSTEM
+            , DESYNPUF_ID
+            , "YEAR"
+            , SP_CHRONIC_FLAGS
+            , {chronic_flag_decode_columns()}
+        FROM src_beneficiary_summary
+        UNION ALL
+        SELECT
+            'New' AS SYSTEM
+            , DESYNPUF_ID
+            , "YEAR"
+            , SP_CHRONIC_FLAGS
+            , {chronic_flag_decode_columns()}
+        FROM new_beneficiary_summary;
+
+        -- Which chronic condition flags flip between systems, and between which codes
+        -- (0 = blank, 1 = '1', 2 = '2', 3 = other), in one pass over the packed words
+        CREATE OR REPLACE VIEW vw_chronic_condition_flips AS
+        WITH diffs AS (
+            SELECT
+                s.SP_CHRONIC_FLAGS AS SRC_FLAGS
+                , n.SP_CHRONIC_FLAGS AS NEW_FLAGS
+                , xor(s.SP_CHRONIC_FLAGS, n.SP_CHRONIC_FLAGS) AS DIFF
+            FROM src_beneficiary_summary s
+            JOIN new_beneficiary_summary n ON s.DESYNPUF_KEY = n.DESYNPUF_KEY AND s."YEAR" = n."YEAR"
+            WHERE s.SP_CHRONIC_FLAGS <> n.SP_CHRONIC_FLAGS
+        ),
+        lanes AS (
+            SELECT
+                l.lane
+                , (SRC_FLAGS >> (2 * l.lane)) & 3 AS SRC_CODE
+                , (NEW_FLAGS >> (2 * l.lane)) & 3 AS NEW_CODE
+            FROM diffs
+            CROSS JOIN range({len(CHRONIC_CONDITION_FLAGS)}) l(lane)
+            WHERE ((DIFF >> (2 * l.lane)) & 3) <> 0
+        )
+        SELECT
+            {CHRONIC_CONDITION_FLAGS}[lane + 1] AS FLAG
+            , SRC_CODE
+            , NEW_CODE
+            , COUNT(*) AS BENE_YEARS
+        FROM lanes
+        GROUP BY ALL
+        ORDER BY BENE_YEARS DESC, FLAG;
+
+        -- Readable one-column-per-flag view of the packed audit table
+        CREATE OR REPLACE VIEW vw_audit_beneficiary_summary_flags AS
+        SELECT
+            DESYNPUF_ID
+            , "YEAR"
+            , {defect_flag_columns(BENEFICIARY_DEFECT_COLUMNS)}
+            , DEFECT_COUNT
+        FROM audit_beneficiary_summary;
+
+        -- Financial rows are keyed on the demographics as well as the bene-year: src and new
+        -- share a row only when their demographics agree, otherwise each side gets its own,
+        -- and a side with a NULL demographic matches neither table and carries no values.
         DROP TABLE IF EXISTS audit_beneficiary_financials;
         CREATE TABLE audit_beneficiary_financials AS
-        WITH KEYS AS (
-            SELECT DISTINCT
-                DESYNPUF_ID
+        WITH sides AS (
+            SELECT
+                COALESCE(SRC_DESYNPUF_ID, NEW_DESYNPUF_ID) AS DESYNPUF_ID
+                , DESYNPUF_KEY
                 , "YEAR"
-                , BENE_BIRTH_DT
-                , BENE_DEATH_DT
-                , BENE_SEX_IDENT_CD
-                , BENE_RACE_CD
-            FROM
-                data_eng.main.src_beneficiary_summary
-            UNION 
-            SELECT DISTINCT
-                DESYNPUF_ID
+                , SRC_DEMOGRAPHICS AS DEMOGRAPHICS
+                , SRC_DEMOGRAPHICS_COMPLETE AS DEMOGRAPHICS_COMPLETE
+                , {select_list(money_delta_names(BENEFICIARY_MONEY_COLUMNS, ('src', 'new')))}
+            FROM audit_beneficiary_compare
+            WHERE SRC_DESYNPUF_ID IS NOT NULL
+                AND NEW_DESYNPUF_ID IS NOT NULL
+                AND SRC_DEMOGRAPHICS IS NOT DISTINCT FROM NEW_DEMOGRAPHICS
+            -- The side missing from a row comes back NULL
+            UNION ALL BY NAME
+            SELECT
+                SRC_DESYNPUF_ID AS DESYNPUF_ID
+                , DESYNPUF_KEY
                 , "YEAR"
-                , BENE_BIRTH_DT
-                , BENE_DEATH_DT
-                , BENE_SEX_IDENT_CD
-                , BENE_RACE_CD
-            FROM
-                data_eng.main.new_beneficiary_summary
-        ),
-        src_ AS (
+                , SRC_DEMOGRAPHICS AS DEMOGRAPHICS
+                , SRC_DEMOGRAPHICS_COMPLETE AS DEMOGRAPHICS_COMPLETE
+                , {select_list(money_delta_names(BENEFICIARY_MONEY_COLUMNS, ('src',)))}
+            FROM audit_beneficiary_compare
+            WHERE SRC_DESYNPUF_ID IS NOT NULL
+                AND (NEW_DESYNPUF_ID IS NULL OR SRC_DEMOGRAPHICS IS DISTINCT FROM NEW_DEMOGRAPHICS)
+            UNION ALL BY NAME
             SELECT
-                DESYNPUF_ID
+                NEW_DESYNPUF_ID AS DESYNPUF_ID
+                , DESYNPUF_KEY
                 , "YEAR"
-                , BENE_BIRTH_DT
-                , BENE_DEATH_DT
-                , BENE_SEX_IDENT_CD
-                , BENE_RACE_CD
-                , CASE WHEN isnan(MEDREIMB_IP)  THEN 0 ELSE coalesce(MEDREIMB_IP,  0) END AS MEDREIMB_IP
-                , CASE WHEN isnan(BENRES_IP)    THEN 0 ELSE coalesce(BENRES_IP,    0) END AS BENRES_IP
-                , CASE WHEN isnan(PPPYMT_IP)    THEN 0 ELSE coalesce(PPPYMT_IP,    0) END AS PPPYMT_IP
-                , CASE WHEN isnan(MEDREIMB_OP)  THEN 0 ELSE coalesce(MEDREIMB_OP,  0) END AS MEDREIMB_OP
-                , CASE WHEN isnan(BENRES_OP)    THEN 0 ELSE coalesce(BENRES_OP,    0) END AS BENRES_OP
-                , CASE WHEN isnan(PPPYMT_OP)    THEN 0 ELSE coalesce(PPPYMT_OP,    0) END AS PPPYMT_OP
-                , CASE WHEN isnan(MEDREIMB_CAR) THEN 0 ELSE coalesce(MEDREIMB_CAR, 0) END AS MEDREIMB_CAR
-                , CASE WHEN isnan(BENRES_CAR)   THEN 0 ELSE coalesce(BENRES_CAR,   0) END AS BENRES_CAR
-                , CASE WHEN isnan(PPPYMT_CAR)   THEN 0 ELSE coalesce(PPPYMT_CAR,   0) END AS PPPYMT_CAR
-            FROM data_eng.main.src_beneficiary_summary
+                , NEW_DEMOGRAPHICS AS DEMOGRAPHICS
+                , NEW_DEMOGRAPHICS_COMPLETE AS DEMOGRAPHICS_COMPLETE
+                , {select_list(money_delta_names(BENEFICIARY_MONEY_COLUMNS, ('new',)))}
+            FROM audit_beneficiary_compare
+            WHERE NEW_DESYNPUF_ID IS NOT NULL
+                AND (SRC_DESYNPUF_ID IS NULL OR SRC_DEMOGRAPHICS IS DISTINCT FROM NEW_DEMOGRAPHICS)
         ),
-        new_ AS (
+        matched AS (
             SELECT
-                DESYNPUF_ID
+                CASE WHEN DEMOGRAPHICS_COMPLETE THEN DESYNPUF_ID END AS DESYNPUF_ID
+                , DESYNPUF_KEY
                 , "YEAR"
-                , BENE_BIRTH_DT
-                , BENE_DEATH_DT
-                , BENE_SEX_IDENT_CD
-                , BENE_RACE_CD
-                , CASE WHEN isnan(MEDREIMB_IP)  THEN 0 ELSE coalesce(MEDREIMB_IP,  0) END AS MEDREIMB_IP
-                , CASE WHEN isnan(BENRES_IP)    THEN 0 ELSE coalesce(BENRES_IP,    0) END AS BENRES_IP
-                , CASE WHEN isnan(PPPYMT_IP)    THEN 0 ELSE coalesce(PPPYMT_IP,    0) END AS PPPYMT_IP
-                , CASE WHEN isnan(MEDREIMB_OP)  THEN 0 ELSE coalesce(MEDREIMB_OP,  0) END AS MEDREIMB_OP
-                , CASE WHEN isnan(BENRES_OP)    THEN 0 ELSE coalesce(BENRES_OP,    0) END AS BENRES_OP
-                , CASE WHEN isnan(PPPYMT_OP)    THEN 0 ELSE coalesce(PPPYMT_OP,    0) END AS PPPYMT_OP
-                , CASE WHEN isnan(MEDREIMB_CAR) THEN 0 ELSE coalesce(MEDREIMB_CAR, 0) END AS MEDREIMB_CAR
-                , CASE WHEN isnan(BENRES_CAR)   THEN 0 ELSE coalesce(BENRES_CAR,   0) END AS BENRES_CAR
-                , CASE WHEN isnan(PPPYMT_CAR)   THEN 0 ELSE coalesce(PPPYMT_CAR,   0) END AS PPPYMT_CAR
-            FROM data_eng.main.new_beneficiary_summary
+                , {select_list([f"DEMOGRAPHICS.{col} AS {col}" for col in BENEFICIARY_DEMOGRAPHIC_COLUMNS])}
+                , {select_list([f"CASE WHEN DEMOGRAPHICS_COMPLETE THEN {name} END AS {name}" for name in money_delta_names(BENEFICIARY_MONEY_COLUMNS, ('src', 'new'))])}
+            FROM sides
         )
         SELECT
-                k.DESYNPUF_ID
-                , k."YEAR"
-                , k.BENE_BIRTH_DT
-                , k.BENE_DEATH_DT
-                , k.BENE_SEX_IDENT_CD
-                , k.BENE_RACE_CD
-                , s.MEDREIMB_IP as src_MEDREIMB_IP
-                , n.MEDREIMB_IP as new_MEDREIMB_IP
-                , n.MEDREIMB_IP - s.MEDREIMB_IP as delta_MEDREIMB_IP
-                , abs(n.MEDREIMB_IP - s.MEDREIMB_IP) as abs_delta_MEDREIMB_IP
-                , s.BENRES_IP as src_BENRES_IP
-                , n.BENRES_IP as new_BENRES_IP
-                , n.BENRES_IP - s.BENRES_IP as delta_BENRES_IP
-                , abs(n.BENRES_IP - s.BENRES_IP) as abs_delta_BENRES_IP
-                , s.PPPYMT_IP as src_PPPYMT_IP
-                , n.PPPYMT_IP as new_PPPYMT_IP
-                , n.PPPYMT_IP - s.PPPYMT_IP as delta_PPPYMT_IP
-                , abs(n.PPPYMT_IP - s.PPPYMT_IP) as abs_delta_PPPYMT_IP
-                , s.MEDREIMB_OP as src_MEDREIMB_OP
-                , n.MEDREIMB_OP as new_MEDREIMB_OP
-                , n.MEDREIMB_OP - s.MEDREIMB_OP as delta_MEDREIMB_OP
-                , abs(n.MEDREIMB_OP - s.MEDREIMB_OP) as abs_delta_MEDREIMB_OP
-                , s.BENRES_OP as src_BENRES_OP
-                , n.BENRES_OP as new_BENRES_OP
-                , n.BENRES_OP - s.BENRES_OP as delta_BENRES_OP
-                , abs(n.BENRES_OP - s.BENRES_OP) as abs_delta_BENRES_OP
-                , s.PPPYMT_OP as src_PPPYMT_OP
-                , n.PPPYMT_OP as new_PPPYMT_OP
-                , n.PPPYMT_OP - s.PPPYMT_OP as delta_PPPYMT_OP
-                , abs(n.PPPYMT_OP - s.PPPYMT_OP) as abs_delta_PPPYMT_OP
-                , s.MEDREIMB_CAR as src_MEDREIMB_CAR
-                , n.MEDREIMB_CAR as new_MEDREIMB_CAR
-                , n.MEDREIMB_CAR - s.MEDREIMB_CAR as delta_MEDREIMB_CAR
-                , abs(n.MEDREIMB_CAR - s.MEDREIMB_CAR) as abs_delta_MEDREIMB_CAR
-                , s.BENRES_CAR as src_BENRES_CAR
-                , n.BENRES_CAR as new_BENRES_CAR
-                , n.BENRES_CAR - s.BENRES_CAR as delta_BENRES_CAR
-                , abs(n.BENRES_CAR - s.BENRES_CAR) as abs_delta_BENRES_CAR
-                , s.PPPYMT_CAR as src_PPPYMT_CAR
-                , n.PPPYMT_CAR as new_PPPYMT_CAR
-                , n.PPPYMT_CAR - s.PPPYMT_CAR as delta_PPPYMT_CAR
-                , abs(n.PPPYMT_CAR - s.PPPYMT_CAR) as abs_delta_PPPYMT_CAR
+                DESYNPUF_ID
+                , DESYNPUF_KEY
+                , "YEAR"
+                , {select_list(BENEFICIARY_DEMOGRAPHIC_COLUMNS)}
+                , {money_delta_columns(BENEFICIARY_MONEY_COLUMNS, src='m.src_{col}', new='m.new_{col}')}
             FROM
-                keys k 
-        LEFT JOIN src_ s ON k.DESYNPUF_ID = s.DESYNPUF_ID 
-                AND k."YEAR" = s."YEAR" 
-                AND k.BENE_BIRTH_DT = s.BENE_BIRTH_DT 
-                AND k.BENE_DEATH_DT = s.BENE_DEATH_DT
-                AND k.BENE_SEX_IDENT_CD = s.BENE_SEX_IDENT_CD
-                AND k.BENE_RACE_CD = s.BENE_RACE_CD
-        LEFT JOIN new_ n ON k.DESYNPUF_ID = n.DESYNPUF_ID 
-                AND k."YEAR" = n."YEAR" 
-                AND k.BENE_BIRTH_DT = n.BENE_BIRTH_DT 
-                AND k.BENE_DEATH_DT = n.BENE_DEATH_DT
-                AND k.BENE_SEX_IDENT_CD = n.BENE_SEX_IDENT_CD
-                AND k.BENE_RACE_CD = n.BENE_RACE_CD;
-        CREATE INDEX idx_audit_beneficiary_financials_desynpuf_year ON audit_beneficiary_financials(DESYNPUF_ID, "YEAR");
-        CREATE INDEX idx_audit_beneficiary_financials_desynpuf_year_bene_dts ON audit_beneficiary_financials(DESYNPUF_ID, "YEAR", BENE_BIRTH_DT, BENE_DEATH_DT);
+                matched m;
+        DROP TABLE audit_beneficiary_compare;
+        CREATE INDEX idx_audit_beneficiary_financials_desynpuf_year ON audit_beneficiary_financials(DESYNPUF_KEY, "YEAR");
+        CREATE INDEX idx_audit_beneficiary_financials_desynpuf_year_bene_dts ON audit_beneficiary_financials(DESYNPUF_KEY, "YEAR", BENE_BIRTH_DT, BENE_DEATH_DT);
         ANALYZE audit_beneficiary_financials;
 
         CREATE OR REPLACE VIEW vw_financial_differences_bene AS
         WITH agg AS (
             SELECT
-                DESYNPUF_ID
+                any_value(DESYNPUF_ID) AS DESYNPUF_ID
+                , DESYNPUF_KEY
                 , "YEAR"
-                , sum(abs_delta_MEDREIMB_IP)  as abs_delta_MEDREIMB_IP
-                , sum(abs_delta_BENRES_IP)  as abs_delta_BENRES_IP
-                , sum(abs_delta_PPPYMT_IP)  as abs_delta_PPPYMT_IP
-                , sum(abs_delta_MEDREIMB_OP)  as abs_delta_MEDREIMB_OP
-                , sum(abs_delta_BENRES_OP)  as abs_delta_BENRES_OP
-                , sum(abs_delta_PPPYMT_OP)  as abs_delta_PPPYMT_OP
-                , sum(abs_delta_MEDREIMB_CAR)  as abs_delta_MEDREIMB_CAR
-                , sum(abs_delta_BENRES_CAR)  as abs_delta_BENRES_CAR
-                , sum(abs_delta_PPPYMT_CAR)  as abs_delta_PPPYMT_CAR
+                , {abs_delta_sum_columns(BENEFICIARY_MONEY_COLUMNS)}
             FROM data_eng.main.audit_beneficiary_financials
             GROUP BY 
-                DESYNPUF_ID
+                DESYNPUF_KEY
                 , "YEAR"
         )
         SELECT *
         FROM agg
         WHERE list_sum(list_value(
-                abs_delta_MEDREIMB_IP,
-                abs_delta_BENRES_IP,
-                abs_delta_PPPYMT_IP,
-                abs_delta_MEDREIMB_OP,
-                abs_delta_BENRES_OP,
-                abs_delta_PPPYMT_OP,
-                abs_delta_MEDREIMB_CAR,
-                abs_delta_BENRES_CAR,
-                abs_delta_PPPYMT_CAR
+                {abs_delta_list(BENEFICIARY_MONEY_COLUMNS)}
         )) > 0;
 
         CREATE OR REPLACE TABLE audit_beneficiary_financial_fields AS
         WITH flat AS (
             SELECT
                 [
-                    struct_pack(metric_name := 'abs_delta_MEDREIMB_IP',  metric_value := abs_delta_MEDREIMB_IP),
-                    struct_pack(metric_name := 'abs_delta_BENRES_IP',  metric_value := abs_delta_BENRES_IP),
-                    struct_pack(metric_name := 'abs_delta_PPPYMT_IP',  metric_value := abs_delta_PPPYMT_IP),
-                    struct_pack(metric_name := 'abs_delta_MEDREIMB_OP',  metric_value := abs_delta_MEDREIMB_OP),
-                    struct_pack(metric_name := 'abs_delta_BENRES_OP',  metric_value := abs_delta_BENRES_OP),
-                    struct_pack(metric_name := 'abs_delta_PPPYMT_OP',  metric_value := abs_delta_PPPYMT_OP),
-                    struct_pack(metric_name := 'abs_delta_MEDREIMB_CAR',  metric_value := abs_delta_MEDREIMB_CAR),
-                    struct_pack(metric_name := 'abs_delta_BENRES_CAR',  metric_value := abs_delta_BENRES_CAR),
-                    struct_pack(metric_name := 'abs_delta_PPPYMT_CAR',  metric_value := abs_delta_PPPYMT_CAR)
+                    {abs_delta_metrics(BENEFICIARY_MONEY_COLUMNS)}
                 ] AS metrics
             FROM data_eng.main.vw_financial_differences_bene
         )
@@ -479,593 +529,319 @@ def main():
         ORDER BY total_abs_delta DESC;
         ANALYZE audit_beneficiary_financial_fields;"""
     try:
-        execute_sql_script(sql_script)
+        execute_sql_script(sql_script, label="Phase 2")
         logger.info("✅ Phase 2 SQL transformations completed successfully")
     except Exception as e:
         logger.error(f"Error running Phase 2 SQL transformations: {e}")
         raise
 
-    logger.info("Starting Phase 3 SQL transformations.")
-    sql_script = """
-        DROP TABLE IF EXISTS audit_carrier_claims;
-        CREATE TABLE audit_carrier_claims AS
+def run_phase_2a():
+    """Beneficiary dimension for claim-level views."""
+    logger.info("Starting Phase 2a SQL transformations.")
+    # One row per beneficiary so claim views join 1:1 instead of fanning out to every
+    # bene-year of both systems. Attributes come from the beneficiary's latest year in
+    # each system.
+    sql_script = f"""
+        CREATE OR REPLACE TABLE dim_beneficiary AS
+        WITH src_ AS (
+            SELECT
+                DESYNPUF_KEY
+                , any_value(DESYNPUF_ID) AS DESYNPUF_ID
+                , max("YEAR") AS LAST_YEAR
+                , arg_max(SP_STATE_CODE, "YEAR") AS SP_STATE_CODE
+                , {select_list([f'arg_max({col}, "YEAR") AS {col}' for col in BENEFICIARY_DEMOGRAPHIC_COLUMNS])}
+            FROM src_beneficiary_summary
+            GROUP BY DESYNPUF_KEY
+        ),
+        new_ AS (
+            SELECT
+                DESYNPUF_KEY
+                , any_value(DESYNPUF_ID) AS DESYNPUF_ID
+                , max("YEAR") AS LAST_YEAR
+                , arg_max(SP_STATE_CODE, "YEAR") AS SP_STATE_CODE
+                , {select_list([f'arg_max({col}, "YEAR") AS {col}' for col in BENEFICIARY_DEMOGRAPHIC_COLUMNS])}
+            FROM new_beneficiary_summary
+            GROUP BY DESYNPUF_KEY
+        )
+        SELECT
+            COALESCE(s.DESYNPUF_KEY, n.DESYNPUF_KEY) AS DESYNPUF_KEY
+            , COALESCE(s.DESYNPUF_ID, n.DESYNPUF_ID) AS DESYNPUF_ID
+            , s.DESYNPUF_KEY IS NOT NULL AS IN_SRC
+            , n.DESYNPUF_KEY IS NOT NULL AS IN_NEW
+            -- Source system first, then the new system
+            , COALESCE(ls_s.name, ls_n.name) AS STATE_NAME
+            , s.LAST_YEAR AS SRC_LAST_YEAR
+            , n.LAST_YEAR AS NEW_LAST_YEAR
+            , s.SP_STATE_CODE AS SRC_SP_STATE_CODE
+            , n.SP_STATE_CODE AS NEW_SP_STATE_CODE
+            , ls_s.name AS SRC_STATE_NAME
+            , ls_n.name AS NEW_STATE_NAME
+            , {select_list([f"{side}.{col} AS {prefix}_{col}" for col in BENEFICIARY_DEMOGRAPHIC_COLUMNS for side, prefix in (('s', 'SRC'), ('n', 'NEW'))], indent=12)}
+        FROM src_ s
+        FULL OUTER JOIN new_ n ON s.DESYNPUF_KEY = n.DESYNPUF_KEY
+        LEFT JOIN lookup_state ls_s ON s.SP_STATE_CODE = ls_s.code
+        LEFT JOIN lookup_state ls_n ON n.SP_STATE_CODE = ls_n.code;
+        ANALYZE dim_beneficiary;"""
+    try:
+        execute_sql_script(sql_script, label="Phase 2a")
+        logger.info("✅ Phase 2a SQL transformations completed successfully")
+    except Exception as e:
+        logger.error(f"Error running Phase 2a SQL transformations: {e}")
+        raise
+
+# Beneficiary attributes that must agree across a beneficiary's year files within one
+# system. 'stable' values never change from one year to the next; 'once_set' values (the
+# death date) may first appear in a later year but must not change or disappear after.
+LONGITUDINAL_COLUMNS = {
+    'BENE_BIRTH_DT': 'stable',
+    'BENE_DEATH_DT': 'once_set',
+    'BENE_SEX_IDENT_CD': 'stable',
+    'BENE_RACE_CD': 'stable',
+}
+LONGITUDINAL_SEMANTICS = {
+    'stable': "{col} IS DISTINCT FROM lag({col}) OVER bene_years",
+    'once_set': "COALESCE(lag({col}) OVER bene_years, 'nan') <> 'nan' AND {col} IS DISTINCT FROM lag({col}) OVER bene_years",
+}
+
+def run_phase_2b():
+    """Cross-year consistency of each beneficiary within each system, compared between systems."""
+    logger.info("Starting Phase 2b SQL transformations.")
+    columns = list(LONGITUDINAL_COLUMNS)
+    change_flags = [
+        f"CASE WHEN row_number() OVER bene_years > 1 AND {LONGITUDINAL_SEMANTICS[semantics].format(col=col)} "
+        f"THEN 1 ELSE 0 END AS {col}_CHANGED"
+        for col, semantics in LONGITUDINAL_COLUMNS.items()
+    ]
+    pattern_columns = [
+        column
+        for col in columns
+        for column in (
+            f"""COALESCE(list("YEAR" ORDER BY "YEAR") FILTER (WHERE {col}_CHANGED = 1), []) AS {col}_CHANGE_YEARS""",
+            f"""string_agg(COALESCE({col}, 'NULL'), ' > ' ORDER BY "YEAR") AS {col}_HISTORY""",
+        )
+    ]
+    side_columns = [
+        f"{side}.{col}_{suffix} AS {prefix}_{col}_{suffix}"
+        for col in columns
+        for suffix in ('CHANGE_YEARS', 'HISTORY')
+        for side, prefix in (('s', 'SRC'), ('n', 'NEW'))
+    ]
+    inconsistent = lambda side: " OR ".join(f"len({side}.{col}_CHANGE_YEARS) > 0" for col in columns)
+    change_pattern = lambda side: struct_columns([f"{col}_CHANGE_YEARS" for col in columns], side)
+    sql_script = f"""
+        -- One partitioned pass over both beneficiary files: each beneficiary's years are
+        -- ordered within its system, and every year is compared with the one before it
+        CREATE OR REPLACE TABLE audit_beneficiary_longitudinal AS
+        WITH bene_years AS (
+            SELECT 'SRC' AS SYSTEM, DESYNPUF_KEY, DESYNPUF_ID, "YEAR", {", ".join(columns)}
+            FROM src_beneficiary_summary
+            UNION ALL
+            SELECT 'NEW' AS SYSTEM, DESYNPUF_KEY, DESYNPUF_ID, "YEAR", {", ".join(columns)}
+            FROM new_beneficiary_summary
+        ),
+        year_changes AS (
+            SELECT
+                *
+                , {select_list(change_flags)}
+            FROM bene_years
+            WINDOW bene_years AS (PARTITION BY SYSTEM, DESYNPUF_KEY ORDER BY "YEAR")
+        ),
+        patterns AS (
+            SELECT
+                SYSTEM
+                , DESYNPUF_KEY
+                , any_value(DESYNPUF_ID) AS DESYNPUF_ID
+                , list("YEAR" ORDER BY "YEAR") AS YEARS
+                , {select_list(pattern_columns)}
+            FROM year_changes
+            GROUP BY SYSTEM, DESYNPUF_KEY
+        ),
+        src_ AS (SELECT * FROM patterns WHERE SYSTEM = 'SRC'),
+        new_ AS (SELECT * FROM patterns WHERE SYSTEM = 'NEW')
+        SELECT
+            COALESCE(s.DESYNPUF_KEY, n.DESYNPUF_KEY) AS DESYNPUF_KEY
+            , COALESCE(s.DESYNPUF_ID, n.DESYNPUF_ID) AS DESYNPUF_ID
+            , s.YEARS AS SRC_YEARS
+            , n.YEARS AS NEW_YEARS
+            , COALESCE({inconsistent('s')}, FALSE) AS SRC_INCONSISTENT
+            , COALESCE({inconsistent('n')}, FALSE) AS NEW_INCONSISTENT
+            , CASE
+                WHEN n.DESYNPUF_KEY IS NULL THEN 'Beneficiary Missing in New File'
+                WHEN s.DESYNPUF_KEY IS NULL THEN 'Beneficiary Not in Original File'
+                WHEN s.YEARS <> n.YEARS THEN 'Year Files Differ'
+                WHEN {change_pattern('s')} IS NOT DISTINCT FROM {change_pattern('n')}
+                    THEN CASE WHEN {inconsistent('s')} THEN 'Inconsistent in Both Systems' ELSE 'Consistent' END
+                WHEN NOT ({inconsistent('s')}) THEN 'Inconsistency Introduced by Migration'
+                WHEN NOT ({inconsistent('n')}) THEN 'Inconsistency Removed by Migration'
+                ELSE 'Inconsistency Pattern Changed'
+            END AS FINDING
+            , {select_list(side_columns, indent=12)}
+        FROM src_ s
+        FULL OUTER JOIN new_ n ON s.DESYNPUF_KEY = n.DESYNPUF_KEY;
+        ANALYZE audit_beneficiary_longitudinal;
+
+        -- Beneficiaries whose year-to-year pattern is not the same clean history in both systems
+        CREATE OR REPLACE VIEW vw_beneficiary_longitudinal_errors AS
+        SELECT * EXCLUDE (DESYNPUF_KEY)
+        FROM audit_beneficiary_longitudinal
+        WHERE FINDING <> 'Consistent';
+
+        CREATE OR REPLACE VIEW vw_beneficiary_longitudinal_summary AS
+        SELECT
+            FINDING
+            , COUNT(*) AS BENEFICIARIES
+            , {select_list([f"count_if(len(SRC_{col}_CHANGE_YEARS) > 0) AS SRC_{col}_INCONSISTENT" for col in columns] + [f"count_if(len(NEW_{col}_CHANGE_YEARS) > 0) AS NEW_{col}_INCONSISTENT" for col in columns], indent=12)}
+        FROM audit_beneficiary_longitudinal
+        GROUP BY FINDING
+        ORDER BY BENEFICIARIES DESC;"""
+
+    try:
+        execute_sql_script(sql_script, label="Phase 2b")
+        logger.info("✅ Phase 2b SQL transformations completed successfully")
+    except Exception as e:
+        logger.error(f"Error running Phase 2b SQL transformations: {e}")
+        raise
+
+def carrier_compare_select(partition):
+    """
+    The fused carrier comparison: one scan and join of the src/new claims yielding the
+    defect masks and the money deltas of the claims matching the partition predicate.
+    """
+    flag_columns = carrier_flag_semantics(diagnosis_comparison())
+    return f"""
         WITH KEYS AS (
             SELECT DISTINCT
-                DESYNPUF_ID
-                , CLM_ID
-                , CLM_FROM_DT
-                , CLM_THRU_DT
+                CLAIM_KEY
             FROM
                 data_eng.main.src_carrier_claims
+            WHERE {partition}
             UNION 
             SELECT DISTINCT
-                DESYNPUF_ID
-                , CLM_ID
-                , CLM_FROM_DT
-                , CLM_THRU_DT
+                CLAIM_KEY
             FROM
                 data_eng.main.new_carrier_claims
+            WHERE {partition}
         ),
         src_ as (
             SELECT
                 DESYNPUF_ID
+                , CLAIM_KEY
                 , CLM_ID
                 , CLM_FROM_DT
                 , CLM_THRU_DT
-                , ICD9_DGNS_CD_1
-                , ICD9_DGNS_CD_2
-                , ICD9_DGNS_CD_3
-                , ICD9_DGNS_CD_4
-                , ICD9_DGNS_CD_5
-                , ICD9_DGNS_CD_6
-                , ICD9_DGNS_CD_7
-                , ICD9_DGNS_CD_8
-                , PRF_PHYSN_NPI_1
-                , PRF_PHYSN_NPI_2
-                , PRF_PHYSN_NPI_3
-                , PRF_PHYSN_NPI_4
-                , PRF_PHYSN_NPI_5
-                , PRF_PHYSN_NPI_6
-                , PRF_PHYSN_NPI_7
-                , PRF_PHYSN_NPI_8
-                , PRF_PHYSN_NPI_9
-                , PRF_PHYSN_NPI_10
-                , PRF_PHYSN_NPI_11
-                , PRF_PHYSN_NPI_12
-                , PRF_PHYSN_NPI_13
-                , TAX_NUM_1
-                , TAX_NUM_2
-                , TAX_NUM_3
-                , TAX_NUM_4
-                , TAX_NUM_5
-                , TAX_NUM_6
-                , TAX_NUM_7
-                , TAX_NUM_8
-                , TAX_NUM_9
-                , TAX_NUM_10
-                , TAX_NUM_11
-                , TAX_NUM_12
-                , TAX_NUM_13
-                , HCPCS_CD_1
-                , HCPCS_CD_2
-                , HCPCS_CD_3
-                , HCPCS_CD_4
-                , HCPCS_CD_5
-                , HCPCS_CD_6
-                , HCPCS_CD_7
-                , HCPCS_CD_8
-                , HCPCS_CD_9
-                , HCPCS_CD_10
-                , HCPCS_CD_11
-                , HCPCS_CD_12
-                , HCPCS_CD_13
-                , LINE_NCH_PMT_AMT_1
-                , LINE_NCH_PMT_AMT_2
-                , LINE_NCH_PMT_AMT_3
-                , LINE_NCH_PMT_AMT_4
-                , LINE_NCH_PMT_AMT_5
-                , LINE_NCH_PMT_AMT_6
-                , LINE_NCH_PMT_AMT_7
-                , LINE_NCH_PMT_AMT_8
-                , LINE_NCH_PMT_AMT_9
-                , LINE_NCH_PMT_AMT_10
-                , LINE_NCH_PMT_AMT_11
-                , LINE_NCH_PMT_AMT_12
-                , LINE_NCH_PMT_AMT_13
-                , LINE_BENE_PTB_DDCTBL_AMT_1
-                , LINE_BENE_PTB_DDCTBL_AMT_2
-                , LINE_BENE_PTB_DDCTBL_AMT_3
-                , LINE_BENE_PTB_DDCTBL_AMT_4
-                , LINE_BENE_PTB_DDCTBL_AMT_5
-                , LINE_BENE_PTB_DDCTBL_AMT_6
-                , LINE_BENE_PTB_DDCTBL_AMT_7
-                , LINE_BENE_PTB_DDCTBL_AMT_8
-                , LINE_BENE_PTB_DDCTBL_AMT_9
-                , LINE_BENE_PTB_DDCTBL_AMT_10
-                , LINE_BENE_PTB_DDCTBL_AMT_11
-                , LINE_BENE_PTB_DDCTBL_AMT_12
-                , LINE_BENE_PTB_DDCTBL_AMT_13
-                , LINE_BENE_PRMRY_PYR_PD_AMT_1
-                , LINE_BENE_PRMRY_PYR_PD_AMT_2
-                , LINE_BENE_PRMRY_PYR_PD_AMT_3
-                , LINE_BENE_PRMRY_PYR_PD_AMT_4
-                , LINE_BENE_PRMRY_PYR_PD_AMT_5
-                , LINE_BENE_PRMRY_PYR_PD_AMT_6
-                , LINE_BENE_PRMRY_PYR_PD_AMT_7
-                , LINE_BENE_PRMRY_PYR_PD_AMT_8
-                , LINE_BENE_PRMRY_PYR_PD_AMT_9
-                , LINE_BENE_PRMRY_PYR_PD_AMT_10
-                , LINE_BENE_PRMRY_PYR_PD_AMT_11
-                , LINE_BENE_PRMRY_PYR_PD_AMT_12
-                , LINE_BENE_PRMRY_PYR_PD_AMT_13
-                , LINE_COINSRNC_AMT_1
-                , LINE_COINSRNC_AMT_2
-                , LINE_COINSRNC_AMT_3
-                , LINE_COINSRNC_AMT_4
-                , LINE_COINSRNC_AMT_5
-                , LINE_COINSRNC_AMT_6
-                , LINE_COINSRNC_AMT_7
-                , LINE_COINSRNC_AMT_8
-                , LINE_COINSRNC_AMT_9
-                , LINE_COINSRNC_AMT_10
-                , LINE_COINSRNC_AMT_11
-                , LINE_COINSRNC_AMT_12
-                , LINE_COINSRNC_AMT_13
-                , LINE_ALOWD_CHRG_AMT_1
-                , LINE_ALOWD_CHRG_AMT_2
-                , LINE_ALOWD_CHRG_AMT_3
-                , LINE_ALOWD_CHRG_AMT_4
-                , LINE_ALOWD_CHRG_AMT_5
-                , LINE_ALOWD_CHRG_AMT_6
-                , LINE_ALOWD_CHRG_AMT_7
-                , LINE_ALOWD_CHRG_AMT_8
-                , LINE_ALOWD_CHRG_AMT_9
-                , LINE_ALOWD_CHRG_AMT_10
-                , LINE_ALOWD_CHRG_AMT_11
-                , LINE_ALOWD_CHRG_AMT_12
-                , LINE_ALOWD_CHRG_AMT_13
-                , LINE_PRCSG_IND_CD_1
-                , LINE_PRCSG_IND_CD_2
-                , LINE_PRCSG_IND_CD_3
-                , LINE_PRCSG_IND_CD_4
-                , LINE_PRCSG_IND_CD_5
-                , LINE_PRCSG_IND_CD_6
-                , LINE_PRCSG_IND_CD_7
-                , LINE_PRCSG_IND_CD_8
-                , LINE_PRCSG_IND_CD_9
-                , LINE_PRCSG_IND_CD_10
-                , LINE_PRCSG_IND_CD_11
-                , LINE_PRCSG_IND_CD_12
-                , LINE_PRCSG_IND_CD_13
-                , LINE_ICD9_DGNS_CD_1
-                , LINE_ICD9_DGNS_CD_2
-                , LINE_ICD9_DGNS_CD_3
-                , LINE_ICD9_DGNS_CD_4
-                , LINE_ICD9_DGNS_CD_5
-                , LINE_ICD9_DGNS_CD_6
-                , LINE_ICD9_DGNS_CD_7
-                , LINE_ICD9_DGNS_CD_8
-                , LINE_ICD9_DGNS_CD_9
-                , LINE_ICD9_DGNS_CD_10
-                , LINE_ICD9_DGNS_CD_11
-                , LINE_ICD9_DGNS_CD_12
-                , LINE_ICD9_DGNS_CD_13
+                , {select_list(CARRIER_DEFECT_COLUMNS)}
+                , {diagnosis_set()} AS DGNS_SET
+                -- Financial Fields
+                , {money_value_columns(CARRIER_MONEY_COLUMNS, alias='VALUE_{col}')}
             FROM
                 data_eng.main.src_carrier_claims
+            WHERE {partition}
         ),
         new_ as (
             SELECT
                 DESYNPUF_ID
+                , CLAIM_KEY
                 , CLM_ID
                 , CLM_FROM_DT
                 , CLM_THRU_DT
-                , ICD9_DGNS_CD_1
-                , ICD9_DGNS_CD_2
-                , ICD9_DGNS_CD_3
-                , ICD9_DGNS_CD_4
-                , ICD9_DGNS_CD_5
-                , ICD9_DGNS_CD_6
-                , ICD9_DGNS_CD_7
-                , ICD9_DGNS_CD_8
-                , PRF_PHYSN_NPI_1
-                , PRF_PHYSN_NPI_2
-                , PRF_PHYSN_NPI_3
-                , PRF_PHYSN_NPI_4
-                , PRF_PHYSN_NPI_5
-                , PRF_PHYSN_NPI_6
-                , PRF_PHYSN_NPI_7
-                , PRF_PHYSN_NPI_8
-                , PRF_PHYSN_NPI_9
-                , PRF_PHYSN_NPI_10
-                , PRF_PHYSN_NPI_11
-                , PRF_PHYSN_NPI_12
-                , PRF_PHYSN_NPI_13
-                , TAX_NUM_1
-                , TAX_NUM_2
-                , TAX_NUM_3
-                , TAX_NUM_4
-                , TAX_NUM_5
-                , TAX_NUM_6
-                , TAX_NUM_7
-                , TAX_NUM_8
-                , TAX_NUM_9
-                , TAX_NUM_10
-                , TAX_NUM_11
-                , TAX_NUM_12
-                , TAX_NUM_13
-                , HCPCS_CD_1
-                , HCPCS_CD_2
-                , HCPCS_CD_3
-                , HCPCS_CD_4
-                , HCPCS_CD_5
-                , HCPCS_CD_6
-                , HCPCS_CD_7
-                , HCPCS_CD_8
-                , HCPCS_CD_9
-                , HCPCS_CD_10
-                , HCPCS_CD_11
-                , HCPCS_CD_12
-                , HCPCS_CD_13
-                , LINE_NCH_PMT_AMT_1
-                , LINE_NCH_PMT_AMT_2
-                , LINE_NCH_PMT_AMT_3
-                , LINE_NCH_PMT_AMT_4
-                , LINE_NCH_PMT_AMT_5
-                , LINE_NCH_PMT_AMT_6
-                , LINE_NCH_PMT_AMT_7
-                , LINE_NCH_PMT_AMT_8
-                , LINE_NCH_PMT_AMT_9
-                , LINE_NCH_PMT_AMT_10
-                , LINE_NCH_PMT_AMT_11
-                , LINE_NCH_PMT_AMT_12
-                , LINE_NCH_PMT_AMT_13
-                , LINE_BENE_PTB_DDCTBL_AMT_1
-                , LINE_BENE_PTB_DDCTBL_AMT_2
-                , LINE_BENE_PTB_DDCTBL_AMT_3
-                , LINE_BENE_PTB_DDCTBL_AMT_4
-                , LINE_BENE_PTB_DDCTBL_AMT_5
-                , LINE_BENE_PTB_DDCTBL_AMT_6
-                , LINE_BENE_PTB_DDCTBL_AMT_7
-                , LINE_BENE_PTB_DDCTBL_AMT_8
-                , LINE_BENE_PTB_DDCTBL_AMT_9
-                , LINE_BENE_PTB_DDCTBL_AMT_10
-                , LINE_BENE_PTB_DDCTBL_AMT_11
-                , LINE_BENE_PTB_DDCTBL_AMT_12
-                , LINE_BENE_PTB_DDCTBL_AMT_13
-                , LINE_BENE_PRMRY_PYR_PD_AMT_1
-                , LINE_BENE_PRMRY_PYR_PD_AMT_2
-                , LINE_BENE_PRMRY_PYR_PD_AMT_3
-                , LINE_BENE_PRMRY_PYR_PD_AMT_4
-                , LINE_BENE_PRMRY_PYR_PD_AMT_5
-                , LINE_BENE_PRMRY_PYR_PD_AMT_6
-                , LINE_BENE_PRMRY_PYR_PD_AMT_7
-                , LINE_BENE_PRMRY_PYR_PD_AMT_8
-                , LINE_BENE_PRMRY_PYR_PD_AMT_9
-                , LINE_BENE_PRMRY_PYR_PD_AMT_10
-                , LINE_BENE_PRMRY_PYR_PD_AMT_11
-                , LINE_BENE_PRMRY_PYR_PD_AMT_12
-                , LINE_BENE_PRMRY_PYR_PD_AMT_13
-                , LINE_COINSRNC_AMT_1
-                , LINE_COINSRNC_AMT_2
-                , LINE_COINSRNC_AMT_3
-                , LINE_COINSRNC_AMT_4
-                , LINE_COINSRNC_AMT_5
-                , LINE_COINSRNC_AMT_6
-                , LINE_COINSRNC_AMT_7
-                , LINE_COINSRNC_AMT_8
-                , LINE_COINSRNC_AMT_9
-                , LINE_COINSRNC_AMT_10
-                , LINE_COINSRNC_AMT_11
-                , LINE_COINSRNC_AMT_12
-                , LINE_COINSRNC_AMT_13
-                , LINE_ALOWD_CHRG_AMT_1
-                , LINE_ALOWD_CHRG_AMT_2
-                , LINE_ALOWD_CHRG_AMT_3
-                , LINE_ALOWD_CHRG_AMT_4
-                , LINE_ALOWD_CHRG_AMT_5
-                , LINE_ALOWD_CHRG_AMT_6
-                , LINE_ALOWD_CHRG_AMT_7
-                , LINE_ALOWD_CHRG_AMT_8
-                , LINE_ALOWD_CHRG_AMT_9
-                , LINE_ALOWD_CHRG_AMT_10
-                , LINE_ALOWD_CHRG_AMT_11
-                , LINE_ALOWD_CHRG_AMT_12
-                , LINE_ALOWD_CHRG_AMT_13
-                , LINE_PRCSG_IND_CD_1
-                , LINE_PRCSG_IND_CD_2
-                , LINE_PRCSG_IND_CD_3
-                , LINE_PRCSG_IND_CD_4
-                , LINE_PRCSG_IND_CD_5
-                , LINE_PRCSG_IND_CD_6
-                , LINE_PRCSG_IND_CD_7
-                , LINE_PRCSG_IND_CD_8
-                , LINE_PRCSG_IND_CD_9
-                , LINE_PRCSG_IND_CD_10
-                , LINE_PRCSG_IND_CD_11
-                , LINE_PRCSG_IND_CD_12
-                , LINE_PRCSG_IND_CD_13
-                , LINE_ICD9_DGNS_CD_1
-                , LINE_ICD9_DGNS_CD_2
-                , LINE_ICD9_DGNS_CD_3
-                , LINE_ICD9_DGNS_CD_4
-                , LINE_ICD9_DGNS_CD_5
-                , LINE_ICD9_DGNS_CD_6
-                , LINE_ICD9_DGNS_CD_7
-                , LINE_ICD9_DGNS_CD_8
-                , LINE_ICD9_DGNS_CD_9
-                , LINE_ICD9_DGNS_CD_10
-                , LINE_ICD9_DGNS_CD_11
-                , LINE_ICD9_DGNS_CD_12
-                , LINE_ICD9_DGNS_CD_13
+                , {select_list(CARRIER_DEFECT_COLUMNS)}
+                , {diagnosis_set()} AS DGNS_SET
+                -- Financial Fields
+                , {money_value_columns(CARRIER_MONEY_COLUMNS, alias='VALUE_{col}')}
             FROM
                 data_eng.main.new_carrier_claims
-        )
-        SELECT
-                k.DESYNPUF_ID
-                , k.CLM_ID
-                , k.CLM_FROM_DT
-                , k.CLM_THRU_DT
-                , CASE WHEN COALESCE(s.CLM_FROM_DT, '') <> COALESCE(n.CLM_FROM_DT, '') THEN 1 ELSE 0 END AS CLM_FROM_DT
-                , CASE WHEN COALESCE(s.CLM_THRU_DT, '') <> COALESCE(n.CLM_THRU_DT, '') THEN 1 ELSE 0 END AS CLM_THRU_DT
-                , CASE WHEN COALESCE(s.ICD9_DGNS_CD_1, '') <> COALESCE(n.ICD9_DGNS_CD_1, '') THEN 1 ELSE 0 END AS ICD9_DGNS_CD_1
-                , CASE WHEN COALESCE(s.ICD9_DGNS_CD_2, '') <> COALESCE(n.ICD9_DGNS_CD_2, '') THEN 1 ELSE 0 END AS ICD9_DGNS_CD_2
-                , CASE WHEN COALESCE(s.ICD9_DGNS_CD_3, '') <> COALESCE(n.ICD9_DGNS_CD_3, '') THEN 1 ELSE 0 END AS ICD9_DGNS_CD_3
-                , CASE WHEN COALESCE(s.ICD9_DGNS_CD_4, '') <> COALESCE(n.ICD9_DGNS_CD_4, '') THEN 1 ELSE 0 END AS ICD9_DGNS_CD_4
-                , CASE WHEN COALESCE(s.ICD9_DGNS_CD_5, '') <> COALESCE(n.ICD9_DGNS_CD_5, '') THEN 1 ELSE 0 END AS ICD9_DGNS_CD_5
-                , CASE WHEN COALESCE(s.ICD9_DGNS_CD_6, '') <> COALESCE(n.ICD9_DGNS_CD_6, '') THEN 1 ELSE 0 END AS ICD9_DGNS_CD_6
-                , CASE WHEN COALESCE(s.ICD9_DGNS_CD_7, '') <> COALESCE(n.ICD9_DGNS_CD_7, '') THEN 1 ELSE 0 END AS ICD9_DGNS_CD_7
-                , CASE WHEN COALESCE(s.ICD9_DGNS_CD_8, '') <> COALESCE(n.ICD9_DGNS_CD_8, '') THEN 1 ELSE 0 END AS ICD9_DGNS_CD_8
-                , CASE WHEN COALESCE(s.PRF_PHYSN_NPI_1, '') <> COALESCE(n.PRF_PHYSN_NPI_1, '') THEN 1 ELSE 0 END AS PRF_PHYSN_NPI_1
-                , CASE WHEN COALESCE(s.PRF_PHYSN_NPI_2, '') <> COALESCE(n.PRF_PHYSN_NPI_2, '') THEN 1 ELSE 0 END AS PRF_PHYSN_NPI_2
-                , CASE WHEN COALESCE(s.PRF_PHYSN_NPI_3, '') <> COALESCE(n.PRF_PHYSN_NPI_3, '') THEN 1 ELSE 0 END AS PRF_PHYSN_NPI_3
-                , CASE WHEN COALESCE(s.PRF_PHYSN_NPI_4, '') <> COALESCE(n.PRF_PHYSN_NPI_4, '') THEN 1 ELSE 0 END AS PRF_PHYSN_NPI_4
-                , CASE WHEN COALESCE(s.PRF_PHYSN_NPI_5, '') <> COALESCE(n.PRF_PHYSN_NPI_5, '') THEN 1 ELSE 0 END AS PRF_PHYSN_NPI_5
-                , CASE WHEN COALESCE(s.PRF_PHYSN_NPI_6, '') <> COALESCE(n.PRF_PHYSN_NPI_6, '') THEN 1 ELSE 0 END AS PRF_PHYSN_NPI_6
-                , CASE WHEN COALESCE(s.PRF_PHYSN_NPI_7, '') <> COALESCE(n.PRF_PHYSN_NPI_7, '') THEN 1 ELSE 0 END AS PRF_PHYSN_NPI_7
-                , CASE WHEN COALESCE(s.PRF_PHYSN_NPI_8, '') <> COALESCE(n.PRF_PHYSN_NPI_8, '') THEN 1 ELSE 0 END AS PRF_PHYSN_NPI_8
-                , CASE WHEN COALESCE(s.PRF_PHYSN_NPI_9, '') <> COALESCE(n.PRF_PHYSN_NPI_9, '') THEN 1 ELSE 0 END AS PRF_PHYSN_NPI_9
-                , CASE WHEN COALESCE(s.PRF_PHYSN_NPI_10, '') <> COALESCE(n.PRF_PHYSN_NPI_10, '') THEN 1 ELSE 0 END AS PRF_PHYSN_NPI_10
-                , CASE WHEN COALESCE(s.PRF_PHYSN_NPI_11, '') <> COALESCE(n.PRF_PHYSN_NPI_11, '') THEN 1 ELSE 0 END AS PRF_PHYSN_NPI_11
-                , CASE WHEN COALESCE(s.PRF_PHYSN_NPI_12, '') <> COALESCE(n.PRF_PHYSN_NPI_12, '') THEN 1 ELSE 0 END AS PRF_PHYSN_NPI_12
-                , CASE WHEN COALESCE(s.PRF_PHYSN_NPI_13, '') <> COALESCE(n.PRF_PHYSN_NPI_13, '') THEN 1 ELSE 0 END AS PRF_PHYSN_NPI_13
-                , CASE WHEN COALESCE(s.TAX_NUM_1, '') <> COALESCE(n.TAX_NUM_1, '') THEN 1 ELSE 0 END AS TAX_NUM_1
-                , CASE WHEN COALESCE(s.TAX_NUM_2, '') <> COALESCE(n.TAX_NUM_2, '') THEN 1 ELSE 0 END AS TAX_NUM_2
-                , CASE WHEN COALESCE(s.TAX_NUM_3, '') <> COALESCE(n.TAX_NUM_3, '') THEN 1 ELSE 0 END AS TAX_NUM_3
-                , CASE WHEN COALESCE(s.TAX_NUM_4, '') <> COALESCE(n.TAX_NUM_4, '') THEN 1 ELSE 0 END AS TAX_NUM_4
-                , CASE WHEN COALESCE(s.TAX_NUM_5, '') <> COALESCE(n.TAX_NUM_5, '') THEN 1 ELSE 0 END AS TAX_NUM_5
-                , CASE WHEN COALESCE(s.TAX_NUM_6, '') <> COALESCE(n.TAX_NUM_6, '') THEN 1 ELSE 0 END AS TAX_NUM_6
-                , CASE WHEN COALESCE(s.TAX_NUM_7, '') <> COALESCE(n.TAX_NUM_7, '') THEN 1 ELSE 0 END AS TAX_NUM_7
-                , CASE WHEN COALESCE(s.TAX_NUM_8, '') <> COALESCE(n.TAX_NUM_8, '') THEN 1 ELSE 0 END AS TAX_NUM_8
-                , CASE WHEN COALESCE(s.TAX_NUM_9, '') <> COALESCE(n.TAX_NUM_9, '') THEN 1 ELSE 0 END AS TAX_NUM_9
-                , CASE WHEN COALESCE(s.TAX_NUM_10, '') <> COALESCE(n.TAX_NUM_10, '') THEN 1 ELSE 0 END AS TAX_NUM_10
-                , CASE WHEN COALESCE(s.TAX_NUM_11, '') <> COALESCE(n.TAX_NUM_11, '') THEN 1 ELSE 0 END AS TAX_NUM_11
-                , CASE WHEN COALESCE(s.TAX_NUM_12, '') <> COALESCE(n.TAX_NUM_12, '') THEN 1 ELSE 0 END AS TAX_NUM_12
-                , CASE WHEN COALESCE(s.TAX_NUM_13, '') <> COALESCE(n.TAX_NUM_13, '') THEN 1 ELSE 0 END AS TAX_NUM_13
-                , CASE WHEN COALESCE(s.HCPCS_CD_1, '') <> COALESCE(n.HCPCS_CD_1, '') THEN 1 ELSE 0 END AS HCPCS_CD_1
-                , CASE WHEN COALESCE(s.HCPCS_CD_2, '') <> COALESCE(n.HCPCS_CD_2, '') THEN 1 ELSE 0 END AS HCPCS_CD_2
-                , CASE WHEN COALESCE(s.HCPCS_CD_3, '') <> COALESCE(n.HCPCS_CD_3, '') THEN 1 ELSE 0 END AS HCPCS_CD_3
-                , CASE WHEN COALESCE(s.HCPCS_CD_4, '') <> COALESCE(n.HCPCS_CD_4, '') THEN 1 ELSE 0 END AS HCPCS_CD_4
-                , CASE WHEN COALESCE(s.HCPCS_CD_5, '') <> COALESCE(n.HCPCS_CD_5, '') THEN 1 ELSE 0 END AS HCPCS_CD_5
-                , CASE WHEN COALESCE(s.HCPCS_CD_6, '') <> COALESCE(n.HCPCS_CD_6, '') THEN 1 ELSE 0 END AS HCPCS_CD_6
-                , CASE WHEN COALESCE(s.HCPCS_CD_7, '') <> COALESCE(n.HCPCS_CD_7, '') THEN 1 ELSE 0 END AS HCPCS_CD_7
-                , CASE WHEN COALESCE(s.HCPCS_CD_8, '') <> COALESCE(n.HCPCS_CD_8, '') THEN 1 ELSE 0 END AS HCPCS_CD_8
-                , CASE WHEN COALESCE(s.HCPCS_CD_9, '') <> COALESCE(n.HCPCS_CD_9, '') THEN 1 ELSE 0 END AS HCPCS_CD_9
-                , CASE WHEN COALESCE(s.HCPCS_CD_10, '') <> COALESCE(n.HCPCS_CD_10, '') THEN 1 ELSE 0 END AS HCPCS_CD_10
-                , CASE WHEN COALESCE(s.HCPCS_CD_11, '') <> COALESCE(n.HCPCS_CD_11, '') THEN 1 ELSE 0 END AS HCPCS_CD_11
-                , CASE WHEN COALESCE(s.HCPCS_CD_12, '') <> COALESCE(n.HCPCS_CD_12, '') THEN 1 ELSE 0 END AS HCPCS_CD_12
-                , CASE WHEN COALESCE(s.HCPCS_CD_13, '') <> COALESCE(n.HCPCS_CD_13, '') THEN 1 ELSE 0 END AS HCPCS_CD_13
-                , CASE WHEN COALESCE(s.LINE_NCH_PMT_AMT_1, 0) <> COALESCE(n.LINE_NCH_PMT_AMT_1, 0) THEN 1 ELSE 0 END AS LINE_NCH_PMT_AMT_1
-                , CASE WHEN COALESCE(s.LINE_NCH_PMT_AMT_2, 0) <> COALESCE(n.LINE_NCH_PMT_AMT_2, 0) THEN 1 ELSE 0 END AS LINE_NCH_PMT_AMT_2
-                , CASE WHEN COALESCE(s.LINE_NCH_PMT_AMT_3, 0) <> COALESCE(n.LINE_NCH_PMT_AMT_3, 0) THEN 1 ELSE 0 END AS LINE_NCH_PMT_AMT_3
-                , CASE WHEN COALESCE(s.LINE_NCH_PMT_AMT_4, 0) <> COALESCE(n.LINE_NCH_PMT_AMT_4, 0) THEN 1 ELSE 0 END AS LINE_NCH_PMT_AMT_4
-                , CASE WHEN COALESCE(s.LINE_NCH_PMT_AMT_5, 0) <> COALESCE(n.LINE_NCH_PMT_AMT_5, 0) THEN 1 ELSE 0 END AS LINE_NCH_PMT_AMT_5
-                , CASE WHEN COALESCE(s.LINE_NCH_PMT_AMT_6, 0) <> COALESCE(n.LINE_NCH_PMT_AMT_6, 0) THEN 1 ELSE 0 END AS LINE_NCH_PMT_AMT_6
-                , CASE WHEN COALESCE(s.LINE_NCH_PMT_AMT_7, 0) <> COALESCE(n.LINE_NCH_PMT_AMT_7, 0) THEN 1 ELSE 0 END AS LINE_NCH_PMT_AMT_7
-                , CASE WHEN COALESCE(s.LINE_NCH_PMT_AMT_8, 0) <> COALESCE(n.LINE_NCH_PMT_AMT_8, 0) THEN 1 ELSE 0 END AS LINE_NCH_PMT_AMT_8
-                , CASE WHEN COALESCE(s.LINE_NCH_PMT_AMT_9, 0) <> COALESCE(n.LINE_NCH_PMT_AMT_9, 0) THEN 1 ELSE 0 END AS LINE_NCH_PMT_AMT_9
-                , CASE WHEN COALESCE(s.LINE_NCH_PMT_AMT_10, 0) <> COALESCE(n.LINE_NCH_PMT_AMT_10, 0) THEN 1 ELSE 0 END AS LINE_NCH_PMT_AMT_10
-                , CASE WHEN COALESCE(s.LINE_NCH_PMT_AMT_11, 0) <> COALESCE(n.LINE_NCH_PMT_AMT_11, 0) THEN 1 ELSE 0 END AS LINE_NCH_PMT_AMT_11
-                , CASE WHEN COALESCE(s.LINE_NCH_PMT_AMT_12, 0) <> COALESCE(n.LINE_NCH_PMT_AMT_12, 0) THEN 1 ELSE 0 END AS LINE_NCH_PMT_AMT_12
-                , CASE WHEN COALESCE(s.LINE_NCH_PMT_AMT_13, 0) <> COALESCE(n.LINE_NCH_PMT_AMT_13, 0) THEN 1 ELSE 0 END AS LINE_NCH_PMT_AMT_13
-                , CASE WHEN COALESCE(s.LINE_BENE_PTB_DDCTBL_AMT_1, 0) <> COALESCE(n.LINE_BENE_PTB_DDCTBL_AMT_1, 0) THEN 1 ELSE 0 END AS LINE_BENE_PTB_DDCTBL_AMT_1
-                , CASE WHEN COALESCE(s.LINE_BENE_PTB_DDCTBL_AMT_2, 0) <> COALESCE(n.LINE_BENE_PTB_DDCTBL_AMT_2, 0) THEN 1 ELSE 0 END AS LINE_BENE_PTB_DDCTBL_AMT_2
-                , CASE WHEN COALESCE(s.LINE_BENE_PTB_DDCTBL_AMT_3, 0) <> COALESCE(n.LINE_BENE_PTB_DDCTBL_AMT_3, 0) THEN 1 ELSE 0 END AS LINE_BENE_PTB_DDCTBL_AMT_3
-                , CASE WHEN COALESCE(s.LINE_BENE_PTB_DDCTBL_AMT_4, 0) <> COALESCE(n.LINE_BENE_PTB_DDCTBL_AMT_4, 0) THEN 1 ELSE 0 END AS LINE_BENE_PTB_DDCTBL_AMT_4
-                , CASE WHEN COALESCE(s.LINE_BENE_PTB_DDCTBL_AMT_5, 0) <> COALESCE(n.LINE_BENE_PTB_DDCTBL_AMT_5, 0) THEN 1 ELSE 0 END AS LINE_BENE_PTB_DDCTBL_AMT_5
-                , CASE WHEN COALESCE(s.LINE_BENE_PTB_DDCTBL_AMT_6, 0) <> COALESCE(n.LINE_BENE_PTB_DDCTBL_AMT_6, 0) THEN 1 ELSE 0 END AS LINE_BENE_PTB_DDCTBL_AMT_6
-                , CASE WHEN COALESCE(s.LINE_BENE_PTB_DDCTBL_AMT_7, 0) <> COALESCE(n.LINE_BENE_PTB_DDCTBL_AMT_7, 0) THEN 1 ELSE 0 END AS LINE_BENE_PTB_DDCTBL_AMT_7
-                , CASE WHEN COALESCE(s.LINE_BENE_PTB_DDCTBL_AMT_8, 0) <> COALESCE(n.LINE_BENE_PTB_DDCTBL_AMT_8, 0) THEN 1 ELSE 0 END AS LINE_BENE_PTB_DDCTBL_AMT_8
-                , CASE WHEN COALESCE(s.LINE_BENE_PTB_DDCTBL_AMT_9, 0) <> COALESCE(n.LINE_BENE_PTB_DDCTBL_AMT_9, 0) THEN 1 ELSE 0 END AS LINE_BENE_PTB_DDCTBL_AMT_9
-                , CASE WHEN COALESCE(s.LINE_BENE_PTB_DDCTBL_AMT_10, 0) <> COALESCE(n.LINE_BENE_PTB_DDCTBL_AMT_10, 0) THEN 1 ELSE 0 END AS LINE_BENE_PTB_DDCTBL_AMT_10
-                , CASE WHEN COALESCE(s.LINE_BENE_PTB_DDCTBL_AMT_11, 0) <> COALESCE(n.LINE_BENE_PTB_DDCTBL_AMT_11, 0) THEN 1 ELSE 0 END AS LINE_BENE_PTB_DDCTBL_AMT_11
-                , CASE WHEN COALESCE(s.LINE_BENE_PTB_DDCTBL_AMT_12, 0) <> COALESCE(n.LINE_BENE_PTB_DDCTBL_AMT_12, 0) THEN 1 ELSE 0 END AS LINE_BENE_PTB_DDCTBL_AMT_12
-                , CASE WHEN COALESCE(s.LINE_BENE_PTB_DDCTBL_AMT_13, 0) <> COALESCE(n.LINE_BENE_PTB_DDCTBL_AMT_13, 0) THEN 1 ELSE 0 END AS LINE_BENE_PTB_DDCTBL_AMT_13
-                , CASE WHEN COALESCE(s.LINE_BENE_PRMRY_PYR_PD_AMT_1, 0) <> COALESCE(n.LINE_BENE_PRMRY_PYR_PD_AMT_1, 0) THEN 1 ELSE 0 END AS LINE_BENE_PRMRY_PYR_PD_AMT_1
-                , CASE WHEN COALESCE(s.LINE_BENE_PRMRY_PYR_PD_AMT_2, 0) <> COALESCE(n.LINE_BENE_PRMRY_PYR_PD_AMT_2, 0) THEN 1 ELSE 0 END AS LINE_BENE_PRMRY_PYR_PD_AMT_2
-                , CASE WHEN COALESCE(s.LINE_BENE_PRMRY_PYR_PD_AMT_3, 0) <> COALESCE(n.LINE_BENE_PRMRY_PYR_PD_AMT_3, 0) THEN 1 ELSE 0 END AS LINE_BENE_PRMRY_PYR_PD_AMT_3
-                , CASE WHEN COALESCE(s.LINE_BENE_PRMRY_PYR_PD_AMT_4, 0) <> COALESCE(n.LINE_BENE_PRMRY_PYR_PD_AMT_4, 0) THEN 1 ELSE 0 END AS LINE_BENE_PRMRY_PYR_PD_AMT_4
-                , CASE WHEN COALESCE(s.LINE_BENE_PRMRY_PYR_PD_AMT_5, 0) <> COALESCE(n.LINE_BENE_PRMRY_PYR_PD_AMT_5, 0) THEN 1 ELSE 0 END AS LINE_BENE_PRMRY_PYR_PD_AMT_5
-                , CASE WHEN COALESCE(s.LINE_BENE_PRMRY_PYR_PD_AMT_6, 0) <> COALESCE(n.LINE_BENE_PRMRY_PYR_PD_AMT_6, 0) THEN 1 ELSE 0 END AS LINE_BENE_PRMRY_PYR_PD_AMT_6
-                , CASE WHEN COALESCE(s.LINE_BENE_PRMRY_PYR_PD_AMT_7, 0) <> COALESCE(n.LINE_BENE_PRMRY_PYR_PD_AMT_7, 0) THEN 1 ELSE 0 END AS LINE_BENE_PRMRY_PYR_PD_AMT_7
-                , CASE WHEN COALESCE(s.LINE_BENE_PRMRY_PYR_PD_AMT_8, 0) <> COALESCE(n.LINE_BENE_PRMRY_PYR_PD_AMT_8, 0) THEN 1 ELSE 0 END AS LINE_BENE_PRMRY_PYR_PD_AMT_8
-                , CASE WHEN COALESCE(s.LINE_BENE_PRMRY_PYR_PD_AMT_9, 0) <> COALESCE(n.LINE_BENE_PRMRY_PYR_PD_AMT_9, 0) THEN 1 ELSE 0 END AS LINE_BENE_PRMRY_PYR_PD_AMT_9
-                , CASE WHEN COALESCE(s.LINE_BENE_PRMRY_PYR_PD_AMT_10, 0) <> COALESCE(n.LINE_BENE_PRMRY_PYR_PD_AMT_10, 0) THEN 1 ELSE 0 END AS LINE_BENE_PRMRY_PYR_PD_AMT_10
-                , CASE WHEN COALESCE(s.LINE_BENE_PRMRY_PYR_PD_AMT_11, 0) <> COALESCE(n.LINE_BENE_PRMRY_PYR_PD_AMT_11, 0) THEN 1 ELSE 0 END AS LINE_BENE_PRMRY_PYR_PD_AMT_11
-                , CASE WHEN COALESCE(s.LINE_BENE_PRMRY_PYR_PD_AMT_12, 0) <> COALESCE(n.LINE_BENE_PRMRY_PYR_PD_AMT_12, 0) THEN 1 ELSE 0 END AS LINE_BENE_PRMRY_PYR_PD_AMT_12
-                , CASE WHEN COALESCE(s.LINE_BENE_PRMRY_PYR_PD_AMT_13, 0) <> COALESCE(n.LINE_BENE_PRMRY_PYR_PD_AMT_13, 0) THEN 1 ELSE 0 END AS LINE_BENE_PRMRY_PYR_PD_AMT_13
-                , CASE WHEN COALESCE(s.LINE_COINSRNC_AMT_1, 0) <> COALESCE(n.LINE_COINSRNC_AMT_1, 0) THEN 1 ELSE 0 END AS LINE_COINSRNC_AMT_1
-                , CASE WHEN COALESCE(s.LINE_COINSRNC_AMT_2, 0) <> COALESCE(n.LINE_COINSRNC_AMT_2, 0) THEN 1 ELSE 0 END AS LINE_COINSRNC_AMT_2
-                , CASE WHEN COALESCE(s.LINE_COINSRNC_AMT_3, 0) <> COALESCE(n.LINE_COINSRNC_AMT_3, 0) THEN 1 ELSE 0 END AS LINE_COINSRNC_AMT_3
-                , CASE WHEN COALESCE(s.LINE_COINSRNC_AMT_4, 0) <> COALESCE(n.LINE_COINSRNC_AMT_4, 0) THEN 1 ELSE 0 END AS LINE_COINSRNC_AMT_4
-                , CASE WHEN COALESCE(s.LINE_COINSRNC_AMT_5, 0) <> COALESCE(n.LINE_COINSRNC_AMT_5, 0) THEN 1 ELSE 0 END AS LINE_COINSRNC_AMT_5
-                , CASE WHEN COALESCE(s.LINE_COINSRNC_AMT_6, 0) <> COALESCE(n.LINE_COINSRNC_AMT_6, 0) THEN 1 ELSE 0 END AS LINE_COINSRNC_AMT_6
-                , CASE WHEN COALESCE(s.LINE_COINSRNC_AMT_7, 0) <> COALESCE(n.LINE_COINSRNC_AMT_7, 0) THEN 1 ELSE 0 END AS LINE_COINSRNC_AMT_7
-                , CASE WHEN COALESCE(s.LINE_COINSRNC_AMT_8, 0) <> COALESCE(n.LINE_COINSRNC_AMT_8, 0) THEN 1 ELSE 0 END AS LINE_COINSRNC_AMT_8
-                , CASE WHEN COALESCE(s.LINE_COINSRNC_AMT_9, 0) <> COALESCE(n.LINE_COINSRNC_AMT_9, 0) THEN 1 ELSE 0 END AS LINE_COINSRNC_AMT_9
-                , CASE WHEN COALESCE(s.LINE_COINSRNC_AMT_10, 0) <> COALESCE(n.LINE_COINSRNC_AMT_10, 0) THEN 1 ELSE 0 END AS LINE_COINSRNC_AMT_10
-                , CASE WHEN COALESCE(s.LINE_COINSRNC_AMT_11, 0) <> COALESCE(n.LINE_COINSRNC_AMT_11, 0) THEN 1 ELSE 0 END AS LINE_COINSRNC_AMT_11
-                , CASE WHEN COALESCE(s.LINE_COINSRNC_AMT_12, 0) <> COALESCE(n.LINE_COINSRNC_AMT_12, 0) THEN 1 ELSE 0 END AS LINE_COINSRNC_AMT_12
-                , CASE WHEN COALESCE(s.LINE_COINSRNC_AMT_13, 0) <> COALESCE(n.LINE_COINSRNC_AMT_13, 0) THEN 1 ELSE 0 END AS LINE_COINSRNC_AMT_13
-                , CASE WHEN COALESCE(s.LINE_ALOWD_CHRG_AMT_1, 0) <> COALESCE(n.LINE_ALOWD_CHRG_AMT_1, 0) THEN 1 ELSE 0 END AS LINE_ALOWD_CHRG_AMT_1
-                , CASE WHEN COALESCE(s.LINE_ALOWD_CHRG_AMT_2, 0) <> COALESCE(n.LINE_ALOWD_CHRG_AMT_2, 0) THEN 1 ELSE 0 END AS LINE_ALOWD_CHRG_AMT_2
-                , CASE WHEN COALESCE(s.LINE_ALOWD_CHRG_AMT_3, 0) <> COALESCE(n.LINE_ALOWD_CHRG_AMT_3, 0) THEN 1 ELSE 0 END AS LINE_ALOWD_CHRG_AMT_3
-                , CASE WHEN COALESCE(s.LINE_ALOWD_CHRG_AMT_4, 0) <> COALESCE(n.LINE_ALOWD_CHRG_AMT_4, 0) THEN 1 ELSE 0 END AS LINE_ALOWD_CHRG_AMT_4
-                , CASE WHEN COALESCE(s.LINE_ALOWD_CHRG_AMT_5, 0) <> COALESCE(n.LINE_ALOWD_CHRG_AMT_5, 0) THEN 1 ELSE 0 END AS LINE_ALOWD_CHRG_AMT_5
-                , CASE WHEN COALESCE(s.LINE_ALOWD_CHRG_AMT_6, 0) <> COALESCE(n.LINE_ALOWD_CHRG_AMT_6, 0) THEN 1 ELSE 0 END AS LINE_ALOWD_CHRG_AMT_6
-                , CASE WHEN COALESCE(s.LINE_ALOWD_CHRG_AMT_7, 0) <> COALESCE(n.LINE_ALOWD_CHRG_AMT_7, 0) THEN 1 ELSE 0 END AS LINE_ALOWD_CHRG_AMT_7
-                , CASE WHEN COALESCE(s.LINE_ALOWD_CHRG_AMT_8, 0) <> COALESCE(n.LINE_ALOWD_CHRG_AMT_8, 0) THEN 1 ELSE 0 END AS LINE_ALOWD_CHRG_AMT_8
-                , CASE WHEN COALESCE(s.LINE_ALOWD_CHRG_AMT_9, 0) <> COALESCE(n.LINE_ALOWD_CHRG_AMT_9, 0) THEN 1 ELSE 0 END AS LINE_ALOWD_CHRG_AMT_9
-                , CASE WHEN COALESCE(s.LINE_ALOWD_CHRG_AMT_10, 0) <> COALESCE(n.LINE_ALOWD_CHRG_AMT_10, 0) THEN 1 ELSE 0 END AS LINE_ALOWD_CHRG_AMT_10
-                , CASE WHEN COALESCE(s.LINE_ALOWD_CHRG_AMT_11, 0) <> COALESCE(n.LINE_ALOWD_CHRG_AMT_11, 0) THEN 1 ELSE 0 END AS LINE_ALOWD_CHRG_AMT_11
-                , CASE WHEN COALESCE(s.LINE_ALOWD_CHRG_AMT_12, 0) <> COALESCE(n.LINE_ALOWD_CHRG_AMT_12, 0) THEN 1 ELSE 0 END AS LINE_ALOWD_CHRG_AMT_12
-                , CASE WHEN COALESCE(s.LINE_ALOWD_CHRG_AMT_13, 0) <> COALESCE(n.LINE_ALOWD_CHRG_AMT_13, 0) THEN 1 ELSE 0 END AS LINE_ALOWD_CHRG_AMT_13
-                , CASE WHEN COALESCE(s.LINE_PRCSG_IND_CD_1, '') <> COALESCE(n.LINE_PRCSG_IND_CD_1, '') THEN 1 ELSE 0 END AS LINE_PRCSG_IND_CD_1
-                , CASE WHEN COALESCE(s.LINE_PRCSG_IND_CD_2, '') <> COALESCE(n.LINE_PRCSG_IND_CD_2, '') THEN 1 ELSE 0 END AS LINE_PRCSG_IND_CD_2
-                , CASE WHEN COALESCE(s.LINE_PRCSG_IND_CD_3, '') <> COALESCE(n.LINE_PRCSG_IND_CD_3, '') THEN 1 ELSE 0 END AS LINE_PRCSG_IND_CD_3
-                , CASE WHEN COALESCE(s.LINE_PRCSG_IND_CD_4, '') <> COALESCE(n.LINE_PRCSG_IND_CD_4, '') THEN 1 ELSE 0 END AS LINE_PRCSG_IND_CD_4
-                , CASE WHEN COALESCE(s.LINE_PRCSG_IND_CD_5, '') <> COALESCE(n.LINE_PRCSG_IND_CD_5, '') THEN 1 ELSE 0 END AS LINE_PRCSG_IND_CD_5
-                , CASE WHEN COALESCE(s.LINE_PRCSG_IND_CD_6, '') <> COALESCE(n.LINE_PRCSG_IND_CD_6, '') THEN 1 ELSE 0 END AS LINE_PRCSG_IND_CD_6
-                , CASE WHEN COALESCE(s.LINE_PRCSG_IND_CD_7, '') <> COALESCE(n.LINE_PRCSG_IND_CD_7, '') THEN 1 ELSE 0 END AS LINE_PRCSG_IND_CD_7
-                , CASE WHEN COALESCE(s.LINE_PRCSG_IND_CD_8, '') <> COALESCE(n.LINE_PRCSG_IND_CD_8, '') THEN 1 ELSE 0 END AS LINE_PRCSG_IND_CD_8
-                , CASE WHEN COALESCE(s.LINE_PRCSG_IND_CD_9, '') <> COALESCE(n.LINE_PRCSG_IND_CD_9, '') THEN 1 ELSE 0 END AS LINE_PRCSG_IND_CD_9
-                , CASE WHEN COALESCE(s.LINE_PRCSG_IND_CD_10, '') <> COALESCE(n.LINE_PRCSG_IND_CD_10, '') THEN 1 ELSE 0 END AS LINE_PRCSG_IND_CD_10
-                , CASE WHEN COALESCE(s.LINE_PRCSG_IND_CD_11, '') <> COALESCE(n.LINE_PRCSG_IND_CD_11, '') THEN 1 ELSE 0 END AS LINE_PRCSG_IND_CD_11
-                , CASE WHEN COALESCE(s.LINE_PRCSG_IND_CD_12, '') <> COALESCE(n.LINE_PRCSG_IND_CD_12, '') THEN 1 ELSE 0 END AS LINE_PRCSG_IND_CD_12
-                , CASE WHEN COALESCE(s.LINE_PRCSG_IND_CD_13, '') <> COALESCE(n.LINE_PRCSG_IND_CD_13, '') THEN 1 ELSE 0 END AS LINE_PRCSG_IND_CD_13
-                , CASE WHEN COALESCE(s.LINE_ICD9_DGNS_CD_1, '') <> COALESCE(n.LINE_ICD9_DGNS_CD_1, '') THEN 1 ELSE 0 END AS LINE_ICD9_DGNS_CD_1
-                , CASE WHEN COALESCE(s.LINE_ICD9_DGNS_CD_2, '') <> COALESCE(n.LINE_ICD9_DGNS_CD_2, '') THEN 1 ELSE 0 END AS LINE_ICD9_DGNS_CD_2
-                , CASE WHEN COALESCE(s.LINE_ICD9_DGNS_CD_3, '') <> COALESCE(n.LINE_ICD9_DGNS_CD_3, '') THEN 1 ELSE 0 END AS LINE_ICD9_DGNS_CD_3
-                , CASE WHEN COALESCE(s.LINE_ICD9_DGNS_CD_4, '') <> COALESCE(n.LINE_ICD9_DGNS_CD_4, '') THEN 1 ELSE 0 END AS LINE_ICD9_DGNS_CD_4
-                , CASE WHEN COALESCE(s.LINE_ICD9_DGNS_CD_5, '') <> COALESCE(n.LINE_ICD9_DGNS_CD_5, '') THEN 1 ELSE 0 END AS LINE_ICD9_DGNS_CD_5
-                , CASE WHEN COALESCE(s.LINE_ICD9_DGNS_CD_6, '') <> COALESCE(n.LINE_ICD9_DGNS_CD_6, '') THEN 1 ELSE 0 END AS LINE_ICD9_DGNS_CD_6
-                , CASE WHEN COALESCE(s.LINE_ICD9_DGNS_CD_7, '') <> COALESCE(n.LINE_ICD9_DGNS_CD_7, '') THEN 1 ELSE 0 END AS LINE_ICD9_DGNS_CD_7
-                , CASE WHEN COALESCE(s.LINE_ICD9_DGNS_CD_8, '') <> COALESCE(n.LINE_ICD9_DGNS_CD_8, '') THEN 1 ELSE 0 END AS LINE_ICD9_DGNS_CD_8
-                , CASE WHEN COALESCE(s.LINE_ICD9_DGNS_CD_9, '') <> COALESCE(n.LINE_ICD9_DGNS_CD_9, '') THEN 1 ELSE 0 END AS LINE_ICD9_DGNS_CD_9
-                , CASE WHEN COALESCE(s.LINE_ICD9_DGNS_CD_10, '') <> COALESCE(n.LINE_ICD9_DGNS_CD_10, '') THEN 1 ELSE 0 END AS LINE_ICD9_DGNS_CD_10
-                , CASE WHEN COALESCE(s.LINE_ICD9_DGNS_CD_11, '') <> COALESCE(n.LINE_ICD9_DGNS_CD_11, '') THEN 1 ELSE 0 END AS LINE_ICD9_DGNS_CD_11
-                , CASE WHEN COALESCE(s.LINE_ICD9_DGNS_CD_12, '') <> COALESCE(n.LINE_ICD9_DGNS_CD_12, '') THEN 1 ELSE 0 END AS LINE_ICD9_DGNS_CD_12
-                , CASE WHEN COALESCE(s.LINE_ICD9_DGNS_CD_13, '') <> COALESCE(n.LINE_ICD9_DGNS_CD_13, '') THEN 1 ELSE 0 END AS LINE_ICD9_DGNS_CD_13
+            WHERE {partition}
+        ),
+        -- Per-column comparisons are generated from src/models.py (see src/audit_sql.py)
+        flags AS (
+            SELECT
+                COALESCE(s.DESYNPUF_ID, n.DESYNPUF_ID) AS DESYNPUF_ID
+                , COALESCE(s.CLM_ID, n.CLM_ID) AS CLM_ID
+                , COALESCE(s.CLM_FROM_DT, n.CLM_FROM_DT) AS CLM_FROM_DT
+                , COALESCE(s.CLM_THRU_DT, n.CLM_THRU_DT) AS CLM_THRU_DT
+                , k.CLAIM_KEY
+                , CASE WHEN COALESCE(s.CLM_FROM_DT, '') <> COALESCE(n.CLM_FROM_DT, '') THEN 1 ELSE 0 END AS CLM_FROM_DT_DIFF
+                , CASE WHEN COALESCE(s.CLM_THRU_DT, '') <> COALESCE(n.CLM_THRU_DT, '') THEN 1 ELSE 0 END AS CLM_THRU_DT_DIFF
+                , {diagnosis_change()} AS DGNS_CHANGE
+                , {defect_flag_case_columns(flag_columns)}
+                , {money_delta_columns(CARRIER_MONEY_COLUMNS, src='s.VALUE_{col}', new='n.VALUE_{col}')}
             FROM
                 keys k 
-        LEFT JOIN src_ s ON k.DESYNPUF_ID = s.DESYNPUF_ID AND k.CLM_ID = s.CLM_ID AND k.CLM_FROM_DT = s.CLM_FROM_DT AND k.CLM_THRU_DT = s.CLM_THRU_DT
-        LEFT JOIN new_ n ON k.DESYNPUF_ID = n.DESYNPUF_ID AND k.CLM_ID = n.CLM_ID AND k.CLM_FROM_DT = n.CLM_FROM_DT AND k.CLM_THRU_DT = n.CLM_THRU_DT;"""
+        LEFT JOIN src_ s ON k.CLAIM_KEY = s.CLAIM_KEY
+        LEFT JOIN new_ n ON k.CLAIM_KEY = n.CLAIM_KEY
+        )
+        -- The 138 field defect flags are stored as packed bitmasks per row (see CARRIER_DEFECT_COLUMNS)
+        SELECT
+            DESYNPUF_ID
+            , CLM_ID
+            , CLM_FROM_DT
+            , CLM_THRU_DT
+            , CLAIM_KEY
+            , CLM_FROM_DT_DIFF::UTINYINT AS CLM_FROM_DT_DIFF
+            , CLM_THRU_DT_DIFF::UTINYINT AS CLM_THRU_DT_DIFF
+            , DGNS_CHANGE
+            , {defect_mask_columns(CARRIER_DEFECT_COLUMNS)}
+            , {select_list(money_delta_names(CARRIER_MONEY_COLUMNS), indent=12)}
+        FROM flags"""
+
+def carrier_audit_script(partitions):
+    """
+    Phase 3 main path: the fused comparison, one hash partition at a time, staged and
+    then split into the defect and financial audit tables.
+    """
+    compare_statements = []
+    for bucket in range(partitions):
+        target = "CREATE TABLE audit_carrier_compare AS" if bucket == 0 else "INSERT INTO audit_carrier_compare"
+        compare_statements.append(f"{target}{carrier_compare_select(partition_filter(partitions, bucket))};")
+    compare_script = "\n".join(compare_statements)
+    return f"""
+        DROP TABLE IF EXISTS audit_carrier_compare;
+        {compare_script}
+
+        DROP TABLE IF EXISTS audit_carrier_claims;
+        CREATE TABLE audit_carrier_claims AS
+        SELECT
+            DESYNPUF_ID
+            , CLM_ID
+            , CLM_FROM_DT
+            , CLM_THRU_DT
+            , CLAIM_KEY
+            , CLM_FROM_DT_DIFF
+            , CLM_THRU_DT_DIFF
+            , DGNS_CHANGE
+            , COLUMNS('^DEFECT_MASK_')
+            , DEFECT_COUNT
+        FROM audit_carrier_compare;
+
+        DROP TABLE IF EXISTS audit_carrier_financials;
+        CREATE TABLE audit_carrier_financials AS
+        SELECT
+            DESYNPUF_ID
+            , CLM_ID
+            , CLM_FROM_DT
+            , CLM_THRU_DT
+            , CLAIM_KEY
+            , {select_list(money_delta_names(CARRIER_MONEY_COLUMNS), indent=12)}
+        FROM audit_carrier_compare;
+        DROP TABLE audit_carrier_compare;"""
+
+def run_phase_3():
+    """Carrier claim defect and financial audit tables, their views and per-field totals."""
+    logger.info("Starting Phase 3 SQL transformations.")
+    # One scan and join of the src/new claims feeds both the defect masks and the money
+    # deltas; the memory governor picks how many hash partitions it runs in.
     try:
-        execute_sql_script(sql_script)
+        run_governed(carrier_audit_script, "Phase 3")
         logger.info("✅ Phase 3 SQL transformations completed successfully")
     except Exception as e:
         logger.error(f"Error running Phase 3 SQL transformations: {e}")
-        logger.info("Starting Phase 3a SQL transformations.")
-        sql_script = """/*CLAIM DIFFERENCES*/
-
-            DROP VIEW IF EXISTS vw_claim_mismatches;
-            CREATE VIEW vw_claim_mismatches AS
-            SELECT
-                s.clm_id AS CLM_ID
-                ,'Error: Claim Missing in New File' as FINDING
-            FROM
-                src_carrier_claims s
-            LEFT JOIN new_carrier_claims n ON
-                s.clm_id = n.clm_id
-            WHERE
-                n.clm_id IS NULL
-            UNION 
-            SELECT
-                n.clm_id AS CLM_ID
-                ,'Error: Claim Present in New File, Not in Original File' as FINDING
-            FROM
-                new_carrier_claims n
-            LEFT JOIN src_carrier_claims s ON
-                n.clm_id = s.clm_id
-            WHERE
-                s.clm_id IS NULL;
-
-            -- This query calculates the "True" Payment for Line 1 using the business rules
-            -- and compares it to the Source to see if the migration actually failed.
-            DROP VIEW IF EXISTS vw_claim_line_nch_pmt_amt_1_differences;
-            CREATE OR REPLACE VIEW vw_claim_line_nch_pmt_amt_1_differences AS
-            WITH combined_claims AS (
-                SELECT 
-                    COALESCE(s.CLM_ID, n.CLM_ID) AS CLM_ID,
-                    COALESCE(s.DESYNPUF_ID, n.DESYNPUF_ID) AS BENE_ID,
-                    s.LINE_NCH_PMT_AMT_1 AS src_pmt,
-                    n.LINE_NCH_PMT_AMT_1 AS new_pmt,
-                    n.LINE_PRCSG_IND_CD_1 AS processing_ind,
-                    n.LINE_ALOWD_CHRG_AMT_1 AS allowed_amt,
-                    COALESCE(s.CLM_FROM_DT, n.CLM_FROM_DT) AS CLM_FROM_DT,
-                    CASE 
-                        WHEN s.CLM_ID IS NOT NULL AND n.CLM_ID IS NOT NULL THEN 'Matched'
-                        WHEN s.CLM_ID IS NOT NULL AND n.CLM_ID IS NULL THEN 'Src Only'
-                        WHEN s.CLM_ID IS NULL AND n.CLM_ID IS NOT NULL THEN 'New Only'
-                    END AS record_status
-                FROM src_carrier_claims s
-                FULL OUTER JOIN new_carrier_claims n ON s.CLM_ID = n.CLM_ID
-            )
-            SELECT 
-                c.CLM_ID,
-                c.record_status,
-                -- Translate Code to Name: Priority sb, then nb, then fallback to 'Unknown'
-                COALESCE(ls_sb.name, ls_nb.name, 'Unknown/Orphan') AS STATE_NAME,
-                c.CLM_FROM_DT,
-                COALESCE(c.src_pmt, 0) AS src_pmt,
-                COALESCE(c.new_pmt, 0) AS new_pmt,
-                c.processing_ind,
-                c.allowed_amt,
-                CASE 
-                    WHEN c.processing_ind = 'A' THEN 'Valid'
-                    WHEN c.processing_ind IN ('R', 'S') AND c.allowed_amt > 0 THEN 'Valid'
-                    ELSE 'Denied/Invalid'
-                END AS business_rule_status,
-                (COALESCE(c.src_pmt, 0) - COALESCE(c.new_pmt, 0)) AS variance
-            FROM combined_claims c
-            LEFT JOIN src_beneficiary_summary sb ON c.BENE_ID = sb.DESYNPUF_ID
-            LEFT JOIN new_beneficiary_summary nb ON c.BENE_ID = nb.DESYNPUF_ID
-            -- Joins to your Lookup Table
-            LEFT JOIN lookup_state ls_sb ON sb.SP_STATE_CODE = ls_sb.code
-            LEFT JOIN lookup_state ls_nb ON nb.SP_STATE_CODE = ls_nb.code
-            WHERE business_rule_status = 'Valid' 
-            AND COALESCE(c.src_pmt, 0) <> COALESCE(c.new_pmt, 0);
-
-            CREATE OR REPLACE TABLE carrier_claims_orphans as 
-            WITH KEYS AS (
-                SELECT DISTINCT
-                    DESYNPUF_ID
-                    ,CLM_ID
-                    ,CLM_FROM_DT
-                    ,CLM_THRU_DT
-                FROM 
-                    data_eng.main.src_carrier_claims
-            )
-            SELECT 
-                n.* 
-            FROM 
-                data_eng.main.new_carrier_claims n
-            FULL OUTER JOIN 
-                KEYS k 
-            ON
-                n.DESYNPUF_ID = k.DESYNPUF_ID
-                AND n.CLM_ID = k.CLM_ID
-                AND n.CLM_FROM_DT = k.CLM_FROM_DT
-                AND n.CLM_THRU_DT = k.CLM_THRU_DT
-            WHERE 
-                k.DESYNPUF_ID IS NULL
-                OR k.CLM_ID IS NULL
-                OR k.CLM_FROM_DT IS NULL
-                OR k.CLM_THRU_DT IS NULL;
-            ANALYZE carrier_claims_orphans;"""
-
-        try:
-            execute_sql_script(sql_script)
-            logger.info("✅ Phase 3a SQL transformations completed successfully")
-        except Exception as e:
-            logger.error(f"Error running Phase 3a SQL transformations: {e}")
-            raise
-
         logger.info("Starting Phase 3b SQL transformations.")
         sql_script = """
             DROP TABLE IF EXISTS audit_carrier_keys;
             CREATE TABLE audit_carrier_keys AS
             WITH KEYS AS (
                 SELECT DISTINCT
+                    CLAIM_KEY,
                     DESYNPUF_ID,
                     CLM_ID,
                     CLM_FROM_DT,
@@ -1073,6 +849,7 @@ def main():
                 FROM data_eng.main.src_carrier_claims
                 UNION
                 SELECT DISTINCT
+                    CLAIM_KEY,
                     DESYNPUF_ID,
                     CLM_ID,
                     CLM_FROM_DT,
@@ -1081,12 +858,13 @@ def main():
             )
             SELECT * FROM KEYS;
             CREATE INDEX idx_audit_carrier_keys
-                ON audit_carrier_keys (DESYNPUF_ID, CLM_ID, CLM_FROM_DT, CLM_THRU_DT);
+                ON audit_carrier_keys (CLAIM_KEY);
             ANALYZE audit_carrier_keys;
 
             DROP TABLE IF EXISTS audit_carrier_src;
             CREATE TABLE audit_carrier_src AS
             SELECT
+                CLAIM_KEY,
                 DESYNPUF_ID,
                 CLM_ID,
                 CLM_FROM_DT,
@@ -1231,12 +1009,13 @@ def main():
                 LINE_ICD9_DGNS_CD_13
             FROM data_eng.main.src_carrier_claims;
             CREATE INDEX idx_audit_carrier_src_keys
-                ON audit_carrier_src (DESYNPUF_ID, CLM_ID, CLM_FROM_DT, CLM_THRU_DT);
+                ON audit_carrier_src (CLAIM_KEY);
             ANALYZE audit_carrier_src;
 
             DROP TABLE IF EXISTS audit_carrier_new;
             CREATE TABLE audit_carrier_new AS
             SELECT
+                CLAIM_KEY,
                 DESYNPUF_ID,
                 CLM_ID,
                 CLM_FROM_DT,
@@ -1382,10 +1161,10 @@ def main():
                 LINE_ICD9_DGNS_CD_13
             FROM data_eng.main.new_carrier_claims;
             CREATE INDEX idx_audit_carrier_new_keys
-                ON audit_carrier_new (DESYNPUF_ID, CLM_ID, CLM_FROM_DT, CLM_THRU_DT);
+                ON audit_carrier_new (CLAIM_KEY);
             ANALYZE audit_carrier_new;"""
         try:
-            execute_sql_script(sql_script)
+            execute_sql_script(sql_script, label="Phase 3b")
             logger.info("✅ Phase 3b SQL transformations completed successfully")
         except Exception as e:
             logger.error(f"Error running Phase 3b SQL transformations: {e}")
@@ -1399,11 +1178,12 @@ def main():
                 DESYNPUF_ID,
                 CLM_ID,
                 CLM_FROM_DT,
-                CLM_THRU_DT
+                CLM_THRU_DT,
+                CLAIM_KEY
             FROM audit_carrier_keys;
             """
         try:
-            execute_sql_script(sql_script)
+            execute_sql_script(sql_script, label="Phase 3c1")
             logger.info("✅ Phase 3c1 SQL transformations completed successfully")
         except Exception as e:
             logger.error(f"Error running Phase 3c1 SQL transformations: {e}")
@@ -1439,17 +1219,11 @@ def main():
                 ICD9_DGNS_CD_8   = CASE WHEN COALESCE(s.ICD9_DGNS_CD_8, '') <> COALESCE(n.ICD9_DGNS_CD_8, '') THEN 1 ELSE 0 END
             FROM audit_carrier_src s
             LEFT JOIN audit_carrier_new n
-            ON s.DESYNPUF_ID = n.DESYNPUF_ID
-            AND s.CLM_ID      = n.CLM_ID
-            AND s.CLM_FROM_DT = n.CLM_FROM_DT
-            AND s.CLM_THRU_DT = n.CLM_THRU_DT
-            WHERE t.DESYNPUF_ID = s.DESYNPUF_ID
-            AND t.CLM_ID      = s.CLM_ID
-            AND t.CLM_FROM_DT = s.CLM_FROM_DT
-            AND t.CLM_THRU_DT = s.CLM_THRU_DT;
+            ON s.CLAIM_KEY = n.CLAIM_KEY
+            WHERE t.CLAIM_KEY = s.CLAIM_KEY;
             """
         try:
-            execute_sql_script(sql_script)
+            execute_sql_script(sql_script, label="Phase 3c2")
             logger.info("✅ Phase 3c2 SQL transformations completed successfully")
         except Exception as e:
             logger.error(f"Error running Phase 3c2 SQL transformations: {e}")
@@ -1490,17 +1264,11 @@ def main():
                 PRF_PHYSN_NPI_13 = CASE WHEN COALESCE(s.PRF_PHYSN_NPI_13, '') <> COALESCE(n.PRF_PHYSN_NPI_13, '') THEN 1 ELSE 0 END
             FROM audit_carrier_src s
             LEFT JOIN audit_carrier_new n
-            ON s.DESYNPUF_ID = n.DESYNPUF_ID
-            AND s.CLM_ID      = n.CLM_ID
-            AND s.CLM_FROM_DT = n.CLM_FROM_DT
-            AND s.CLM_THRU_DT = n.CLM_THRU_DT
-            WHERE t.DESYNPUF_ID = s.DESYNPUF_ID
-            AND t.CLM_ID      = s.CLM_ID
-            AND t.CLM_FROM_DT = s.CLM_FROM_DT
-            AND t.CLM_THRU_DT = s.CLM_THRU_DT;
+            ON s.CLAIM_KEY = n.CLAIM_KEY
+            WHERE t.CLAIM_KEY = s.CLAIM_KEY;
             """
         try:
-            execute_sql_script(sql_script)
+            execute_sql_script(sql_script, label="Phase 3c3")
             logger.info("✅ Phase 3c3 SQL transformations completed successfully")
         except Exception as e:
             logger.error(f"Error running Phase 3c3 SQL transformations: {e}")
@@ -1539,17 +1307,11 @@ def main():
                 TAX_NUM_13 = CASE WHEN COALESCE(s.TAX_NUM_13, '') <> COALESCE(n.TAX_NUM_13, '') THEN 1 ELSE 0 END
             FROM audit_carrier_src s
             LEFT JOIN audit_carrier_new n
-            ON s.DESYNPUF_ID = n.DESYNPUF_ID
-            AND s.CLM_ID      = n.CLM_ID
-            AND s.CLM_FROM_DT = n.CLM_FROM_DT
-            AND s.CLM_THRU_DT = n.CLM_THRU_DT
-            WHERE t.DESYNPUF_ID = s.DESYNPUF_ID
-            AND t.CLM_ID      = s.CLM_ID
-            AND t.CLM_FROM_DT = s.CLM_FROM_DT
-            AND t.CLM_THRU_DT = s.CLM_THRU_DT;
+            ON s.CLAIM_KEY = n.CLAIM_KEY
+            WHERE t.CLAIM_KEY = s.CLAIM_KEY;
             """
         try:
-            execute_sql_script(sql_script)
+            execute_sql_script(sql_script, label="Phase 3c4")
             logger.info("✅ Phase 3c4 SQL transformations completed successfully")
         except Exception as e:
             logger.error(f"Error running Phase 3c4 SQL transformations: {e}")
@@ -1588,16 +1350,10 @@ def main():
                 HCPCS_CD_13 = CASE WHEN COALESCE(s.HCPCS_CD_13, '') <> COALESCE(n.HCPCS_CD_13, '') THEN 1 ELSE 0 END
             FROM audit_carrier_src s
             LEFT JOIN audit_carrier_new n
-            ON s.DESYNPUF_ID = n.DESYNPUF_ID
-            AND s.CLM_ID      = n.CLM_ID
-            AND s.CLM_FROM_DT = n.CLM_FROM_DT
-            AND s.CLM_THRU_DT = n.CLM_THRU_DT
-            WHERE t.DESYNPUF_ID = s.DESYNPUF_ID
-            AND t.CLM_ID      = s.CLM_ID
-            AND t.CLM_FROM_DT = s.CLM_FROM_DT
-            AND t.CLM_THRU_DT = s.CLM_THRU_DT;"""
+            ON s.CLAIM_KEY = n.CLAIM_KEY
+            WHERE t.CLAIM_KEY = s.CLAIM_KEY;"""
         try:
-            execute_sql_script(sql_script)
+            execute_sql_script(sql_script, label="Phase 3c5")
             logger.info("✅ Phase 3c5 SQL transformations completed successfully")
         except Exception as e:
             logger.error(f"Error running Phase 3c5 SQL transformations: {e}")
@@ -1636,16 +1392,10 @@ def main():
                 LINE_NCH_PMT_AMT_13 = CASE WHEN COALESCE(s.LINE_NCH_PMT_AMT_13, 0) <> COALESCE(n.LINE_NCH_PMT_AMT_13, 0) THEN 1 ELSE 0 END
             FROM audit_carrier_src s
             LEFT JOIN audit_carrier_new n
-            ON s.DESYNPUF_ID = n.DESYNPUF_ID
-            AND s.CLM_ID      = n.CLM_ID
-            AND s.CLM_FROM_DT = n.CLM_FROM_DT
-            AND s.CLM_THRU_DT = n.CLM_THRU_DT
-            WHERE t.DESYNPUF_ID = s.DESYNPUF_ID
-            AND t.CLM_ID      = s.CLM_ID
-            AND t.CLM_FROM_DT = s.CLM_FROM_DT
-            AND t.CLM_THRU_DT = s.CLM_THRU_DT;"""
+            ON s.CLAIM_KEY = n.CLAIM_KEY
+            WHERE t.CLAIM_KEY = s.CLAIM_KEY;"""
         try:
-            execute_sql_script(sql_script)
+            execute_sql_script(sql_script, label="Phase 3c6")
             logger.info("✅ Phase 3c6 SQL transformations completed successfully")
         except Exception as e:
             logger.error(f"Error running Phase 3c6 SQL transformations: {e}")
@@ -1684,16 +1434,10 @@ def main():
                 LINE_BENE_PTB_DDCTBL_AMT_13 = CASE WHEN COALESCE(s.LINE_BENE_PTB_DDCTBL_AMT_13, 0) <> COALESCE(n.LINE_BENE_PTB_DDCTBL_AMT_13, 0) THEN 1 ELSE 0 END
             FROM audit_carrier_src s
             LEFT JOIN audit_carrier_new n
-            ON s.DESYNPUF_ID = n.DESYNPUF_ID
-            AND s.CLM_ID      = n.CLM_ID
-            AND s.CLM_FROM_DT = n.CLM_FROM_DT
-            AND s.CLM_THRU_DT = n.CLM_THRU_DT
-            WHERE t.DESYNPUF_ID = s.DESYNPUF_ID
-            AND t.CLM_ID      = s.CLM_ID
-            AND t.CLM_FROM_DT = s.CLM_FROM_DT
-            AND t.CLM_THRU_DT = s.CLM_THRU_DT;"""
+            ON s.CLAIM_KEY = n.CLAIM_KEY
+            WHERE t.CLAIM_KEY = s.CLAIM_KEY;"""
         try:
-            execute_sql_script(sql_script)
+            execute_sql_script(sql_script, label="Phase 3c7")
             logger.info("✅ Phase 3c7 SQL transformations completed successfully")
         except Exception as e:
             logger.error(f"Error running Phase 3c7 SQL transformations: {e}")
@@ -1732,16 +1476,10 @@ def main():
                 LINE_BENE_PRMRY_PYR_PD_AMT_13 = CASE WHEN COALESCE(s.LINE_BENE_PRMRY_PYR_PD_AMT_13, 0) <> COALESCE(n.LINE_BENE_PRMRY_PYR_PD_AMT_13, 0) THEN 1 ELSE 0 END
             FROM audit_carrier_src s
             LEFT JOIN audit_carrier_new n
-            ON s.DESYNPUF_ID = n.DESYNPUF_ID
-            AND s.CLM_ID      = n.CLM_ID
-            AND s.CLM_FROM_DT = n.CLM_FROM_DT
-            AND s.CLM_THRU_DT = n.CLM_THRU_DT
-            WHERE t.DESYNPUF_ID = s.DESYNPUF_ID
-            AND t.CLM_ID      = s.CLM_ID
-            AND t.CLM_FROM_DT = s.CLM_FROM_DT
-            AND t.CLM_THRU_DT = s.CLM_THRU_DT;"""
+            ON s.CLAIM_KEY = n.CLAIM_KEY
+            WHERE t.CLAIM_KEY = s.CLAIM_KEY;"""
         try:
-            execute_sql_script(sql_script)
+            execute_sql_script(sql_script, label="Phase 3c8")
             logger.info("✅ Phase 3c8 SQL transformations completed successfully")
         except Exception as e:
             logger.error(f"Error running Phase 3c8 SQL transformations: {e}")
@@ -1780,16 +1518,10 @@ def main():
                 LINE_COINSRNC_AMT_13 = CASE WHEN COALESCE(s.LINE_COINSRNC_AMT_13, 0) <> COALESCE(n.LINE_COINSRNC_AMT_13, 0) THEN 1 ELSE 0 END
             FROM audit_carrier_src s
             LEFT JOIN audit_carrier_new n
-            ON s.DESYNPUF_ID = n.DESYNPUF_ID
-            AND s.CLM_ID      = n.CLM_ID
-            AND s.CLM_FROM_DT = n.CLM_FROM_DT
-            AND s.CLM_THRU_DT = n.CLM_THRU_DT
-            WHERE t.DESYNPUF_ID = s.DESYNPUF_ID
-            AND t.CLM_ID      = s.CLM_ID
-            AND t.CLM_FROM_DT = s.CLM_FROM_DT
-            AND t.CLM_THRU_DT = s.CLM_THRU_DT;"""
+            ON s.CLAIM_KEY = n.CLAIM_KEY
+            WHERE t.CLAIM_KEY = s.CLAIM_KEY;"""
         try:
-            execute_sql_script(sql_script)
+            execute_sql_script(sql_script, label="Phase 3c9")
             logger.info("✅ Phase 3c9 SQL transformations completed successfully")
         except Exception as e:
             logger.error(f"Error running Phase 3c9 SQL transformations: {e}")
@@ -1828,16 +1560,10 @@ def main():
                 LINE_ALOWD_CHRG_AMT_13 = CASE WHEN COALESCE(s.LINE_ALOWD_CHRG_AMT_13, 0) <> COALESCE(n.LINE_ALOWD_CHRG_AMT_13, 0) THEN 1 ELSE 0 END
             FROM audit_carrier_src s
             LEFT JOIN audit_carrier_new n
-            ON s.DESYNPUF_ID = n.DESYNPUF_ID
-            AND s.CLM_ID      = n.CLM_ID
-            AND s.CLM_FROM_DT = n.CLM_FROM_DT
-            AND s.CLM_THRU_DT = n.CLM_THRU_DT
-            WHERE t.DESYNPUF_ID = s.DESYNPUF_ID
-            AND t.CLM_ID      = s.CLM_ID
-            AND t.CLM_FROM_DT = s.CLM_FROM_DT
-            AND t.CLM_THRU_DT = s.CLM_THRU_DT;"""
+            ON s.CLAIM_KEY = n.CLAIM_KEY
+            WHERE t.CLAIM_KEY = s.CLAIM_KEY;"""
         try:
-            execute_sql_script(sql_script)
+            execute_sql_script(sql_script, label="Phase 3c10")
             logger.info("✅ Phase 3c10 SQL transformations completed successfully")
         except Exception as e:
             logger.error(f"Error running Phase 3c10 SQL transformations: {e}")
@@ -1876,16 +1602,10 @@ def main():
                 LINE_PRCSG_IND_CD_13 = CASE WHEN COALESCE(s.LINE_PRCSG_IND_CD_13, '') <> COALESCE(n.LINE_PRCSG_IND_CD_13, '') THEN 1 ELSE 0 END
             FROM audit_carrier_src s
             LEFT JOIN audit_carrier_new n
-            ON s.DESYNPUF_ID = n.DESYNPUF_ID
-            AND s.CLM_ID      = n.CLM_ID
-            AND s.CLM_FROM_DT = n.CLM_FROM_DT
-            AND s.CLM_THRU_DT = n.CLM_THRU_DT
-            WHERE t.DESYNPUF_ID = s.DESYNPUF_ID
-            AND t.CLM_ID      = s.CLM_ID
-            AND t.CLM_FROM_DT = s.CLM_FROM_DT
-            AND t.CLM_THRU_DT = s.CLM_THRU_DT;"""
+            ON s.CLAIM_KEY = n.CLAIM_KEY
+            WHERE t.CLAIM_KEY = s.CLAIM_KEY;"""
         try:
-            execute_sql_script(sql_script)
+            execute_sql_script(sql_script, label="Phase 3c11")
             logger.info("✅ Phase 3c11 SQL transformations completed successfully")
         except Exception as e:
             logger.error(f"Error running Phase 3c11 SQL transformations: {e}")
@@ -1924,802 +1644,973 @@ def main():
             LINE_ICD9_DGNS_CD_13 = CASE WHEN COALESCE(s.LINE_ICD9_DGNS_CD_13, '') <> COALESCE(n.LINE_ICD9_DGNS_CD_13, '') THEN 1 ELSE 0 END
         FROM audit_carrier_src s
         LEFT JOIN audit_carrier_new n
-        ON s.DESYNPUF_ID = n.DESYNPUF_ID
-        AND s.CLM_ID      = n.CLM_ID
-        AND s.CLM_FROM_DT = n.CLM_FROM_DT
-        AND s.CLM_THRU_DT = n.CLM_THRU_DT
-        WHERE t.DESYNPUF_ID = s.DESYNPUF_ID
-        AND t.CLM_ID      = s.CLM_ID
-        AND t.CLM_FROM_DT = s.CLM_FROM_DT
-        AND t.CLM_THRU_DT = s.CLM_THRU_DT;"""
+        ON s.CLAIM_KEY = n.CLAIM_KEY
+        WHERE t.CLAIM_KEY = s.CLAIM_KEY;"""
         try:
-            execute_sql_script(sql_script)
+            execute_sql_script(sql_script, label="Phase 3c12")
             logger.info("✅ Phase 3c12 SQL transformations completed successfully")
         except Exception as e:
             logger.error(f"Error running Phase 3c12 SQL transformations: {e}")
             raise
 
+        logger.info("Starting Phase 3c13 SQL transformations.")
+        diagnosis_flag_columns = [
+            (col, semantics) for col, semantics in carrier_flag_semantics(diagnosis_comparison())
+            if col in CARRIER_DIAGNOSIS_COLUMNS
+        ]
+        sql_script = f"""
+            -- Pack the per-column flags built above into the defect bitmasks; the diagnosis
+            -- flags and DGNS_CHANGE are taken from the code sets, as in the fused audit
+            DROP TABLE IF EXISTS audit_carrier_claims_packed;
+            CREATE TABLE audit_carrier_claims_packed AS
+            WITH src_ AS (
+                SELECT CLAIM_KEY, {', '.join(CARRIER_DIAGNOSIS_COLUMNS)}, {diagnosis_set()} AS DGNS_SET
+                FROM audit_carrier_src
+            ),
+            new_ AS (
+                SELECT CLAIM_KEY, {', '.join(CARRIER_DIAGNOSIS_COLUMNS)}, {diagnosis_set()} AS DGNS_SET
+                FROM audit_carrier_new
+            ),
+            flags AS (
+                SELECT
+                    t.* EXCLUDE ({', '.join(CARRIER_DIAGNOSIS_COLUMNS)})
+                    , {diagnosis_change()} AS DGNS_CHANGE
+                    , {defect_flag_case_columns(diagnosis_flag_columns, indent=20)}
+                FROM audit_carrier_claims t
+                LEFT JOIN src_ s ON t.CLAIM_KEY = s.CLAIM_KEY
+                LEFT JOIN new_ n ON t.CLAIM_KEY = n.CLAIM_KEY
+            )
+            SELECT
+                DESYNPUF_ID
+                , CLM_ID
+                , CLM_FROM_DT
+                , CLM_THRU_DT
+                , CLAIM_KEY
+                , COALESCE(CLM_FROM_DT_DIFF, 0)::UTINYINT AS CLM_FROM_DT_DIFF
+                , COALESCE(CLM_THRU_DT_DIFF, 0)::UTINYINT AS CLM_THRU_DT_DIFF
+                , DGNS_CHANGE
+                , {defect_mask_columns(CARRIER_DEFECT_COLUMNS)}
+            FROM flags;
+            DROP TABLE audit_carrier_claims;
+            ALTER TABLE audit_carrier_claims_packed RENAME TO audit_carrier_claims;"""
+        try:
+            execute_sql_script(sql_script, label="Phase 3c13")
+            logger.info("✅ Phase 3c13 SQL transformations completed successfully")
+        except Exception as e:
+            logger.error(f"Error running Phase 3c13 SQL transformations: {e}")
+            raise
+
+        logger.info("Starting Phase 3d SQL transformations.")
+        sql_script = f"""
+            DROP TABLE IF EXISTS audit_carrier_compare;
+            DROP TABLE IF EXISTS audit_carrier_financials;
+            CREATE TABLE audit_carrier_financials AS
+            WITH KEYS AS (
+                SELECT DISTINCT
+                    CLAIM_KEY
+                FROM
+                    data_eng.main.src_carrier_claims
+                UNION 
+                SELECT DISTINCT
+                    CLAIM_KEY
+                FROM
+                    data_eng.main.new_carrier_claims
+            ),
+            src_ AS (
+                SELECT
+                    DESYNPUF_ID
+                    , CLAIM_KEY
+                    , CLM_ID
+                    , CLM_FROM_DT
+                    , CLM_THRU_DT
+                    -- Financial Fields
+                    , {money_value_columns(CARRIER_MONEY_COLUMNS)}
+                FROM data_eng.main.src_carrier_claims
+            ),
+            new_ AS (
+                SELECT
+                    DESYNPUF_ID
+                    , CLAIM_KEY
+                    , CLM_ID
+                    , CLM_FROM_DT
+                    , CLM_THRU_DT
+                    -- Financial Fields
+                    , {money_value_columns(CARRIER_MONEY_COLUMNS)}
+                FROM data_eng.main.new_carrier_claims
+            )
+            SELECT
+                    COALESCE(s.DESYNPUF_ID, n.DESYNPUF_ID) AS DESYNPUF_ID
+                    , COALESCE(s.CLM_ID, n.CLM_ID) AS CLM_ID
+                    , COALESCE(s.CLM_FROM_DT, n.CLM_FROM_DT) AS CLM_FROM_DT
+                    , COALESCE(s.CLM_THRU_DT, n.CLM_THRU_DT) AS CLM_THRU_DT
+                    , k.CLAIM_KEY
+                    , {money_delta_columns(CARRIER_MONEY_COLUMNS)}
+                FROM
+                    keys k 
+            LEFT JOIN src_ s ON k.CLAIM_KEY = s.CLAIM_KEY
+            LEFT JOIN new_ n ON k.CLAIM_KEY = n.CLAIM_KEY;"""
+        try:
+            execute_sql_script(sql_script, label="Phase 3d")
+            logger.info("✅ Phase 3d SQL transformations completed successfully")
+        except Exception as e:
+            logger.error(f"Error running Phase 3d SQL transformations: {e}")
+            raise
+
     logger.info("Starting Phase 3 Index/Analyze.")
-    sql_script = """
+    sql_script = f"""
         CREATE INDEX idx_audit_carrier_claims_keys 
-            ON audit_carrier_claims (DESYNPUF_ID, CLM_ID, CLM_FROM_DT, CLM_THRU_DT);
+            ON audit_carrier_claims (CLAIM_KEY);
         ANALYZE audit_carrier_claims;
-        """
+        CREATE INDEX idx_audit_carrier_financials_keys ON audit_carrier_financials(CLAIM_KEY);
+        ANALYZE audit_carrier_financials;
+        {column_defect_counts_script(
+            'Carrier Claims', 'audit_carrier_claims', CARRIER_DEFECT_COLUMNS,
+            diff_columns=CARRIER_DATE_DIFF_COLUMNS,
+        )}
+
+        -- Readable one-column-per-flag view of the packed audit table
+        CREATE OR REPLACE VIEW vw_audit_carrier_claims_flags AS
+        SELECT
+            DESYNPUF_ID
+            , CLM_ID
+            , CLM_FROM_DT
+            , CLM_THRU_DT
+            , CLM_FROM_DT_DIFF
+            , CLM_THRU_DT_DIFF
+            , DGNS_CHANGE
+            , {defect_flag_columns(CARRIER_DEFECT_COLUMNS)}
+            , DEFECT_COUNT
+        FROM audit_carrier_claims;
+
+        -- Claims by how their diagnosis codes changed; REORDERED_ONLY claims hold the same
+        -- codes in different positions, which DIAGNOSIS_COMPARISON=set does not count as defects
+        CREATE OR REPLACE VIEW vw_claim_diagnosis_changes AS
+        SELECT
+            DGNS_CHANGE
+            , COUNT(*) AS CLAIMS
+            , SUM({' + '.join(CARRIER_DIAGNOSIS_COLUMNS)}) AS DGNS_DEFECTS
+        FROM vw_audit_carrier_claims_flags
+        WHERE DGNS_CHANGE IS NOT NULL
+        GROUP BY DGNS_CHANGE
+        ORDER BY DGNS_CHANGE;
+
+        CREATE OR REPLACE VIEW vw_financial_differences_claim AS
+        WITH agg AS (
+            SELECT
+                any_value(DESYNPUF_ID) AS DESYNPUF_ID
+                , any_value(CLM_ID) AS CLM_ID
+                , any_value(CLM_FROM_DT) AS CLM_FROM_DT
+                , any_value(CLM_THRU_DT) AS CLM_THRU_DT
+                , CLAIM_KEY
+                , {abs_delta_sum_columns(CARRIER_MONEY_COLUMNS)}
+            FROM data_eng.main.audit_carrier_financials
+            GROUP BY 
+                CLAIM_KEY
+        )
+        SELECT *
+        FROM agg
+        WHERE list_sum(list_value(
+                {abs_delta_list(CARRIER_MONEY_COLUMNS)}
+        )) > 0;
+
+        CREATE OR REPLACE TABLE audit_claim_financial_fields AS
+        WITH flat AS (
+            SELECT
+                [
+                    {abs_delta_metrics(CARRIER_MONEY_COLUMNS)}
+                ] AS metrics
+            FROM data_eng.main.vw_financial_differences_claim
+        )
+        SELECT
+            unnest.metric_name,
+            round(sum(unnest.metric_value),2) AS total_abs_delta
+        FROM flat
+        CROSS JOIN UNNEST(metrics)
+        GROUP BY unnest.metric_name
+        ORDER BY total_abs_delta DESC;"""
     try:
-        execute_sql_script(sql_script)
+        execute_sql_script(sql_script, label="Phase 3 Index")
         logger.info("✅ Phase 3 Index/Analyzes completed successfully")
     except Exception as e:
         logger.error(f"Error running Phase 3 Index/Analyze: {e}")
         raise
 
-    logger.info("Starting Phase 4 SQL transformations.")
-    sql_script = """
-        DROP TABLE IF EXISTS audit_carrier_financials;
-        CREATE TABLE audit_carrier_financials AS
+def run_phase_3a():
+    """Claim presence views and the all-lines payment discrepancy tables."""
+    logger.info("Starting Phase 3a SQL transformations.")
+    families = CARRIER_LINE_AMOUNT_FAMILIES
+    line_count = max(families.values())
+    line_structs = ",\n                    ".join(
+        f"struct_pack(LINE_NUM := {line}, SRC_PROCESSING_IND := s.LINE_PRCSG_IND_CD_{line}, "
+        f"NEW_PROCESSING_IND := n.LINE_PRCSG_IND_CD_{line}, "
+        + ", ".join(f"{prefix}_{family} := {side}.{family}_{line}" for family in families for prefix, side in (('SRC', 's'), ('NEW', 'n')))
+        + ")"
+        for line in range(1, line_count + 1)
+    )
+    line_amount_columns = [
+        column
+        for family in families
+        for column in (
+            f"COALESCE(SRC_{family}, 0) AS SRC_{family}",
+            f"COALESCE(NEW_{family}, 0) AS NEW_{family}",
+            f"COALESCE(SRC_{family}, 0) - COALESCE(NEW_{family}, 0) AS VARIANCE_{family}",
+        )
+    ]
+    # Each system's lines are summed under that system's own processing indicator
+    rule_status_columns = [
+        f"""CASE
+                WHEN {side}_PROCESSING_IND = 'A' THEN 'Valid'
+                WHEN {side}_PROCESSING_IND IN ('R', 'S') AND {side}_LINE_ALOWD_CHRG_AMT > 0 THEN 'Valid'
+                ELSE 'Denied/Invalid'
+            END AS {side}_RULE_STATUS"""
+        for side in ('SRC', 'NEW')
+    ]
+    valid_sums = {
+        (side, family): f"COALESCE(SUM({side}_{family}) FILTER (WHERE {side}_RULE_STATUS = 'Valid'), 0)"
+        for family in families
+        for side in ('SRC', 'NEW')
+    }
+    claim_amount_columns = [
+        column
+        for family in families
+        for column in (
+            f"{valid_sums['SRC', family]} AS SRC_{family}",
+            f"{valid_sums['NEW', family]} AS NEW_{family}",
+            f"{valid_sums['SRC', family]} - {valid_sums['NEW', family]} AS VARIANCE_{family}",
+        )
+    ]
+    line_mismatch = " OR ".join(f"VARIANCE_{family} <> 0" for family in families)
+    line_valid = "(SRC_RULE_STATUS = 'Valid' OR NEW_RULE_STATUS = 'Valid')"
+    sql_script = f"""/*CLAIM DIFFERENCES*/
+
+        DROP VIEW IF EXISTS vw_claim_mismatches;
+        CREATE VIEW vw_claim_mismatches AS
+        SELECT
+            s.clm_id AS CLM_ID
+            ,'Error: Claim Missing in New File' as FINDING
+        FROM
+            src_carrier_claims s
+        LEFT JOIN new_carrier_claims n ON
+            s.clm_id = n.clm_id
+        WHERE
+            n.clm_id IS NULL
+        UNION 
+        SELECT
+            n.clm_id AS CLM_ID
+            ,'Error: Claim Present in New File, Not in Original File' as FINDING
+        FROM
+            new_carrier_claims n
+        LEFT JOIN src_carrier_claims s ON
+            n.clm_id = s.clm_id
+        WHERE
+            s.clm_id IS NULL;
+
+        -- Every line of every claim, with the business rule applied to each system's line
+        -- and the source and new value of each line amount, built from one join of the
+        -- claim files. Unused lines (no processing indicator and no amounts in either
+        -- system) are left out.
+        CREATE OR REPLACE TABLE audit_claim_line_payments AS
+        WITH combined_claims AS (
+            SELECT 
+                COALESCE(s.CLM_ID, n.CLM_ID) AS CLM_ID,
+                COALESCE(s.DESYNPUF_ID, n.DESYNPUF_ID) AS BENE_ID,
+                COALESCE(s.DESYNPUF_KEY, n.DESYNPUF_KEY) AS BENE_KEY,
+                COALESCE(s.CLM_FROM_DT, n.CLM_FROM_DT) AS CLM_FROM_DT,
+                CASE 
+                    WHEN s.CLM_ID IS NOT NULL AND n.CLM_ID IS NOT NULL THEN 'Matched'
+                    WHEN s.CLM_ID IS NOT NULL AND n.CLM_ID IS NULL THEN 'Src Only'
+                    WHEN s.CLM_ID IS NULL AND n.CLM_ID IS NOT NULL THEN 'New Only'
+                END AS RECORD_STATUS,
+                [
+                    {line_structs}
+                ] AS LINES
+            FROM src_carrier_claims s
+            FULL OUTER JOIN new_carrier_claims n ON s.CLM_ID = n.CLM_ID
+        ),
+        claim_lines AS (
+            SELECT
+                CLM_ID, BENE_ID, BENE_KEY, CLM_FROM_DT, RECORD_STATUS,
+                UNNEST(LINES, recursive := true)
+            FROM combined_claims
+        )
+        SELECT
+            CLM_ID
+            , BENE_ID
+            , BENE_KEY
+            , CLM_FROM_DT
+            , RECORD_STATUS
+            , LINE_NUM
+            , SRC_PROCESSING_IND
+            , NEW_PROCESSING_IND
+            , {select_list(rule_status_columns, indent=12)}
+            , {select_list(line_amount_columns, indent=12)}
+        FROM claim_lines
+        WHERE NOT (COALESCE(SRC_PROCESSING_IND, 'nan') = 'nan' AND COALESCE(NEW_PROCESSING_IND, 'nan') = 'nan' AND {" AND ".join(f"COALESCE({side}_{family}, 0) = 0" for family in families for side in ('SRC', 'NEW'))});
+        ANALYZE audit_claim_line_payments;
+
+        -- Per-claim totals; each side sums the lines valid under its own processing indicator
+        CREATE OR REPLACE TABLE audit_claim_payments AS
+        SELECT
+            CLM_ID
+            , any_value(BENE_ID) AS BENE_ID
+            , any_value(BENE_KEY) AS BENE_KEY
+            , any_value(CLM_FROM_DT) AS CLM_FROM_DT
+            , any_value(RECORD_STATUS) AS RECORD_STATUS
+            , COUNT(*) AS LINES
+            , count_if(SRC_RULE_STATUS = 'Valid') AS SRC_VALID_LINES
+            , count_if(NEW_RULE_STATUS = 'Valid') AS NEW_VALID_LINES
+            , count_if({line_valid} AND ({line_mismatch})) AS MISMATCHED_LINES
+            , {select_list(claim_amount_columns, indent=12)}
+        FROM audit_claim_line_payments
+        GROUP BY CLM_ID;
+        ANALYZE audit_claim_payments;
+
+        -- Lines valid in either system where any line amount differs between the systems
+        CREATE OR REPLACE VIEW vw_claim_line_payment_differences AS
+        SELECT
+            l.*
+            , COALESCE(d.STATE_NAME, 'Unknown/Orphan') AS STATE_NAME
+        FROM audit_claim_line_payments l
+        LEFT JOIN dim_beneficiary d ON l.BENE_KEY = d.DESYNPUF_KEY
+        WHERE {line_valid}
+        AND ({line_mismatch});
+
+        -- The original line 1 payment check, now a filter on the all-lines table; it keeps
+        -- applying the business rule to the new system's line
+        DROP VIEW IF EXISTS vw_claim_line_nch_pmt_amt_1_differences;
+        CREATE OR REPLACE VIEW vw_claim_line_nch_pmt_amt_1_differences AS
+        SELECT 
+            l.CLM_ID,
+            l.RECORD_STATUS AS record_status,
+            -- State name resolved in dim_beneficiary (source first, then new), else 'Unknown'
+            COALESCE(d.STATE_NAME, 'Unknown/Orphan') AS STATE_NAME,
+            l.CLM_FROM_DT,
+            l.SRC_LINE_NCH_PMT_AMT AS src_pmt,
+            l.NEW_LINE_NCH_PMT_AMT AS new_pmt,
+            l.NEW_PROCESSING_IND AS processing_ind,
+            l.NEW_LINE_ALOWD_CHRG_AMT AS allowed_amt,
+            l.NEW_RULE_STATUS AS business_rule_status,
+            l.VARIANCE_LINE_NCH_PMT_AMT AS variance
+        FROM audit_claim_line_payments l
+        -- One dim_beneficiary row per beneficiary, so each claim stays one row
+        LEFT JOIN dim_beneficiary d ON l.BENE_KEY = d.DESYNPUF_KEY
+        WHERE l.LINE_NUM = 1
+        AND l.NEW_RULE_STATUS = 'Valid' 
+        AND l.SRC_LINE_NCH_PMT_AMT <> l.NEW_LINE_NCH_PMT_AMT;"""
+
+    try:
+        execute_sql_script(sql_script, label="Phase 3a")
+        logger.info("✅ Phase 3a SQL transformations completed successfully")
+    except Exception as e:
+        logger.error(f"Error running Phase 3a SQL transformations: {e}")
+        raise
+
+def carrier_orphans_script(partitions):
+    """Phase 3a orphan claims, one hash partition at a time."""
+    orphan_statements = []
+    for bucket in range(partitions):
+        partition = partition_filter(partitions, bucket)
+        target = "CREATE OR REPLACE TABLE carrier_claims_orphans as" if bucket == 0 else "INSERT INTO carrier_claims_orphans"
+        orphan_statements.append(f"""
+        {target}
         WITH KEYS AS (
             SELECT DISTINCT
-                DESYNPUF_ID
-                , CLM_ID
-                , CLM_FROM_DT
-                , CLM_THRU_DT
-            FROM
+                CLAIM_KEY
+            FROM 
                 data_eng.main.src_carrier_claims
-            UNION 
-            SELECT DISTINCT
-                DESYNPUF_ID
-                , CLM_ID
-                , CLM_FROM_DT
-                , CLM_THRU_DT
-            FROM
-                data_eng.main.new_carrier_claims
+            WHERE {partition}
+        )
+        SELECT 
+            n.* EXCLUDE (DESYNPUF_KEY, CLAIM_KEY)
+        FROM 
+            (SELECT * FROM data_eng.main.new_carrier_claims WHERE {partition}) n
+        FULL OUTER JOIN 
+            KEYS k 
+        ON
+            n.CLAIM_KEY = k.CLAIM_KEY
+        WHERE 
+            k.CLAIM_KEY IS NULL;""")
+    return "".join(orphan_statements) + """
+        ANALYZE carrier_claims_orphans;"""
+
+def run_phase_3a_orphans():
+    """Claims in the new file with no counterpart in the source file."""
+    logger.info("Starting Phase 3a orphan claims.")
+    try:
+        run_governed(carrier_orphans_script, "Phase 3a Orphans")
+        logger.info("✅ Phase 3a orphan claims completed successfully")
+    except Exception as e:
+        logger.error(f"Error running Phase 3a orphan claims: {e}")
+        raise
+
+# Orphan re-linking. A claim whose identity (DESYNPUF_ID, CLM_ID, CLM_FROM_DT, CLM_THRU_DT)
+# changed between the files is both missing and orphaned. Unmatched source and new claims
+# are only compared within blocks that share one of these keys, so the comparison grows
+# with the block sizes instead of the product of the unmatched counts. AMOUNT_FINGERPRINT
+# hashes the claim's money columns.
+RELINK_BLOCKING_KEYS = {
+    'CLM_ID': ['CLM_ID'],
+    'DESYNPUF_ID + AMOUNTS': ['DESYNPUF_ID', 'AMOUNT_FINGERPRINT'],
+    'DESYNPUF_ID + CLM_FROM_DT': ['DESYNPUF_ID', 'CLM_FROM_DT'],
+    'DESYNPUF_ID + CLM_THRU_DT': ['DESYNPUF_ID', 'CLM_THRU_DT'],
+}
+# Blocks holding more claims than this on either side are skipped rather than compared pairwise
+RELINK_MAX_BLOCK_SIZE = 50
+# Share of the compared fields (those not empty on both claims) that must agree
+RELINK_MIN_SCORE = 0.7
+
+def carrier_relink_script():
+    """Phase 3a re-linking of unmatched source claims to unmatched new claims."""
+    candidate_blocks = []
+    for name, keys in RELINK_BLOCKING_KEYS.items():
+        key_list = ", ".join(keys)
+        candidate_blocks.append(f"""
+            SELECT s.CLM_ID AS SRC_CLM_ID, n.CLM_ID AS NEW_CLM_ID, '{name}' AS BLOCKING_KEY
+            FROM (SELECT {key_list}, CLM_ID, count(*) OVER (PARTITION BY {key_list}) AS BLOCK_SIZE FROM unmatched_src) s
+            JOIN (SELECT {key_list}, CLM_ID, count(*) OVER (PARTITION BY {key_list}) AS BLOCK_SIZE FROM unmatched_new) n
+                ON {" AND ".join(f"s.{key} = n.{key}" for key in keys)}
+            WHERE s.BLOCK_SIZE <= {RELINK_MAX_BLOCK_SIZE} AND n.BLOCK_SIZE <= {RELINK_MAX_BLOCK_SIZE}""")
+    candidates = "\n            UNION ALL".join(candidate_blocks)
+    return f"""
+        CREATE OR REPLACE TABLE carrier_claims_relinked AS
+        WITH unmatched_src AS (
+            SELECT s.*, {money_fingerprint(CARRIER_MONEY_COLUMNS, 's')} AS AMOUNT_FINGERPRINT
+            FROM src_carrier_claims s
+            WHERE NOT EXISTS (SELECT 1 FROM new_carrier_claims n WHERE n.CLAIM_KEY = s.CLAIM_KEY)
+        ),
+        unmatched_new AS (
+            SELECT n.*, {money_fingerprint(CARRIER_MONEY_COLUMNS, 'n')} AS AMOUNT_FINGERPRINT
+            FROM new_carrier_claims n
+            WHERE NOT EXISTS (SELECT 1 FROM src_carrier_claims s WHERE s.CLAIM_KEY = n.CLAIM_KEY)
+        ),
+        candidates AS ({candidates}
         ),
-        src_ AS (
+        candidate_pairs AS (
+            SELECT SRC_CLM_ID, NEW_CLM_ID, list(DISTINCT BLOCKING_KEY ORDER BY BLOCKING_KEY) AS BLOCKING_KEYS
+            FROM candidates
+            GROUP BY SRC_CLM_ID, NEW_CLM_ID
+        ),
+        -- Every candidate pair is compared field by field in one projection
+        scored AS (
             SELECT
-                DESYNPUF_ID
-                , CLM_ID
-                , CLM_FROM_DT
-                , CLM_THRU_DT
-                -- Financial Fields
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_1)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_1,  0) END AS LINE_NCH_PMT_AMT_1
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_2)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_2,  0) END AS LINE_NCH_PMT_AMT_2
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_3)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_3,  0) END AS LINE_NCH_PMT_AMT_3
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_4)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_4,  0) END AS LINE_NCH_PMT_AMT_4
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_5)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_5,  0) END AS LINE_NCH_PMT_AMT_5
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_6)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_6,  0) END AS LINE_NCH_PMT_AMT_6
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_7)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_7,  0) END AS LINE_NCH_PMT_AMT_7
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_8)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_8,  0) END AS LINE_NCH_PMT_AMT_8
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_9)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_9,  0) END AS LINE_NCH_PMT_AMT_9
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_10) THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_10, 0) END AS LINE_NCH_PMT_AMT_10
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_11) THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_11, 0) END AS LINE_NCH_PMT_AMT_11
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_12) THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_12, 0) END AS LINE_NCH_PMT_AMT_12
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_13) THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_13, 0) END AS LINE_NCH_PMT_AMT_13
-
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_1)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_1,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_1
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_2)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_2,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_2
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_3)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_3,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_3
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_4)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_4,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_4
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_5)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_5,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_5
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_6)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_6,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_6
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_7)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_7,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_7
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_8)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_8,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_8
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_9)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_9,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_9
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_10) THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_10, 0) END AS LINE_BENE_PTB_DDCTBL_AMT_10
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_11) THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_11, 0) END AS LINE_BENE_PTB_DDCTBL_AMT_11
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_12) THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_12, 0) END AS LINE_BENE_PTB_DDCTBL_AMT_12
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_13) THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_13, 0) END AS LINE_BENE_PTB_DDCTBL_AMT_13
-
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_1)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_1,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_1
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_2)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_2,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_2
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_3)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_3,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_3
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_4)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_4,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_4
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_5)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_5,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_5
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_6)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_6,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_6
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_7)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_7,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_7
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_8)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_8,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_8
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_9)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_9,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_9
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_10) THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_10, 0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_10
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_11) THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_11, 0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_11
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_12) THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_12, 0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_12
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_13) THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_13, 0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_13
-
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_1)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_1,  0) END AS LINE_COINSRNC_AMT_1
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_2)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_2,  0) END AS LINE_COINSRNC_AMT_2
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_3)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_3,  0) END AS LINE_COINSRNC_AMT_3
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_4)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_4,  0) END AS LINE_COINSRNC_AMT_4
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_5)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_5,  0) END AS LINE_COINSRNC_AMT_5
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_6)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_6,  0) END AS LINE_COINSRNC_AMT_6
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_7)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_7,  0) END AS LINE_COINSRNC_AMT_7
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_8)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_8,  0) END AS LINE_COINSRNC_AMT_8
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_9)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_9,  0) END AS LINE_COINSRNC_AMT_9
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_10) THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_10, 0) END AS LINE_COINSRNC_AMT_10
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_11) THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_11, 0) END AS LINE_COINSRNC_AMT_11
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_12) THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_12, 0) END AS LINE_COINSRNC_AMT_12
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_13) THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_13, 0) END AS LINE_COINSRNC_AMT_13
-
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_1)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_1,  0) END AS LINE_ALOWD_CHRG_AMT_1
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_2)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_2,  0) END AS LINE_ALOWD_CHRG_AMT_2
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_3)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_3,  0) END AS LINE_ALOWD_CHRG_AMT_3
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_4)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_4,  0) END AS LINE_ALOWD_CHRG_AMT_4
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_5)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_5,  0) END AS LINE_ALOWD_CHRG_AMT_5
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_6)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_6,  0) END AS LINE_ALOWD_CHRG_AMT_6
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_7)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_7,  0) END AS LINE_ALOWD_CHRG_AMT_7
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_8)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_8,  0) END AS LINE_ALOWD_CHRG_AMT_8
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_9)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_9,  0) END AS LINE_ALOWD_CHRG_AMT_9
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_10) THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_10, 0) END AS LINE_ALOWD_CHRG_AMT_10
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_11) THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_11, 0) END AS LINE_ALOWD_CHRG_AMT_11
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_12) THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_12, 0) END AS LINE_ALOWD_CHRG_AMT_12
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_13) THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_13, 0) END AS LINE_ALOWD_CHRG_AMT_13
-            FROM data_eng.main.src_carrier_claims
+                p.SRC_CLM_ID
+                , p.NEW_CLM_ID
+                , s.DESYNPUF_ID AS SRC_DESYNPUF_ID
+                , n.DESYNPUF_ID AS NEW_DESYNPUF_ID
+                , s.CLM_FROM_DT AS SRC_CLM_FROM_DT
+                , n.CLM_FROM_DT AS NEW_CLM_FROM_DT
+                , s.CLM_THRU_DT AS SRC_CLM_THRU_DT
+                , n.CLM_THRU_DT AS NEW_CLM_THRU_DT
+                , p.BLOCKING_KEYS
+                , {field_difference_list(CARRIER_RELINK_COLUMNS)} AS DIFFERING_FIELDS
+                , {compared_field_count(CARRIER_RELINK_COLUMNS)} AS COMPARED_FIELDS
+            FROM candidate_pairs p
+            JOIN unmatched_src s ON s.CLM_ID = p.SRC_CLM_ID
+            JOIN unmatched_new n ON n.CLM_ID = p.NEW_CLM_ID
         ),
-        new_ AS (
+        ranked AS (
+            SELECT
+                *
+                , 1 - len(DIFFERING_FIELDS) / greatest(COMPARED_FIELDS, 1) AS MATCH_SCORE
+                , row_number() OVER (PARTITION BY SRC_CLM_ID ORDER BY MATCH_SCORE DESC, NEW_CLM_ID) AS SRC_RANK
+                , row_number() OVER (PARTITION BY NEW_CLM_ID ORDER BY MATCH_SCORE DESC, SRC_CLM_ID) AS NEW_RANK
+            FROM scored
+        )
+        -- A pair is linked when each claim is the other's best candidate
+        SELECT
+            SRC_CLM_ID
+            , NEW_CLM_ID
+            , SRC_DESYNPUF_ID
+            , NEW_DESYNPUF_ID
+            , SRC_CLM_FROM_DT
+            , NEW_CLM_FROM_DT
+            , SRC_CLM_THRU_DT
+            , NEW_CLM_THRU_DT
+            , BLOCKING_KEYS
+            , round(MATCH_SCORE, 4) AS MATCH_SCORE
+            , list_filter(DIFFERING_FIELDS, f -> list_contains({CARRIER_IDENTITY_COLUMNS}, f)) AS DRIFTED_KEY_FIELDS
+            , DIFFERING_FIELDS
+            , len(DIFFERING_FIELDS) AS DIFFERING_FIELD_COUNT
+            , COMPARED_FIELDS
+        FROM ranked
+        WHERE SRC_RANK = 1 AND NEW_RANK = 1
+        AND MATCH_SCORE >= {RELINK_MIN_SCORE};
+        ANALYZE carrier_claims_relinked;
+
+        -- Claims still without a counterpart once the drifted ones are re-linked
+        CREATE OR REPLACE VIEW vw_carrier_claims_unlinked AS
+        SELECT
+            'Src Only' AS RECORD_STATUS
+            , s.DESYNPUF_ID
+            , s.CLM_ID
+            , s.CLM_FROM_DT
+            , s.CLM_THRU_DT
+        FROM src_carrier_claims s
+        WHERE NOT EXISTS (SELECT 1 FROM new_carrier_claims n WHERE n.CLAIM_KEY = s.CLAIM_KEY)
+        AND NOT EXISTS (SELECT 1 FROM carrier_claims_relinked r WHERE r.SRC_CLM_ID = s.CLM_ID)
+        UNION ALL
+        SELECT
+            'New Only' AS RECORD_STATUS
+            , n.DESYNPUF_ID
+            , n.CLM_ID
+            , n.CLM_FROM_DT
+            , n.CLM_THRU_DT
+        FROM new_carrier_claims n
+        WHERE NOT EXISTS (SELECT 1 FROM src_carrier_claims s WHERE s.CLAIM_KEY = n.CLAIM_KEY)
+        AND NOT EXISTS (SELECT 1 FROM carrier_claims_relinked r WHERE r.NEW_CLM_ID = n.CLM_ID);"""
+
+def run_phase_3a_relink():
+    """Pairs up unmatched source and new claims whose identity drifted between the files."""
+    logger.info("Starting Phase 3a orphan re-linking.")
+    sql_script = carrier_relink_script()
+
+    try:
+        execute_sql_script(sql_script, label="Phase 3a Relink")
+        logger.info("✅ Phase 3a orphan re-linking completed successfully")
+    except Exception as e:
+        logger.error(f"Error running Phase 3a orphan re-linking: {e}")
+        raise
+
+# Claim checks against the beneficiary's year file in effect on the claim's from date
+CLAIM_COVERAGE_CHECKS = {
+    'AFTER_DEATH': 'Claim starts after the beneficiary died',
+    'NO_PART_B_COVERAGE': 'Claim year has zero Part B (SMI) coverage months',
+    'NO_BENE_YEAR': 'No beneficiary file for the claim year',
+}
+
+def claim_coverage_select(system):
+    """
+    Flagged claims of one system. An ASOF join picks, for each claim, the latest bene-year
+    of the same beneficiary starting on or before CLM_FROM_DT; both sides are sorted on
+    (DESYNPUF_KEY, date) instead of range-joining every claim with every bene-year.
+    """
+    return f"""
+        SELECT
+            '{system.upper()}' AS SYSTEM
+            , c.CLM_ID
+            , c.DESYNPUF_ID
+            , c.CLM_FROM_DT
+            , b."YEAR" AS BENE_YEAR
+            , b.BENE_DEATH_DT
+            , b.BENE_SMI_CVRAGE_TOT_MONS
+            , COALESCE(c.CLAIM_DATE > b.DEATH_DATE, FALSE) AS AFTER_DEATH
+            , COALESCE(year(c.CLAIM_DATE) = b."YEAR" AND b.BENE_SMI_CVRAGE_TOT_MONS = 0, FALSE) AS NO_PART_B_COVERAGE
+            , b."YEAR" IS DISTINCT FROM year(c.CLAIM_DATE) AS NO_BENE_YEAR
+        FROM (
+            SELECT CLM_ID, DESYNPUF_ID, DESYNPUF_KEY, CLM_FROM_DT, try_strptime(CLM_FROM_DT, '%Y%m%d')::DATE AS CLAIM_DATE
+            FROM {system}_carrier_claims
+        ) c
+        ASOF LEFT JOIN (
+            SELECT
+                DESYNPUF_KEY, "YEAR", make_date("YEAR", 1, 1) AS YEAR_START
+                , BENE_DEATH_DT, try_strptime(BENE_DEATH_DT, '%Y%m%d')::DATE AS DEATH_DATE
+                , BENE_SMI_CVRAGE_TOT_MONS
+            FROM {system}_beneficiary_summary
+        ) b
+        ON c.DESYNPUF_KEY = b.DESYNPUF_KEY AND c.CLAIM_DATE >= b.YEAR_START
+        -- Claims with an unreadable CLM_FROM_DT are left to the CLM_DATES_VALID rule
+        WHERE c.CLAIM_DATE IS NOT NULL"""
+
+def run_phase_3e():
+    """Claims dated after the beneficiary's death or outside Part B coverage, per system."""
+    logger.info("Starting Phase 3e SQL transformations.")
+    checks = list(CLAIM_COVERAGE_CHECKS)
+    sql_script = f"""
+        CREATE OR REPLACE TABLE audit_claim_coverage AS
+        SELECT * FROM ({claim_coverage_select('src')}
+            UNION ALL{claim_coverage_select('new')}
+        )
+        WHERE {" OR ".join(checks)};
+        ANALYZE audit_claim_coverage;
+
+        -- Flagged claims per check in each system
+        CREATE OR REPLACE VIEW vw_claim_coverage_summary AS
+        WITH counts AS (
+            UNPIVOT (
+                SELECT
+                    SYSTEM
+                    , {select_list([f"count_if({check}) AS {check}" for check in checks], indent=20)}
+                FROM audit_claim_coverage
+                GROUP BY SYSTEM
+            ) ON {", ".join(checks)} INTO NAME CHECK_NAME VALUE CLAIMS
+        )
+        SELECT
+            d.CHECK_NAME
+            , d.DESCRIPTION
+            , COALESCE(sum(c.CLAIMS) FILTER (WHERE c.SYSTEM = 'SRC'), 0) AS SRC_CLAIMS
+            , COALESCE(sum(c.CLAIMS) FILTER (WHERE c.SYSTEM = 'NEW'), 0) AS NEW_CLAIMS
+            , COALESCE(sum(c.CLAIMS) FILTER (WHERE c.SYSTEM = 'NEW'), 0)
+                - COALESCE(sum(c.CLAIMS) FILTER (WHERE c.SYSTEM = 'SRC'), 0) AS DIFFERENCE
+        FROM (VALUES {", ".join(f"('{check}', '{description}')" for check, description in CLAIM_COVERAGE_CHECKS.items())}) d(CHECK_NAME, DESCRIPTION)
+        LEFT JOIN counts c ON c.CHECK_NAME = d.CHECK_NAME
+        GROUP BY d.CHECK_NAME, d.DESCRIPTION
+        ORDER BY d.CHECK_NAME;
+
+        -- Claims whose flags differ between the systems
+        CREATE OR REPLACE VIEW vw_claim_coverage_differences AS
+        SELECT
+            COALESCE(s.CLM_ID, n.CLM_ID) AS CLM_ID
+            , COALESCE(s.DESYNPUF_ID, n.DESYNPUF_ID) AS DESYNPUF_ID
+            , s.CLM_FROM_DT AS SRC_CLM_FROM_DT
+            , n.CLM_FROM_DT AS NEW_CLM_FROM_DT
+            , s.BENE_DEATH_DT AS SRC_BENE_DEATH_DT
+            , n.BENE_DEATH_DT AS NEW_BENE_DEATH_DT
+            , s.BENE_SMI_CVRAGE_TOT_MONS AS SRC_BENE_SMI_CVRAGE_TOT_MONS
+            , n.BENE_SMI_CVRAGE_TOT_MONS AS NEW_BENE_SMI_CVRAGE_TOT_MONS
+            , {select_list([f"COALESCE({side}.{check}, FALSE) AS {prefix}_{check}" for check in checks for side, prefix in (('s', 'SRC'), ('n', 'NEW'))], indent=12)}
+        FROM (SELECT * FROM audit_claim_coverage WHERE SYSTEM = 'SRC') s
+        FULL OUTER JOIN (SELECT * FROM audit_claim_coverage WHERE SYSTEM = 'NEW') n ON s.CLM_ID = n.CLM_ID
+        WHERE {" OR ".join(f"COALESCE(s.{check}, FALSE) <> COALESCE(n.{check}, FALSE)" for check in checks)};"""
+
+    try:
+        execute_sql_script(sql_script, label="Phase 3e")
+        logger.info("✅ Phase 3e SQL transformations completed successfully")
+    except Exception as e:
+        logger.error(f"Error running Phase 3e SQL transformations: {e}")
+        raise
+
+def run_phase_3c():
+    """Claims whose line items were only reordered, and the minimum line edit of the others."""
+    logger.info("Starting Phase 3c SQL transformations.")
+    line_defects = defect_subset_count(CARRIER_DEFECT_COLUMNS, CARRIER_LINE_ITEM_COLUMNS)
+    claim_lines = {
+        side: f"""
+            SELECT
+                CLAIM_KEY
+                , {line_item_hashes(side)} AS LINE_HASHES
+            FROM {table} {side}
+            WHERE CLAIM_KEY IN (SELECT CLAIM_KEY FROM line_defects)"""
+        for side, table in (('s', 'src_carrier_claims'), ('n', 'new_carrier_claims'))
+    }
+    # Each line is reduced to one hash, so a claim's lines compare as a sorted list of
+    # hashes (a multiset) instead of every line against every line of the other system
+    sql_script = f"""
+        CREATE OR REPLACE TABLE audit_claim_line_permutations AS
+        WITH line_defects AS (
             SELECT
                 DESYNPUF_ID
                 , CLM_ID
                 , CLM_FROM_DT
                 , CLM_THRU_DT
-                -- Financial Fields
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_1)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_1,  0) END AS LINE_NCH_PMT_AMT_1
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_2)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_2,  0) END AS LINE_NCH_PMT_AMT_2
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_3)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_3,  0) END AS LINE_NCH_PMT_AMT_3
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_4)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_4,  0) END AS LINE_NCH_PMT_AMT_4
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_5)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_5,  0) END AS LINE_NCH_PMT_AMT_5
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_6)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_6,  0) END AS LINE_NCH_PMT_AMT_6
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_7)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_7,  0) END AS LINE_NCH_PMT_AMT_7
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_8)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_8,  0) END AS LINE_NCH_PMT_AMT_8
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_9)  THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_9,  0) END AS LINE_NCH_PMT_AMT_9
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_10) THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_10, 0) END AS LINE_NCH_PMT_AMT_10
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_11) THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_11, 0) END AS LINE_NCH_PMT_AMT_11
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_12) THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_12, 0) END AS LINE_NCH_PMT_AMT_12
-                , CASE WHEN isnan(LINE_NCH_PMT_AMT_13) THEN 0 ELSE coalesce(LINE_NCH_PMT_AMT_13, 0) END AS LINE_NCH_PMT_AMT_13
-
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_1)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_1,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_1
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_2)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_2,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_2
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_3)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_3,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_3
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_4)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_4,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_4
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_5)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_5,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_5
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_6)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_6,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_6
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_7)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_7,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_7
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_8)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_8,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_8
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_9)  THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_9,  0) END AS LINE_BENE_PTB_DDCTBL_AMT_9
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_10) THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_10, 0) END AS LINE_BENE_PTB_DDCTBL_AMT_10
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_11) THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_11, 0) END AS LINE_BENE_PTB_DDCTBL_AMT_11
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_12) THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_12, 0) END AS LINE_BENE_PTB_DDCTBL_AMT_12
-                , CASE WHEN isnan(LINE_BENE_PTB_DDCTBL_AMT_13) THEN 0 ELSE coalesce(LINE_BENE_PTB_DDCTBL_AMT_13, 0) END AS LINE_BENE_PTB_DDCTBL_AMT_13
-
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_1)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_1,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_1
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_2)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_2,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_2
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_3)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_3,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_3
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_4)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_4,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_4
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_5)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_5,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_5
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_6)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_6,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_6
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_7)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_7,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_7
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_8)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_8,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_8
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_9)  THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_9,  0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_9
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_10) THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_10, 0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_10
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_11) THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_11, 0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_11
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_12) THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_12, 0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_12
-                , CASE WHEN isnan(LINE_BENE_PRMRY_PYR_PD_AMT_13) THEN 0 ELSE coalesce(LINE_BENE_PRMRY_PYR_PD_AMT_13, 0) END AS LINE_BENE_PRMRY_PYR_PD_AMT_13
-
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_1)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_1,  0) END AS LINE_COINSRNC_AMT_1
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_2)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_2,  0) END AS LINE_COINSRNC_AMT_2
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_3)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_3,  0) END AS LINE_COINSRNC_AMT_3
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_4)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_4,  0) END AS LINE_COINSRNC_AMT_4
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_5)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_5,  0) END AS LINE_COINSRNC_AMT_5
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_6)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_6,  0) END AS LINE_COINSRNC_AMT_6
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_7)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_7,  0) END AS LINE_COINSRNC_AMT_7
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_8)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_8,  0) END AS LINE_COINSRNC_AMT_8
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_9)  THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_9,  0) END AS LINE_COINSRNC_AMT_9
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_10) THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_10, 0) END AS LINE_COINSRNC_AMT_10
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_11) THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_11, 0) END AS LINE_COINSRNC_AMT_11
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_12) THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_12, 0) END AS LINE_COINSRNC_AMT_12
-                , CASE WHEN isnan(LINE_COINSRNC_AMT_13) THEN 0 ELSE coalesce(LINE_COINSRNC_AMT_13, 0) END AS LINE_COINSRNC_AMT_13
-
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_1)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_1,  0) END AS LINE_ALOWD_CHRG_AMT_1
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_2)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_2,  0) END AS LINE_ALOWD_CHRG_AMT_2
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_3)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_3,  0) END AS LINE_ALOWD_CHRG_AMT_3
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_4)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_4,  0) END AS LINE_ALOWD_CHRG_AMT_4
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_5)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_5,  0) END AS LINE_ALOWD_CHRG_AMT_5
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_6)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_6,  0) END AS LINE_ALOWD_CHRG_AMT_6
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_7)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_7,  0) END AS LINE_ALOWD_CHRG_AMT_7
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_8)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_8,  0) END AS LINE_ALOWD_CHRG_AMT_8
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_9)  THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_9,  0) END AS LINE_ALOWD_CHRG_AMT_9
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_10) THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_10, 0) END AS LINE_ALOWD_CHRG_AMT_10
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_11) THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_11, 0) END AS LINE_ALOWD_CHRG_AMT_11
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_12) THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_12, 0) END AS LINE_ALOWD_CHRG_AMT_12
-                , CASE WHEN isnan(LINE_ALOWD_CHRG_AMT_13) THEN 0 ELSE coalesce(LINE_ALOWD_CHRG_AMT_13, 0) END AS LINE_ALOWD_CHRG_AMT_13
-            FROM data_eng.main.new_carrier_claims
+                , CLAIM_KEY
+                , {line_defects} AS LINE_FIELD_DEFECTS
+            FROM audit_carrier_claims
+            WHERE {line_defects} > 0
+        ),
+        src_ AS ({claim_lines['s']}
+        ),
+        new_ AS ({claim_lines['n']}
+        ),
+        compared AS (
+            SELECT
+                s.CLAIM_KEY
+                , s.LINE_HASHES AS SRC_LINE_HASHES
+                , n.LINE_HASHES AS NEW_LINE_HASHES
+                , list_sort(list_filter(s.LINE_HASHES, h -> h <> 0)) AS SRC_LINE_SET
+                , list_sort(list_filter(n.LINE_HASHES, h -> h <> 0)) AS NEW_LINE_SET
+            FROM src_ s
+            JOIN new_ n ON s.CLAIM_KEY = n.CLAIM_KEY
+        ),
+        -- Multiset difference of the changed claims: how often each line occurs per system
+        line_counts AS (
+            SELECT
+                CLAIM_KEY
+                , LINE_HASH
+                , SUM(IN_SRC) AS SRC_COUNT
+                , SUM(IN_NEW) AS NEW_COUNT
+            FROM (
+                SELECT CLAIM_KEY, unnest(SRC_LINE_SET) AS LINE_HASH, 1 AS IN_SRC, 0 AS IN_NEW
+                FROM compared WHERE SRC_LINE_SET <> NEW_LINE_SET
+                UNION ALL
+                SELECT CLAIM_KEY, unnest(NEW_LINE_SET) AS LINE_HASH, 0 AS IN_SRC, 1 AS IN_NEW
+                FROM compared WHERE SRC_LINE_SET <> NEW_LINE_SET
+            )
+            GROUP BY CLAIM_KEY, LINE_HASH
+        ),
+        edits AS (
+            SELECT
+                CLAIM_KEY
+                , SUM(greatest(SRC_COUNT - NEW_COUNT, 0))::INTEGER AS LINES_REMOVED
+                , SUM(greatest(NEW_COUNT - SRC_COUNT, 0))::INTEGER AS LINES_ADDED
+            FROM line_counts
+            GROUP BY CLAIM_KEY
         )
         SELECT
-                k.DESYNPUF_ID
-                , k.CLM_ID
-                , k.CLM_FROM_DT
-                , k.CLM_THRU_DT
-                -- LINE_NCH_PMT_AMT (Medicare Reimbursement)
-                , s.LINE_NCH_PMT_AMT_1 as src_LINE_NCH_PMT_AMT_1
-                , n.LINE_NCH_PMT_AMT_1 as new_LINE_NCH_PMT_AMT_1
-                , n.LINE_NCH_PMT_AMT_1 - s.LINE_NCH_PMT_AMT_1 as delta_LINE_NCH_PMT_AMT_1
-                , abs(n.LINE_NCH_PMT_AMT_1 - s.LINE_NCH_PMT_AMT_1) as abs_delta_LINE_NCH_PMT_AMT_1
-                , s.LINE_NCH_PMT_AMT_2 as src_LINE_NCH_PMT_AMT_2
-                , n.LINE_NCH_PMT_AMT_2 as new_LINE_NCH_PMT_AMT_2
-                , n.LINE_NCH_PMT_AMT_2 - s.LINE_NCH_PMT_AMT_2 as delta_LINE_NCH_PMT_AMT_2
-                , abs(n.LINE_NCH_PMT_AMT_2 - s.LINE_NCH_PMT_AMT_2) as abs_delta_LINE_NCH_PMT_AMT_2
-                , s.LINE_NCH_PMT_AMT_3 as src_LINE_NCH_PMT_AMT_3
-                , n.LINE_NCH_PMT_AMT_3 as new_LINE_NCH_PMT_AMT_3
-                , n.LINE_NCH_PMT_AMT_3 - s.LINE_NCH_PMT_AMT_3 as delta_LINE_NCH_PMT_AMT_3
-                , abs(n.LINE_NCH_PMT_AMT_3 - s.LINE_NCH_PMT_AMT_3) as abs_delta_LINE_NCH_PMT_AMT_3
-                , s.LINE_NCH_PMT_AMT_4 as src_LINE_NCH_PMT_AMT_4
-                , n.LINE_NCH_PMT_AMT_4 as new_LINE_NCH_PMT_AMT_4
-                , n.LINE_NCH_PMT_AMT_4 - s.LINE_NCH_PMT_AMT_4 as delta_LINE_NCH_PMT_AMT_4
-                , abs(n.LINE_NCH_PMT_AMT_4 - s.LINE_NCH_PMT_AMT_4) as abs_delta_LINE_NCH_PMT_AMT_4
-                , s.LINE_NCH_PMT_AMT_5 as src_LINE_NCH_PMT_AMT_5
-                , n.LINE_NCH_PMT_AMT_5 as new_LINE_NCH_PMT_AMT_5
-                , n.LINE_NCH_PMT_AMT_5 - s.LINE_NCH_PMT_AMT_5 as delta_LINE_NCH_PMT_AMT_5
-                , abs(n.LINE_NCH_PMT_AMT_5 - s.LINE_NCH_PMT_AMT_5) as abs_delta_LINE_NCH_PMT_AMT_5
-                , s.LINE_NCH_PMT_AMT_6 as src_LINE_NCH_PMT_AMT_6
-                , n.LINE_NCH_PMT_AMT_6 as new_LINE_NCH_PMT_AMT_6
-                , n.LINE_NCH_PMT_AMT_6 - s.LINE_NCH_PMT_AMT_6 as delta_LINE_NCH_PMT_AMT_6
-                , abs(n.LINE_NCH_PMT_AMT_6 - s.LINE_NCH_PMT_AMT_6) as abs_delta_LINE_NCH_PMT_AMT_6
-                , s.LINE_NCH_PMT_AMT_7 as src_LINE_NCH_PMT_AMT_7
-                , n.LINE_NCH_PMT_AMT_7 as new_LINE_NCH_PMT_AMT_7
-                , n.LINE_NCH_PMT_AMT_7 - s.LINE_NCH_PMT_AMT_7 as delta_LINE_NCH_PMT_AMT_7
-                , abs(n.LINE_NCH_PMT_AMT_7 - s.LINE_NCH_PMT_AMT_7) as abs_delta_LINE_NCH_PMT_AMT_7
-                , s.LINE_NCH_PMT_AMT_8 as src_LINE_NCH_PMT_AMT_8
-                , n.LINE_NCH_PMT_AMT_8 as new_LINE_NCH_PMT_AMT_8
-                , n.LINE_NCH_PMT_AMT_8 - s.LINE_NCH_PMT_AMT_8 as delta_LINE_NCH_PMT_AMT_8
-                , abs(n.LINE_NCH_PMT_AMT_8 - s.LINE_NCH_PMT_AMT_8) as abs_delta_LINE_NCH_PMT_AMT_8
-                , s.LINE_NCH_PMT_AMT_9 as src_LINE_NCH_PMT_AMT_9
-                , n.LINE_NCH_PMT_AMT_9 as new_LINE_NCH_PMT_AMT_9
-                , n.LINE_NCH_PMT_AMT_9 - s.LINE_NCH_PMT_AMT_9 as delta_LINE_NCH_PMT_AMT_9
-                , abs(n.LINE_NCH_PMT_AMT_9 - s.LINE_NCH_PMT_AMT_9) as abs_delta_LINE_NCH_PMT_AMT_9
-                , s.LINE_NCH_PMT_AMT_10 as src_LINE_NCH_PMT_AMT_10
-                , n.LINE_NCH_PMT_AMT_10 as new_LINE_NCH_PMT_AMT_10
-                , n.LINE_NCH_PMT_AMT_10 - s.LINE_NCH_PMT_AMT_10 as delta_LINE_NCH_PMT_AMT_10
-                , abs(n.LINE_NCH_PMT_AMT_10 - s.LINE_NCH_PMT_AMT_10) as abs_delta_LINE_NCH_PMT_AMT_10
-                , s.LINE_NCH_PMT_AMT_11 as src_LINE_NCH_PMT_AMT_11
-                , n.LINE_NCH_PMT_AMT_11 as new_LINE_NCH_PMT_AMT_11
-                , n.LINE_NCH_PMT_AMT_11 - s.LINE_NCH_PMT_AMT_11 as delta_LINE_NCH_PMT_AMT_11
-                , abs(n.LINE_NCH_PMT_AMT_11 - s.LINE_NCH_PMT_AMT_11) as abs_delta_LINE_NCH_PMT_AMT_11
-                , s.LINE_NCH_PMT_AMT_12 as src_LINE_NCH_PMT_AMT_12
-                , n.LINE_NCH_PMT_AMT_12 as new_LINE_NCH_PMT_AMT_12
-                , n.LINE_NCH_PMT_AMT_12 - s.LINE_NCH_PMT_AMT_12 as delta_LINE_NCH_PMT_AMT_12
-                , abs(n.LINE_NCH_PMT_AMT_12 - s.LINE_NCH_PMT_AMT_12) as abs_delta_LINE_NCH_PMT_AMT_12
-                , s.LINE_NCH_PMT_AMT_13 as src_LINE_NCH_PMT_AMT_13
-                , n.LINE_NCH_PMT_AMT_13 as new_LINE_NCH_PMT_AMT_13
-                , n.LINE_NCH_PMT_AMT_13 - s.LINE_NCH_PMT_AMT_13 as delta_LINE_NCH_PMT_AMT_13
-                , abs(n.LINE_NCH_PMT_AMT_13 - s.LINE_NCH_PMT_AMT_13) as abs_delta_LINE_NCH_PMT_AMT_13
-                -- LINE_BENE_PTB_DDCTBL_AMT (Beneficiary Responsibility)
-                , s.LINE_BENE_PTB_DDCTBL_AMT_1 as src_LINE_BENE_PTB_DDCTBL_AMT_1
-                , n.LINE_BENE_PTB_DDCTBL_AMT_1 as new_LINE_BENE_PTB_DDCTBL_AMT_1
-                , n.LINE_BENE_PTB_DDCTBL_AMT_1 - s.LINE_BENE_PTB_DDCTBL_AMT_1 as delta_LINE_BENE_PTB_DDCTBL_AMT_1
-                , abs(n.LINE_BENE_PTB_DDCTBL_AMT_1 - s.LINE_BENE_PTB_DDCTBL_AMT_1) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_1
-                , s.LINE_BENE_PTB_DDCTBL_AMT_2 as src_LINE_BENE_PTB_DDCTBL_AMT_2
-                , n.LINE_BENE_PTB_DDCTBL_AMT_2 as new_LINE_BENE_PTB_DDCTBL_AMT_2
-                , n.LINE_BENE_PTB_DDCTBL_AMT_2 - s.LINE_BENE_PTB_DDCTBL_AMT_2 as delta_LINE_BENE_PTB_DDCTBL_AMT_2
-                , abs(n.LINE_BENE_PTB_DDCTBL_AMT_2 - s.LINE_BENE_PTB_DDCTBL_AMT_2) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_2
-                , s.LINE_BENE_PTB_DDCTBL_AMT_3 as src_LINE_BENE_PTB_DDCTBL_AMT_3
-                , n.LINE_BENE_PTB_DDCTBL_AMT_3 as new_LINE_BENE_PTB_DDCTBL_AMT_3
-                , n.LINE_BENE_PTB_DDCTBL_AMT_3 - s.LINE_BENE_PTB_DDCTBL_AMT_3 as delta_LINE_BENE_PTB_DDCTBL_AMT_3
-                , abs(n.LINE_BENE_PTB_DDCTBL_AMT_3 - s.LINE_BENE_PTB_DDCTBL_AMT_3) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_3
-                , s.LINE_BENE_PTB_DDCTBL_AMT_4 as src_LINE_BENE_PTB_DDCTBL_AMT_4
-                , n.LINE_BENE_PTB_DDCTBL_AMT_4 as new_LINE_BENE_PTB_DDCTBL_AMT_4
-                , n.LINE_BENE_PTB_DDCTBL_AMT_4 - s.LINE_BENE_PTB_DDCTBL_AMT_4 as delta_LINE_BENE_PTB_DDCTBL_AMT_4
-                , abs(n.LINE_BENE_PTB_DDCTBL_AMT_4 - s.LINE_BENE_PTB_DDCTBL_AMT_4) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_4
-                , s.LINE_BENE_PTB_DDCTBL_AMT_5 as src_LINE_BENE_PTB_DDCTBL_AMT_5
-                , n.LINE_BENE_PTB_DDCTBL_AMT_5 as new_LINE_BENE_PTB_DDCTBL_AMT_5
-                , n.LINE_BENE_PTB_DDCTBL_AMT_5 - s.LINE_BENE_PTB_DDCTBL_AMT_5 as delta_LINE_BENE_PTB_DDCTBL_AMT_5
-                , abs(n.LINE_BENE_PTB_DDCTBL_AMT_5 - s.LINE_BENE_PTB_DDCTBL_AMT_5) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_5
-                , s.LINE_BENE_PTB_DDCTBL_AMT_6 as src_LINE_BENE_PTB_DDCTBL_AMT_6
-                , n.LINE_BENE_PTB_DDCTBL_AMT_6 as new_LINE_BENE_PTB_DDCTBL_AMT_6
-                , n.LINE_BENE_PTB_DDCTBL_AMT_6 - s.LINE_BENE_PTB_DDCTBL_AMT_6 as delta_LINE_BENE_PTB_DDCTBL_AMT_6
-                , abs(n.LINE_BENE_PTB_DDCTBL_AMT_6 - s.LINE_BENE_PTB_DDCTBL_AMT_6) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_6
-                , s.LINE_BENE_PTB_DDCTBL_AMT_7 as src_LINE_BENE_PTB_DDCTBL_AMT_7
-                , n.LINE_BENE_PTB_DDCTBL_AMT_7 as new_LINE_BENE_PTB_DDCTBL_AMT_7
-                , n.LINE_BENE_PTB_DDCTBL_AMT_7 - s.LINE_BENE_PTB_DDCTBL_AMT_7 as delta_LINE_BENE_PTB_DDCTBL_AMT_7
-                , abs(n.LINE_BENE_PTB_DDCTBL_AMT_7 - s.LINE_BENE_PTB_DDCTBL_AMT_7) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_7
-                , s.LINE_BENE_PTB_DDCTBL_AMT_8 as src_LINE_BENE_PTB_DDCTBL_AMT_8
-                , n.LINE_BENE_PTB_DDCTBL_AMT_8 as new_LINE_BENE_PTB_DDCTBL_AMT_8
-                , n.LINE_BENE_PTB_DDCTBL_AMT_8 - s.LINE_BENE_PTB_DDCTBL_AMT_8 as delta_LINE_BENE_PTB_DDCTBL_AMT_8
-                , abs(n.LINE_BENE_PTB_DDCTBL_AMT_8 - s.LINE_BENE_PTB_DDCTBL_AMT_8) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_8
-                , s.LINE_BENE_PTB_DDCTBL_AMT_9 as src_LINE_BENE_PTB_DDCTBL_AMT_9
-                , n.LINE_BENE_PTB_DDCTBL_AMT_9 as new_LINE_BENE_PTB_DDCTBL_AMT_9
-                , n.LINE_BENE_PTB_DDCTBL_AMT_9 - s.LINE_BENE_PTB_DDCTBL_AMT_9 as delta_LINE_BENE_PTB_DDCTBL_AMT_9
-                , abs(n.LINE_BENE_PTB_DDCTBL_AMT_9 - s.LINE_BENE_PTB_DDCTBL_AMT_9) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_9
-                , s.LINE_BENE_PTB_DDCTBL_AMT_10 as src_LINE_BENE_PTB_DDCTBL_AMT_10
-                , n.LINE_BENE_PTB_DDCTBL_AMT_10 as new_LINE_BENE_PTB_DDCTBL_AMT_10
-                , n.LINE_BENE_PTB_DDCTBL_AMT_10 - s.LINE_BENE_PTB_DDCTBL_AMT_10 as delta_LINE_BENE_PTB_DDCTBL_AMT_10
-                , abs(n.LINE_BENE_PTB_DDCTBL_AMT_10 - s.LINE_BENE_PTB_DDCTBL_AMT_10) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_10
-                , s.LINE_BENE_PTB_DDCTBL_AMT_11 as src_LINE_BENE_PTB_DDCTBL_AMT_11
-                , n.LINE_BENE_PTB_DDCTBL_AMT_11 as new_LINE_BENE_PTB_DDCTBL_AMT_11
-                , n.LINE_BENE_PTB_DDCTBL_AMT_11 - s.LINE_BENE_PTB_DDCTBL_AMT_11 as delta_LINE_BENE_PTB_DDCTBL_AMT_11
-                , abs(n.LINE_BENE_PTB_DDCTBL_AMT_11 - s.LINE_BENE_PTB_DDCTBL_AMT_11) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_11
-                , s.LINE_BENE_PTB_DDCTBL_AMT_12 as src_LINE_BENE_PTB_DDCTBL_AMT_12
-                , n.LINE_BENE_PTB_DDCTBL_AMT_12 as new_LINE_BENE_PTB_DDCTBL_AMT_12
-                , n.LINE_BENE_PTB_DDCTBL_AMT_12 - s.LINE_BENE_PTB_DDCTBL_AMT_12 as delta_LINE_BENE_PTB_DDCTBL_AMT_12
-                , abs(n.LINE_BENE_PTB_DDCTBL_AMT_12 - s.LINE_BENE_PTB_DDCTBL_AMT_12) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_12
-                , s.LINE_BENE_PTB_DDCTBL_AMT_13 as src_LINE_BENE_PTB_DDCTBL_AMT_13
-                , n.LINE_BENE_PTB_DDCTBL_AMT_13 as new_LINE_BENE_PTB_DDCTBL_AMT_13
-                , n.LINE_BENE_PTB_DDCTBL_AMT_13 - s.LINE_BENE_PTB_DDCTBL_AMT_13 as delta_LINE_BENE_PTB_DDCTBL_AMT_13
-                , abs(n.LINE_BENE_PTB_DDCTBL_AMT_13 - s.LINE_BENE_PTB_DDCTBL_AMT_13) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_13
-                -- LINE_BENE_PRMRY_PYR_PD_AMT (Primary Payer Reimbursement)
-                , s.LINE_BENE_PRMRY_PYR_PD_AMT_1 as src_LINE_BENE_PRMRY_PYR_PD_AMT_1
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_1 as new_LINE_BENE_PRMRY_PYR_PD_AMT_1
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_1 - s.LINE_BENE_PRMRY_PYR_PD_AMT_1 as delta_LINE_BENE_PRMRY_PYR_PD_AMT_1
-                , abs(n.LINE_BENE_PRMRY_PYR_PD_AMT_1 - s.LINE_BENE_PRMRY_PYR_PD_AMT_1) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_1
-                , s.LINE_BENE_PRMRY_PYR_PD_AMT_2 as src_LINE_BENE_PRMRY_PYR_PD_AMT_2
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_2 as new_LINE_BENE_PRMRY_PYR_PD_AMT_2
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_2 - s.LINE_BENE_PRMRY_PYR_PD_AMT_2 as delta_LINE_BENE_PRMRY_PYR_PD_AMT_2
-                , abs(n.LINE_BENE_PRMRY_PYR_PD_AMT_2 - s.LINE_BENE_PRMRY_PYR_PD_AMT_2) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_2
-                , s.LINE_BENE_PRMRY_PYR_PD_AMT_3 as src_LINE_BENE_PRMRY_PYR_PD_AMT_3
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_3 as new_LINE_BENE_PRMRY_PYR_PD_AMT_3
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_3 - s.LINE_BENE_PRMRY_PYR_PD_AMT_3 as delta_LINE_BENE_PRMRY_PYR_PD_AMT_3
-                , abs(n.LINE_BENE_PRMRY_PYR_PD_AMT_3 - s.LINE_BENE_PRMRY_PYR_PD_AMT_3) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_3
-                , s.LINE_BENE_PRMRY_PYR_PD_AMT_4 as src_LINE_BENE_PRMRY_PYR_PD_AMT_4
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_4 as new_LINE_BENE_PRMRY_PYR_PD_AMT_4
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_4 - s.LINE_BENE_PRMRY_PYR_PD_AMT_4 as delta_LINE_BENE_PRMRY_PYR_PD_AMT_4
-                , abs(n.LINE_BENE_PRMRY_PYR_PD_AMT_4 - s.LINE_BENE_PRMRY_PYR_PD_AMT_4) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_4
-                , s.LINE_BENE_PRMRY_PYR_PD_AMT_5 as src_LINE_BENE_PRMRY_PYR_PD_AMT_5
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_5 as new_LINE_BENE_PRMRY_PYR_PD_AMT_5
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_5 - s.LINE_BENE_PRMRY_PYR_PD_AMT_5 as delta_LINE_BENE_PRMRY_PYR_PD_AMT_5
-                , abs(n.LINE_BENE_PRMRY_PYR_PD_AMT_5 - s.LINE_BENE_PRMRY_PYR_PD_AMT_5) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_5
-                , s.LINE_BENE_PRMRY_PYR_PD_AMT_6 as src_LINE_BENE_PRMRY_PYR_PD_AMT_6
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_6 as new_LINE_BENE_PRMRY_PYR_PD_AMT_6
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_6 - s.LINE_BENE_PRMRY_PYR_PD_AMT_6 as delta_LINE_BENE_PRMRY_PYR_PD_AMT_6
-                , abs(n.LINE_BENE_PRMRY_PYR_PD_AMT_6 - s.LINE_BENE_PRMRY_PYR_PD_AMT_6) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_6
-                , s.LINE_BENE_PRMRY_PYR_PD_AMT_7 as src_LINE_BENE_PRMRY_PYR_PD_AMT_7
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_7 as new_LINE_BENE_PRMRY_PYR_PD_AMT_7
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_7 - s.LINE_BENE_PRMRY_PYR_PD_AMT_7 as delta_LINE_BENE_PRMRY_PYR_PD_AMT_7
-                , abs(n.LINE_BENE_PRMRY_PYR_PD_AMT_7 - s.LINE_BENE_PRMRY_PYR_PD_AMT_7) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_7
-                , s.LINE_BENE_PRMRY_PYR_PD_AMT_8 as src_LINE_BENE_PRMRY_PYR_PD_AMT_8
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_8 as new_LINE_BENE_PRMRY_PYR_PD_AMT_8
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_8 - s.LINE_BENE_PRMRY_PYR_PD_AMT_8 as delta_LINE_BENE_PRMRY_PYR_PD_AMT_8
-                , abs(n.LINE_BENE_PRMRY_PYR_PD_AMT_8 - s.LINE_BENE_PRMRY_PYR_PD_AMT_8) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_8
-                , s.LINE_BENE_PRMRY_PYR_PD_AMT_9 as src_LINE_BENE_PRMRY_PYR_PD_AMT_9
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_9 as new_LINE_BENE_PRMRY_PYR_PD_AMT_9
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_9 - s.LINE_BENE_PRMRY_PYR_PD_AMT_9 as delta_LINE_BENE_PRMRY_PYR_PD_AMT_9
-                , abs(n.LINE_BENE_PRMRY_PYR_PD_AMT_9 - s.LINE_BENE_PRMRY_PYR_PD_AMT_9) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_9
-                , s.LINE_BENE_PRMRY_PYR_PD_AMT_10 as src_LINE_BENE_PRMRY_PYR_PD_AMT_10
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_10 as new_LINE_BENE_PRMRY_PYR_PD_AMT_10
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_10 - s.LINE_BENE_PRMRY_PYR_PD_AMT_10 as delta_LINE_BENE_PRMRY_PYR_PD_AMT_10
-                , abs(n.LINE_BENE_PRMRY_PYR_PD_AMT_10 - s.LINE_BENE_PRMRY_PYR_PD_AMT_10) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_10
-                , s.LINE_BENE_PRMRY_PYR_PD_AMT_11 as src_LINE_BENE_PRMRY_PYR_PD_AMT_11
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_11 as new_LINE_BENE_PRMRY_PYR_PD_AMT_11
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_11 - s.LINE_BENE_PRMRY_PYR_PD_AMT_11 as delta_LINE_BENE_PRMRY_PYR_PD_AMT_11
-                , abs(n.LINE_BENE_PRMRY_PYR_PD_AMT_11 - s.LINE_BENE_PRMRY_PYR_PD_AMT_11) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_11
-                , s.LINE_BENE_PRMRY_PYR_PD_AMT_12 as src_LINE_BENE_PRMRY_PYR_PD_AMT_12
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_12 as new_LINE_BENE_PRMRY_PYR_PD_AMT_12
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_12 - s.LINE_BENE_PRMRY_PYR_PD_AMT_12 as delta_LINE_BENE_PRMRY_PYR_PD_AMT_12
-                , abs(n.LINE_BENE_PRMRY_PYR_PD_AMT_12 - s.LINE_BENE_PRMRY_PYR_PD_AMT_12) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_12
-                , s.LINE_BENE_PRMRY_PYR_PD_AMT_13 as src_LINE_BENE_PRMRY_PYR_PD_AMT_13
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_13 as new_LINE_BENE_PRMRY_PYR_PD_AMT_13
-                , n.LINE_BENE_PRMRY_PYR_PD_AMT_13 - s.LINE_BENE_PRMRY_PYR_PD_AMT_13 as delta_LINE_BENE_PRMRY_PYR_PD_AMT_13
-                , abs(n.LINE_BENE_PRMRY_PYR_PD_AMT_13 - s.LINE_BENE_PRMRY_PYR_PD_AMT_13) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_13
-                -- LINE_COINSRNC_AMT (Beneficiary Responsibility)
-                , s.LINE_COINSRNC_AMT_1 as src_LINE_COINSRNC_AMT_1
-                , n.LINE_COINSRNC_AMT_1 as new_LINE_COINSRNC_AMT_1
-                , n.LINE_COINSRNC_AMT_1 - s.LINE_COINSRNC_AMT_1 as delta_LINE_COINSRNC_AMT_1
-                , abs(n.LINE_COINSRNC_AMT_1 - s.LINE_COINSRNC_AMT_1) as abs_delta_LINE_COINSRNC_AMT_1
-                , s.LINE_COINSRNC_AMT_2 as src_LINE_COINSRNC_AMT_2
-                , n.LINE_COINSRNC_AMT_2 as new_LINE_COINSRNC_AMT_2
-                , n.LINE_COINSRNC_AMT_2 - s.LINE_COINSRNC_AMT_2 as delta_LINE_COINSRNC_AMT_2
-                , abs(n.LINE_COINSRNC_AMT_2 - s.LINE_COINSRNC_AMT_2) as abs_delta_LINE_COINSRNC_AMT_2
-                , s.LINE_COINSRNC_AMT_3 as src_LINE_COINSRNC_AMT_3
-                , n.LINE_COINSRNC_AMT_3 as new_LINE_COINSRNC_AMT_3
-                , n.LINE_COINSRNC_AMT_3 - s.LINE_COINSRNC_AMT_3 as delta_LINE_COINSRNC_AMT_3
-                , abs(n.LINE_COINSRNC_AMT_3 - s.LINE_COINSRNC_AMT_3) as abs_delta_LINE_COINSRNC_AMT_3
-                , s.LINE_COINSRNC_AMT_4 as src_LINE_COINSRNC_AMT_4
-                , n.LINE_COINSRNC_AMT_4 as new_LINE_COINSRNC_AMT_4
-                , n.LINE_COINSRNC_AMT_4 - s.LINE_COINSRNC_AMT_4 as delta_LINE_COINSRNC_AMT_4
-                , abs(n.LINE_COINSRNC_AMT_4 - s.LINE_COINSRNC_AMT_4) as abs_delta_LINE_COINSRNC_AMT_4
-                , s.LINE_COINSRNC_AMT_5 as src_LINE_COINSRNC_AMT_5
-                , n.LINE_COINSRNC_AMT_5 as new_LINE_COINSRNC_AMT_5
-                , n.LINE_COINSRNC_AMT_5 - s.LINE_COINSRNC_AMT_5 as delta_LINE_COINSRNC_AMT_5
-                , abs(n.LINE_COINSRNC_AMT_5 - s.LINE_COINSRNC_AMT_5) as abs_delta_LINE_COINSRNC_AMT_5
-                , s.LINE_COINSRNC_AMT_6 as src_LINE_COINSRNC_AMT_6
-                , n.LINE_COINSRNC_AMT_6 as new_LINE_COINSRNC_AMT_6
-                , n.LINE_COINSRNC_AMT_6 - s.LINE_COINSRNC_AMT_6 as delta_LINE_COINSRNC_AMT_6
-                , abs(n.LINE_COINSRNC_AMT_6 - s.LINE_COINSRNC_AMT_6) as abs_delta_LINE_COINSRNC_AMT_6
-                , s.LINE_COINSRNC_AMT_7 as src_LINE_COINSRNC_AMT_7
-                , n.LINE_COINSRNC_AMT_7 as new_LINE_COINSRNC_AMT_7
-                , n.LINE_COINSRNC_AMT_7 - s.LINE_COINSRNC_AMT_7 as delta_LINE_COINSRNC_AMT_7
-                , abs(n.LINE_COINSRNC_AMT_7 - s.LINE_COINSRNC_AMT_7) as abs_delta_LINE_COINSRNC_AMT_7
-                , s.LINE_COINSRNC_AMT_8 as src_LINE_COINSRNC_AMT_8
-                , n.LINE_COINSRNC_AMT_8 as new_LINE_COINSRNC_AMT_8
-                , n.LINE_COINSRNC_AMT_8 - s.LINE_COINSRNC_AMT_8 as delta_LINE_COINSRNC_AMT_8
-                , abs(n.LINE_COINSRNC_AMT_8 - s.LINE_COINSRNC_AMT_8) as abs_delta_LINE_COINSRNC_AMT_8
-                , s.LINE_COINSRNC_AMT_9 as src_LINE_COINSRNC_AMT_9
-                , n.LINE_COINSRNC_AMT_9 as new_LINE_COINSRNC_AMT_9
-                , n.LINE_COINSRNC_AMT_9 - s.LINE_COINSRNC_AMT_9 as delta_LINE_COINSRNC_AMT_9
-                , abs(n.LINE_COINSRNC_AMT_9 - s.LINE_COINSRNC_AMT_9) as abs_delta_LINE_COINSRNC_AMT_9
-                , s.LINE_COINSRNC_AMT_10 as src_LINE_COINSRNC_AMT_10
-                , n.LINE_COINSRNC_AMT_10 as new_LINE_COINSRNC_AMT_10
-                , n.LINE_COINSRNC_AMT_10 - s.LINE_COINSRNC_AMT_10 as delta_LINE_COINSRNC_AMT_10
-                , abs(n.LINE_COINSRNC_AMT_10 - s.LINE_COINSRNC_AMT_10) as abs_delta_LINE_COINSRNC_AMT_10
-                , s.LINE_COINSRNC_AMT_11 as src_LINE_COINSRNC_AMT_11
-                , n.LINE_COINSRNC_AMT_11 as new_LINE_COINSRNC_AMT_11
-                , n.LINE_COINSRNC_AMT_11 - s.LINE_COINSRNC_AMT_11 as delta_LINE_COINSRNC_AMT_11
-                , abs(n.LINE_COINSRNC_AMT_11 - s.LINE_COINSRNC_AMT_11) as abs_delta_LINE_COINSRNC_AMT_11
-                , s.LINE_COINSRNC_AMT_12 as src_LINE_COINSRNC_AMT_12
-                , n.LINE_COINSRNC_AMT_12 as new_LINE_COINSRNC_AMT_12
-                , n.LINE_COINSRNC_AMT_12 - s.LINE_COINSRNC_AMT_12 as delta_LINE_COINSRNC_AMT_12
-                , abs(n.LINE_COINSRNC_AMT_12 - s.LINE_COINSRNC_AMT_12) as abs_delta_LINE_COINSRNC_AMT_12
-                , s.LINE_COINSRNC_AMT_13 as src_LINE_COINSRNC_AMT_13
-                , n.LINE_COINSRNC_AMT_13 as new_LINE_COINSRNC_AMT_13
-                , n.LINE_COINSRNC_AMT_13 - s.LINE_COINSRNC_AMT_13 as delta_LINE_COINSRNC_AMT_13
-                , abs(n.LINE_COINSRNC_AMT_13 - s.LINE_COINSRNC_AMT_13) as abs_delta_LINE_COINSRNC_AMT_13
-                -- LINE_ALOWD_CHRG_AMT (Filter Baseline)
-                , s.LINE_ALOWD_CHRG_AMT_1 as src_LINE_ALOWD_CHRG_AMT_1
-                , n.LINE_ALOWD_CHRG_AMT_1 as new_LINE_ALOWD_CHRG_AMT_1
-                , n.LINE_ALOWD_CHRG_AMT_1 - s.LINE_ALOWD_CHRG_AMT_1 as delta_LINE_ALOWD_CHRG_AMT_1
-                , abs(n.LINE_ALOWD_CHRG_AMT_1 - s.LINE_ALOWD_CHRG_AMT_1) as abs_delta_LINE_ALOWD_CHRG_AMT_1
-                , s.LINE_ALOWD_CHRG_AMT_2 as src_LINE_ALOWD_CHRG_AMT_2
-                , n.LINE_ALOWD_CHRG_AMT_2 as new_LINE_ALOWD_CHRG_AMT_2
-                , n.LINE_ALOWD_CHRG_AMT_2 - s.LINE_ALOWD_CHRG_AMT_2 as delta_LINE_ALOWD_CHRG_AMT_2
-                , abs(n.LINE_ALOWD_CHRG_AMT_2 - s.LINE_ALOWD_CHRG_AMT_2) as abs_delta_LINE_ALOWD_CHRG_AMT_2
-                , s.LINE_ALOWD_CHRG_AMT_3 as src_LINE_ALOWD_CHRG_AMT_3
-                , n.LINE_ALOWD_CHRG_AMT_3 as new_LINE_ALOWD_CHRG_AMT_3
-                , n.LINE_ALOWD_CHRG_AMT_3 - s.LINE_ALOWD_CHRG_AMT_3 as delta_LINE_ALOWD_CHRG_AMT_3
-                , abs(n.LINE_ALOWD_CHRG_AMT_3 - s.LINE_ALOWD_CHRG_AMT_3) as abs_delta_LINE_ALOWD_CHRG_AMT_3
-                , s.LINE_ALOWD_CHRG_AMT_4 as src_LINE_ALOWD_CHRG_AMT_4
-                , n.LINE_ALOWD_CHRG_AMT_4 as new_LINE_ALOWD_CHRG_AMT_4
-                , n.LINE_ALOWD_CHRG_AMT_4 - s.LINE_ALOWD_CHRG_AMT_4 as delta_LINE_ALOWD_CHRG_AMT_4
-                , abs(n.LINE_ALOWD_CHRG_AMT_4 - s.LINE_ALOWD_CHRG_AMT_4) as abs_delta_LINE_ALOWD_CHRG_AMT_4
-                , s.LINE_ALOWD_CHRG_AMT_5 as src_LINE_ALOWD_CHRG_AMT_5
-                , n.LINE_ALOWD_CHRG_AMT_5 as new_LINE_ALOWD_CHRG_AMT_5
-                , n.LINE_ALOWD_CHRG_AMT_5 - s.LINE_ALOWD_CHRG_AMT_5 as delta_LINE_ALOWD_CHRG_AMT_5
-                , abs(n.LINE_ALOWD_CHRG_AMT_5 - s.LINE_ALOWD_CHRG_AMT_5) as abs_delta_LINE_ALOWD_CHRG_AMT_5
-                , s.LINE_ALOWD_CHRG_AMT_6 as src_LINE_ALOWD_CHRG_AMT_6
-                , n.LINE_ALOWD_CHRG_AMT_6 as new_LINE_ALOWD_CHRG_AMT_6
-                , n.LINE_ALOWD_CHRG_AMT_6 - s.LINE_ALOWD_CHRG_AMT_6 as delta_LINE_ALOWD_CHRG_AMT_6
-                , abs(n.LINE_ALOWD_CHRG_AMT_6 - s.LINE_ALOWD_CHRG_AMT_6) as abs_delta_LINE_ALOWD_CHRG_AMT_6
-                , s.LINE_ALOWD_CHRG_AMT_7 as src_LINE_ALOWD_CHRG_AMT_7
-                , n.LINE_ALOWD_CHRG_AMT_7 as new_LINE_ALOWD_CHRG_AMT_7
-                , n.LINE_ALOWD_CHRG_AMT_7 - s.LINE_ALOWD_CHRG_AMT_7 as delta_LINE_ALOWD_CHRG_AMT_7
-                , abs(n.LINE_ALOWD_CHRG_AMT_7 - s.LINE_ALOWD_CHRG_AMT_7) as abs_delta_LINE_ALOWD_CHRG_AMT_7
-                , s.LINE_ALOWD_CHRG_AMT_8 as src_LINE_ALOWD_CHRG_AMT_8
-                , n.LINE_ALOWD_CHRG_AMT_8 as new_LINE_ALOWD_CHRG_AMT_8
-                , n.LINE_ALOWD_CHRG_AMT_8 - s.LINE_ALOWD_CHRG_AMT_8 as delta_LINE_ALOWD_CHRG_AMT_8
-                , abs(n.LINE_ALOWD_CHRG_AMT_8 - s.LINE_ALOWD_CHRG_AMT_8) as abs_delta_LINE_ALOWD_CHRG_AMT_8
-                , s.LINE_ALOWD_CHRG_AMT_9 as src_LINE_ALOWD_CHRG_AMT_9
-                , n.LINE_ALOWD_CHRG_AMT_9 as new_LINE_ALOWD_CHRG_AMT_9
-                , n.LINE_ALOWD_CHRG_AMT_9 - s.LINE_ALOWD_CHRG_AMT_9 as delta_LINE_ALOWD_CHRG_AMT_9
-                , abs(n.LINE_ALOWD_CHRG_AMT_9 - s.LINE_ALOWD_CHRG_AMT_9) as abs_delta_LINE_ALOWD_CHRG_AMT_9
-                , s.LINE_ALOWD_CHRG_AMT_10 as src_LINE_ALOWD_CHRG_AMT_10
-                , n.LINE_ALOWD_CHRG_AMT_10 as new_LINE_ALOWD_CHRG_AMT_10
-                , n.LINE_ALOWD_CHRG_AMT_10 - s.LINE_ALOWD_CHRG_AMT_10 as delta_LINE_ALOWD_CHRG_AMT_10
-                , abs(n.LINE_ALOWD_CHRG_AMT_10 - s.LINE_ALOWD_CHRG_AMT_10) as abs_delta_LINE_ALOWD_CHRG_AMT_10
-                , s.LINE_ALOWD_CHRG_AMT_11 as src_LINE_ALOWD_CHRG_AMT_11
-                , n.LINE_ALOWD_CHRG_AMT_11 as new_LINE_ALOWD_CHRG_AMT_11
-                , n.LINE_ALOWD_CHRG_AMT_11 - s.LINE_ALOWD_CHRG_AMT_11 as delta_LINE_ALOWD_CHRG_AMT_11
-                , abs(n.LINE_ALOWD_CHRG_AMT_11 - s.LINE_ALOWD_CHRG_AMT_11) as abs_delta_LINE_ALOWD_CHRG_AMT_11
-                , s.LINE_ALOWD_CHRG_AMT_12 as src_LINE_ALOWD_CHRG_AMT_12
-                , n.LINE_ALOWD_CHRG_AMT_12 as new_LINE_ALOWD_CHRG_AMT_12
-                , n.LINE_ALOWD_CHRG_AMT_12 - s.LINE_ALOWD_CHRG_AMT_12 as delta_LINE_ALOWD_CHRG_AMT_12
-                , abs(n.LINE_ALOWD_CHRG_AMT_12 - s.LINE_ALOWD_CHRG_AMT_12) as abs_delta_LINE_ALOWD_CHRG_AMT_12
-                , s.LINE_ALOWD_CHRG_AMT_13 as src_LINE_ALOWD_CHRG_AMT_13
-                , n.LINE_ALOWD_CHRG_AMT_13 as new_LINE_ALOWD_CHRG_AMT_13
-                , n.LINE_ALOWD_CHRG_AMT_13 - s.LINE_ALOWD_CHRG_AMT_13 as delta_LINE_ALOWD_CHRG_AMT_13
-                , abs(n.LINE_ALOWD_CHRG_AMT_13 - s.LINE_ALOWD_CHRG_AMT_13) as abs_delta_LINE_ALOWD_CHRG_AMT_13
-            FROM
-                keys k 
-        LEFT JOIN src_ s ON k.DESYNPUF_ID = s.DESYNPUF_ID AND k.CLM_ID = s.CLM_ID AND k.CLM_FROM_DT = s.CLM_FROM_DT AND k.CLM_THRU_DT = s.CLM_THRU_DT
-        LEFT JOIN new_ n ON k.DESYNPUF_ID = n.DESYNPUF_ID AND k.CLM_ID = n.CLM_ID AND k.CLM_FROM_DT = n.CLM_FROM_DT AND k.CLM_THRU_DT = n.CLM_THRU_DT;
-        CREATE INDEX idx_audit_carrier_financials_keys ON audit_carrier_financials(DESYNPUF_ID, CLM_ID, CLM_FROM_DT, CLM_THRU_DT);
-        ANALYZE audit_carrier_financials;
+            d.DESYNPUF_ID
+            , d.CLM_ID
+            , d.CLM_FROM_DT
+            , d.CLM_THRU_DT
+            , d.CLAIM_KEY
+            , CASE
+                WHEN c.SRC_LINE_HASHES = c.NEW_LINE_HASHES THEN 'IDENTICAL'
+                WHEN c.SRC_LINE_SET = c.NEW_LINE_SET THEN 'PERMUTED_ONLY'
+                ELSE 'CHANGED'
+            END AS LINE_CHANGE
+            , len(c.SRC_LINE_SET) AS SRC_LINES
+            , len(c.NEW_LINE_SET) AS NEW_LINES
+            , len(list_filter(
+                range(1, {CARRIER_LINE_COUNT + 1}), i -> c.SRC_LINE_HASHES[i] <> c.NEW_LINE_HASHES[i]
+            )) AS LINE_SLOTS_DIFFERING
+            , COALESCE(e.LINES_REMOVED, 0) AS LINES_REMOVED
+            , COALESCE(e.LINES_ADDED, 0) AS LINES_ADDED
+            -- A removed line and an added line pair up as one line substitution
+            , greatest(COALESCE(e.LINES_REMOVED, 0), COALESCE(e.LINES_ADDED, 0)) AS MIN_LINE_EDITS
+            , d.LINE_FIELD_DEFECTS
+        FROM line_defects d
+        JOIN compared c ON c.CLAIM_KEY = d.CLAIM_KEY
+        LEFT JOIN edits e ON e.CLAIM_KEY = d.CLAIM_KEY;
+        ANALYZE audit_claim_line_permutations;
+
+        -- Line field defects of PERMUTED_ONLY claims are phantoms of the line order
+        CREATE OR REPLACE VIEW vw_claim_line_permutation_summary AS
+        SELECT
+            LINE_CHANGE
+            , COUNT(*) AS CLAIMS
+            , SUM(LINE_FIELD_DEFECTS) AS LINE_FIELD_DEFECTS
+            , SUM(LINE_SLOTS_DIFFERING) AS LINE_SLOTS_DIFFERING
+            , SUM(MIN_LINE_EDITS) AS MIN_LINE_EDITS
+        FROM audit_claim_line_permutations
+        GROUP BY LINE_CHANGE
+        ORDER BY LINE_CHANGE;"""
 
-        CREATE OR REPLACE VIEW vw_financial_differences_claim AS
-        WITH agg AS (
+    try:
+        execute_sql_script(sql_script, label="Phase 3c")
+        logger.info("✅ Phase 3c SQL transformations completed successfully")
+    except Exception as e:
+        logger.error(f"Error running Phase 3c SQL transformations: {e}")
+        raise
+
+def run_phase_3f():
+    """Line amounts that moved to another amount field of the same line between the systems."""
+    logger.info("Starting Phase 3f SQL transformations.")
+    families = list(CARRIER_LINE_AMOUNT_FAMILIES)
+    field_names = "[" + ", ".join(f"'{family}'" for family in families) + "]"
+    # Candidate (A, B) field pairs as 1-based indexes into each line's amount LIST
+    pairs = "[" + ", ".join(
+        f"{{'A': {a}, 'B': {b}}}"
+        for a in range(1, len(families) + 1) for b in range(1, len(families) + 1) if a != b
+    ) + "]"
+    line_amounts = ",\n                    ".join(
+        f"struct_pack(LINE_NUM := {line}, "
+        f"SRC := [{', '.join(f'src_{family}_{line}' for family in families)}], "
+        f"NEW := [{', '.join(f'new_{family}_{line}' for family in families)}])"
+        for line in range(1, CARRIER_LINE_COUNT + 1)
+    )
+    # One scan of the financial audit: every line's amounts become a SRC and a NEW list and
+    # all field pairs are tested at once with list_filter, instead of one query per pair
+    sql_script = f"""
+        CREATE OR REPLACE TABLE audit_financial_transpositions AS
+        WITH lines AS (
             SELECT
                 DESYNPUF_ID
                 , CLM_ID
                 , CLM_FROM_DT
                 , CLM_THRU_DT
-                , sum(abs_delta_LINE_NCH_PMT_AMT_1)  as abs_delta_LINE_NCH_PMT_AMT_1
-                , sum(abs_delta_LINE_NCH_PMT_AMT_2)  as abs_delta_LINE_NCH_PMT_AMT_2
-                , sum(abs_delta_LINE_NCH_PMT_AMT_3)  as abs_delta_LINE_NCH_PMT_AMT_3
-                , sum(abs_delta_LINE_NCH_PMT_AMT_4)  as abs_delta_LINE_NCH_PMT_AMT_4
-                , sum(abs_delta_LINE_NCH_PMT_AMT_5)  as abs_delta_LINE_NCH_PMT_AMT_5
-                , sum(abs_delta_LINE_NCH_PMT_AMT_6)  as abs_delta_LINE_NCH_PMT_AMT_6
-                , sum(abs_delta_LINE_NCH_PMT_AMT_7)  as abs_delta_LINE_NCH_PMT_AMT_7
-                , sum(abs_delta_LINE_NCH_PMT_AMT_8)  as abs_delta_LINE_NCH_PMT_AMT_8
-                , sum(abs_delta_LINE_NCH_PMT_AMT_9)  as abs_delta_LINE_NCH_PMT_AMT_9
-                , sum(abs_delta_LINE_NCH_PMT_AMT_10) as abs_delta_LINE_NCH_PMT_AMT_10
-                , sum(abs_delta_LINE_NCH_PMT_AMT_11) as abs_delta_LINE_NCH_PMT_AMT_11
-                , sum(abs_delta_LINE_NCH_PMT_AMT_12) as abs_delta_LINE_NCH_PMT_AMT_12
-                , sum(abs_delta_LINE_NCH_PMT_AMT_13) as abs_delta_LINE_NCH_PMT_AMT_13
-                , sum(abs_delta_LINE_BENE_PTB_DDCTBL_AMT_1)  as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_1
-                , sum(abs_delta_LINE_BENE_PTB_DDCTBL_AMT_2)  as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_2
-                , sum(abs_delta_LINE_BENE_PTB_DDCTBL_AMT_3)  as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_3
-                , sum(abs_delta_LINE_BENE_PTB_DDCTBL_AMT_4)  as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_4
-                , sum(abs_delta_LINE_BENE_PTB_DDCTBL_AMT_5)  as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_5
-                , sum(abs_delta_LINE_BENE_PTB_DDCTBL_AMT_6)  as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_6
-                , sum(abs_delta_LINE_BENE_PTB_DDCTBL_AMT_7)  as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_7
-                , sum(abs_delta_LINE_BENE_PTB_DDCTBL_AMT_8)  as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_8
-                , sum(abs_delta_LINE_BENE_PTB_DDCTBL_AMT_9)  as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_9
-                , sum(abs_delta_LINE_BENE_PTB_DDCTBL_AMT_10) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_10
-                , sum(abs_delta_LINE_BENE_PTB_DDCTBL_AMT_11) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_11
-                , sum(abs_delta_LINE_BENE_PTB_DDCTBL_AMT_12) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_12
-                , sum(abs_delta_LINE_BENE_PTB_DDCTBL_AMT_13) as abs_delta_LINE_BENE_PTB_DDCTBL_AMT_13
-                , sum(abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_1)  as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_1
-                , sum(abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_2)  as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_2
-                , sum(abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_3)  as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_3
-                , sum(abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_4)  as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_4
-                , sum(abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_5)  as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_5
-                , sum(abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_6)  as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_6
-                , sum(abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_7)  as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_7
-                , sum(abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_8)  as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_8
-                , sum(abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_9)  as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_9
-                , sum(abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_10) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_10
-                , sum(abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_11) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_11
-                , sum(abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_12) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_12
-                , sum(abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_13) as abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_13
-                , sum(abs_delta_LINE_COINSRNC_AMT_1)  as abs_delta_LINE_COINSRNC_AMT_1
-                , sum(abs_delta_LINE_COINSRNC_AMT_2)  as abs_delta_LINE_COINSRNC_AMT_2
-                , sum(abs_delta_LINE_COINSRNC_AMT_3)  as abs_delta_LINE_COINSRNC_AMT_3
-                , sum(abs_delta_LINE_COINSRNC_AMT_4)  as abs_delta_LINE_COINSRNC_AMT_4
-                , sum(abs_delta_LINE_COINSRNC_AMT_5)  as abs_delta_LINE_COINSRNC_AMT_5
-                , sum(abs_delta_LINE_COINSRNC_AMT_6)  as abs_delta_LINE_COINSRNC_AMT_6
-                , sum(abs_delta_LINE_COINSRNC_AMT_7)  as abs_delta_LINE_COINSRNC_AMT_7
-                , sum(abs_delta_LINE_COINSRNC_AMT_8)  as abs_delta_LINE_COINSRNC_AMT_8
-                , sum(abs_delta_LINE_COINSRNC_AMT_9)  as abs_delta_LINE_COINSRNC_AMT_9
-                , sum(abs_delta_LINE_COINSRNC_AMT_10) as abs_delta_LINE_COINSRNC_AMT_10
-                , sum(abs_delta_LINE_COINSRNC_AMT_11) as abs_delta_LINE_COINSRNC_AMT_11
-                , sum(abs_delta_LINE_COINSRNC_AMT_12) as abs_delta_LINE_COINSRNC_AMT_12
-                , sum(abs_delta_LINE_COINSRNC_AMT_13) as abs_delta_LINE_COINSRNC_AMT_13
-                , sum(abs_delta_LINE_ALOWD_CHRG_AMT_1)  as abs_delta_LINE_ALOWD_CHRG_AMT_1
-                , sum(abs_delta_LINE_ALOWD_CHRG_AMT_2)  as abs_delta_LINE_ALOWD_CHRG_AMT_2
-                , sum(abs_delta_LINE_ALOWD_CHRG_AMT_3)  as abs_delta_LINE_ALOWD_CHRG_AMT_3
-                , sum(abs_delta_LINE_ALOWD_CHRG_AMT_4)  as abs_delta_LINE_ALOWD_CHRG_AMT_4
-                , sum(abs_delta_LINE_ALOWD_CHRG_AMT_5)  as abs_delta_LINE_ALOWD_CHRG_AMT_5
-                , sum(abs_delta_LINE_ALOWD_CHRG_AMT_6)  as abs_delta_LINE_ALOWD_CHRG_AMT_6
-                , sum(abs_delta_LINE_ALOWD_CHRG_AMT_7)  as abs_delta_LINE_ALOWD_CHRG_AMT_7
-                , sum(abs_delta_LINE_ALOWD_CHRG_AMT_8)  as abs_delta_LINE_ALOWD_CHRG_AMT_8
-                , sum(abs_delta_LINE_ALOWD_CHRG_AMT_9)  as abs_delta_LINE_ALOWD_CHRG_AMT_9
-                , sum(abs_delta_LINE_ALOWD_CHRG_AMT_10) as abs_delta_LINE_ALOWD_CHRG_AMT_10
-                , sum(abs_delta_LINE_ALOWD_CHRG_AMT_11) as abs_delta_LINE_ALOWD_CHRG_AMT_11
-                , sum(abs_delta_LINE_ALOWD_CHRG_AMT_12) as abs_delta_LINE_ALOWD_CHRG_AMT_12
-                , sum(abs_delta_LINE_ALOWD_CHRG_AMT_13) as abs_delta_LINE_ALOWD_CHRG_AMT_13
-            FROM data_eng.main.audit_carrier_financials
-            GROUP BY 
+                , CLAIM_KEY
+                , unnest([
+                    {line_amounts}
+                ]) AS LINE
+            FROM audit_carrier_financials
+            WHERE list_max(list_value(
+                {abs_delta_list(CARRIER_MONEY_COLUMNS)}
+            )) > 0
+        ),
+        -- Source amount of field A found in field B of the new line, both fields having changed
+        moves AS (
+            SELECT
                 DESYNPUF_ID
                 , CLM_ID
                 , CLM_FROM_DT
                 , CLM_THRU_DT
+                , CLAIM_KEY
+                , LINE.LINE_NUM AS LINE_NUM
+                , LINE.SRC AS SRC
+                , LINE.NEW AS NEW
+                , unnest(list_filter({pairs}, p ->
+                    LINE.SRC[p.A] <> 0
+                    AND LINE.SRC[p.A] <> LINE.NEW[p.A]
+                    AND LINE.SRC[p.B] <> LINE.NEW[p.B]
+                    AND LINE.SRC[p.A] = LINE.NEW[p.B]
+                )) AS MOVE
+            FROM lines
+            WHERE LINE.SRC <> LINE.NEW
         )
-        SELECT *
-        FROM agg
-        WHERE list_sum(list_value(
-                abs_delta_LINE_NCH_PMT_AMT_1,
-                abs_delta_LINE_NCH_PMT_AMT_2,
-                abs_delta_LINE_NCH_PMT_AMT_3,
-                abs_delta_LINE_NCH_PMT_AMT_4,
-                abs_delta_LINE_NCH_PMT_AMT_5,
-                abs_delta_LINE_NCH_PMT_AMT_6,
-                abs_delta_LINE_NCH_PMT_AMT_7,
-                abs_delta_LINE_NCH_PMT_AMT_8,
-                abs_delta_LINE_NCH_PMT_AMT_9,
-                abs_delta_LINE_NCH_PMT_AMT_10,
-                abs_delta_LINE_NCH_PMT_AMT_11,
-                abs_delta_LINE_NCH_PMT_AMT_12,
-                abs_delta_LINE_NCH_PMT_AMT_13,
-                abs_delta_LINE_BENE_PTB_DDCTBL_AMT_1,
-                abs_delta_LINE_BENE_PTB_DDCTBL_AMT_2,
-                abs_delta_LINE_BENE_PTB_DDCTBL_AMT_3,
-                abs_delta_LINE_BENE_PTB_DDCTBL_AMT_4,
-                abs_delta_LINE_BENE_PTB_DDCTBL_AMT_5,
-                abs_delta_LINE_BENE_PTB_DDCTBL_AMT_6,
-                abs_delta_LINE_BENE_PTB_DDCTBL_AMT_7,
-                abs_delta_LINE_BENE_PTB_DDCTBL_AMT_8,
-                abs_delta_LINE_BENE_PTB_DDCTBL_AMT_9,
-                abs_delta_LINE_BENE_PTB_DDCTBL_AMT_10,
-                abs_delta_LINE_BENE_PTB_DDCTBL_AMT_11,
-                abs_delta_LINE_BENE_PTB_DDCTBL_AMT_12,
-                abs_delta_LINE_BENE_PTB_DDCTBL_AMT_13,
-                abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_1,
-                abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_2,
-                abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_3,
-                abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_4,
-                abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_5,
-                abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_6,
-                abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_7,
-                abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_8,
-                abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_9,
-                abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_10,
-                abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_11,
-                abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_12,
-                abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_13,
-                abs_delta_LINE_COINSRNC_AMT_1,
-                abs_delta_LINE_COINSRNC_AMT_2,
-                abs_delta_LINE_COINSRNC_AMT_3,
-                abs_delta_LINE_COINSRNC_AMT_4,
-                abs_delta_LINE_COINSRNC_AMT_5,
-                abs_delta_LINE_COINSRNC_AMT_6,
-                abs_delta_LINE_COINSRNC_AMT_7,
-                abs_delta_LINE_COINSRNC_AMT_8,
-                abs_delta_LINE_COINSRNC_AMT_9,
-                abs_delta_LINE_COINSRNC_AMT_10,
-                abs_delta_LINE_COINSRNC_AMT_11,
-                abs_delta_LINE_COINSRNC_AMT_12,
-                abs_delta_LINE_COINSRNC_AMT_13,
-                abs_delta_LINE_ALOWD_CHRG_AMT_1,
-                abs_delta_LINE_ALOWD_CHRG_AMT_2,
-                abs_delta_LINE_ALOWD_CHRG_AMT_3,
-                abs_delta_LINE_ALOWD_CHRG_AMT_4,
-                abs_delta_LINE_ALOWD_CHRG_AMT_5,
-                abs_delta_LINE_ALOWD_CHRG_AMT_6,
-                abs_delta_LINE_ALOWD_CHRG_AMT_7,
-                abs_delta_LINE_ALOWD_CHRG_AMT_8,
-                abs_delta_LINE_ALOWD_CHRG_AMT_9,
-                abs_delta_LINE_ALOWD_CHRG_AMT_10,
-                abs_delta_LINE_ALOWD_CHRG_AMT_11,
-                abs_delta_LINE_ALOWD_CHRG_AMT_12,
-                abs_delta_LINE_ALOWD_CHRG_AMT_13
-        )) > 0;
+        SELECT
+            DESYNPUF_ID
+            , CLM_ID
+            , CLM_FROM_DT
+            , CLM_THRU_DT
+            , CLAIM_KEY
+            , LINE_NUM
+            , {field_names}[MOVE.A] AS SRC_FIELD
+            , {field_names}[MOVE.B] AS NEW_FIELD
+            , SRC[MOVE.A] AS AMOUNT
+            -- Both values changed places, rather than one value copied over another
+            , SRC[MOVE.B] = NEW[MOVE.A] AS SWAPPED
+        FROM moves;
+        ANALYZE audit_financial_transpositions;
+
+        -- How often each source field's amount turns up in each other field of the new line
+        CREATE OR REPLACE VIEW vw_financial_transposition_matrix AS
+        SELECT
+            SRC_FIELD
+            , {select_list([f"count_if(NEW_FIELD = '{family}') AS {family}" for family in families], indent=12)}
+            , COUNT(*) AS MOVED_VALUES
+            , count_if(SWAPPED) AS SWAPPED_VALUES
+            , SUM(AMOUNT) AS MOVED_AMOUNT
+        FROM audit_financial_transpositions
+        GROUP BY SRC_FIELD
+        ORDER BY MOVED_VALUES DESC;"""
 
-        CREATE OR REPLACE TABLE audit_claim_financial_fields AS
-        WITH flat AS (
+    try:
+        execute_sql_script(sql_script, label="Phase 3f")
+        logger.info("✅ Phase 3f SQL transformations completed successfully")
+    except Exception as e:
+        logger.error(f"Error running Phase 3f SQL transformations: {e}")
+        raise
+
+def payment_reconciliation_variables():
+    """Payment formula variables the carrier claims compute and the beneficiary summary reports."""
+    bene_columns = {column.name for column in SrcBeneficiarySummary.__table__.columns}
+    variables = [col[len('CALC_'):] for col in payment_columns('src_carrier_claims')]
+    return [variable for variable in variables if variable in bene_columns]
+
+def run_phase_4():
+    """Claims-to-beneficiary payment reconciliation for every bene-year."""
+    logger.info("Starting Phase 4 SQL transformations.")
+    variables = payment_reconciliation_variables()
+    calc_sums = select_list([f"SUM(CALC_{var}) AS CALC_{var}" for var in variables])
+    reconciliation_columns = []
+    for var in variables:
+        for prefix, calc, bene in (('SRC', 'sc', 'sb'), ('NEW', 'nc', 'nb')):
+            reconciliation_columns += [
+                f"COALESCE({calc}.CALC_{var}, 0) AS {prefix}_CALC_{var}",
+                f"COALESCE({bene}.{var}, 0) AS {prefix}_{var}",
+                f"COALESCE({bene}.{var}, 0) - COALESCE({calc}.CALC_{var}, 0) AS {prefix}_{var}_VARIANCE",
+            ]
+        reconciliation_columns += [
+            f"COALESCE(nc.CALC_{var}, 0) - COALESCE(sc.CALC_{var}, 0) AS CALC_DELTA_{var}",
+            f"COALESCE(nb.{var}, 0) - COALESCE(sb.{var}, 0) AS BENE_DELTA_{var}",
+        ]
+    year_columns = [
+        f"SUM({prefix}{var}{suffix}) AS {prefix}{var}{suffix}"
+        for var in variables
+        for prefix, suffix in (
+            ('SRC_CALC_', ''), ('SRC_', ''), ('SRC_', '_VARIANCE'),
+            ('NEW_CALC_', ''), ('NEW_', ''), ('NEW_', '_VARIANCE'),
+            ('CALC_DELTA_', ''), ('BENE_DELTA_', ''),
+        )
+    ]
+    # The payment formulas are evaluated on every claim line in the same scan that
+    # groups the claims by bene-year, once per system
+    claim_totals = {
+        system: f"""
             SELECT
-                [
-                    struct_pack(metric_name := 'abs_delta_LINE_NCH_PMT_AMT_1',  metric_value := abs_delta_LINE_NCH_PMT_AMT_1),
-                    struct_pack(metric_name := 'abs_delta_LINE_NCH_PMT_AMT_2',  metric_value := abs_delta_LINE_NCH_PMT_AMT_2),
-                    struct_pack(metric_name := 'abs_delta_LINE_NCH_PMT_AMT_3',  metric_value := abs_delta_LINE_NCH_PMT_AMT_3),
-                    struct_pack(metric_name := 'abs_delta_LINE_NCH_PMT_AMT_4',  metric_value := abs_delta_LINE_NCH_PMT_AMT_4),
-                    struct_pack(metric_name := 'abs_delta_LINE_NCH_PMT_AMT_5',  metric_value := abs_delta_LINE_NCH_PMT_AMT_5),
-                    struct_pack(metric_name := 'abs_delta_LINE_NCH_PMT_AMT_6',  metric_value := abs_delta_LINE_NCH_PMT_AMT_6),
-                    struct_pack(metric_name := 'abs_delta_LINE_NCH_PMT_AMT_7',  metric_value := abs_delta_LINE_NCH_PMT_AMT_7),
-                    struct_pack(metric_name := 'abs_delta_LINE_NCH_PMT_AMT_8',  metric_value := abs_delta_LINE_NCH_PMT_AMT_8),
-                    struct_pack(metric_name := 'abs_delta_LINE_NCH_PMT_AMT_9',  metric_value := abs_delta_LINE_NCH_PMT_AMT_9),
-                    struct_pack(metric_name := 'abs_delta_LINE_NCH_PMT_AMT_10', metric_value := abs_delta_LINE_NCH_PMT_AMT_10),
-                    struct_pack(metric_name := 'abs_delta_LINE_NCH_PMT_AMT_11', metric_value := abs_delta_LINE_NCH_PMT_AMT_11),
-                    struct_pack(metric_name := 'abs_delta_LINE_NCH_PMT_AMT_12', metric_value := abs_delta_LINE_NCH_PMT_AMT_12),
-                    struct_pack(metric_name := 'abs_delta_LINE_NCH_PMT_AMT_13', metric_value := abs_delta_LINE_NCH_PMT_AMT_13),
-
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PTB_DDCTBL_AMT_1',  metric_value := abs_delta_LINE_BENE_PTB_DDCTBL_AMT_1),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PTB_DDCTBL_AMT_2',  metric_value := abs_delta_LINE_BENE_PTB_DDCTBL_AMT_2),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PTB_DDCTBL_AMT_3',  metric_value := abs_delta_LINE_BENE_PTB_DDCTBL_AMT_3),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PTB_DDCTBL_AMT_4',  metric_value := abs_delta_LINE_BENE_PTB_DDCTBL_AMT_4),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PTB_DDCTBL_AMT_5',  metric_value := abs_delta_LINE_BENE_PTB_DDCTBL_AMT_5),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PTB_DDCTBL_AMT_6',  metric_value := abs_delta_LINE_BENE_PTB_DDCTBL_AMT_6),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PTB_DDCTBL_AMT_7',  metric_value := abs_delta_LINE_BENE_PTB_DDCTBL_AMT_7),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PTB_DDCTBL_AMT_8',  metric_value := abs_delta_LINE_BENE_PTB_DDCTBL_AMT_8),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PTB_DDCTBL_AMT_9',  metric_value := abs_delta_LINE_BENE_PTB_DDCTBL_AMT_9),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PTB_DDCTBL_AMT_10', metric_value := abs_delta_LINE_BENE_PTB_DDCTBL_AMT_10),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PTB_DDCTBL_AMT_11', metric_value := abs_delta_LINE_BENE_PTB_DDCTBL_AMT_11),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PTB_DDCTBL_AMT_12', metric_value := abs_delta_LINE_BENE_PTB_DDCTBL_AMT_12),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PTB_DDCTBL_AMT_13', metric_value := abs_delta_LINE_BENE_PTB_DDCTBL_AMT_13),
-
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_1',  metric_value := abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_1),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_2',  metric_value := abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_2),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_3',  metric_value := abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_3),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_4',  metric_value := abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_4),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_5',  metric_value := abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_5),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_6',  metric_value := abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_6),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_7',  metric_value := abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_7),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_8',  metric_value := abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_8),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_9',  metric_value := abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_9),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_10', metric_value := abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_10),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_11', metric_value := abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_11),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_12', metric_value := abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_12),
-                    struct_pack(metric_name := 'abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_13', metric_value := abs_delta_LINE_BENE_PRMRY_PYR_PD_AMT_13),
-
-                    struct_pack(metric_name := 'abs_delta_LINE_COINSRNC_AMT_1',  metric_value := abs_delta_LINE_COINSRNC_AMT_1),
-                    struct_pack(metric_name := 'abs_delta_LINE_COINSRNC_AMT_2',  metric_value := abs_delta_LINE_COINSRNC_AMT_2),
-                    struct_pack(metric_name := 'abs_delta_LINE_COINSRNC_AMT_3',  metric_value := abs_delta_LINE_COINSRNC_AMT_3),
-                    struct_pack(metric_name := 'abs_delta_LINE_COINSRNC_AMT_4',  metric_value := abs_delta_LINE_COINSRNC_AMT_4),
-                    struct_pack(metric_name := 'abs_delta_LINE_COINSRNC_AMT_5',  metric_value := abs_delta_LINE_COINSRNC_AMT_5),
-                    struct_pack(metric_name := 'abs_delta_LINE_COINSRNC_AMT_6',  metric_value := abs_delta_LINE_COINSRNC_AMT_6),
-                    struct_pack(metric_name := 'abs_delta_LINE_COINSRNC_AMT_7',  metric_value := abs_delta_LINE_COINSRNC_AMT_7),
-                    struct_pack(metric_name := 'abs_delta_LINE_COINSRNC_AMT_8',  metric_value := abs_delta_LINE_COINSRNC_AMT_8),
-                    struct_pack(metric_name := 'abs_delta_LINE_COINSRNC_AMT_9',  metric_value := abs_delta_LINE_COINSRNC_AMT_9),
-                    struct_pack(metric_name := 'abs_delta_LINE_COINSRNC_AMT_10', metric_value := abs_delta_LINE_COINSRNC_AMT_10),
-                    struct_pack(metric_name := 'abs_delta_LINE_COINSRNC_AMT_11', metric_value := abs_delta_LINE_COINSRNC_AMT_11),
-                    struct_pack(metric_name := 'abs_delta_LINE_COINSRNC_AMT_12', metric_value := abs_delta_LINE_COINSRNC_AMT_12),
-                    struct_pack(metric_name := 'abs_delta_LINE_COINSRNC_AMT_13', metric_value := abs_delta_LINE_COINSRNC_AMT_13),
-
-                    struct_pack(metric_name := 'abs_delta_LINE_ALOWD_CHRG_AMT_1',  metric_value := abs_delta_LINE_ALOWD_CHRG_AMT_1),
-                    struct_pack(metric_name := 'abs_delta_LINE_ALOWD_CHRG_AMT_2',  metric_value := abs_delta_LINE_ALOWD_CHRG_AMT_2),
-                    struct_pack(metric_name := 'abs_delta_LINE_ALOWD_CHRG_AMT_3',  metric_value := abs_delta_LINE_ALOWD_CHRG_AMT_3),
-                    struct_pack(metric_name := 'abs_delta_LINE_ALOWD_CHRG_AMT_4',  metric_value := abs_delta_LINE_ALOWD_CHRG_AMT_4),
-                    struct_pack(metric_name := 'abs_delta_LINE_ALOWD_CHRG_AMT_5',  metric_value := abs_delta_LINE_ALOWD_CHRG_AMT_5),
-                    struct_pack(metric_name := 'abs_delta_LINE_ALOWD_CHRG_AMT_6',  metric_value := abs_delta_LINE_ALOWD_CHRG_AMT_6),
-                    struct_pack(metric_name := 'abs_delta_LINE_ALOWD_CHRG_AMT_7',  metric_value := abs_delta_LINE_ALOWD_CHRG_AMT_7),
-                    struct_pack(metric_name := 'abs_delta_LINE_ALOWD_CHRG_AMT_8',  metric_value := abs_delta_LINE_ALOWD_CHRG_AMT_8),
-                    struct_pack(metric_name := 'abs_delta_LINE_ALOWD_CHRG_AMT_9',  metric_value := abs_delta_LINE_ALOWD_CHRG_AMT_9),
-                    struct_pack(metric_name := 'abs_delta_LINE_ALOWD_CHRG_AMT_10', metric_value := abs_delta_LINE_ALOWD_CHRG_AMT_10),
-                    struct_pack(metric_name := 'abs_delta_LINE_ALOWD_CHRG_AMT_11', metric_value := abs_delta_LINE_ALOWD_CHRG_AMT_11),
-                    struct_pack(metric_name := 'abs_delta_LINE_ALOWD_CHRG_AMT_12', metric_value := abs_delta_LINE_ALOWD_CHRG_AMT_12),
-                    struct_pack(metric_name := 'abs_delta_LINE_ALOWD_CHRG_AMT_13', metric_value := abs_delta_LINE_ALOWD_CHRG_AMT_13)
-                ] AS metrics
-            FROM data_eng.main.vw_financial_differences_claim
+                DESYNPUF_KEY
+                , "YEAR"
+                , any_value(DESYNPUF_ID) AS DESYNPUF_ID
+                , COUNT(*) AS CLAIM_COUNT
+                , {calc_sums}
+            FROM (
+                SELECT
+                    DESYNPUF_KEY
+                    , DESYNPUF_ID
+                    , TRY_CAST(left(CLM_FROM_DT, 4) AS INTEGER) AS "YEAR"
+                    , {payment_projection(f'{system}_carrier_claims', indent=20)}
+                FROM {system}_carrier_claims
+            )
+            GROUP BY DESYNPUF_KEY, "YEAR\""""
+        for system in ('src', 'new')
+    }
+    sql_script = f"""/*CLAIMS TO BENEFICIARY PAYMENT RECONCILIATION*/
+
+        -- Annual amounts recomputed from the claims with data/lookup_payment_formulas.json
+        -- next to the amounts the beneficiary summary reports, for both systems
+        CREATE OR REPLACE TABLE audit_payment_reconciliation AS
+        WITH src_calc AS ({claim_totals['src']}
+        ),
+        new_calc AS ({claim_totals['new']}
+        ),
+        src_bene AS (
+            SELECT
+                DESYNPUF_KEY
+                , "YEAR"
+                , DESYNPUF_ID
+                , {money_value_columns(variables)}
+            FROM src_beneficiary_summary
+        ),
+        new_bene AS (
+            SELECT
+                DESYNPUF_KEY
+                , "YEAR"
+                , DESYNPUF_ID
+                , {money_value_columns(variables)}
+            FROM new_beneficiary_summary
+        ),
+        bene_years AS (
+            SELECT DESYNPUF_KEY, "YEAR" FROM src_calc
+            UNION SELECT DESYNPUF_KEY, "YEAR" FROM new_calc
+            UNION SELECT DESYNPUF_KEY, "YEAR" FROM src_bene
+            UNION SELECT DESYNPUF_KEY, "YEAR" FROM new_bene
         )
         SELECT
-            unnest.metric_name,
-            round(sum(unnest.metric_value),2) AS total_abs_delta
-        FROM flat
-        CROSS JOIN UNNEST(metrics)
-        GROUP BY unnest.metric_name
-        ORDER BY total_abs_delta DESC;"""
+            k.DESYNPUF_KEY
+            , COALESCE(sb.DESYNPUF_ID, nb.DESYNPUF_ID, sc.DESYNPUF_ID, nc.DESYNPUF_ID) AS DESYNPUF_ID
+            , k."YEAR"
+            , sb.DESYNPUF_KEY IS NOT NULL AS IN_SRC_BENE
+            , nb.DESYNPUF_KEY IS NOT NULL AS IN_NEW_BENE
+            , COALESCE(sc.CLAIM_COUNT, 0) AS SRC_CLAIM_COUNT
+            , COALESCE(nc.CLAIM_COUNT, 0) AS NEW_CLAIM_COUNT
+            , {select_list(reconciliation_columns, indent=12)}
+        FROM bene_years k
+        LEFT JOIN src_calc sc ON k.DESYNPUF_KEY = sc.DESYNPUF_KEY AND k."YEAR" IS NOT DISTINCT FROM sc."YEAR"
+        LEFT JOIN new_calc nc ON k.DESYNPUF_KEY = nc.DESYNPUF_KEY AND k."YEAR" IS NOT DISTINCT FROM nc."YEAR"
+        LEFT JOIN src_bene sb ON k.DESYNPUF_KEY = sb.DESYNPUF_KEY AND k."YEAR" = sb."YEAR"
+        LEFT JOIN new_bene nb ON k.DESYNPUF_KEY = nb.DESYNPUF_KEY AND k."YEAR" = nb."YEAR";
+        CREATE INDEX idx_audit_payment_reconciliation_keys ON audit_payment_reconciliation(DESYNPUF_KEY, "YEAR");
+        ANALYZE audit_payment_reconciliation;
+
+        CREATE OR REPLACE VIEW vw_payment_reconciliation_by_year AS
+        SELECT
+            "YEAR"
+            , COUNT(*) AS BENE_YEARS
+            , SUM(SRC_CLAIM_COUNT) AS SRC_CLAIM_COUNT
+            , SUM(NEW_CLAIM_COUNT) AS NEW_CLAIM_COUNT
+            , {select_list(year_columns, indent=12)}
+        FROM audit_payment_reconciliation
+        GROUP BY "YEAR"
+        ORDER BY "YEAR";"""
     try:
-        execute_sql_script(sql_script)
+        execute_sql_script(sql_script, label="Phase 4")
         logger.info("✅ Phase 4 SQL transformations completed successfully")
     except Exception as e:
         logger.error(f"Error running Phase 4 SQL transformations: {e}")
         raise
-    
+
+def run_phase_5():
+    """Six Sigma views."""
     logger.info("Starting Phase 5 SQL transformations.")
-    sql_script = """/*SIX SIGMA ANALYSIS*/
+    sql_script = f"""/*SIX SIGMA ANALYSIS*/
 
         DROP VIEW IF EXISTS vw_sigma_analysis;
         CREATE VIEW vw_sigma_analysis AS
+        -- Totals come from the per-column counters; the date diff columns are not part of DEFECT_COUNT
         WITH carrier_claim_dpmo AS (
             SELECT
-                COUNT(*) AS TOTAL_UNITS,
-                SUM(
-                    ICD9_DGNS_CD_1 + ICD9_DGNS_CD_2 + 
-                    ICD9_DGNS_CD_3 + ICD9_DGNS_CD_4 + ICD9_DGNS_CD_5 + ICD9_DGNS_CD_6 + 
-                    ICD9_DGNS_CD_7 + ICD9_DGNS_CD_8 + PRF_PHYSN_NPI_1 + PRF_PHYSN_NPI_2 + 
-                    PRF_PHYSN_NPI_3 + PRF_PHYSN_NPI_4 + PRF_PHYSN_NPI_5 + PRF_PHYSN_NPI_6 + 
-                    PRF_PHYSN_NPI_7 + PRF_PHYSN_NPI_8 + PRF_PHYSN_NPI_9 + PRF_PHYSN_NPI_10 + 
-                    PRF_PHYSN_NPI_11 + PRF_PHYSN_NPI_12 + PRF_PHYSN_NPI_13 + TAX_NUM_1 + 
-                    TAX_NUM_2 + TAX_NUM_3 + TAX_NUM_4 + TAX_NUM_5 + TAX_NUM_6 + TAX_NUM_7 + 
-                    TAX_NUM_8 + TAX_NUM_9 + TAX_NUM_10 + TAX_NUM_11 + TAX_NUM_12 + TAX_NUM_13 + 
-                    HCPCS_CD_1 + HCPCS_CD_2 + HCPCS_CD_3 + HCPCS_CD_4 + HCPCS_CD_5 + 
-                    HCPCS_CD_6 + HCPCS_CD_7 + HCPCS_CD_8 + HCPCS_CD_9 + HCPCS_CD_10 + 
-                    HCPCS_CD_11 + HCPCS_CD_12 + HCPCS_CD_13 + LINE_NCH_PMT_AMT_1 + 
-                    LINE_NCH_PMT_AMT_2 + LINE_NCH_PMT_AMT_3 + LINE_NCH_PMT_AMT_4 + 
-                    LINE_NCH_PMT_AMT_5 + LINE_NCH_PMT_AMT_6 + LINE_NCH_PMT_AMT_7 + 
-                    LINE_NCH_PMT_AMT_8 + LINE_NCH_PMT_AMT_9 + LINE_NCH_PMT_AMT_10 + 
-                    LINE_NCH_PMT_AMT_11 + LINE_NCH_PMT_AMT_12 + LINE_NCH_PMT_AMT_13 + 
-                    LINE_BENE_PTB_DDCTBL_AMT_1 + LINE_BENE_PTB_DDCTBL_AMT_2 + 
-                    LINE_BENE_PTB_DDCTBL_AMT_3 + LINE_BENE_PTB_DDCTBL_AMT_4 + 
-                    LINE_BENE_PTB_DDCTBL_AMT_5 + LINE_BENE_PTB_DDCTBL_AMT_6 + 
-                    LINE_BENE_PTB_DDCTBL_AMT_7 + LINE_BENE_PTB_DDCTBL_AMT_8 + 
-                    LINE_BENE_PTB_DDCTBL_AMT_9 + LINE_BENE_PTB_DDCTBL_AMT_10 + 
-                    LINE_BENE_PTB_DDCTBL_AMT_11 + LINE_BENE_PTB_DDCTBL_AMT_12 + 
-                    LINE_BENE_PTB_DDCTBL_AMT_13 + LINE_BENE_PRMRY_PYR_PD_AMT_1 + 
-                    LINE_BENE_PRMRY_PYR_PD_AMT_2 + LINE_BENE_PRMRY_PYR_PD_AMT_3 + 
-                    LINE_BENE_PRMRY_PYR_PD_AMT_4 + LINE_BENE_PRMRY_PYR_PD_AMT_5 + 
-                    LINE_BENE_PRMRY_PYR_PD_AMT_6 + LINE_BENE_PRMRY_PYR_PD_AMT_7 + 
-                    LINE_BENE_PRMRY_PYR_PD_AMT_8 + LINE_BENE_PRMRY_PYR_PD_AMT_9 + 
-                    LINE_BENE_PRMRY_PYR_PD_AMT_10 + LINE_BENE_PRMRY_PYR_PD_AMT_11 + 
-                    LINE_BENE_PRMRY_PYR_PD_AMT_12 + LINE_BENE_PRMRY_PYR_PD_AMT_13 + 
-                    LINE_COINSRNC_AMT_1 + LINE_COINSRNC_AMT_2 + LINE_COINSRNC_AMT_3 + 
-                    LINE_COINSRNC_AMT_4 + LINE_COINSRNC_AMT_5 + LINE_COINSRNC_AMT_6 + 
-                    LINE_COINSRNC_AMT_7 + LINE_COINSRNC_AMT_8 + LINE_COINSRNC_AMT_9 + 
-                    LINE_COINSRNC_AMT_10 + LINE_COINSRNC_AMT_11 + LINE_COINSRNC_AMT_12 + 
-                    LINE_COINSRNC_AMT_13 + LINE_ALOWD_CHRG_AMT_1 + LINE_ALOWD_CHRG_AMT_2 + 
-                    LINE_ALOWD_CHRG_AMT_3 + LINE_ALOWD_CHRG_AMT_4 + LINE_ALOWD_CHRG_AMT_5 + 
-                    LINE_ALOWD_CHRG_AMT_6 + LINE_ALOWD_CHRG_AMT_7 + LINE_ALOWD_CHRG_AMT_8 + 
-                    LINE_ALOWD_CHRG_AMT_9 + LINE_ALOWD_CHRG_AMT_10 + LINE_ALOWD_CHRG_AMT_11 + 
-                    LINE_ALOWD_CHRG_AMT_12 + LINE_ALOWD_CHRG_AMT_13 + LINE_PRCSG_IND_CD_1 + 
-                    LINE_PRCSG_IND_CD_2 + LINE_PRCSG_IND_CD_3 + LINE_PRCSG_IND_CD_4 + 
-                    LINE_PRCSG_IND_CD_5 + LINE_PRCSG_IND_CD_6 + LINE_PRCSG_IND_CD_7 + 
-                    LINE_PRCSG_IND_CD_8 + LINE_PRCSG_IND_CD_9 + LINE_PRCSG_IND_CD_10 + 
-                    LINE_PRCSG_IND_CD_11 + LINE_PRCSG_IND_CD_12 + LINE_PRCSG_IND_CD_13 + 
-                    LINE_ICD9_DGNS_CD_1 + LINE_ICD9_DGNS_CD_2 + LINE_ICD9_DGNS_CD_3 + 
-                    LINE_ICD9_DGNS_CD_4 + LINE_ICD9_DGNS_CD_5 + LINE_ICD9_DGNS_CD_6 + 
-                    LINE_ICD9_DGNS_CD_7 + LINE_ICD9_DGNS_CD_8 + LINE_ICD9_DGNS_CD_9 + 
-                    LINE_ICD9_DGNS_CD_10 + LINE_ICD9_DGNS_CD_11 + LINE_ICD9_DGNS_CD_12 + 
-                    LINE_ICD9_DGNS_CD_13
-                ) AS TOTAL_DEFECTS,
-                (COUNT(*) * 102) AS TOTAL_OPPORTUNITIES
-            FROM audit_carrier_claims
+                max(TOTAL_OPPORTUNITIES) AS TOTAL_UNITS,
+                SUM(TOTAL_DEFECTS) AS TOTAL_DEFECTS,
+                (max(TOTAL_OPPORTUNITIES) * 102) AS TOTAL_OPPORTUNITIES
+            FROM audit_column_defect_counts
+            WHERE SOURCE = 'Carrier Claims'
+                AND COLUMN_NAME NOT IN ({", ".join(f"'{col}'" for col in CARRIER_DATE_DIFF_COLUMNS)})
         ),
         bene_summary_dpmo AS (
             SELECT
-                COUNT(*) AS TOTAL_UNITS,
-                SUM(
-                    BENE_BIRTH_DT + BENE_DEATH_DT + BENE_SEX_IDENT_CD + BENE_RACE_CD + 
-                    BENE_ESRD_IND + SP_STATE_CODE + BENE_COUNTY_CD + 
-                    BENE_HI_CVRAGE_TOT_MONS + BENE_SMI_CVRAGE_TOT_MONS + 
-                    BENE_HMO_CVRAGE_TOT_MONS + PLAN_CVRG_MOS_NUM + 
-                    SP_ALZHDMTA + SP_CHF + SP_CHRNKIDN + SP_CNCR + SP_COPD + 
-                    SP_DEPRESSN + SP_DIABETES + SP_ISCHMCHT + SP_OSTEOPRS + 
-                    SP_RA_OA + SP_STRKETIA + MEDREIMB_IP + BENRES_IP + 
-                    PPPYMT_IP + MEDREIMB_OP + BENRES_OP + PPPYMT_OP + 
-                    MEDREIMB_CAR + BENRES_CAR + PPPYMT_CAR
-                ) AS TOTAL_DEFECTS,
-                (COUNT(*) * 31) AS TOTAL_OPPORTUNITIES
-            FROM audit_beneficiary_summary
+                max(TOTAL_OPPORTUNITIES) AS TOTAL_UNITS,
+                SUM(TOTAL_DEFECTS) AS TOTAL_DEFECTS,
+                (max(TOTAL_OPPORTUNITIES) * 31) AS TOTAL_OPPORTUNITIES
+            FROM audit_column_defect_counts
+            WHERE SOURCE = 'Beneficiary Summary'
         )
         SELECT
             'Carrier Claims' AS SUBJECT,
@@ -2728,7 +2619,7 @@ def main():
             TOTAL_OPPORTUNITIES,
             (CAST(TOTAL_DEFECTS AS FLOAT) / TOTAL_OPPORTUNITIES) * 1000000 AS DPMO,
             (1 - (CAST(TOTAL_DEFECTS AS FLOAT) / TOTAL_OPPORTUNITIES)) AS YIELD,
-            sigma_level(1 - (CAST(TOTAL_DEFECTS AS FLOAT) / TOTAL_OPPORTUNITIES)) AS SIGMA_LEVEL
+            sigma_level_exact(1 - (CAST(TOTAL_DEFECTS AS FLOAT) / TOTAL_OPPORTUNITIES)) AS SIGMA_LEVEL
         FROM carrier_claim_dpmo
         UNION ALL
         SELECT
@@ -2738,31 +2629,20 @@ def main():
             TOTAL_OPPORTUNITIES,
             (CAST(TOTAL_DEFECTS AS FLOAT) / TOTAL_OPPORTUNITIES) * 1000000 AS DPMO,
             (1 - (CAST(TOTAL_DEFECTS AS FLOAT) / TOTAL_OPPORTUNITIES)) AS YIELD,
-            sigma_level(1 - (CAST(TOTAL_DEFECTS AS FLOAT) / TOTAL_OPPORTUNITIES)) AS SIGMA_LEVEL
+            sigma_level_exact(1 - (CAST(TOTAL_DEFECTS AS FLOAT) / TOTAL_OPPORTUNITIES)) AS SIGMA_LEVEL
         FROM bene_summary_dpmo;
 
         CREATE OR REPLACE VIEW vw_sigma_analysis_columns AS 
         -- Final Unified Column-Level Audit
-        WITH carrier_columns AS (
-            UNPIVOT audit_carrier_claims ON COLUMNS(* EXCLUDE (DESYNPUF_ID, CLM_ID, CLM_FROM_DT, CLM_THRU_DT )) INTO NAME col VALUE def
-        ),
-        bene_columns AS (
-            UNPIVOT audit_beneficiary_summary ON COLUMNS(* EXCLUDE (DESYNPUF_ID, "YEAR")) INTO NAME col VALUE def
-        ),
-        stacked_results AS (
-            SELECT 'Carrier Claims' AS src, col, def FROM carrier_columns
-            UNION ALL
-            SELECT 'Beneficiary Summary' AS src, col, def FROM bene_columns
-        )
+        -- Per-column defect totals are written by the audit builds into audit_column_defect_counts
         SELECT 
-            src,
-            col AS column_name,
-            SUM(def) AS TOTAL_DEFECTS,
-            COUNT(*) AS TOTAL_OPPORTUNITIES,
-            (CAST(SUM(def) AS FLOAT) / COUNT(*)) * 1000000 AS DPMO,
-            sigma_level(1 - (CAST(SUM(def) AS FLOAT) / COUNT(*))) AS SIGMA_LEVEL
-        FROM stacked_results
-        GROUP BY src, col
+            SOURCE AS src,
+            COLUMN_NAME AS column_name,
+            TOTAL_DEFECTS,
+            TOTAL_OPPORTUNITIES,
+            (CAST(TOTAL_DEFECTS AS FLOAT) / TOTAL_OPPORTUNITIES) * 1000000 AS DPMO,
+            sigma_level_exact(1 - (CAST(TOTAL_DEFECTS AS FLOAT) / TOTAL_OPPORTUNITIES)) AS SIGMA_LEVEL
+        FROM audit_column_defect_counts
         ORDER BY src, TOTAL_DEFECTS DESC;
 
         -- SIX SIGMA ANALYSIS FOR CARRIER CLAIM FIELDS
@@ -2784,8 +2664,9 @@ def main():
                 SOURCE,
                 FIELD_BASE AS FIELD,
                 sum(TOTAL_DEFECTS) AS TOTAL_DEFECTS,
-                sum(TOTAL_DEFECTS) / max(TOTAL_OPPORTUNITIES) * 1000000 AS DPMO,
-                sigma_level(1 - (CAST(sum(TOTAL_DEFECTS) AS FLOAT) / max(TOTAL_OPPORTUNITIES))) AS SIGMA_LEVEL
+                -- Every field of the family is an opportunity on every row
+                sum(TOTAL_DEFECTS) / sum(TOTAL_OPPORTUNITIES) * 1000000 AS DPMO,
+                sigma_level_exact(1 - (CAST(sum(TOTAL_DEFECTS) AS FLOAT) / sum(TOTAL_OPPORTUNITIES))) AS SIGMA_LEVEL
             FROM base
             GROUP BY SOURCE, FIELD_BASE
         ),
@@ -2835,8 +2716,9 @@ def main():
                 SOURCE,
                 FIELD_BASE AS FIELD,
                 sum(TOTAL_DEFECTS) AS TOTAL_DEFECTS,
-                sum(TOTAL_DEFECTS) / max(TOTAL_OPPORTUNITIES) * 1000000 AS DPMO,
-                sigma_level(1 - (CAST(sum(TOTAL_DEFECTS) AS FLOAT) / max(TOTAL_OPPORTUNITIES))) AS SIGMA_LEVEL
+                -- Every field of the family is an opportunity on every row
+                sum(TOTAL_DEFECTS) / sum(TOTAL_OPPORTUNITIES) * 1000000 AS DPMO,
+                sigma_level_exact(1 - (CAST(sum(TOTAL_DEFECTS) AS FLOAT) / sum(TOTAL_OPPORTUNITIES))) AS SIGMA_LEVEL
             FROM base
             GROUP BY SOURCE, FIELD_BASE
         ),
@@ -2867,13 +2749,26 @@ def main():
             DPMO DESC,
             FIELD_FAMILY ASC;"""
     try:
-        execute_sql_script(sql_script)
+        execute_sql_script(sql_script, label="Phase 5")
         logger.info("✅ Phase 5 SQL transformations completed successfully")
     except Exception as e:
         logger.error(f"Error running Phase 5 SQL transformations: {e}")
         raise
 
-    
+def run_phase_5a():
+    """Which value transformation explains the mismatches of each defective column."""
+    logger.info("Starting Phase 5a SQL transformations.")
+    sql_script = transformation_patterns_script()
+
+    try:
+        execute_sql_script(sql_script, label="Phase 5a")
+        logger.info("✅ Phase 5a SQL transformations completed successfully")
+    except Exception as e:
+        logger.error(f"Error running Phase 5a SQL transformations: {e}")
+        raise
+
+def run_phase_6():
+    """Financial impact views."""
     logger.info("Starting Phase 6 SQL transformations.")
     sql_script = """-- Financial Impact Summary
         CREATE OR REPLACE VIEW vw_claim_financial_error_impact AS
@@ -2923,16 +2818,405 @@ def main():
         FROM base
         ORDER BY FINANCIAL_VARIANCE DESC;"""
     try:
-        execute_sql_script(sql_script)
+        execute_sql_script(sql_script, label="Phase 6")
         logger.info("✅ Phase 6 SQL transformations completed successfully")
     except Exception as e:
         logger.error(f"Error running Phase 5 SQL transformations: {e}")
         raise
 
+# Derived objects built by the transform, in run order. "inputs" lists the ingested
+# tables and upstream steps each step reads; "helpers" lists the functions of this module
+# outside the step that generate its SQL; "modules" lists the modules it imports SQL
+# builders from, hashed whole; "files" lists the rule files its SQL is compiled from;
+# "settings" lists the environment variables that change its SQL;
+# "output_filters" marks the rows a step owns in an output table that several steps write. A step is rebuilt when the fingerprint of any input or of its
+# own code changes, and step fingerprints chain, so everything
+# downstream of a changed input is rebuilt with it.
+TRANSFORM_STEPS = [
+    {
+        'name': 'Phase 1',
+        'run': run_phase_1,
+        'inputs': BENEFICIARY_TABLES + CLAIM_TABLES,
+        'outputs': ['vw_db_schema', 'vw_source_counts'],
+    },
+    {
+        'name': 'Phase 1a',
+        'run': run_phase_1a,
+        'modules': [quality_rules, audit_sql, models],
+        'files': [QUALITY_RULES_PATH],
+        'inputs': BENEFICIARY_TABLES + CLAIM_TABLES + [
+            'lookup_state', 'lookup_sex', 'lookup_race', 'lookup_processing_indicator',
+        ],
+        'outputs': [QUALITY_RULES_TABLE, RULE_VIOLATION_COUNTS_TABLE] + [
+            name for target in RULE_TARGETS for name in (violations_table(target), f"vw_{violations_table(target)}")
+        ],
+    },
+    {
+        'name': 'Phase 2',
+        'run': run_phase_2,
+        'modules': [audit_sql, models],
+        'inputs': BENEFICIARY_TABLES,
+        'outputs': [
+            'vw_beneficiary_errors', 'vw_beneficiary_attribute_errors', 'vw_bene_dt_differences',
+            'vw_beneficiary_lines_not_identical', 'audit_beneficiary_summary',
+            'vw_beneficiary_chronic_flags', 'vw_chronic_condition_flips',
+            'vw_audit_beneficiary_summary_flags', 'audit_beneficiary_financials',
+            'vw_financial_differences_bene', 'audit_beneficiary_financial_fields',
+            COLUMN_DEFECT_COUNTS_TABLE,
+        ],
+        'output_filters': {COLUMN_DEFECT_COUNTS_TABLE: "SOURCE = 'Beneficiary Summary'"},
+    },
+    {
+        'name': 'Phase 2a',
+        'run': run_phase_2a,
+        'modules': [audit_sql, models],
+        'inputs': BENEFICIARY_TABLES + ['lookup_state'],
+        'outputs': ['dim_beneficiary'],
+    },
+    {
+        'name': 'Phase 2b',
+        'run': run_phase_2b,
+        'modules': [audit_sql, models],
+        'inputs': BENEFICIARY_TABLES,
+        'outputs': [
+            'audit_beneficiary_longitudinal', 'vw_beneficiary_longitudinal_errors',
+            'vw_beneficiary_longitudinal_summary',
+        ],
+    },
+    {
+        'name': 'Phase 3',
+        'run': run_phase_3,
+        'helpers': [carrier_audit_script, carrier_compare_select, partition_filter, diagnosis_comparison],
+        'modules': [audit_sql, models],
+        'settings': ['DIAGNOSIS_COMPARISON'],
+        'inputs': CLAIM_TABLES,
+        'outputs': [
+            'audit_carrier_claims', 'vw_audit_carrier_claims_flags', 'audit_carrier_financials',
+            'vw_financial_differences_claim', 'audit_claim_financial_fields', COLUMN_DEFECT_COUNTS_TABLE,
+            'vw_claim_diagnosis_changes',
+        ],
+        'output_filters': {COLUMN_DEFECT_COUNTS_TABLE: "SOURCE = 'Carrier Claims'"},
+    },
+    {
+        'name': 'Phase 3a',
+        'run': run_phase_3a,
+        'modules': [audit_sql, models],
+        'inputs': CLAIM_TABLES + ['Phase 2a'],
+        'outputs': [
+            'vw_claim_mismatches', 'audit_claim_line_payments', 'audit_claim_payments',
+            'vw_claim_line_payment_differences', 'vw_claim_line_nch_pmt_amt_1_differences',
+        ],
+    },
+    {
+        'name': 'Phase 3a Orphans',
+        'run': run_phase_3a_orphans,
+        'helpers': [carrier_orphans_script, partition_filter],
+        'inputs': CLAIM_TABLES,
+        'outputs': ['carrier_claims_orphans'],
+    },
+    {
+        'name': 'Phase 3a Relink',
+        'run': run_phase_3a_relink,
+        'helpers': [carrier_relink_script],
+        'modules': [audit_sql, models],
+        'inputs': CLAIM_TABLES,
+        'outputs': ['carrier_claims_relinked', 'vw_carrier_claims_unlinked'],
+    },
+    {
+        'name': 'Phase 3e',
+        'run': run_phase_3e,
+        'helpers': [claim_coverage_select],
+        'modules': [audit_sql, models],
+        'inputs': CLAIM_TABLES + BENEFICIARY_TABLES,
+        'outputs': ['audit_claim_coverage', 'vw_claim_coverage_summary', 'vw_claim_coverage_differences'],
+    },
+    {
+        'name': 'Phase 3c',
+        'run': run_phase_3c,
+        'modules': [audit_sql, models],
+        'inputs': CLAIM_TABLES + ['Phase 3'],
+        'outputs': ['audit_claim_line_permutations', 'vw_claim_line_permutation_summary'],
+    },
+    {
+        'name': 'Phase 3f',
+        'run': run_phase_3f,
+        'modules': [audit_sql, models],
+        'inputs': ['Phase 3'],
+        'outputs': ['audit_financial_transpositions', 'vw_financial_transposition_matrix'],
+    },
+    {
+        'name': 'Phase 4',
+        'run': run_phase_4,
+        'helpers': [payment_reconciliation_variables],
+        'modules': [payment_formulas, audit_sql, models],
+        'inputs': BENEFICIARY_TABLES + CLAIM_TABLES + ['lookup_payment_formulas'],
+        'outputs': ['audit_payment_reconciliation', 'vw_payment_reconciliation_by_year'],
+    },
+    {
+        'name': 'Phase 5',
+        'run': run_phase_5,
+        'modules': [audit_sql, models],
+        'inputs': ['Phase 2', 'Phase 3'],
+        'outputs': [
+            'vw_sigma_analysis', 'vw_sigma_analysis_columns',
+            'vw_sigma_analysis_carrier_columns', 'vw_sigma_analysis_beneficiary_columns',
+        ],
+    },
+    {
+        'name': 'Phase 5a',
+        'run': run_phase_5a,
+        'modules': [transformation_patterns, audit_sql, models],
+        'inputs': BENEFICIARY_TABLES + CLAIM_TABLES + ['Phase 2', 'Phase 3'],
+        'outputs': ['audit_transformation_patterns', 'audit_transformation_mappings', 'vw_transformation_patterns_top'],
+    },
+    {
+        'name': 'Phase 6',
+        'run': run_phase_6,
+        'inputs': ['Phase 2', 'Phase 3'],
+        'outputs': ['vw_claim_financial_error_impact', 'vw_beneficiary_financial_error_impact'],
+    },
+]
+
+# One row per step: the fingerprint its outputs were last built from and, once the step
+# completed, the fingerprints of the output tables it left behind (views are only checked
+# for existence).
+TRANSFORM_STATE_TABLE = 'transform_state'
+
+def table_fingerprint(conn, table_name, where="TRUE"):
+    """Order-insensitive content fingerprint of a table: row count plus the sum of row hashes."""
+    row_count, hash_sum = conn.execute(text(
+        f"SELECT count(*), coalesce(sum(hash(t)::HUGEINT), 0) FROM {table_name} t WHERE {where}"
+    )).one()
+    return f"{row_count}:{hash_sum}"
+
+def step_fingerprint(step, fingerprints):
+    """Hash of the step's code and the fingerprints of everything it reads."""
+    files = {}
+    for path in step.get('files', []):
+        with open(path, 'rb') as f:
+            files[os.path.basename(path)] = hashlib.sha256(f.read()).hexdigest()
+    payload = {
+        'code': [inspect.getsource(function) for function in [step['run']] + step.get('helpers', [])],
+        'modules': {
+            module.__name__: hashlib.sha256(inspect.getsource(module).encode()).hexdigest()
+            for module in step.get('modules', [])
+        },
+        'files': files,
+        'settings': {name: os.getenv(name, '') for name in step.get('settings', [])},
+        'inputs': {name: fingerprints[name] for name in step['inputs']},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def resolve_step(name):
+    """
+    Maps a --from-phase/--only-phase value to a step name. 'Phase 3a', '3a' and
+    '3a-orphans' style spellings are accepted.
+    """
+    def normalize(value):
+        value = value.strip().lower().replace('-', ' ').replace('_', ' ')
+        return value[len('phase '):] if value.startswith('phase ') else value
+    for step in TRANSFORM_STEPS:
+        if normalize(step['name']) == normalize(name):
+            return step['name']
+    raise ValueError(
+        f"Unknown transform phase '{name}'. Available phases: "
+        f"{', '.join(step['name'] for step in TRANSFORM_STEPS)}"
+    )
+
+def load_transform_state():
+    """
+    {step: {'fingerprint': ..., 'outputs': {table: fingerprint}, 'inputs': {step: fingerprint}}}
+    from the run-state table.
+    """
+    with engine.connect() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {TRANSFORM_STATE_TABLE} (
+                STEP VARCHAR PRIMARY KEY,
+                FINGERPRINT VARCHAR,
+                BUILT_AT TIMESTAMP
+            )"""))
+        # Run-state tables created before output fingerprints were recorded
+        conn.execute(text(f"ALTER TABLE {TRANSFORM_STATE_TABLE} ADD COLUMN IF NOT EXISTS OUTPUTS VARCHAR"))
+        # ...and before the upstream step fingerprints were
+        conn.execute(text(f"ALTER TABLE {TRANSFORM_STATE_TABLE} ADD COLUMN IF NOT EXISTS INPUTS VARCHAR"))
+        rows = conn.execute(text(f"SELECT STEP, FINGERPRINT, OUTPUTS, INPUTS FROM {TRANSFORM_STATE_TABLE}")).all()
+        conn.commit()
+    return {
+        step: {
+            'fingerprint': fingerprint,
+            'outputs': json.loads(outputs) if outputs else None,
+            'inputs': json.loads(inputs) if inputs else {},
+        }
+        for step, fingerprint, outputs, inputs in rows
+    }
+
+def upstream_fingerprints(step, fingerprints):
+    """Fingerprints of the steps this step reads, as they stand when it is built."""
+    step_names = {upstream['name'] for upstream in TRANSFORM_STEPS}
+    return {name: fingerprints.get(name) for name in step['inputs'] if name in step_names}
+
+def missing_outputs(conn, outputs):
+    existing = {row[0] for row in conn.execute(text(
+        "SELECT table_name FROM duckdb_tables() UNION ALL SELECT view_name FROM duckdb_views()"
+    ))}
+    return [name for name in outputs if name not in existing]
+
+def output_fingerprints(conn, step):
+    """
+    Content fingerprints of the step outputs that are tables. Tables shared with other
+    steps are fingerprinted over the rows the step owns, per its output_filters.
+    """
+    tables = {row[0] for row in conn.execute(text("SELECT table_name FROM duckdb_tables()"))}
+    filters = step.get('output_filters', {})
+    return {
+        name: table_fingerprint(conn, name, filters.get(name, "TRUE"))
+        for name in step['outputs'] if name in tables
+    }
+
+def outputs_valid(conn, step, state):
+    """
+    True when the step completed in an earlier run and its outputs still exist with the
+    contents it left behind.
+    """
+    recorded = state.get(step['name'], {}).get('outputs')
+    if recorded is None or missing_outputs(conn, step['outputs']):
+        return False
+    return output_fingerprints(conn, step) == recorded
+
+def clear_step(step_name):
+    """Marks a step incomplete while it runs, so a failure part way through is not resumed past."""
+    with engine.connect() as conn:
+        conn.execute(
+            text(f"UPDATE {TRANSFORM_STATE_TABLE} SET OUTPUTS = NULL WHERE STEP = :step"),
+            {'step': step_name},
+        )
+        conn.commit()
+
+def record_step(step_name, fingerprint, outputs, inputs=None):
+    with engine.connect() as conn:
+        conn.execute(
+            text(f"""
+                INSERT OR REPLACE INTO {TRANSFORM_STATE_TABLE} (STEP, FINGERPRINT, BUILT_AT, OUTPUTS, INPUTS)
+                VALUES (:step, :fingerprint, now(), :outputs, :inputs)"""),
+            {
+                'step': step_name,
+                'fingerprint': fingerprint,
+                'outputs': json.dumps(outputs, sort_keys=True),
+                'inputs': json.dumps(inputs or {}, sort_keys=True),
+            },
+        )
+        conn.commit()
+
+def main(full_refresh=False, from_phase=None, only_phase=None, resume=False):
+    """
+    Build the derived views and audit tables.
+
+    Steps whose inputs and code are unchanged since their last successful build are
+    skipped; full_refresh=True rebuilds every step. from_phase runs the named step and
+    everything after it, only_phase runs just the named step; the steps left out must
+    still have valid outputs. resume=True skips every step that completed in an earlier
+    run, whose outputs are unchanged and whose upstream steps have not been rebuilt since,
+    without fingerprinting the ingested tables, so a failed run picks up at the step that
+    failed.
+    """
+    if from_phase and only_phase:
+        raise ValueError("Use either from_phase or only_phase, not both")
+    step_names = [step['name'] for step in TRANSFORM_STEPS]
+    if only_phase:
+        selected = [resolve_step(only_phase)]
+    elif from_phase:
+        selected = step_names[step_names.index(resolve_step(from_phase)):]
+    else:
+        selected = step_names
+    # A step picked by name is always rebuilt
+    force = full_refresh or bool(from_phase or only_phase)
+    
+    logger.info("Loading lookup tables...")
+    
+    # Load lookup tables BEFORE running SQL transformations
+    try:
+        create_lookups()
+        logger.info("✅ Lookup tables created successfully")
+    except Exception as e:
+        logger.error(f"Error creating lookup tables: {e}")
+        raise
+    
+    try:
+        ingest_formulas()
+        logger.info("✅ Payment formulas ingested successfully")
+    except Exception as e:
+        logger.error(f"Error ingesting formulas: {e}")
+        raise
+    
+    try:
+        ingest_labels()
+        logger.info("✅ Variable labels ingested successfully")
+    except Exception as e:
+        logger.error(f"Error ingesting labels: {e}")
+        raise
+
+    # Databases ingested before the surrogate keys existed are encoded here; already
+    # encoded rows are skipped.
+    try:
+        encode_surrogate_keys()
+        encode_chronic_flags()
+    except Exception as e:
+        logger.error(f"Error encoding surrogate keys: {e}")
+        raise
+
+    state = load_transform_state()
+    fingerprints = {}
+    rebuilt = []
+    for step in TRANSFORM_STEPS:
+        name = step['name']
+        recorded = state.get(name, {}).get('fingerprint')
+
+        if name not in selected:
+            with engine.connect() as conn:
+                missing = missing_outputs(conn, step['outputs'])
+            if missing:
+                raise ValueError(
+                    f"{name} has not been built ({', '.join(missing)} missing); "
+                    f"run it first or start from an earlier phase"
+                )
+            fingerprints[name] = recorded
+            logger.info(f"✅ {name} not selected, keeping its existing outputs")
+            continue
+
+        with engine.connect() as conn:
+            if (resume and not force
+                    and state.get(name, {}).get('inputs') == upstream_fingerprints(step, fingerprints)
+                    and outputs_valid(conn, step, state)):
+                fingerprints[name] = recorded
+                logger.info(f"✅ {name} completed in an earlier run, skipping")
+                continue
+
+            for input_name in step['inputs']:
+                if input_name not in fingerprints:
+                    fingerprints[input_name] = table_fingerprint(conn, input_name)
+            fingerprint = step_fingerprint(step, fingerprints)
+            fingerprints[name] = fingerprint
+
+            if not force and not resume and recorded == fingerprint and outputs_valid(conn, step, state):
+                logger.info(f"✅ {name} is up to date, skipping")
+                continue
+
+        clear_step(name)
+        step['run']()
+        with engine.connect() as conn:
+            outputs = output_fingerprints(conn, step)
+        record_step(name, fingerprint, outputs, upstream_fingerprints(step, fingerprints))
+        rebuilt.append(name)
+
+    if not rebuilt:
+        print("✅ Transform completed: all views and audit tables were already up to date")
+        return
+
     logger.info("Starting Database Compression (Vacuum).")
     sql_script = """vacuum;"""
     try:
-        execute_sql_script(sql_script)
+        execute_sql_script(sql_script, label="Vacuum")
+        record_step('Vacuum', None, {})
         logger.info("✅ Database Compression (Vacuum) completed successfully")
     except Exception as e:
         logger.error(f"Error running Database Compression (Vacuum): {e}")
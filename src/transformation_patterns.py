@@ -0,0 +1,279 @@
+"""
+Mines the source -> new value pairs of every defective audited column for the
+transformation that explains them: a date shifted by a day, a truncated string, a
+rounded or rescaled amount, leading zeros lost from BENE_COUNTY_CD, and so on.
+
+Each pattern in TRANSFORMATION_PATTERNS is a SQL predicate over one mismatched pair:
+
+    SRC, NEW                the two values as VARCHAR
+    SRC_EMPTY, NEW_EMPTY    the value carries nothing (NULL, '', 'nan', a 0 amount)
+    SRC_DATE, NEW_DATE      the value read as a YYYYMMDD date, NULL when it is not one
+    SRC_NUMBER, NEW_NUMBER  the value read as a number; NULL unless the column has money or
+                            integer semantics, so codes such as SP_CHF are never amounts
+
+The mismatched pairs of all columns of a target are unnested from one scan of the
+defective rows, and every pattern is tested on them in the same pass; a pair may match
+several patterns. The generic FALLBACK_PATTERNS only count pairs no specific pattern
+explains, and pairs nothing matches are counted as UNEXPLAINED. The same pairs also
+give audit_transformation_mappings: src -> new values that recur, such as a code
+systematically recoded, which no generic pattern describes.
+"""
+from src.ingest import BENEFICIARY_TABLES, CLAIM_TABLES
+from src.audit_sql import (
+    BENEFICIARY_AUDIT_COLUMNS, CARRIER_AUDIT_COLUMNS, COMPARISON_SEMANTICS, select_list,
+)
+
+# Pattern name -> (SQL predicate over one mismatched pair, description). When patterns
+# explain the same number of a column's mismatches, the one listed first is reported.
+TRANSFORMATION_PATTERNS = {
+    'VALUE_DROPPED': ("NOT SRC_EMPTY AND NEW_EMPTY", "Value missing in new"),
+    'VALUE_ADDED': ("SRC_EMPTY AND NOT NEW_EMPTY", "Value only in new"),
+    'DATE_SHIFTED_1_DAY': ("abs(date_diff('day', SRC_DATE, NEW_DATE)) = 1", "Date moved by one day"),
+    'DATE_YEAR_CHANGED': (
+        "strftime(SRC_DATE, '%m%d') = strftime(NEW_DATE, '%m%d')", "Same month and day, different year",
+    ),
+    'DATE_MONTH_DAY_SWAPPED': (
+        "length(SRC) = 8 AND NEW = substr(SRC, 1, 4) || substr(SRC, 7, 2) || substr(SRC, 5, 2)",
+        "YYYYMMDD written as YYYYDDMM",
+    ),
+    'DATE_INVALID': (
+        "SRC_DATE IS NOT NULL AND NEW_DATE IS NULL AND NOT NEW_EMPTY", "Real date replaced by an invalid one (e.g. 20231332)",
+    ),
+    'LEADING_ZEROS_LOST': ("NEW <> '' AND ltrim(SRC, '0') = NEW", "Leading zeros stripped (e.g. 010 -> 10)"),
+    'LEADING_ZEROS_ADDED': ("SRC <> '' AND ltrim(NEW, '0') = SRC", "Leading zeros added"),
+    'TRUNCATED': ("NEW <> '' AND length(NEW) < length(SRC) AND starts_with(SRC, NEW)", "Trailing characters cut off"),
+    'CASE_OR_WHITESPACE': ("lower(trim(SRC)) = lower(trim(NEW))", "Differs only in case or surrounding spaces"),
+    'CHARACTERS_REORDERED': (
+        "list_sort(string_split(SRC, '')) = list_sort(string_split(NEW, ''))", "Same characters in another order",
+    ),
+    'SIGN_FLIPPED': ("SRC_NUMBER <> 0 AND SRC_NUMBER = -NEW_NUMBER", "Amount negated"),
+    'ROUNDED': (
+        "NEW_NUMBER <> SRC_NUMBER AND SRC_NUMBER <> round(SRC_NUMBER, 1) "
+        "AND (abs(NEW_NUMBER - round(SRC_NUMBER)) < 0.001 OR abs(NEW_NUMBER - round(SRC_NUMBER, 1)) < 0.001)",
+        "Amount rounded to whole units or one decimal",
+    ),
+    'UNIT_SCALED': (
+        "SRC_NUMBER <> 0 AND len(list_filter([10, 100, 1000, 0.1, 0.01, 0.001], f -> abs(NEW_NUMBER - SRC_NUMBER * f) < 0.01)) > 0",
+        "Amount multiplied or divided by 10, 100 or 1000",
+    ),
+    'AMOUNT_OFFSET': (
+        "len(list_filter([1, 10, 100, 1000], d -> abs(abs(NEW_NUMBER - SRC_NUMBER) - d) < 0.001)) > 0",
+        "Amount off by exactly 1, 10, 100 or 1000",
+    ),
+}
+
+# Generic patterns that many specific ones are instances of (10.0 -> -10.0 is a single
+# character edit too); they only count the pairs no specific pattern explains
+FALLBACK_PATTERNS = {
+    'SINGLE_CHARACTER_EDIT': (
+        "least(length(SRC), length(NEW)) > 1 AND levenshtein(SRC, NEW) = 1",
+        "One character inserted, deleted or replaced",
+    ),
+}
+
+# audit_column_defect_counts SOURCE -> the tables compared, their join keys and the packed
+# audit table whose DEFECT_COUNT selects the rows worth mining
+PATTERN_TARGETS = {
+    'Beneficiary Summary': {
+        'tables': BENEFICIARY_TABLES,
+        'keys': ['DESYNPUF_KEY', 'YEAR'],
+        'audit_table': 'audit_beneficiary_summary',
+        'columns': BENEFICIARY_AUDIT_COLUMNS,
+    },
+    'Carrier Claims': {
+        'tables': CLAIM_TABLES,
+        'keys': ['CLAIM_KEY'],
+        'audit_table': 'audit_carrier_claims',
+        'columns': CARRIER_AUDIT_COLUMNS,
+    },
+}
+
+TRANSFORMATION_PATTERNS_TABLE = 'audit_transformation_patterns'
+TRANSFORMATION_MAPPINGS_TABLE = 'audit_transformation_mappings'
+
+def raw_semantics(semantics):
+    """Semantics comparing the raw column values; packed chronic flags compare as strings."""
+    return semantics if semantics in ('string', 'integer', 'money') else 'string'
+
+def mismatched_pairs(columns):
+    """
+    LIST of one (COLUMN_NAME, IS_NUMBER, SRC, NEW, SRC_EMPTY, NEW_EMPTY) struct per column whose
+    s and n values differ, for unnesting into one row per mismatched pair.
+    """
+    pairs = []
+    for col, semantics in columns:
+        semantics = raw_semantics(semantics)
+        templates = COMPARISON_SEMANTICS[semantics]
+        pairs.append(
+            f"CASE WHEN {templates['flag'].format(col=col)} = 1 THEN struct_pack("
+            f"COLUMN_NAME := '{col}', IS_NUMBER := {semantics in ('money', 'integer')}, "
+            f"SRC := COALESCE(CAST(s.{col} AS VARCHAR), ''), NEW := COALESCE(CAST(n.{col} AS VARCHAR), ''), "
+            f"SRC_EMPTY := {templates['empty'].format(col=f's.{col}')}, "
+            f"NEW_EMPTY := {templates['empty'].format(col=f'n.{col}')}) END"
+        )
+    return "list_filter([\n                    " + ",\n                    ".join(pairs) + "\n                ], p -> p IS NOT NULL)"
+
+def transformation_patterns_script():
+    """
+    SQL rebuilding audit_transformation_patterns: per SOURCE and column, the mismatched
+    pairs (MISMATCHES) and how many of them each pattern, or none (UNEXPLAINED), explains;
+    and audit_transformation_mappings, the src -> new value pairs that recur.
+    """
+    all_patterns = {**TRANSFORMATION_PATTERNS, **FALLBACK_PATTERNS}
+    patterns = list(all_patterns)
+    descriptions = ", ".join(
+        f"('{pattern}', '{description.replace(chr(39), chr(39) * 2)}')"
+        for pattern, (_, description) in all_patterns.items()
+    )
+    pattern_order = "[" + ", ".join(f"'{pattern}'" for pattern in patterns) + "]"
+    tests = [f"COALESCE(({predicate}), FALSE) AS {pattern}" for pattern, (predicate, _) in TRANSFORMATION_PATTERNS.items()]
+    explained = " OR ".join(TRANSFORMATION_PATTERNS)
+    fallback_tests = [
+        f"NOT ({explained}) AND COALESCE(({predicate}), FALSE) AS {pattern}"
+        for pattern, (predicate, _) in FALLBACK_PATTERNS.items()
+    ]
+    statements = [f"""
+        CREATE OR REPLACE TABLE {TRANSFORMATION_PATTERNS_TABLE} (
+            SOURCE VARCHAR,
+            COLUMN_NAME VARCHAR,
+            PATTERN VARCHAR,
+            DESCRIPTION VARCHAR,
+            MATCHES BIGINT,
+            MISMATCHES BIGINT,
+            PCT_OF_DEFECTS DOUBLE
+        );
+        CREATE OR REPLACE TABLE {TRANSFORMATION_MAPPINGS_TABLE} (
+            SOURCE VARCHAR,
+            COLUMN_NAME VARCHAR,
+            SRC_VALUE VARCHAR,
+            NEW_VALUE VARCHAR,
+            PAIRS BIGINT,
+            PCT_OF_DEFECTS DOUBLE
+        );"""]
+    for source, config in PATTERN_TARGETS.items():
+        src_table, new_table = config['tables']
+        join = " AND ".join(f's."{key}" = n."{key}"' for key in config['keys'])
+        audit_join = " AND ".join(f'a."{key}" = s."{key}"' for key in config['keys'])
+        statements.append(f"""
+        -- {source}: the mismatched pairs of every column from one scan of the defective rows
+        CREATE OR REPLACE TEMP TABLE transformation_pairs AS
+        SELECT
+            unnest({mismatched_pairs(config['columns'])}, recursive := true)
+        FROM {config['audit_table']} a
+        JOIN {src_table} s ON {audit_join}
+        JOIN {new_table} n ON {join}
+        WHERE a.DEFECT_COUNT > 0;
+
+        -- Every pattern tested on every pair in the same pass
+        INSERT INTO {TRANSFORMATION_PATTERNS_TABLE}
+        WITH typed AS (
+            SELECT
+                *
+                , try_strptime(SRC, '%Y%m%d') AS SRC_DATE
+                , try_strptime(NEW, '%Y%m%d') AS NEW_DATE
+            FROM transformation_pairs
+        ),
+        numbered AS (
+            SELECT
+                *
+                , CASE WHEN IS_NUMBER THEN try_cast(SRC AS DOUBLE) END AS SRC_NUMBER
+                , CASE WHEN IS_NUMBER THEN try_cast(NEW AS DOUBLE) END AS NEW_NUMBER
+            FROM typed
+        ),
+        tested AS (
+            SELECT
+                *
+                , {select_list(tests)}
+            FROM numbered
+        ),
+        fallback_tested AS (
+            SELECT
+                COLUMN_NAME
+                , {select_list(patterns[:len(TRANSFORMATION_PATTERNS)])}
+                , {select_list(fallback_tests)}
+            FROM tested
+        ),
+        totals AS (
+            SELECT
+                COLUMN_NAME
+                , COUNT(*) AS MISMATCHES
+                , {select_list([f"count_if({pattern}) AS {pattern}" for pattern in patterns])}
+                , count_if(NOT ({" OR ".join(patterns)})) AS UNEXPLAINED
+            FROM fallback_tested
+            GROUP BY COLUMN_NAME
+        ),
+        unpivoted AS (
+            UNPIVOT totals ON COLUMNS(* EXCLUDE (COLUMN_NAME, MISMATCHES)) INTO NAME PATTERN VALUE MATCHES
+        )
+        SELECT
+            '{source}' AS SOURCE
+            , u.COLUMN_NAME
+            , u.PATTERN
+            , COALESCE(d.DESCRIPTION, 'No pattern matches') AS DESCRIPTION
+            , u.MATCHES
+            , u.MISMATCHES
+            , round(100.0 * u.MATCHES / u.MISMATCHES, 2) AS PCT_OF_DEFECTS
+        FROM unpivoted u
+        LEFT JOIN (VALUES {descriptions}) d(PATTERN, DESCRIPTION) ON d.PATTERN = u.PATTERN
+        WHERE u.MATCHES > 0;
+
+        -- Value mappings seen more than once, e.g. a code systematically recoded
+        INSERT INTO {TRANSFORMATION_MAPPINGS_TABLE}
+        SELECT
+            '{source}' AS SOURCE
+            , COLUMN_NAME
+            , SRC AS SRC_VALUE
+            , NEW AS NEW_VALUE
+            , COUNT(*) AS PAIRS
+            , round(100.0 * COUNT(*) / sum(COUNT(*)) OVER (PARTITION BY COLUMN_NAME), 2) AS PCT_OF_DEFECTS
+        FROM transformation_pairs
+        GROUP BY COLUMN_NAME, SRC, NEW
+        QUALIFY COUNT(*) > 1;
+        DROP TABLE transformation_pairs;""")
+    statements.append(f"""
+        ANALYZE {TRANSFORMATION_PATTERNS_TABLE};
+        ANALYZE {TRANSFORMATION_MAPPINGS_TABLE};
+
+        -- The pattern explaining the most mismatches of each column, next to the unexplained
+        -- share and the column's most frequent recurring value mapping
+        CREATE OR REPLACE VIEW vw_transformation_patterns_top AS
+        WITH ranked AS (
+            SELECT
+                *
+                , row_number() OVER (
+                    PARTITION BY SOURCE, COLUMN_NAME
+                    ORDER BY MATCHES DESC, list_position({pattern_order}, PATTERN)
+                ) AS RANK
+            FROM {TRANSFORMATION_PATTERNS_TABLE}
+            WHERE PATTERN <> 'UNEXPLAINED'
+        ),
+        column_totals AS (
+            SELECT
+                SOURCE
+                , COLUMN_NAME
+                , max(MISMATCHES) AS MISMATCHES
+                , COALESCE(max(PCT_OF_DEFECTS) FILTER (WHERE PATTERN = 'UNEXPLAINED'), 0) AS UNEXPLAINED_PCT
+            FROM {TRANSFORMATION_PATTERNS_TABLE}
+            GROUP BY SOURCE, COLUMN_NAME
+        ),
+        mappings AS (
+            SELECT
+                *
+                , row_number() OVER (PARTITION BY SOURCE, COLUMN_NAME ORDER BY PAIRS DESC, SRC_VALUE, NEW_VALUE) AS RANK
+            FROM {TRANSFORMATION_MAPPINGS_TABLE}
+        )
+        SELECT
+            c.SOURCE
+            , c.COLUMN_NAME
+            , c.MISMATCHES
+            , r.PATTERN AS TOP_PATTERN
+            , r.DESCRIPTION
+            , COALESCE(r.PCT_OF_DEFECTS, 0) AS TOP_PATTERN_PCT
+            , c.UNEXPLAINED_PCT
+            , m.SRC_VALUE || ' -> ' || m.NEW_VALUE AS TOP_MAPPING
+            , COALESCE(m.PCT_OF_DEFECTS, 0) AS TOP_MAPPING_PCT
+        FROM column_totals c
+        LEFT JOIN ranked r ON r.SOURCE = c.SOURCE AND r.COLUMN_NAME = c.COLUMN_NAME AND r.RANK = 1
+        LEFT JOIN mappings m ON m.SOURCE = c.SOURCE AND m.COLUMN_NAME = c.COLUMN_NAME AND m.RANK = 1
+        ORDER BY c.MISMATCHES DESC, c.SOURCE, c.COLUMN_NAME;""")
+    return "".join(statements)